@@ -4,6 +4,8 @@ NopalBot Simple - Solo Auto Attack y Auto Walk
 Versión simplificada y funcional
 """
 
+import os
+import sys
 import time
 import threading
 import keyboard
@@ -19,6 +21,9 @@ from PIL import Image, ImageGrab
 import tkinter as tk
 from tkinter import messagebox
 
+# Módulos del bot (navegación por minimapa, etc.)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
 # Configurar tema
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -149,8 +154,25 @@ class NopalBotEliteKnight:
         self.position_check_interval = 2.0
         
         # Variables de mapping
-        self.visited_coordinates = set()
+        from navigation.map_journal import MapJournal
+        self.map_journal = MapJournal()  # Journal en disco de tiles visitados (un bit por tile en memoria)
+        try:
+            self.visited_coordinates = self.map_journal.open()
+        except OSError as e:
+            print(f"⚠️ Could not open the map journal: {e}")
+            self.visited_coordinates = self.map_journal.visited
         self.current_position = (0, 0, 0)
+        self.minimap_tracker = None  # Posición real desde el minimapa (se crea al primer uso)
+        self.minimap_retry_at = 0.0  # Sin minimapa: cuándo volver a buscarlo
+        self.minimap_retry_delay = 5.0
+        self.position_from_fix = False  # current_position vino del minimapa (no estimada)
+        self.read_from_fix = False  # La última lectura de get_character_position vino del minimapa
+        self.walkability = None  # Costos por tile derivados del atlas del minimapa
+        self.path_planner = None
+        self.floor_transitions = None  # Escaleras/agujeros conocidos (grafo entre pisos)
+        self.exploration = None  # Frontera de exploración (se actualiza con cada posición)
+        from navigation.blocked_edges import BlockedEdgeIndex
+        self.blocked_edges = BlockedEdgeIndex()  # Movimientos que fallaron (criaturas, paredes), con decaimiento
         self.target_position = None
         self.path_to_target = []
         self.mapping_enabled = False
@@ -525,6 +547,22 @@ class NopalBotEliteKnight:
     def avoid_stairs(self):
         """Evitar subir/bajar escaleras"""
         try:
+            # Con mapa: solo se evita si el tile siguiente es realmente un cambio de piso
+            walkability = self.get_walkability()
+            if walkability is not None and self.minimap_tracker.position is not None:
+                from navigation.walkability import TRANSITION
+                steps = {'W': (0, -1), 'S': (0, 1), 'A': (-1, 0), 'D': (1, 0)}
+                x, y, z = self.current_position
+                dx, dy = steps[self.movement_direction.upper()]
+                if walkability.cost(x + dx, y + dy, z) != TRANSITION:
+                    return False
+                for direction, (dx, dy) in steps.items():
+                    if walkability.is_walkable(x + dx, y + dy, z):
+                        self.movement_direction = direction
+                        self.log_to_gui(f"🚫 Stairs ahead on the map, changing to {direction}")
+                        return True
+                return False
+            
             # Simular detección de escaleras (en un bot real esto sería OCR)
             # Por ahora, solo evitamos movimientos que podrían ser escaleras
             stair_directions = ['w', 's']  # Arriba y abajo pueden ser escaleras
@@ -545,26 +583,98 @@ class NopalBotEliteKnight:
             self.log_to_gui(f"❌ Error avoiding stairs: {e}")
             return False
     
+    def read_minimap_position(self):
+        """Posición (x, y, z) registrando el minimapa contra el mapa, o None"""
+        if self.minimap_tracker is None:
+            # Buscar el minimapa en una captura completa, reintentando cada vez más espaciado
+            if time.time() < self.minimap_retry_at:
+                return None
+            image = self.capture_tibia_screen()
+            if image is None:
+                return None
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            try:
+                from navigation.minimap_tracker import create_tracker
+                self.minimap_tracker = create_tracker(image)
+            except ImportError:
+                self.minimap_tracker = None
+            if self.minimap_tracker is None:
+                self.minimap_retry_at = time.time() + self.minimap_retry_delay
+                self.log_to_gui(f"⚠️ Minimap not found: position is estimated from movement "
+                                f"(retry in {self.minimap_retry_delay:.0f}s)")
+                self.minimap_retry_delay = min(self.minimap_retry_delay * 2, 300.0)
+                return None
+            self.minimap_retry_delay = 5.0
+            fix = self.minimap_tracker.update(image)
+            return fix.position if fix is not None else None
+        
+        # Con el minimapa ya ubicado solo se captura su rectángulo
+        from capture.frame import Frame
+        x, y, w, h = self.minimap_tracker.minimap_region
+        pixels = self.capture_tibia_region(x, y, w, h)
+        if pixels is None or pixels.shape[:2] != (h, w):
+            return None
+        pixels = cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+        fix = self.minimap_tracker.update(Frame.from_tiles([((x, y, w, h), pixels)], screen_size=(x + w, y + h)))
+        return fix.position if fix is not None else None
+    
+    def get_walkability(self):
+        """Grid de costos del mapa grabado, o None sin minimapa"""
+        if self.walkability is None and self.minimap_tracker is not None:
+            from navigation.walkability import WalkabilityGrid
+            self.walkability = WalkabilityGrid(self.minimap_tracker.atlas)
+        return self.walkability
+    
+    def get_path_planner(self):
+        """Planificador A*/JPS sobre el mapa grabado, o None sin minimapa"""
+        if self.path_planner is None:
+            walkability = self.get_walkability()
+            if walkability is not None:
+                from navigation.path_planner import PathPlanner
+                from navigation.floor_transitions import TransitionGraph
+                self.path_planner = PathPlanner(walkability, blocked_edges=self.blocked_edges)
+                self.floor_transitions = TransitionGraph(self.path_planner)
+        return self.path_planner
+    
+    def get_exploration(self):
+        """Índice de frontera de exploración sobre las coordenadas visitadas"""
+        from navigation.exploration import ExplorationIndex
+        if self.exploration is None:
+            self.exploration = ExplorationIndex(self.get_walkability())
+            self.exploration.visit_many(self.visited_coordinates)
+        elif self.exploration.walkability is None:
+            self.exploration.walkability = self.get_walkability()
+        return self.exploration
+    
     def update_position(self):
-        """Actualizar posición actual basada en movimiento"""
+        """Actualizar posición actual (minimapa, o estimada por movimiento)"""
         try:
-            x, y, z = self.current_position
-            
-            # Simular movimiento basado en dirección
-            if self.movement_direction == 'W':
-                y -= 1
-            elif self.movement_direction == 'S':
-                y += 1
-            elif self.movement_direction == 'A':
-                x -= 1
-            elif self.movement_direction == 'D':
-                x += 1
-            
-            self.current_position = (x, y, z)
+            position = self.read_minimap_position()
+            self.position_from_fix = position is not None
+            if position is not None:
+                # Cambio de piso visto en el minimapa: recordar por dónde se pasó
+                if position[2] != self.current_position[2] and self.get_path_planner() is not None:
+                    self.floor_transitions.observe(self.current_position, position)
+                self.current_position = position
+            else:
+                x, y, z = self.current_position
+                
+                # Estimar movimiento basado en dirección
+                if self.movement_direction == 'W':
+                    y -= 1
+                elif self.movement_direction == 'S':
+                    y += 1
+                elif self.movement_direction == 'A':
+                    x -= 1
+                elif self.movement_direction == 'D':
+                    x += 1
+                
+                self.current_position = (x, y, z)
             
-            # Agregar a coordenadas visitadas
-            if self.mapping_enabled:
-                self.visited_coordinates.add(self.current_position)
+            # Agregar a coordenadas visitadas (solo posiciones reales del minimapa)
+            if self.mapping_enabled and self.position_from_fix:
+                self.map_journal.add(self.current_position)
+                self.get_exploration().visit(*self.current_position)
                 self.log_to_gui(f"📍 Position updated: {self.current_position}")
             
         except Exception as e:
@@ -578,26 +688,29 @@ class NopalBotEliteKnight:
             
             x, y, z = self.current_position
             
-            # Buscar en un radio de 10 tiles
-            for radius in range(1, 11):
-                for dx in range(-radius, radius + 1):
-                    for dy in range(-radius, radius + 1):
-                        new_pos = (x + dx, y + dy, z)
-                        if new_pos not in self.visited_coordinates:
-                            return new_pos
-            
-            return None
+            # Tile sin explorar junto a la frontera más cercana (saltando paredes, agua, etc. del mapa)
+            return self.get_exploration().nearest(x, y, z)
             
         except Exception as e:
             self.log_to_gui(f"❌ Error finding unexplored area: {e}")
             return None
     
     def calculate_path_to_target(self, target):
-        """Calcular ruta simple hacia target"""
+        """Calcular ruta hacia target (A*/JPS sobre el mapa, o directa sin mapa; None mientras se calcula)"""
         try:
             if not target:
                 return []
             
+            planner = self.get_path_planner()
+            if planner is not None:
+                # El planificador calcula en su propio hilo: sin ruta lista todavía, None
+                route = planner.request(self.current_position, target)
+                if route is not None:
+                    return planner.to_moves(route)
+                if planner.is_pending(target):
+                    return None
+                self.log_to_gui(f"⚠️ No known route to {target}, walking straight")
+            
             current_x, current_y, current_z = self.current_position
             target_x, target_y, target_z = target
             
@@ -640,6 +753,12 @@ class NopalBotEliteKnight:
                     self.movement_direction = random.choice(directions)
                     self.log_to_gui(f"🔄 No unexplored areas, random direction: {self.movement_direction}")
                     return True
+            elif self.path_to_target is None:
+                # Ruta todavía en cálculo: volver a pedirla desde la posición actual
+                self.path_to_target = self.calculate_path_to_target(self.target_position)
+            
+            if self.path_to_target is None:
+                return False
             
             # Seguir path hacia target
             if self.path_to_target:
@@ -663,8 +782,10 @@ class NopalBotEliteKnight:
             if not self.mapping_enabled:
                 return
             
+            # Solo las coordenadas nuevas se añaden al journal; el JSON solo guarda metadatos
+            written = self.map_journal.flush()
             map_data = {
-                'visited_coordinates': list(self.visited_coordinates),
+                'visited_dir': self.map_journal.directory,
                 'current_position': self.current_position,
                 'timestamp': datetime.now().isoformat(),
                 'total_visited': len(self.visited_coordinates)
@@ -674,7 +795,11 @@ class NopalBotEliteKnight:
             with open('tibia_map_data.json', 'w') as f:
                 json.dump(map_data, f, indent=2)
             
-            self.log_to_gui(f"💾 Map data saved: {len(self.visited_coordinates)} coordinates")
+            # El atlas del minimapa solo escribe los chunks que cambiaron
+            if self.minimap_tracker is not None:
+                self.minimap_tracker.atlas.flush()
+            
+            self.log_to_gui(f"💾 Map data saved: {written} new coordinates ({len(self.visited_coordinates)} total)")
             
         except Exception as e:
             self.log_to_gui(f"❌ Error saving map data: {e}")
@@ -697,6 +822,20 @@ class NopalBotEliteKnight:
             self.log_to_gui(f"❌ Error capturing screen: {e}")
             return None
     
+    def capture_tibia_region(self, x, y, w, h):
+        """Capturar solo un rectángulo de la ventana de Tibia (coordenadas de la ventana, RGB)"""
+        try:
+            if not self.tibia_window:
+                return None
+            
+            left, top, _, _ = win32gui.GetWindowRect(self.tibia_window)
+            screenshot = ImageGrab.grab(bbox=(left + x, top + y, left + x + w, top + y + h))
+            return np.array(screenshot)
+            
+        except Exception as e:
+            self.log_to_gui(f"❌ Error capturing region: {e}")
+            return None
+    
     def detect_enemies(self, image):
         """Detectar enemigos en la imagen"""
         try:
@@ -996,6 +1135,16 @@ class NopalBotEliteKnight:
             if self.avoid_stairs():
                 self.direction_change_timer = current_time  # Resetear timer
             
+            # Movimiento que ya falló desde este tile (pared, criatura): usar otro
+            if self.position_from_fix and self.blocked_edges.is_blocked(self.current_position, self.movement_direction):
+                directions = ['S', 'D', 'W', 'A']
+                blocked = self.blocked_edges.blocked_directions(self.current_position)
+                open_directions = [d for d in directions if d not in blocked]
+                if open_directions:
+                    start = directions.index(self.movement_direction)
+                    self.movement_direction = min(open_directions, key=lambda d: (directions.index(d) - start) % 4)
+                    self.log_to_gui(f"🧱 Known blocked move, new direction: {self.movement_direction}")
+            
             if not self.activate_tibia_window():
                 return False
             
@@ -1017,8 +1166,13 @@ class NopalBotEliteKnight:
             return False
     
     def get_character_position(self):
-        """Obtener posición del personaje (simulado pero más realista)"""
+        """Obtener posición del personaje (minimapa, o simulada sin mapa)"""
         try:
+            position = self.read_minimap_position()
+            self.read_from_fix = position is not None
+            if position is not None:
+                return (position[0], position[1])
+            
             # Simular posición basada en el tiempo y dirección
             current_time = time.time()
             base_x = 100 + (int(current_time) % 50)  # Posición base X
@@ -1049,15 +1203,15 @@ class NopalBotEliteKnight:
             current_position = self.get_character_position()
             self.last_position_check = current_time
             
-            # Agregar posición al historial
-            self.position_history.append(current_position)
+            # Agregar posición al historial (con si vino del minimapa)
+            self.position_history.append((current_position, self.read_from_fix))
             if len(self.position_history) > 3:  # Mantener solo las últimas 3 posiciones
                 self.position_history.pop(0)
             
             # Verificar si la posición cambió
             if len(self.position_history) >= 2:
-                last_pos = self.position_history[-2]
-                current_pos = self.position_history[-1]
+                last_pos, last_fix = self.position_history[-2]
+                current_pos, current_fix = self.position_history[-1]
                 
                 # Calcular distancia entre posiciones
                 distance = abs(current_pos[0] - last_pos[0]) + abs(current_pos[1] - last_pos[1])
@@ -1069,8 +1223,10 @@ class NopalBotEliteKnight:
                     self.log_to_gui(f"✅ Position changed! Distance: {distance}")
                     return True
                 else:
-                    # La posición no cambió
+                    # La posición no cambió: recordar que este movimiento falla desde aquí
                     self.movement_attempts += 1
+                    if last_fix and current_fix:
+                        self.record_blocked_move(last_pos, self.movement_direction)
                     self.log_to_gui(f"🚧 Position unchanged! Attempts: {self.movement_attempts}/{self.max_movement_attempts}")
                     
                     if self.movement_attempts >= self.max_movement_attempts:
@@ -1083,6 +1239,14 @@ class NopalBotEliteKnight:
             self.log_to_gui(f"❌ Error checking position: {e}")
             return True
     
+    def record_blocked_move(self, position, key, moved=False):
+        """Registrar un movimiento fallido (o que funcionó) desde un tile (solo entre dos posiciones reales)"""
+        tile = (position[0], position[1], self.current_position[2])
+        if moved:
+            self.blocked_edges.record_success(tile, key)
+        else:
+            self.blocked_edges.record_failure(tile, key)
+    
     def try_all_movement_keys(self):
         """Probar todas las teclas de movimiento para encontrar una que funcione"""
         try:
@@ -1093,6 +1257,14 @@ class NopalBotEliteKnight:
             if current_key in movement_keys:
                 movement_keys.remove(current_key)
             
+            # No repetir movimientos que ya se sabe que fallan desde este tile (si es una posición real)
+            blocked = self.blocked_edges.blocked_directions(self.current_position) if self.position_from_fix else []
+            if blocked:
+                open_keys = [key for key in movement_keys if key.upper() not in blocked]
+                if open_keys:
+                    self.log_to_gui(f"🧱 Skipping known blocked keys: {', '.join(blocked)}")
+                    movement_keys = open_keys
+            
             # Probar cada tecla
             for key in movement_keys:
                 self.log_to_gui(f"🔄 Trying movement key: {key.upper()}")
@@ -1100,26 +1272,33 @@ class NopalBotEliteKnight:
                 if not self.activate_tibia_window():
                     continue
                 
+                # Posición antes de la tecla, para saber desde qué tile se movió (o no)
+                old_position = self.get_character_position()
+                old_fix = self.read_from_fix
+                
                 # Enviar tecla
                 keyboard.press_and_release(key)
-                time.sleep(0.5)  # Esperar un poco
+                time.sleep(1.5)  # Esperar a que el movimiento se procese
                 
                 # Verificar si la posición cambió
-                old_position = self.get_character_position()
-                time.sleep(1.0)  # Esperar más tiempo
                 new_position = self.get_character_position()
                 
                 # Calcular distancia
                 distance = abs(new_position[0] - old_position[0]) + abs(new_position[1] - old_position[1])
+                measured = old_fix and self.read_from_fix
                 
                 if distance > 0:
                     # ¡Esta tecla funciona!
+                    if measured:
+                        self.record_blocked_move(old_position, key, moved=True)
                     self.movement_direction = key.upper()
                     self.movement_attempts = 0
                     self.stuck_counter = 0
                     self.log_to_gui(f"✅ Found working key: {key.upper()} (Distance: {distance})")
                     return True
                 else:
+                    if measured:
+                        self.record_blocked_move(old_position, key)
                     self.log_to_gui(f"❌ Key {key.upper()} didn't work")
             
             # Si ninguna tecla funcionó, probar dirección opuesta
@@ -0,0 +1,52 @@
+"""
+Template Bank Build Script
+Packs resources/templates into one memory-mapped archive
+By Taquito Loco 🎮
+
+Run it after adding or changing templates. The bot maps the archive at
+startup instead of decoding every PNG; a template group whose directory
+changed after the build is read from the PNGs until the bank is rebuilt.
+
+Usage:
+    python scripts/build_template_bank.py
+    python scripts/build_template_bank.py --templates resources/templates --output build/templates.bank
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from detection.template_bank import BANK_FILENAME, TemplateBank, build_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack templates into a memory-mapped bank")
+    parser.add_argument("--templates", default=os.path.join(PROJECT_ROOT, "resources", "templates"),
+                        help="Templates root (one sub-directory per group)")
+    parser.add_argument("--output", default=None,
+                        help=f"Bank file (default: <templates>/{BANK_FILENAME})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    output = args.output or os.path.join(args.templates, BANK_FILENAME)
+
+    start = time.perf_counter()
+    count = build_bank(args.templates, output)
+    elapsed = time.perf_counter() - start
+
+    bank = TemplateBank(output)
+    groups = sorted(bank.sources)
+    bank.close()
+    size_kb = os.path.getsize(output) / 1024
+    print(f"📦 Packed {count} templates ({', '.join(groups)}) into {output}")
+    print(f"   {size_kb:.1f} KB in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Map Merge Script
+Merges map files shared by other players into one compact map
+By Taquito Loco 🎮
+
+Takes any mix of exported map files: compact .visited grids, JSON files
+written by "Exportar Coordenadas", and old JSON maps with the positions
+inline. Directories are expanded to the .json and .visited files they
+hold. The result is a .visited file that "Cargar Mapa" accepts, or, with
+--journal, a union into the bot's own map of visited tiles.
+
+Usage:
+    python scripts/merge_maps.py shared/*.json --output logs/merged.visited
+    python scripts/merge_maps.py shared/ --journal resources/maps/visited --processes 4
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from navigation.map_journal import MapJournal
+from navigation.map_merge import find_map_files, merge_map_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge shared map files into one compact map")
+    parser.add_argument("inputs", nargs="+", help="Map files or directories (.json / .visited)")
+    parser.add_argument("--output", default=None, help="Merged .visited file")
+    parser.add_argument("--journal", default=None,
+                        help="Merge into the map journal in this directory instead")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes for JSON inputs (default: one per CPU, 1: no pool)")
+    parser.add_argument("--floor", type=int, default=7,
+                        help="Floor for old (x, y) positions saved without one")
+    args = parser.parse_args()
+    if bool(args.output) == bool(args.journal):
+        parser.error("give either --output or --journal")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    paths = find_map_files(args.inputs)
+    if not paths:
+        parser.error("no map files found")
+
+    journal = None
+    into = None
+    if args.journal:
+        journal = MapJournal(args.journal)
+        into = journal.open()
+
+    grid, report = merge_map_files(paths, into=into, default_floor=args.floor, processes=args.processes)
+
+    if journal is not None:
+        journal.replace(grid)
+        journal.close()
+        target = args.journal
+    else:
+        grid.save(args.output)
+        target = args.output
+
+    floors = ", ".join(f"{z}: {count}" for z, count in sorted(grid.floors().items()))
+    print(f"🗺️ Merged {report.files - len(report.failed)} of {report.files} files into {target}")
+    print(f"   {report.tiles_read} tiles read, {report.tiles} new, {len(grid)} total ({floors})")
+    print(f"   {report.elapsed:.2f}s")
+    for path in report.failed:
+        print(f"   ⚠️ Skipped {path}")
+
+
+if __name__ == "__main__":
+    main()
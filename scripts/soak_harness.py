@@ -0,0 +1,537 @@
+"""
+Soak Harness Script
+Drives the bot against replayed or synthetic frames for hours of virtual time
+By Taquito Loco 🎮
+
+The harness replaces the wall clock with a virtual clock (``time.time`` and
+``time.sleep`` are patched), so eight hours of bot time run as fast as the
+bot code itself allows. Every loop is timed with ``perf_counter`` and a
+``tracemalloc`` snapshot is taken at a fixed virtual interval. The report
+lists the allocation sites that grew the most since the first snapshot,
+how per-loop latency drifted between the first and last windows, and the
+exceptions (type and message) the workload raised.
+
+Usage:
+    python scripts/soak_harness.py --hours 8 --synthetic
+    python scripts/soak_harness.py --hours 2 --frames logs/replay --json soak.json
+"""
+
+import os
+import sys
+import time
+import json
+import array
+import random
+import shutil
+import argparse
+import tracemalloc
+import contextlib
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+from unittest import mock
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+
+class VirtualClock:
+    """Clock that only advances when told to (or when the bot sleeps)."""
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.start = start
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    @property
+    def elapsed(self) -> float:
+        return self.now - self.start
+
+
+class SyntheticFrameSource:
+    """Generates Tibia-like frames with moving creatures, stairs and bars."""
+
+    def __init__(self, width: int = 1280, height: int = 720, seed: int = 0):
+        import cv2
+
+        self._cv2 = cv2
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.background = np.full((height, width, 3), 40, dtype=np.uint8)
+        cv2.rectangle(self.background, (0, 0), (width - 1, height - 1), (70, 70, 70), 2)
+
+    def next_frame(self) -> np.ndarray:
+        cv2 = self._cv2
+        frame = self.background.copy()
+        for _ in range(self.rng.randint(0, 4)):
+            x = self.rng.randint(0, self.width - 32)
+            y = self.rng.randint(0, self.height - 32)
+            cv2.rectangle(frame, (x, y), (x + 24, y + 24), (0, 0, 220), -1)
+        if self.rng.random() < 0.1:
+            x = self.rng.randint(0, self.width - 32)
+            y = self.rng.randint(0, self.height - 32)
+            cv2.rectangle(frame, (x, y), (x + 16, y + 16), (30, 80, 140), -1)
+        health = self.rng.randint(20, 200)
+        cv2.rectangle(frame, (50, 40), (50 + health, 50), (0, 0, 200), -1)
+        cv2.rectangle(frame, (50, 55), (250, 65), (200, 0, 0), -1)
+        return frame
+
+
+class ReplayFrameSource:
+    """Cycles through the PNG/JPG screenshots stored in a directory."""
+
+    def __init__(self, directory: str):
+        import cv2
+
+        names = sorted(
+            n for n in os.listdir(directory)
+            if n.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))
+        )
+        if not names:
+            raise ValueError(f"No frames found in {directory}")
+        # Decode everything up front so disk I/O never shows up as latency
+        self.frames = [cv2.imread(os.path.join(directory, n)) for n in names]
+        self.frames = [f for f in self.frames if f is not None]
+        if not self.frames:
+            raise ValueError(f"No readable frames in {directory}")
+        self.index = 0
+
+    def next_frame(self) -> np.ndarray:
+        frame = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        return frame
+
+
+class WalkingMinimap:
+    """
+    A character walking a generated floor, drawn as the client's minimap.
+
+    The floor is random palette blocks. ``press`` moves the character one
+    tile for the walking keys (it stops short of the floor edge, like at a
+    wall) and ``draw`` paints the minimap centered on it, so the bot's
+    minimap tracker registers real fixes as the bot walks.
+    """
+
+    KEYS = {'w': (0, -1), 's': (0, 1), 'a': (-1, 0), 'd': (1, 0)}
+
+    def __init__(self, size: int = 512, region=(0, 0, 106, 109), seed: int = 0):
+        import cv2
+        from navigation.minimap_atlas import DEFAULT_ORIGIN, PALETTE
+
+        rng = np.random.default_rng(seed)
+        blocks = rng.integers(1, 216, (size // 8, size // 8)).astype(np.uint8)
+        blocks = cv2.resize(blocks, (size, size), interpolation=cv2.INTER_NEAREST)
+        blocks[rng.random(blocks.shape) < 0.05] = 215
+        self.floor = PALETTE[blocks]
+        self.origin = DEFAULT_ORIGIN
+        self.region = region
+        _, _, width, height = region
+        self.margin = max(width, height) // 2 + 1
+        self.x = self.y = size // 2
+        self.moves = 0
+
+    @property
+    def position(self):
+        return (self.origin[0] + self.x, self.origin[1] + self.y, 7)
+
+    def press(self, key: str):
+        dx, dy = self.KEYS.get(key, (0, 0))
+        x, y = self.x + dx, self.y + dy
+        size = self.floor.shape[0]
+        if (dx or dy) and self.margin <= x < size - self.margin and self.margin <= y < size - self.margin:
+            self.x, self.y = x, y
+            self.moves += 1
+
+    def draw(self, frame: np.ndarray):
+        """Paint the minimap into ``frame`` (in place)."""
+        left, top, width, height = self.region
+        x0, y0 = self.x - width // 2, self.y - height // 2
+        minimap = frame[top:top + height, left:left + width]
+        minimap[:] = self.floor[y0:y0 + height, x0:x0 + width]
+        minimap[height // 2 - 1:height // 2 + 2, width // 2 - 1:width // 2 + 2] = 255  # Character cross
+
+
+class BotWorkload:
+    """
+    One iteration of ``NopalBotEliteKnight.run_bot`` with inputs stubbed out.
+
+    Keyboard, mouse and window activation are replaced by no-ops, except the
+    walking keys, which move a ``WalkingMinimap`` character. The screen grab
+    goes through ``AdvancedScreenshotBypass`` with its first method returning
+    the harness frame (minimap painted in), so the capture statistics are
+    updated every loop. The bot gets a minimap tracker over the generated
+    floor, and mapping/vision/walking are enabled, so positions come from
+    real fixes and the visited-tile journal grows as in a real session.
+    """
+
+    def __init__(self, log_dir: str):
+        self.log_dir = log_dir
+        self.frame: Optional[np.ndarray] = None
+        self.bot = None
+        self.cv_system = None
+        self.screenshot = None
+        self.minimap = None
+        self.map_dir = os.path.join(log_dir, 'map')
+        self.log_file = None
+
+    def _grab(self) -> Optional[np.ndarray]:
+        if self.frame is None:
+            return None
+        self.minimap.draw(self.frame)
+        return self.frame
+
+    def _press(self, key: str, delay: float = 0.1) -> bool:
+        self.minimap.press(key)
+        return True
+
+    def _open_map_journal(self):
+        # The bot's journal, kept out of resources/maps
+        from navigation.map_journal import MapJournal
+
+        journal = MapJournal(os.path.join(self.map_dir, 'visited'))
+        journal.open()
+        return journal
+
+    def patches(self) -> List:
+        """Patches that must be active while the bot is constructed and run."""
+        from src import bot as bot_module
+        from src.advanced_screenshot import AdvancedScreenshotBypass
+        from src.utils import InputManager, WindowManager, logger
+        from src.vision import cv_system
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        # Every run maps from scratch
+        shutil.rmtree(self.map_dir, ignore_errors=True)
+        self.log_file = os.path.join(self.log_dir, 'soak_bot.log')
+        self.cv_system = cv_system
+        self.screenshot = AdvancedScreenshotBypass()
+        self.screenshot._capture_directx_desktop_duplication = self._grab
+        workload = self
+        return [
+            mock.patch.object(bot_module.keyboard, 'add_hotkey', lambda *a, **k: None),
+            mock.patch.object(bot_module.NopalBotEliteKnight, '_open_map_journal',
+                              lambda bot: workload._open_map_journal()),
+            mock.patch.object(InputManager, 'send_keyboard_input', staticmethod(self._press)),
+            mock.patch.object(InputManager, 'send_mouse_click', staticmethod(lambda x, y, button='left': True)),
+            mock.patch.object(InputManager, 'triple_check_tibia_input', staticmethod(lambda key: True)),
+            mock.patch.object(WindowManager, 'activate_tibia_window', staticmethod(lambda: True)),
+            mock.patch.object(cv_system, 'capture_tibia_screen', self.screenshot.capture_screen_advanced),
+            mock.patch.object(logger, 'log_file', self.log_file),
+        ]
+
+    def setup(self):
+        from src.bot import NopalBotEliteKnight
+
+        self.bot = NopalBotEliteKnight()
+        self.bot.mapping_enabled = True
+        self.bot.computer_vision_enabled = True
+        self.bot.auto_walk_enabled = True
+        self.bot.running = True
+
+    def _start_walk(self, frame_width: int):
+        from navigation.minimap_atlas import MinimapAtlas
+        from navigation.minimap_tracker import MinimapTracker
+
+        # Top-right corner, where the client draws the minimap
+        region = (max(0, frame_width - 116), 10, 106, 109)
+        self.minimap = WalkingMinimap(region=region)
+        atlas = MinimapAtlas(self.map_dir)
+        atlas.add_floor(7, self.minimap.floor)
+        tracker = MinimapTracker(atlas, region)
+        tracker.set_position(*self.minimap.position)
+        self.bot.minimap_tracker = tracker
+
+    def step(self, frame: np.ndarray):
+        self.frame = frame.copy()
+        if self.minimap is None:
+            self._start_walk(frame.shape[1])
+        bot = self.bot
+        bot.auto_heal()
+        bot.auto_mana()
+        bot.auto_food()
+        cv_data = self.cv_system.computer_vision_scan()
+        if cv_data['enemies']:
+            bot.intelligent_attack()
+        else:
+            bot.smart_walk()
+            bot.auto_loot()
+
+    def extra_metrics(self) -> Dict[str, float]:
+        metrics = {
+            'visited_positions': float(len(self.bot.visited_positions)),
+            'moves': float(self.minimap.moves if self.minimap is not None else 0),
+            'captures': float(sum(s['total'] for s in self.screenshot.performance_stats.values())),
+        }
+        if self.log_file and os.path.exists(self.log_file):
+            metrics['log_bytes'] = float(os.path.getsize(self.log_file))
+        return metrics
+
+
+@dataclass
+class WindowStats:
+    """Latency and memory figures for one snapshot window."""
+    virtual_hours: float
+    loops: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    traced_mb: float
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class GrowthSite:
+    """An allocation site whose size grew between two snapshots."""
+    location: str
+    size_diff_kb: float
+    count_diff: int
+
+
+@dataclass
+class SoakReport:
+    """Outcome of a soak run."""
+    virtual_hours: float
+    loops: int
+    wall_seconds: float
+    windows: List[WindowStats]
+    top_growth: List[GrowthSite]
+    latency_drift_ratio: float
+    latency_slope_ms_per_hour: float
+    errors: int
+    exceptions: Dict[str, int] = field(default_factory=dict)  # "Type: message" -> count
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def format(self) -> str:
+        lines = [
+            "📊 SOAK REPORT",
+            "=" * 60,
+            f"Virtual time: {self.virtual_hours:.2f} h  |  loops: {self.loops}  |  "
+            f"wall time: {self.wall_seconds:.1f} s  |  errors: {self.errors}",
+            "",
+            f"{'hour':>7} {'loops':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8} {'traced':>9}",
+        ]
+        for w in self.windows:
+            lines.append(
+                f"{w.virtual_hours:7.2f} {w.loops:7d} {w.mean_ms:8.2f} {w.p50_ms:8.2f} "
+                f"{w.p95_ms:8.2f} {w.max_ms:8.2f} {w.traced_mb:8.2f}M"
+                + ''.join(f"  {k}={v:.0f}" for k, v in w.metrics.items())
+            )
+        lines += [
+            "",
+            f"Latency drift (last/first window mean): {self.latency_drift_ratio:.2f}x",
+            f"Latency slope: {self.latency_slope_ms_per_hour:+.3f} ms/hour",
+            "",
+            "Top allocation growth since first snapshot:",
+        ]
+        if not self.top_growth:
+            lines.append("  (none)")
+        for site in self.top_growth:
+            lines.append(f"  {site.size_diff_kb:+10.1f} KiB  {site.count_diff:+8d} blocks  {site.location}")
+        if self.exceptions:
+            lines += ["", "Exceptions raised by the workload:"]
+            for text, count in sorted(self.exceptions.items(), key=lambda item: -item[1]):
+                lines.append(f"  {count:8d}x  {text}")
+        return "\n".join(lines)
+
+
+class SoakHarness:
+    """
+    Runs a workload for a given amount of virtual time and reports drift.
+
+    Args:
+        workload: Object with ``patches()``, ``setup()``, ``step(frame)`` and
+            ``extra_metrics()`` (see ``BotWorkload``)
+        frame_source: Object with ``next_frame()``
+        loop_interval: Virtual seconds between loop iterations
+        snapshot_interval: Virtual seconds between tracemalloc snapshots
+        top_n: Number of growth sites kept in the report
+    """
+
+    # Distinct exception texts kept; later ones are counted under one entry
+    MAX_EXCEPTION_KINDS = 50
+
+    def __init__(self, workload, frame_source, loop_interval: float = 0.1,
+                 snapshot_interval: float = 1800.0, top_n: int = 15):
+        self.workload = workload
+        self.frame_source = frame_source
+        self.loop_interval = loop_interval
+        self.snapshot_interval = snapshot_interval
+        self.top_n = top_n
+        self.clock = VirtualClock()
+
+    @staticmethod
+    def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def _close_window(self, latencies: array.array) -> WindowStats:
+        samples = np.frombuffer(latencies, dtype=np.float64) * 1000.0
+        if samples.size == 0:
+            samples = np.zeros(1)
+        current, _ = tracemalloc.get_traced_memory()
+        return WindowStats(
+            virtual_hours=self.clock.elapsed / 3600.0,
+            loops=len(latencies),
+            mean_ms=float(samples.mean()),
+            p50_ms=float(np.percentile(samples, 50)),
+            p95_ms=float(np.percentile(samples, 95)),
+            max_ms=float(samples.max()),
+            traced_mb=current / (1024 * 1024),
+            metrics=self.workload.extra_metrics(),
+        )
+
+    def run(self, hours: float) -> SoakReport:
+        """Run the workload for ``hours`` of virtual time (bot sleeps count too)."""
+        duration = hours * 3600.0
+        loops = 0
+        windows: List[WindowStats] = []
+        latencies = array.array('d')
+        errors = 0
+        exceptions: Dict[str, int] = {}
+        baseline = None
+        last_snapshot = None
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(mock.patch.object(time, 'time', self.clock.time))
+            stack.enter_context(mock.patch.object(time, 'sleep', self.clock.sleep))
+            for patch in self.workload.patches():
+                stack.enter_context(patch)
+            # The bot prints every log line; keep stdout out of the measurement
+            devnull = stack.enter_context(open(os.devnull, 'w'))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+
+            self.workload.setup()
+            tracemalloc.start(10)
+            wall_start = time.perf_counter()
+            next_snapshot = self.clock.now + self.snapshot_interval
+
+            try:
+                while self.clock.elapsed < duration:
+                    frame = self.frame_source.next_frame()
+                    loop_start = time.perf_counter()
+                    try:
+                        self.workload.step(frame)
+                    except Exception as e:
+                        errors += 1
+                        text = f"{type(e).__name__}: {e}"
+                        if text not in exceptions and len(exceptions) >= self.MAX_EXCEPTION_KINDS:
+                            text = "(other exceptions)"
+                        exceptions[text] = exceptions.get(text, 0) + 1
+                    latencies.append(time.perf_counter() - loop_start)
+                    loops += 1
+                    self.clock.advance(self.loop_interval)
+
+                    if self.clock.now >= next_snapshot:
+                        windows.append(self._close_window(latencies))
+                        latencies = array.array('d')
+                        # The first window doubles as warm-up: growth is
+                        # measured against the state at its end
+                        last_snapshot = self._filtered(tracemalloc.take_snapshot())
+                        if baseline is None:
+                            baseline = last_snapshot
+                        next_snapshot = self.clock.now + self.snapshot_interval
+                if latencies:
+                    windows.append(self._close_window(latencies))
+                    last_snapshot = self._filtered(tracemalloc.take_snapshot())
+            finally:
+                wall_seconds = time.perf_counter() - wall_start
+                tracemalloc.stop()
+
+        top_growth = []
+        if baseline is not None and last_snapshot is not None:
+            for stat in last_snapshot.compare_to(baseline, 'lineno'):
+                if stat.size_diff <= 0:
+                    continue
+                frame = stat.traceback[0]
+                top_growth.append(GrowthSite(
+                    location=f"{frame.filename}:{frame.lineno}",
+                    size_diff_kb=stat.size_diff / 1024.0,
+                    count_diff=stat.count_diff,
+                ))
+                if len(top_growth) >= self.top_n:
+                    break
+
+        drift_ratio, slope = 1.0, 0.0
+        if len(windows) >= 2:
+            means = np.array([w.mean_ms for w in windows])
+            hours_axis = np.array([w.virtual_hours for w in windows])
+            if means[0] > 0:
+                drift_ratio = float(means[-1] / means[0])
+            slope = float(np.polyfit(hours_axis, means, 1)[0])
+
+        return SoakReport(
+            virtual_hours=self.clock.elapsed / 3600.0,
+            loops=loops,
+            wall_seconds=wall_seconds,
+            windows=windows,
+            top_growth=top_growth,
+            latency_drift_ratio=drift_ratio,
+            latency_slope_ms_per_hour=slope,
+            errors=errors,
+            exceptions=exceptions,
+        )
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="NopalBot long-session soak harness")
+    parser.add_argument("--hours", type=float, default=8.0, help="Virtual hours to simulate")
+    parser.add_argument("--loop-interval", type=float, default=0.5,
+                        help="Virtual seconds per bot loop (run_bot sleeps 0.5 s)")
+    parser.add_argument("--snapshot-minutes", type=float, default=30.0,
+                        help="Virtual minutes between tracemalloc snapshots")
+    parser.add_argument("--frames", help="Directory of screenshots to replay")
+    parser.add_argument("--synthetic", action="store_true", help="Use generated frames")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=15, help="Growth sites to report")
+    parser.add_argument("--log-dir", default="logs/soak")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.frames:
+        source = ReplayFrameSource(args.frames)
+    else:
+        source = SyntheticFrameSource(args.width, args.height, args.seed)
+
+    harness = SoakHarness(
+        BotWorkload(args.log_dir),
+        source,
+        loop_interval=args.loop_interval,
+        snapshot_interval=args.snapshot_minutes * 60.0,
+        top_n=args.top,
+    )
+
+    print(f"🧪 Soak: {args.hours} virtual hours, loop {args.loop_interval}s, "
+          f"snapshot every {args.snapshot_minutes} min")
+    report = harness.run(args.hours)
+    print(report.format())
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2)
+        print(f"💾 Report saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
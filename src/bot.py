@@ -4,6 +4,7 @@ Lógica core para Elite Knight - NopalBot by Pikos Nopal
 """
 
 import time
+import random
 import threading
 import keyboard
 from typing import Optional, Callable, Tuple
@@ -36,6 +37,8 @@ class NopalBotEliteKnight:
         self.health_potions = 100
         self.mana_potions = 100
         self.food_count = 50
+        self.needs_resupply = False
+        self.supply_monitor = None  # Lee los contadores de los slots (se crea al iniciar)
         self.last_heal_time = 0
         self.last_mana_time = 0
         self.last_food_time = 0
@@ -49,7 +52,16 @@ class NopalBotEliteKnight:
         self.movement_attempts = 0
         self.stuck_counter = 0
         self.max_stuck_attempts = 5
-        self.visited_positions = set()
+        self.map_journal = self._open_map_journal()  # Tiles visitados en disco (journal + snapshot)
+        self.visited_positions = self.map_journal.visited if self.map_journal is not None else set()
+        self.current_floor = 7
+        self.blocked_edges = self._new_blocked_edges()  # Movimientos que fallaron (criaturas, paredes)
+        self.minimap_tracker = None  # Registra el minimapa contra el mapa (se crea al primer uso)
+        self._minimap_retry_at = 0.0  # Sin minimapa: cuándo volver a buscarlo
+        self._minimap_retry_delay = 5.0
+        self.read_from_fix = False  # La última lectura de posición vino del minimapa
+        self.position_from_fix = False  # current_position vino del minimapa (no estimada)
+        self.last_position_from_fix = False
         self.movement_state = "forward"
         self.current_direction = "w"
         self.direction_change_time = time.time()
@@ -297,6 +309,13 @@ class NopalBotEliteKnight:
                 if self.avoid_stairs(cv_data) or self.avoid_portals(cv_data) or self.avoid_obstacles(cv_data):
                     return
             
+            # Movimiento que ya falló desde este tile: elegir otra dirección
+            if self.is_move_blocked(self.current_direction):
+                open_keys = [key for key in ['w', 'a', 's', 'd'] if not self.is_move_blocked(key)]
+                if open_keys:
+                    self.current_direction = random.choice(open_keys)
+                    self.log_to_gui(f"🧱 Movimiento bloqueado conocido - usando: {self.current_direction}")
+            
             # Verificar si está atascado ANTES de intentar moverse
             if self.is_stuck():
                 self.log_to_gui("🚫 Personaje atascado - probando otras teclas")
@@ -315,7 +334,7 @@ class NopalBotEliteKnight:
                 new_position = self.get_character_position()
                 
                 # Verificar si la posición cambió
-                if self.check_position_change(new_position):
+                if self.check_position_change(new_position, self.current_direction):
                     self.log_to_gui(f"✅ Movimiento exitoso: {self.current_direction} - ({old_position[0]},{old_position[1]}) → ({new_position[0]},{new_position[1]})")
                     self.reset_stuck_counter()
                     
@@ -337,9 +356,14 @@ class NopalBotEliteKnight:
     def get_character_position(self) -> Tuple[int, int]:
         """Obtiene la posición real del personaje en Tibia"""
         try:
-            # En una implementación real, esto obtendría las coordenadas de Tibia
-            # Por ahora, simulamos con valores que cambian cuando se mueve
-            
+            # Posición real: minimapa registrado contra el mapa guardado
+            position = self.read_minimap_position()
+            self.read_from_fix = position is not None
+            if position is not None:
+                self.current_floor = position[2]
+                return (position[0], position[1])
+            
+            # Sin mapa o sin minimapa: estimar con la última tecla enviada
             # Si no hay historial, empezar en posición inicial
             if not self.position_history:
                 return (100, 100)
@@ -365,6 +389,39 @@ class NopalBotEliteKnight:
             self.log_to_gui(f"❌ Error obteniendo posición: {e}")
             return (0, 0)
     
+    def read_minimap_position(self) -> Optional[Tuple[int, int, int]]:
+        """Posición (x, y, z) leída del minimapa, o None si no hay mapa o minimapa"""
+        if self.minimap_tracker is None:
+            # Buscar el minimapa en una captura completa, reintentando cada vez más espaciado
+            if time.time() < self._minimap_retry_at:
+                return None
+            image = cv_system.capture_tibia_screen()
+            if image is None:
+                return None
+            try:
+                from navigation.minimap_tracker import create_tracker
+                self.minimap_tracker = create_tracker(image)
+            except ImportError:
+                self.minimap_tracker = None
+            if self.minimap_tracker is None:
+                self._minimap_retry_at = time.time() + self._minimap_retry_delay
+                self.log_to_gui(f"⚠️ Minimapa no encontrado: la posición se estima por movimiento "
+                                f"(reintento en {self._minimap_retry_delay:.0f}s)")
+                self._minimap_retry_delay = min(self._minimap_retry_delay * 2, 300.0)
+                return None
+            self._minimap_retry_delay = 5.0
+            fix = self.minimap_tracker.update(image)
+            return fix.position if fix is not None else None
+        
+        # Con el minimapa ya ubicado solo se captura su rectángulo
+        from capture.frame import Frame
+        x, y, w, h = self.minimap_tracker.minimap_region
+        pixels = cv_system.capture_tibia_region(x, y, w, h)
+        if pixels is None or pixels.shape[:2] != (h, w):
+            return None
+        fix = self.minimap_tracker.update(Frame.from_tiles([((x, y, w, h), pixels)], screen_size=(x + w, y + h)))
+        return fix.position if fix is not None else None
+    
     def update_position(self):
         """Actualiza la posición actual del personaje"""
         try:
@@ -378,36 +435,77 @@ class NopalBotEliteKnight:
             
             # Guardar posición anterior
             self.last_position = self.current_position
+            self.last_position_from_fix = self.position_from_fix
             self.current_position = new_pos
+            self.position_from_fix = self.read_from_fix
             
-            # Agregar a posiciones visitadas si mapping está habilitado
-            if self.mapping_enabled:
-                self.visited_positions.add(new_pos)
+            # Agregar a posiciones visitadas si mapping está habilitado (solo posiciones reales)
+            if self.mapping_enabled and self.position_from_fix:
+                tile = (new_pos[0], new_pos[1], self.current_floor)
+                if self.map_journal is not None:
+                    self.map_journal.add(tile)
+                else:
+                    self.visited_positions.add(tile)
             
             self.log_to_gui(f"📍 Posición actualizada: ({new_pos[0]}, {new_pos[1]})")
             
         except Exception as e:
             self.log_to_gui(f"❌ Error actualizando posición: {e}")
     
-    def check_position_change(self, new_position: Tuple[int, int]) -> bool:
-        """Verifica si la posición cambió"""
+    def check_position_change(self, new_position: Tuple[int, int], direction: Optional[str] = None) -> bool:
+        """Verifica si la posición cambió (y recuerda si la tecla enviada falló desde este tile)"""
+        from_fix = self.read_from_fix
         if self.last_position == (0, 0):
             self.last_position = new_position
+            self.last_position_from_fix = from_fix
             return True
         
         # Calcular distancia
         dx = abs(new_position[0] - self.last_position[0])
         dy = abs(new_position[1] - self.last_position[1])
+        # Solo dos posiciones reales seguidas dicen si la tecla movió al personaje
+        measured = self.last_position_from_fix and from_fix
         
         # Si la posición cambió significativamente
         if dx > 0 or dy > 0:  # Cualquier cambio cuenta
+            if measured:
+                self.record_move(self.last_position, direction, moved=True)
             self.stuck_counter = 0
             self.last_position = new_position
+            self.last_position_from_fix = from_fix
             return True
         
+        if measured:
+            self.record_move(self.last_position, direction, moved=False)
         self.stuck_counter += 1
         return False
     
+    @staticmethod
+    def _new_blocked_edges():
+        """Índice de movimientos fallidos, o None sin el módulo de navegación"""
+        try:
+            from navigation.blocked_edges import BlockedEdgeIndex
+            return BlockedEdgeIndex()
+        except ImportError:
+            return None
+    
+    def record_move(self, position: Tuple[int, int], direction: Optional[str], moved: bool):
+        """Registra si una tecla movió al personaje desde un tile (llamar solo entre dos posiciones reales)"""
+        if self.blocked_edges is None or direction is None:
+            return
+        tile = (position[0], position[1], self.current_floor)
+        if moved:
+            self.blocked_edges.record_success(tile, direction)
+        else:
+            self.blocked_edges.record_failure(tile, direction)
+    
+    def is_move_blocked(self, direction: str) -> bool:
+        """Si la tecla ya falló hace poco desde la posición actual (consulta O(1))"""
+        if self.blocked_edges is None or not self.position_from_fix:
+            return False
+        tile = (self.current_position[0], self.current_position[1], self.current_floor)
+        return self.blocked_edges.is_blocked(tile, direction)
+    
     def is_stuck(self) -> bool:
         """Determina si el personaje está atascado"""
         return self.stuck_counter >= self.max_stuck_attempts
@@ -417,6 +515,12 @@ class NopalBotEliteKnight:
         keys = ['w', 'a', 's', 'd']
         random.shuffle(keys)  # Orden aleatorio
         
+        # Las teclas que ya fallaron desde este tile se prueban solo si no queda otra
+        open_keys = [key for key in keys if not self.is_move_blocked(key)]
+        if open_keys and len(open_keys) < len(keys):
+            self.log_to_gui(f"🧱 Saltando teclas bloqueadas: {', '.join(k for k in keys if k not in open_keys)}")
+        keys = open_keys or keys
+        
         for key in keys:
             self.log_to_gui(f"🔄 Probando tecla: {key}")
             
@@ -426,7 +530,7 @@ class NopalBotEliteKnight:
                 # Obtener nueva posición
                 new_pos = self.get_character_position()
                 
-                if self.check_position_change(new_pos):
+                if self.check_position_change(new_pos, key):
                     self.log_to_gui(f"✅ Movimiento exitoso con tecla: {key}")
                     return key
                 else:
@@ -484,6 +588,10 @@ class NopalBotEliteKnight:
     def stop_bot(self):
         """Detiene el bot"""
         self.running = False
+        if self.supply_monitor is not None:
+            self.supply_monitor.stop()
+        if self.map_journal is not None:
+            self.map_journal.flush()
         self.log_to_gui("🛑 Bot detenido")
     
     def run_bot(self):
@@ -560,10 +668,33 @@ class NopalBotEliteKnight:
     def start(self):
         """Inicia el bot en un thread separado"""
         if not self.running:
+            self.start_supply_monitor()
             self.bot_thread = threading.Thread(target=self.run_bot, daemon=True)
             self.bot_thread.start()
             self.log_to_gui("🎯 Bot iniciado en thread separado")
     
+    def start_supply_monitor(self):
+        """Arranca la lectura periódica de pociones y comida desde la pantalla"""
+        if self.supply_monitor is None:
+            try:
+                from features.supply_monitor import SupplyMonitor
+                self.supply_monitor = SupplyMonitor(capture_fn=cv_system.capture_tibia_screen)
+                self.supply_monitor.on_update(self._on_supplies_update)
+            except ImportError:
+                self.log_to_gui("⚠️ Lector de suministros no disponible, usando contadores internos")
+                return
+        self.supply_monitor.start()
+    
+    def _on_supplies_update(self, supplies: dict):
+        """Reemplaza los contadores internos por lo leído en pantalla"""
+        for name in ('health_potions', 'mana_potions', 'food_count'):
+            if name in supplies:
+                setattr(self, name, supplies[name])
+        low = self.supply_monitor.low_supplies()
+        if low and not self.needs_resupply:
+            self.log_to_gui(f"🎒 Suministros bajos: {', '.join(low)}")
+        self.needs_resupply = bool(low)
+    
     def get_status(self) -> dict:
         """Retorna el estado actual del bot"""
         return {
@@ -572,35 +703,61 @@ class NopalBotEliteKnight:
             'health_potions': self.health_potions,
             'mana_potions': self.mana_potions,
             'food_count': self.food_count,
+            'needs_resupply': self.needs_resupply,
             'current_position': self.current_position,
             'visited_positions': len(self.visited_positions)
         } 
 
+    def _open_map_journal(self):
+        """Abre el journal de tiles visitados (recupera snapshot + cola del journal)"""
+        try:
+            from navigation.map_journal import MapJournal
+            journal = MapJournal()
+            journal.open()
+            return journal
+        except ImportError:
+            return None
+        except Exception as e:
+            self.log_to_gui(f"⚠️ No se pudo abrir el journal del mapa: {e}")
+            return None
+
     def save_map_data(self):
-        """Guarda las coordenadas visitadas en un archivo JSON"""
+        """Guarda el mapa: solo las posiciones nuevas se añaden al journal"""
         try:
             import json
+            import os
             from datetime import datetime
             
+            # Crear directorio logs si no existe
+            os.makedirs("logs", exist_ok=True)
+            filename = "logs/map_data.json"
+            
+            # Las posiciones van al journal (O(tiles nuevos)); el JSON solo guarda metadatos
+            written = self.map_journal.flush() if self.map_journal is not None else 0
+            
             map_data = {
                 "timestamp": datetime.now().isoformat(),
                 "vocation": config.get_feature("vocation"),
-                "visited_positions": list(self.visited_positions),
                 "position_history": self.position_history,
                 "total_positions": len(self.visited_positions),
                 "description": "Coordenadas visitadas por NopalBot"
             }
-            
-            filename = f"logs/map_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            # Crear directorio logs si no existe
-            import os
-            os.makedirs("logs", exist_ok=True)
+            if self.map_journal is None:
+                map_data["visited_positions"] = list(self.visited_positions)
+            else:
+                # Copia del mapa junto al JSON, para que 'Cargar Mapa' pueda leerlo (como al compartir)
+                snapshot = os.path.splitext(filename)[0] + ".visited"
+                self.map_journal.visited.save(snapshot)
+                map_data["visited_file"] = os.path.basename(snapshot)
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(map_data, f, indent=2, ensure_ascii=False)
             
-            self.log_to_gui(f"🗺️ Mapa guardado: {filename} ({len(self.visited_positions)} posiciones)")
+            # El atlas del minimapa solo escribe los chunks que cambiaron
+            if self.minimap_tracker is not None:
+                self.minimap_tracker.atlas.flush()
+            
+            self.log_to_gui(f"🗺️ Mapa guardado: {written} posiciones nuevas ({len(self.visited_positions)} en total)")
             return filename
             
         except Exception as e:
@@ -608,55 +765,69 @@ class NopalBotEliteKnight:
             return None
     
     def load_map_data(self, filename: str):
-        """Carga coordenadas desde un archivo JSON"""
+        """Une al mapa las coordenadas de un archivo (JSON, compartido o binario de posiciones)"""
         try:
-            import json
+            from navigation.map_merge import read_map_file
             
-            with open(filename, 'r', encoding='utf-8') as f:
-                map_data = json.load(f)
+            # El archivo se lee por bloques: la memoria no crece con el tamaño del JSON
+            history = []
+            grid = read_map_file(filename, default_floor=self.current_floor, history=history)
             
-            # Cargar posiciones visitadas
-            if 'visited_positions' in map_data:
-                self.visited_positions = set(map_data['visited_positions'])
-                self.log_to_gui(f"🗺️ Mapa cargado: {len(self.visited_positions)} posiciones")
+            # Unir posiciones visitadas (los tiles repetidos no cuentan dos veces)
+            if self.map_journal is not None:
+                added = self.map_journal.merge(grid)
+                self.visited_positions = self.map_journal.visited
+            else:
+                before = len(self.visited_positions)
+                self.visited_positions.update(grid)
+                added = len(self.visited_positions) - before
+            self.log_to_gui(f"🗺️ Mapa cargado: {added} posiciones nuevas ({len(self.visited_positions)} en total)")
             
             # Cargar historial de posiciones
-            if 'position_history' in map_data:
-                self.position_history = map_data['position_history']
-                if self.position_history:
-                    self.current_position = self.position_history[-1]
-                    self.log_to_gui(f"📍 Posición actual: {self.current_position}")
+            if history:
+                self.position_history = history[-10:]
+                self.current_position = self.position_history[-1]
+                self.log_to_gui(f"📍 Posición actual: {self.current_position}")
             
             return True
             
+        except ValueError as e:
+            # Archivo sin posiciones visitadas (p. ej. solo metadatos): no se toca el mapa
+            self.log_to_gui(f"❌ Mapa no cargado: {e}")
+            return False
         except Exception as e:
             self.log_to_gui(f"❌ Error cargando mapa: {e}")
             return False
     
     def export_coordinates_for_sharing(self):
-        """Exporta coordenadas en formato para compartir"""
+        """Exporta coordenadas en formato para compartir (JSON + binario de posiciones)"""
         try:
             import json
+            import os
             from datetime import datetime
             
+            base = f"logs/coordenadas_compartir_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            filename = f"{base}.json"
+            
+            # Crear directorio logs si no existe
+            os.makedirs("logs", exist_ok=True)
+            
             # Crear archivo de coordenadas para compartir
             share_data = {
                 "nopalbot_coordinates": {
-                    "version": "1.0",
+                    "version": "2.0",
                     "created": datetime.now().isoformat(),
                     "author": "NopalBot by Pikos Nopal",
                     "description": "Coordenadas de farming para Elite Knight",
-                    "positions": list(self.visited_positions),
                     "total_positions": len(self.visited_positions),
-                    "usage": "Copiar este archivo a la carpeta logs/ y usar 'Cargar Mapa'"
+                    "usage": "Copiar este archivo y el .visited a la carpeta logs/ y usar 'Cargar Mapa'"
                 }
             }
-            
-            filename = f"logs/coordenadas_compartir_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            # Crear directorio logs si no existe
-            import os
-            os.makedirs("logs", exist_ok=True)
+            if hasattr(self.visited_positions, 'save'):
+                self.visited_positions.save(f"{base}.visited")
+                share_data["nopalbot_coordinates"]["visited_file"] = os.path.basename(f"{base}.visited")
+            else:
+                share_data["nopalbot_coordinates"]["positions"] = list(self.visited_positions)
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(share_data, f, indent=2, ensure_ascii=False)
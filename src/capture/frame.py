@@ -0,0 +1,242 @@
+"""
+Frame Module for Tibia Bot
+
+This module provides the immutable frame object that the FrameBus hands
+out to every consumer. Frames are read-only so that detectors running on
+different threads can share one capture without copying it, and they
+memoize derived images (HSV, grayscale, downscaled pyramid levels and
+per-ROI conversions) so each one is computed at most once per frame.
+
+A frame can also be partial: built from the few screen rectangles the ROI
+registry asked for. Partial frames keep screen coordinates, so consumers
+crop them exactly like full frames.
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+# Color spaces supported by Frame.crop / Frame.convert
+COLOR_SPACES = ("bgr", "hsv", "gray")
+
+_CONVERSIONS = {
+    "hsv": cv2.COLOR_BGR2HSV,
+    "gray": cv2.COLOR_BGR2GRAY,
+}
+
+
+def _read_only(image: np.ndarray) -> np.ndarray:
+    image.setflags(write=False)
+    return image
+
+
+class Frame:
+    """
+    A single timestamped screen capture with a lazy derived-image cache.
+    
+    The pixel buffer is marked read-only on construction; ``crop`` returns
+    numpy views into it, so subscribers never copy pixels unless they
+    explicitly ask for it. Derived images are computed on first use and
+    shared by every detector until ``release()`` is called (the FrameBus
+    does that when the frame leaves its ring).
+    """
+    
+    __slots__ = ("_image", "timestamp", "seq", "_cache", "_lock", "_released", "_tiles", "_screen_size")
+    
+    def __init__(self, image: np.ndarray, timestamp: Optional[float] = None, seq: int = 0):
+        """
+        Initialize the Frame.
+        
+        Args:
+            image: BGR pixel buffer (ownership passes to the frame)
+            timestamp: Capture time, ``time.time()`` if omitted
+            seq: Monotonic sequence number assigned by the bus
+        """
+        self._image = _read_only(image) if image is not None else None
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.seq = seq
+        self._cache: Dict[Tuple, np.ndarray] = {}
+        self._lock = threading.RLock()
+        self._released = False
+        self._tiles: List[Tuple[Tuple[int, int, int, int], np.ndarray]] = []
+        self._screen_size = image.shape[1::-1] if image is not None else (0, 0)
+    
+    @classmethod
+    def from_tiles(cls, tiles: Sequence[Tuple[Tuple[int, int, int, int], np.ndarray]],
+                   screen_size: Tuple[int, int], timestamp: Optional[float] = None, seq: int = 0) -> "Frame":
+        """
+        Build a partial frame from captured screen rectangles.
+        
+        Args:
+            tiles: ``((x, y, width, height), pixels)`` pairs in screen coordinates
+            screen_size: (width, height) of the whole screen
+            timestamp: Capture time, ``time.time()`` if omitted
+            seq: Monotonic sequence number assigned by the bus
+            
+        Returns:
+            Frame whose ``crop`` resolves rectangles inside the tiles
+        """
+        frame = cls(None, timestamp, seq)
+        frame._tiles = [(tuple(rect), _read_only(pixels)) for rect, pixels in tiles]
+        frame._screen_size = tuple(screen_size)
+        return frame
+    
+    @property
+    def is_partial(self) -> bool:
+        return self._image is None
+    
+    @property
+    def tiles(self) -> List[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+        return list(self._tiles)
+    
+    @property
+    def image(self) -> np.ndarray:
+        """
+        Full BGR buffer. For partial frames this composes a screen-sized
+        canvas (zeros outside the tiles) on first use; prefer ``crop``.
+        """
+        if self._image is not None:
+            return self._image
+        return self._memoize(("canvas",), self._compose_canvas)
+    
+    def _compose_canvas(self) -> np.ndarray:
+        width, height = self._screen_size
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        for (x, y, w, h), pixels in self._tiles:
+            canvas[y:y + h, x:x + w] = pixels
+        return canvas
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self._image is not None:
+            return self._image.shape
+        width, height = self._screen_size
+        return (height, width, 3)
+    
+    @property
+    def age(self) -> float:
+        """Seconds elapsed since the frame was captured."""
+        return time.time() - self.timestamp
+    
+    @property
+    def hsv(self) -> np.ndarray:
+        """Full-frame HSV conversion (computed once)."""
+        return self.convert("hsv")
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """Full-frame grayscale conversion (computed once)."""
+        return self.convert("gray")
+    
+    def convert(self, space: str) -> np.ndarray:
+        """
+        Get the whole frame in another color space.
+        
+        Args:
+            space: One of ``COLOR_SPACES``
+            
+        Returns:
+            Read-only converted image
+        """
+        if space == "bgr":
+            return self.image
+        return self._memoize(("full", space),
+                             lambda: cv2.cvtColor(self.image, _CONVERSIONS[space]))
+    
+    def downscaled(self, factor: int, space: str = "bgr") -> np.ndarray:
+        """
+        Get a pyramid level of the frame.
+        
+        Args:
+            factor: 1, 2 or 4 (each level halves width and height)
+            space: Color space of the level
+            
+        Returns:
+            Read-only downscaled image; the 4x level is built from the 2x one
+        """
+        if factor == 1:
+            return self.convert(space)
+        if factor not in (2, 4):
+            raise ValueError(f"Unsupported downscale factor: {factor}")
+        
+        def build():
+            if factor == 2:
+                return cv2.pyrDown(self.convert(space))
+            return cv2.pyrDown(self.downscaled(2, space))
+        
+        return self._memoize(("pyramid", factor, space), build)
+    
+    def crop(self, x: int, y: int, width: int, height: int, space: str = "bgr") -> Optional[np.ndarray]:
+        """
+        Get a rectangle of the frame.
+        
+        BGR crops are zero-copy views. Other color spaces are views into the
+        full converted frame when that already exists; otherwise only the
+        rectangle is converted and memoized for the other detectors.
+        
+        Args:
+            x, y: Top-left corner in frame coordinates
+            width, height: Size of the rectangle
+            space: One of ``COLOR_SPACES``
+            
+        Returns:
+            Read-only image, or None if the rectangle is outside the frame
+        """
+        frame_h, frame_w = self.shape[:2]
+        if x < 0 or y < 0 or x + width > frame_w or y + height > frame_h:
+            return None
+        if self._image is None:
+            return self._crop_tiles(x, y, width, height, space)
+        if space == "bgr":
+            return self.image[y:y + height, x:x + width]
+        
+        full = self._cache.get(("full", space))
+        if full is not None:
+            return full[y:y + height, x:x + width]
+        return self._memoize(
+            ("roi", space, x, y, width, height),
+            lambda: cv2.cvtColor(self.image[y:y + height, x:x + width], _CONVERSIONS[space]))
+    
+    def _crop_tiles(self, x: int, y: int, width: int, height: int, space: str) -> Optional[np.ndarray]:
+        """Resolve a crop inside the tile that contains it (partial frames)."""
+        for index, ((tx, ty, tw, th), pixels) in enumerate(self._tiles):
+            if tx <= x and ty <= y and x + width <= tx + tw and y + height <= ty + th:
+                if space != "bgr":
+                    # Tiles are small merged ROIs: convert the whole tile once
+                    pixels = self._memoize(("tile", index, space),
+                                           lambda: cv2.cvtColor(pixels, _CONVERSIONS[space]))
+                return pixels[y - ty:y - ty + height, x - tx:x - tx + width]
+        return None
+    
+    def _memoize(self, key: Tuple, build) -> np.ndarray:
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+            result = _read_only(build())
+            # A released frame still answers, it just stops caching
+            if not self._released:
+                self._cache[key] = result
+            return result
+    
+    def release(self):
+        """Drop every derived image so its memory can be reclaimed."""
+        with self._lock:
+            self._released = True
+            self._cache.clear()
+    
+    @property
+    def cached_keys(self):
+        """Keys of the derived images currently memoized (for diagnostics)."""
+        return list(self._cache.keys())
+    
+    def __repr__(self) -> str:
+        kind = f"tiles={len(self._tiles)}" if self._image is None else "full"
+        return f"Frame(seq={self.seq}, shape={self.shape}, {kind}, timestamp={self.timestamp:.3f})"
@@ -0,0 +1,254 @@
+"""
+Frame Bus Module for Tibia Bot
+
+This module provides a single capture producer that publishes frames into
+a small ring buffer. Vision loop, auto-attack, auto-loot and the status
+detector all read from the bus, so one logical tick costs one screen
+capture no matter how many features are enabled.
+
+When a RoiRegistry and a region grabber are supplied, the bus captures
+only the merged rectangles the features declared and publishes partial
+frames instead of full-screen grabs.
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Any
+
+import numpy as np
+
+from capture.frame import Frame
+from capture.roi_registry import RoiRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class FrameBus:
+    """
+    Latest-wins frame ring buffer fed by one capture thread.
+    
+    Consumers either poll ``latest()`` or block in ``wait_for_frame()`` for
+    a frame newer than the one they last processed. Slow consumers simply
+    skip frames; they never queue up stale ones.
+    """
+    
+    def __init__(self, capture_fn: Callable[[], Optional[np.ndarray]],
+                 history: int = 3, interval: float = 0.05,
+                 registry: Optional[RoiRegistry] = None,
+                 region_capture_fn: Optional[Callable[[int, int, int, int], Optional[np.ndarray]]] = None,
+                 screen_size: Optional[Tuple[int, int]] = None):
+        """
+        Initialize the FrameBus.
+        
+        Args:
+            capture_fn: Returns a freshly allocated BGR frame, or None
+            history: Number of recent frames kept in the ring (>= 1)
+            interval: Target seconds between captures (0.05 = 20 FPS)
+            registry: ROI registry; enables partial capture with region_capture_fn
+            region_capture_fn: Grabs one (x, y, width, height) screen rectangle
+            screen_size: (width, height) of the screen for partial frames
+        """
+        self.capture_fn = capture_fn
+        self.registry = registry
+        self.region_capture_fn = region_capture_fn
+        self.screen_size = screen_size
+        self.history_depth = max(1, history)
+        self.interval = interval
+        self.is_running = False
+        self._stopped = False
+        
+        self._frames: Deque[Frame] = deque()
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        
+        # Capture statistics
+        self._capture_count = 0
+        self._capture_failures = 0
+        self._capture_time_total = 0.0
+        self._captured_pixels = 0
+    
+    def start(self) -> bool:
+        """
+        Start the capture thread.
+        
+        Returns:
+            True if the producer is running
+        """
+        if self.is_running:
+            return True
+        
+        self.is_running = True
+        self._stopped = False
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"Frame bus started ({1.0 / self.interval:.0f} FPS, history {self.history_depth})")
+        return True
+    
+    def stop(self):
+        """Stop the capture thread and wake up any waiting consumers."""
+        self.is_running = False
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        logger.info("Frame bus stopped")
+    
+    def _capture_loop(self):
+        """Producer loop: capture, publish, sleep for the rest of the interval."""
+        while self.is_running:
+            start_time = time.time()
+            try:
+                frame = self.capture_once(start_time)
+                self._capture_time_total += time.time() - start_time
+                if frame is None:
+                    self._capture_failures += 1
+            except Exception as e:
+                self._capture_failures += 1
+                logger.error(f"Error capturing frame: {e}")
+            
+            elapsed = time.time() - start_time
+            if elapsed < self.interval:
+                time.sleep(self.interval - elapsed)
+    
+    @property
+    def partial_capture(self) -> bool:
+        """True when the bus grabs declared ROIs instead of the full screen."""
+        return (self.registry is not None and self.region_capture_fn is not None
+                and self.screen_size is not None and bool(self.registry.capture_rects()))
+    
+    def capture_once(self, timestamp: Optional[float] = None) -> Optional[Frame]:
+        """
+        Capture and publish one frame (partial if ROIs are declared).
+        
+        Returns:
+            Published Frame, or None if the capture failed
+        """
+        if not self.partial_capture:
+            image = self.capture_fn()
+            if image is None:
+                return None
+            self._captured_pixels += image.shape[0] * image.shape[1]
+            return self.publish(image, timestamp=timestamp)
+        
+        width, height = self.screen_size
+        tiles = []
+        for rect in self.registry.capture_rects():
+            rect = rect.clip(width, height)
+            if rect is None:
+                continue
+            pixels = self.region_capture_fn(*rect.as_tuple())
+            if pixels is None:
+                return None
+            tiles.append((rect.as_tuple(), pixels))
+            self._captured_pixels += rect.area
+        return self.publish_tiles(tiles, timestamp=timestamp)
+    
+    def publish_tiles(self, tiles, timestamp: Optional[float] = None) -> Frame:
+        """
+        Publish a partial frame made of screen rectangles.
+        
+        Args:
+            tiles: ``((x, y, width, height), pixels)`` pairs
+            timestamp: Capture time, now if omitted
+            
+        Returns:
+            The published Frame
+        """
+        return self._publish(lambda seq: Frame.from_tiles(tiles, self.screen_size, timestamp, seq))
+    
+    def publish(self, image: np.ndarray, timestamp: Optional[float] = None) -> Frame:
+        """
+        Publish a frame to all consumers.
+        
+        Called by the capture thread, but also usable directly by replay
+        tools and tests that feed frames without a live client.
+        
+        Args:
+            image: Newly allocated BGR frame (becomes read-only)
+            timestamp: Capture time, now if omitted
+            
+        Returns:
+            The published Frame
+        """
+        return self._publish(lambda seq: Frame(image, timestamp, seq))
+    
+    def _publish(self, make_frame: Callable[[int], Frame]) -> Frame:
+        with self._condition:
+            self._seq += 1
+            frame = make_frame(self._seq)
+            self._frames.append(frame)
+            while len(self._frames) > self.history_depth:
+                # Derived images die with the frame's slot in the ring
+                self._frames.popleft().release()
+            self._capture_count += 1
+            self._condition.notify_all()
+        return frame
+    
+    def latest(self, max_age: Optional[float] = None) -> Optional[Frame]:
+        """
+        Get the newest frame.
+        
+        Args:
+            max_age: If given, frames older than this many seconds are ignored
+            
+        Returns:
+            Latest Frame, or None if nothing (fresh enough) was captured yet
+        """
+        with self._condition:
+            frame = self._frames[-1] if self._frames else None
+        if frame is not None and max_age is not None and frame.age > max_age:
+            return None
+        return frame
+    
+    def latest_image(self, max_age: Optional[float] = None) -> Optional[np.ndarray]:
+        """Shortcut for the pixel buffer of ``latest()``."""
+        frame = self.latest(max_age)
+        return frame.image if frame is not None else None
+    
+    def wait_for_frame(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[Frame]:
+        """
+        Block until a frame newer than ``after_seq`` is available.
+        
+        Args:
+            after_seq: Sequence number of the last frame the caller processed
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            Newest Frame with ``seq > after_seq``, or None on timeout/stop
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while not self._frames or self._frames[-1].seq <= after_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._stopped:
+                    return None
+                self._condition.wait(remaining)
+            return self._frames[-1]
+    
+    def history(self) -> List[Frame]:
+        """Get the frames currently in the ring, oldest first."""
+        with self._condition:
+            return list(self._frames)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get capture statistics.
+        
+        Returns:
+            Dictionary with capture count, failures and average capture time
+        """
+        attempts = self._capture_count + self._capture_failures
+        return {
+            "running": self.is_running,
+            "frames_published": self._capture_count,
+            "capture_failures": self._capture_failures,
+            "avg_capture_ms": (self._capture_time_total / attempts * 1000.0) if attempts else 0.0,
+            "avg_captured_pixels": (self._captured_pixels / self._capture_count) if self._capture_count else 0,
+            "partial_capture": self.partial_capture,
+            "last_seq": self._seq,
+        }
@@ -0,0 +1,479 @@
+"""
+Layout Detector Module for Tibia Bot
+
+This module locates the Tibia client UI (game viewport, sidebars, minimap,
+health/mana bars, battle list and the container panel below it) once from a full screenshot using edge,
+color and template cues. The result is persisted together with a geometry
+fingerprint (resolution, window rect and small hashes of static UI chrome)
+so later starts only validate the stored layout instead of recalibrating.
+Flat chrome patches carry no hash and always force a re-detection.
+"""
+
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+
+# Tibia's game viewport is 15x11 tiles
+VIEWPORT_ASPECT = 15.0 / 11.0
+
+
+@dataclass
+class LayoutFingerprint:
+    """Identifies the screen geometry a layout was detected on."""
+    resolution: Tuple[int, int]
+    window_rect: Optional[Region] = None
+    ui_hashes: Dict[str, Optional[str]] = field(default_factory=dict)  # None: flat patch
+
+
+@dataclass
+class UILayout:
+    """Screen regions of the Tibia client UI (screen coordinates)."""
+    viewport: Optional[Region] = None
+    left_sidebar: Optional[Region] = None
+    right_sidebar: Optional[Region] = None
+    minimap: Optional[Region] = None
+    health_bar: Optional[Region] = None
+    mana_bar: Optional[Region] = None
+    battle_list: Optional[Region] = None
+    container: Optional[Region] = None    # Sidebar panel below the battle list (open loot containers)
+    fingerprint: Optional[LayoutFingerprint] = None
+
+    @property
+    def tile_size(self) -> Optional[float]:
+        """Size of one game tile in screen pixels (viewport width / 15)."""
+        if self.viewport is None:
+            return None
+        return self.viewport[2] / 15.0
+
+    def regions(self) -> Dict[str, Region]:
+        """Detected regions by name (missing ones omitted)."""
+        names = ("viewport", "left_sidebar", "right_sidebar", "minimap",
+                 "health_bar", "mana_bar", "battle_list", "container")
+        return {n: getattr(self, n) for n in names if getattr(self, n) is not None}
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UILayout":
+        def region(value):
+            return tuple(value) if value is not None else None
+
+        fp = data.get("fingerprint")
+        fingerprint = None
+        if fp:
+            fingerprint = LayoutFingerprint(
+                resolution=tuple(fp["resolution"]),
+                window_rect=region(fp.get("window_rect")),
+                ui_hashes=dict(fp.get("ui_hashes", {})),
+            )
+        return cls(
+            viewport=region(data.get("viewport")),
+            left_sidebar=region(data.get("left_sidebar")),
+            right_sidebar=region(data.get("right_sidebar")),
+            minimap=region(data.get("minimap")),
+            health_bar=region(data.get("health_bar")),
+            mana_bar=region(data.get("mana_bar")),
+            battle_list=region(data.get("battle_list")),
+            container=region(data.get("container")),
+            fingerprint=fingerprint,
+        )
+
+
+def average_hash(patch: np.ndarray, min_std: float = 2.0) -> Optional[str]:
+    """
+    64-bit average hash of an image patch as a hex string.
+
+    A flat patch (gray std below ``min_std``) has no hash: its bits would
+    only encode noise, and any two flat patches would hash alike.
+    """
+    if patch.ndim == 3:
+        patch = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+    if float(patch.std()) < min_std:
+        return None
+    small = cv2.resize(patch, (8, 8), interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+class LayoutDetector:
+    """
+    One-shot UI layout detection with a persisted fingerprint.
+
+    ``load_or_detect`` is the startup entry point: it validates the stored
+    layout in a few milliseconds and only runs the full detection when the
+    resolution, window rect or UI hashes no longer match.
+    """
+
+    def __init__(self, layout_file: str = "config/ui_layout.json",
+                 templates_dir: str = "resources/templates/ui",
+                 max_hash_distance: int = 8):
+        """
+        Initialize the LayoutDetector.
+
+        Args:
+            layout_file: Where the detected layout is persisted
+            templates_dir: Optional UI templates (e.g. battle_list_header.png)
+            max_hash_distance: Hamming distance tolerated per fingerprint patch
+        """
+        self.layout_file = layout_file
+        self.templates_dir = templates_dir
+        self.max_hash_distance = max_hash_distance
+        self._templates: Optional[Dict[str, np.ndarray]] = None
+
+    # ------------------------------------------------------------------ startup
+
+    def load_or_detect(self, image: np.ndarray, window_rect: Optional[Region] = None) -> UILayout:
+        """
+        Return the stored layout if it still matches, else detect and save.
+
+        Args:
+            image: Full BGR screenshot
+            window_rect: Current Tibia window rect, if known
+
+        Returns:
+            Valid UILayout for this screen
+        """
+        stored = self.load()
+        if stored is not None:
+            start = time.perf_counter()
+            valid = self.validate(stored, image, window_rect)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if valid:
+                logger.info(f"Stored UI layout validated in {elapsed_ms:.2f} ms")
+                return stored
+            logger.info("UI fingerprint changed, re-detecting layout")
+
+        start = time.perf_counter()
+        layout = self.detect(image, window_rect)
+        logger.info(f"UI layout detected in {(time.perf_counter() - start) * 1000.0:.1f} ms: "
+                    f"{sorted(layout.regions())}")
+        self.save(layout)
+        return layout
+
+    def validate(self, layout: UILayout, image: np.ndarray, window_rect: Optional[Region] = None) -> bool:
+        """
+        Check a stored layout against the current screen.
+
+        Args:
+            layout: Previously detected layout
+            image: Full BGR screenshot
+            window_rect: Current Tibia window rect, if known
+
+        Returns:
+            True if resolution, window rect and UI hashes still match (never
+            when a fingerprint patch is flat)
+        """
+        fp = layout.fingerprint
+        if fp is None:
+            return False
+        height, width = image.shape[:2]
+        if tuple(fp.resolution) != (width, height):
+            return False
+        if window_rect is not None and fp.window_rect is not None and tuple(window_rect) != tuple(fp.window_rect):
+            return False
+        current = self._ui_hashes(layout, image)
+        if not fp.ui_hashes or set(current) != set(fp.ui_hashes):
+            return False
+        # A flat patch proves nothing (a blank or loading screen is flat too)
+        if None in current.values() or None in fp.ui_hashes.values():
+            return False
+        return all(hamming(current[name], fp.ui_hashes[name]) <= self.max_hash_distance
+                   for name in current)
+
+    def load(self) -> Optional[UILayout]:
+        """Load the persisted layout, if any."""
+        try:
+            if os.path.exists(self.layout_file):
+                with open(self.layout_file, 'r', encoding='utf-8') as f:
+                    return UILayout.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading UI layout: {e}")
+        return None
+
+    def save(self, layout: UILayout) -> bool:
+        """Persist a layout (with its fingerprint)."""
+        try:
+            os.makedirs(os.path.dirname(self.layout_file) or ".", exist_ok=True)
+            with open(self.layout_file, 'w', encoding='utf-8') as f:
+                json.dump(layout.to_dict(), f, indent=2)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving UI layout: {e}")
+            return False
+
+    # ---------------------------------------------------------------- detection
+
+    def detect(self, image: np.ndarray, window_rect: Optional[Region] = None) -> UILayout:
+        """
+        Run the full layout detection on a screenshot.
+
+        Args:
+            image: Full BGR screenshot
+            window_rect: Current Tibia window rect, if known
+
+        Returns:
+            Detected UILayout with a fresh fingerprint
+        """
+        height, width = image.shape[:2]
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        layout = UILayout()
+
+        layout.viewport = self._find_viewport(image, hsv)
+        if layout.viewport is not None:
+            vx, vy, vw, vh = layout.viewport
+            if vx > 100:
+                layout.left_sidebar = (0, 0, vx, height)
+            if width - (vx + vw) > 100:
+                layout.right_sidebar = (vx + vw, 0, width - (vx + vw), height)
+
+        sidebars = [s for s in (layout.right_sidebar, layout.left_sidebar) if s is not None]
+        layout.minimap = self._find_minimap(hsv, sidebars)
+        layout.health_bar, layout.mana_bar = self._find_bars(hsv, layout.viewport)
+        layout.battle_list = self._find_battle_list(image, sidebars, layout)
+        layout.container = self._find_container(image, sidebars, layout)
+
+        layout.fingerprint = LayoutFingerprint(
+            resolution=(width, height),
+            window_rect=tuple(window_rect) if window_rect is not None else None,
+            ui_hashes=self._ui_hashes(layout, image),
+        )
+        return layout
+
+    def _find_viewport(self, image: np.ndarray, hsv: np.ndarray) -> Optional[Region]:
+        """Largest block of textured/colorful game content, snapped to strong edges."""
+        height, width = image.shape[:2]
+        scale = 4
+        small_hsv = cv2.resize(hsv, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+        small_gray = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+                                (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+
+        # UI chrome is flat, dark and unsaturated; the game world is not
+        texture = cv2.absdiff(cv2.blur(small_gray, (5, 5)), small_gray)
+        content = ((small_hsv[:, :, 1] > 50) | (texture > 6)) & (small_hsv[:, :, 2] > 25)
+        content = cv2.morphologyEx(content.astype(np.uint8), cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(content)
+        if count <= 1:
+            return None
+        best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        component = labels == best
+        # Separator lines can bridge the viewport to sidebar widgets; keep only
+        # the rows/columns the component mostly fills
+        cols = np.nonzero(component.mean(axis=0) > 0.5)[0]
+        if cols.size == 0:
+            return None
+        rows = np.nonzero(component[:, cols[0]:cols[-1] + 1].mean(axis=1) > 0.5)[0]
+        if rows.size == 0:
+            return None
+        cols = np.nonzero(component[rows[0]:rows[-1] + 1].mean(axis=0) > 0.5)[0]
+        if cols.size == 0:
+            return None
+        x, y = int(cols[0]) * scale, int(rows[0]) * scale
+        w, h = int(cols[-1] - cols[0] + 1) * scale, int(rows[-1] - rows[0] + 1) * scale
+        if w * h < 0.1 * width * height:
+            return None
+
+        # Snap each side to the sharpest step of the full-resolution content mask
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        full = ((hsv[:, :, 1] > 50) | (cv2.absdiff(cv2.blur(gray, (3, 3)), gray) > 6)) & (hsv[:, :, 2] > 25)
+        # The 3x3 blur leaks texture one pixel into the chrome; erode it back
+        full = cv2.erode(full.astype(np.uint8), np.ones((3, 3), np.uint8))
+        col_profile = full[y:y + h].mean(axis=0)
+        row_profile = full[:, x:x + w].mean(axis=1)
+
+        def snap(profile, pos, limit, k=4):
+            # Step strength at i = sum(profile[i:i+k]) - sum(profile[i-k:i]),
+            # which ignores isolated textured lines in the chrome. The coarse
+            # texture blur can push the bbox out by ~2 coarse pixels, and the
+            # profile is zero-padded so edges at the screen border still snap.
+            lo, hi = max(0, pos - 4 * scale), min(limit, pos + 4 * scale)
+            csum = np.concatenate((np.zeros(k + 1), np.cumsum(profile), np.full(k, profile.sum())))
+            idx = np.arange(lo, hi + 1) + k
+            step = (csum[idx + k] - csum[idx]) - (csum[idx] - csum[idx - k])
+            return int(idx[np.argmax(np.abs(step))]) - k
+
+        left, right = snap(col_profile, x, width), snap(col_profile, x + w, width)
+        top, bottom = snap(row_profile, y, height), snap(row_profile, y + h, height)
+        w, h = right - left, bottom - top
+
+        # The viewport keeps Tibia's 15:11 aspect; trim the long side if needed
+        if w / max(h, 1) > VIEWPORT_ASPECT * 1.05:
+            new_w = int(round(h * VIEWPORT_ASPECT))
+            left += (w - new_w) // 2
+            w = new_w
+        elif w / max(h, 1) < VIEWPORT_ASPECT / 1.05:
+            new_h = int(round(w / VIEWPORT_ASPECT))
+            top += (h - new_h) // 2
+            h = new_h
+        return (left, top, w, h)
+
+    def _find_minimap(self, hsv: np.ndarray, sidebars: List[Region]) -> Optional[Region]:
+        """Roughly square colorful block in the top third of a sidebar."""
+        for sx, sy, sw, sh in sidebars:
+            top = hsv[sy:sy + sh // 3, sx:sx + sw]
+            colorful = ((top[:, :, 1] > 60) & (top[:, :, 2] > 40)).astype(np.uint8)
+            colorful = cv2.morphologyEx(colorful, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+            count, _, stats, _ = cv2.connectedComponentsWithStats(colorful)
+            candidates = []
+            for i in range(1, count):
+                x, y, w, h, area = (int(v) for v in stats[i])
+                if 60 <= w <= 400 and 60 <= h <= 400 and 0.75 <= w / h <= 1.33 and area > 0.3 * w * h:
+                    candidates.append((area, (sx + x, sy + y, w, h)))
+            if candidates:
+                return max(candidates)[1]
+        return None
+
+    def _find_bars(self, hsv: np.ndarray, viewport: Optional[Region]) -> Tuple[Optional[Region], Optional[Region]]:
+        """Widest thin red (health) and blue (mana) horizontal bars outside the viewport."""
+        sat, val = hsv[:, :, 1] > 120, hsv[:, :, 2] > 90
+        hue = hsv[:, :, 0]
+        masks = {
+            "health": ((hue <= 8) | (hue >= 170)) & sat & val,
+            "mana": (hue >= 100) & (hue <= 130) & sat & val,
+        }
+        found = {}
+        for name, mask in masks.items():
+            mask = mask.astype(np.uint8)
+            if viewport is not None:
+                vx, vy, vw, vh = viewport
+                mask[vy:vy + vh, vx:vx + vw] = 0
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+            best = None
+            for i in range(1, count):
+                x, y, w, h, area = (int(v) for v in stats[i])
+                if 2 <= h <= 16 and w >= 40 and w / h >= 6 and area > 0.6 * w * h:
+                    if best is None or w > best[2]:
+                        best = (x, y, w, h)
+            found[name] = best
+        return found["health"], found["mana"]
+
+    def _find_battle_list(self, image: np.ndarray, sidebars: List[Region], layout: UILayout) -> Optional[Region]:
+        """Battle list panel: header template if available, else the first sidebar panel below the bars."""
+        header = self._load_templates().get("battle_list_header")
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        for sx, sy, sw, sh in sidebars:
+            panel_top = None
+            if header is not None and header.shape[0] <= sh and header.shape[1] <= sw:
+                result = cv2.matchTemplate(gray[sy:sy + sh, sx:sx + sw], header, cv2.TM_CCOEFF_NORMED)
+                _, score, _, loc = cv2.minMaxLoc(result)
+                if score >= 0.8:
+                    panel_top = sy + loc[1] + header.shape[0]
+            if panel_top is None:
+                anchors = [r for r in (layout.minimap, layout.health_bar, layout.mana_bar)
+                           if r is not None and sx <= r[0] < sx + sw]
+                if not anchors:
+                    continue
+                panel_top = max(r[1] + r[3] for r in anchors) + 4
+
+            panel = self._panel_below(gray, (sx, sy, sw, sh), panel_top)
+            if panel is not None:
+                return panel
+        return None
+
+    def _find_container(self, image: np.ndarray, sidebars: List[Region], layout: UILayout) -> Optional[Region]:
+        """Container panel: the sidebar panel right below the battle list."""
+        if layout.battle_list is None:
+            return None
+        bx, by, bw, bh = layout.battle_list
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        for sidebar in sidebars:
+            sx, sy, sw, sh = sidebar
+            if sx <= bx < sx + sw:
+                # Skip the separator that closed the battle list
+                return self._panel_below(gray, sidebar, by + bh + 4, max_height=sy + sh)
+        return None
+
+    @staticmethod
+    def _panel_below(gray: np.ndarray, sidebar: Region, panel_top: int, max_height: int = 400) -> Optional[Region]:
+        """Sidebar panel from ``panel_top`` to the next horizontal separator (a near-uniform edge row)."""
+        sx, sy, sw, sh = sidebar
+        strip = gray[panel_top:sy + sh, sx:sx + sw].astype(np.int16)
+        if strip.shape[0] < 40:
+            return None
+        row_edges = np.abs(np.diff(strip, axis=0)).mean(axis=1)
+        threshold = row_edges.mean() + 3 * row_edges.std()
+        separators = np.nonzero(row_edges[30:] > threshold)[0]
+        height = int(separators[0]) + 30 if separators.size else min(max_height, strip.shape[0])
+        return (sx + 4, panel_top, sw - 8, height)
+
+    def _load_templates(self) -> Dict[str, np.ndarray]:
+        if self._templates is None:
+            self._templates = {}
+            if os.path.isdir(self.templates_dir):
+                for name in os.listdir(self.templates_dir):
+                    if name.lower().endswith(".png"):
+                        template = cv2.imread(os.path.join(self.templates_dir, name), cv2.IMREAD_GRAYSCALE)
+                        if template is not None:
+                            self._templates[os.path.splitext(name)[0]] = template
+        return self._templates
+
+    # -------------------------------------------------------------- fingerprint
+
+    def _ui_hashes(self, layout: UILayout, image: np.ndarray, size: int = 16) -> Dict[str, Optional[str]]:
+        """
+        Hash small patches of static chrome just outside the detected regions.
+
+        Patches sit outside the viewport corners and above the minimap and
+        battle list, so moving creatures or changing HP do not affect them.
+        """
+        height, width = image.shape[:2]
+        anchors = {}
+        if layout.viewport is not None:
+            x, y, w, h = layout.viewport
+            anchors["viewport_tl"] = (x - size - 2, y - size - 2)
+            anchors["viewport_tr"] = (x + w + 2, y - size - 2)
+            anchors["viewport_bl"] = (x - size - 2, y + h + 2)
+            anchors["viewport_br"] = (x + w + 2, y + h + 2)
+        for name in ("minimap", "battle_list"):
+            region = getattr(layout, name)
+            if region is not None:
+                anchors[name] = (region[0], region[1] - size - 2)
+
+        hashes = {}
+        for name, (px, py) in anchors.items():
+            if 0 <= px and 0 <= py and px + size <= width and py + size <= height:
+                hashes[name] = average_hash(image[py:py + size, px:px + size])
+        return hashes
+
+    # -------------------------------------------------------------- application
+
+    @staticmethod
+    def apply(layout: UILayout, roi_registry=None, auto_attack=None, auto_loot=None, status_detector=None):
+        """
+        Push a layout into the ROI registry and the features.
+
+        Args:
+            layout: Detected or validated layout
+            roi_registry: RoiRegistry to declare minimap/bars/battle list in
+            auto_attack: AutoAttack to calibrate the battle list and viewport on (it declares the viewport ROI)
+            auto_loot: AutoLoot whose container area becomes the detected container panel
+            status_detector: StatusDetector whose bar regions are updated
+        """
+        if roi_registry is not None:
+            for name in ("minimap", "health_bar", "mana_bar", "battle_list"):
+                region = getattr(layout, name)
+                if region is not None:
+                    roi_registry.declare(name, *region, owner="layout")
+        if auto_attack is not None and layout.battle_list is not None:
+            auto_attack.calibrate_battle_list(*layout.battle_list)
+        if auto_attack is not None and layout.viewport is not None:
+            auto_attack.set_viewport(*layout.viewport)
+        if auto_loot is not None and layout.container is not None:
+            auto_loot.set_container_area(*layout.container)
+        if status_detector is not None and layout.health_bar is not None and layout.mana_bar is not None:
+            status_detector.set_bar_regions(layout.health_bar, layout.mana_bar)
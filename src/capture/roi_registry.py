@@ -0,0 +1,226 @@
+"""
+ROI Registry Module for Tibia Bot
+
+This module provides a central registry of the screen regions each
+feature needs (battle list, loot area, health/mana bars, ...). The
+capture layer asks the registry for a minimal set of merged rectangles
+and grabs only those instead of the whole desktop.
+"""
+
+import json
+import os
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rect:
+    """Axis-aligned screen rectangle."""
+    x: int
+    y: int
+    width: int
+    height: int
+    
+    @property
+    def right(self) -> int:
+        return self.x + self.width
+    
+    @property
+    def bottom(self) -> int:
+        return self.y + self.height
+    
+    @property
+    def area(self) -> int:
+        return self.width * self.height
+    
+    def as_tuple(self) -> Tuple[int, int, int, int]:
+        return (self.x, self.y, self.width, self.height)
+    
+    def union(self, other: "Rect") -> "Rect":
+        x, y = min(self.x, other.x), min(self.y, other.y)
+        return Rect(x, y, max(self.right, other.right) - x, max(self.bottom, other.bottom) - y)
+    
+    def intersection_area(self, other: "Rect") -> int:
+        w = min(self.right, other.right) - max(self.x, other.x)
+        h = min(self.bottom, other.bottom) - max(self.y, other.y)
+        return w * h if w > 0 and h > 0 else 0
+    
+    def near(self, other: "Rect", gap: int = 0) -> bool:
+        """True if the rectangles overlap or are closer than ``gap`` pixels."""
+        return (self.x <= other.right + gap and other.x <= self.right + gap and
+                self.y <= other.bottom + gap and other.y <= self.bottom + gap)
+    
+    def contains(self, other: "Rect") -> bool:
+        return (self.x <= other.x and self.y <= other.y and
+                other.right <= self.right and other.bottom <= self.bottom)
+    
+    def clip(self, width: int, height: int) -> Optional["Rect"]:
+        """Clip to a ``width`` x ``height`` screen; None if nothing is left."""
+        x, y = max(0, self.x), max(0, self.y)
+        right, bottom = min(width, self.right), min(height, self.bottom)
+        if right <= x or bottom <= y:
+            return None
+        return Rect(x, y, right - x, bottom - y)
+
+
+def merge_rects(rects: Iterable[Rect], gap: int = 8, max_waste: float = 0.25) -> List[Rect]:
+    """
+    Merge rectangles into a small set that still covers all of them.
+    
+    Two rectangles are merged when they overlap (or touch within ``gap``
+    pixels) and their bounding box wastes at most ``max_waste`` of its area
+    on pixels no one asked for. Rectangles fully inside another are always
+    absorbed.
+    
+    Args:
+        rects: Requested rectangles
+        gap: Distance under which neighbouring rectangles count as touching
+        max_waste: Allowed fraction of unrequested pixels in a merged box
+        
+    Returns:
+        Merged rectangles, sorted top-to-bottom, left-to-right
+    """
+    merged = [r for r in rects if r.width > 0 and r.height > 0]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if not a.near(b, gap):
+                    continue
+                box = a.union(b)
+                covered = a.area + b.area - a.intersection_area(b)
+                if a.contains(b) or b.contains(a) or box.area <= covered * (1.0 + max_waste):
+                    merged[i] = box
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    merged.sort(key=lambda r: (r.y, r.x))
+    return merged
+
+
+class RoiRegistry:
+    """
+    Registry where features declare the screen regions they read.
+    
+    Each ROI has a unique name and an owner (the feature that declared
+    it). ``capture_rects()`` returns the merged rectangles the capture
+    layer should grab; the result is cached until a region changes.
+    """
+    
+    def __init__(self, gap: int = 8, max_waste: float = 0.25):
+        """
+        Initialize the RoiRegistry.
+        
+        Args:
+            gap: See ``merge_rects``
+            max_waste: See ``merge_rects``
+        """
+        self.gap = gap
+        self.max_waste = max_waste
+        self._regions: Dict[str, Rect] = {}
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._merged: Optional[List[Rect]] = None
+        self.version = 0
+    
+    def declare(self, name: str, x: int, y: int, width: int, height: int, owner: str = "") -> Rect:
+        """
+        Declare (or move) a region of interest.
+        
+        Args:
+            name: Unique ROI name, e.g. "battle_list"
+            x, y, width, height: Screen rectangle
+            owner: Feature that needs the region
+            
+        Returns:
+            The registered Rect
+        """
+        rect = Rect(int(x), int(y), int(width), int(height))
+        with self._lock:
+            if self._regions.get(name) == rect:
+                return rect
+            self._regions[name] = rect
+            self._owners[name] = owner
+            self._merged = None
+            self.version += 1
+        logger.debug(f"ROI '{name}' declared by {owner or 'unknown'}: {rect.as_tuple()}")
+        return rect
+    
+    def remove(self, name: str):
+        """Forget a region."""
+        with self._lock:
+            if self._regions.pop(name, None) is not None:
+                self._owners.pop(name, None)
+                self._merged = None
+                self.version += 1
+    
+    def get(self, name: str) -> Optional[Rect]:
+        """Get a declared region by name."""
+        return self._regions.get(name)
+    
+    def regions(self) -> Dict[str, Rect]:
+        """Get a copy of all declared regions."""
+        with self._lock:
+            return dict(self._regions)
+    
+    def capture_rects(self) -> List[Rect]:
+        """
+        Get the minimal set of rectangles covering every declared ROI.
+        
+        Returns:
+            Merged rectangles (empty if nothing is declared)
+        """
+        with self._lock:
+            if self._merged is None:
+                self._merged = merge_rects(self._regions.values(), self.gap, self.max_waste)
+            return list(self._merged)
+    
+    def load_screen_regions(self, config_file: str = "config/screen_regions.json") -> int:
+        """
+        Declare the regions stored in ``screen_regions.json``.
+        
+        Args:
+            config_file: Path to the JSON file ({"screen_regions": {name: {x, y, width, height}}})
+            
+        Returns:
+            Number of regions declared
+        """
+        try:
+            if not os.path.exists(config_file):
+                return 0
+            with open(config_file, 'r', encoding='utf-8') as f:
+                regions = json.load(f).get("screen_regions", {})
+            for name, region in regions.items():
+                self.declare(name, region["x"], region["y"], region["width"], region["height"], owner="config")
+            return len(regions)
+        except Exception as e:
+            logger.error(f"Error loading screen regions: {e}")
+            return 0
+    
+    def get_stats(self, screen_width: int = 0, screen_height: int = 0) -> Dict:
+        """
+        Get pixel counts of the partial capture.
+        
+        Args:
+            screen_width, screen_height: Full screen size for the savings ratio
+            
+        Returns:
+            Dictionary with ROI count, rectangle count and captured pixels
+        """
+        rects = self.capture_rects()
+        pixels = sum(r.area for r in rects)
+        full = screen_width * screen_height
+        return {
+            "rois": len(self._regions),
+            "capture_rects": len(rects),
+            "captured_pixels": pixels,
+            "screen_fraction": (pixels / full) if full else None,
+        }
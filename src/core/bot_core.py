@@ -5,6 +5,7 @@ This module provides the main bot functionality by orchestrating
 all the different modules (vision, control, features, etc.).
 """
 
+import os
 import time
 import threading
 from typing import Optional, Dict, Any
@@ -12,7 +13,11 @@ from pathlib import Path
 
 # Import our modules
 from vision.screen_reader import ScreenReader
-from vision.template_matcher import TemplateMatcher
+from capture.frame_bus import FrameBus
+from capture.roi_registry import RoiRegistry
+from capture.region_grabber import RegionGrabber
+from capture.layout_detector import LayoutDetector
+from detection.template_matcher import TemplateMatcher
 from control.keyboard_controller import KeyboardController
 from control.mouse_controller import MouseController
 from core.state_machine import StateMachine, BotState
@@ -20,6 +25,7 @@ from config.config_manager import ConfigManager
 from features.auto_attack import AutoAttack
 from features.auto_loot import AutoLoot
 from features.auto_walk import AutoWalk
+from features.supply_monitor import SupplyMonitor
 
 
 class BotCore:
@@ -43,7 +49,15 @@ class BotCore:
         
         # Initialize core modules
         self.screen_reader = ScreenReader(self.config.window_title)
-        self.template_matcher = TemplateMatcher()
+        self.roi_registry = RoiRegistry()
+        self.roi_registry.load_screen_regions()
+        self.region_grabber = RegionGrabber()
+        self.frame_bus = FrameBus(self.screen_reader.capture_single_frame,
+                                  registry=self.roi_registry,
+                                  region_capture_fn=self.region_grabber.grab)
+        self.layout_detector = LayoutDetector(os.path.join(config_dir, "ui_layout.json"))
+        self.layout = None
+        self.template_matcher = TemplateMatcher(roi_registry=self.roi_registry)
         self.keyboard_controller = KeyboardController(self.config.window_title)
         self.mouse_controller = MouseController(self.config.window_title)
         self.state_machine = StateMachine()
@@ -55,9 +69,14 @@ class BotCore:
         self._vision_thread: Optional[threading.Thread] = None
         
         # Initialize features
-        self.auto_attack = AutoAttack(self.screen_reader, self.keyboard_controller, self.mouse_controller)
-        self.auto_loot = AutoLoot(self.screen_reader, self.mouse_controller)
+        self.auto_attack = AutoAttack(self.screen_reader, self.keyboard_controller, self.mouse_controller,
+                                      frame_bus=self.frame_bus, roi_registry=self.roi_registry)
+        self.auto_loot = AutoLoot(self.screen_reader, self.mouse_controller, self.keyboard_controller,
+                                  frame_bus=self.frame_bus, roi_registry=self.roi_registry)
         self.auto_walk = AutoWalk(self.keyboard_controller, self)
+        self.supply_monitor = SupplyMonitor(frame_bus=self.frame_bus, roi_registry=self.roi_registry,
+                                            state_machine=self.state_machine,
+                                            config_file=os.path.join(config_dir, "supplies.json"))
         self.enable_auto_loot = True  # Set to True to enable auto-loot by default
         self.enable_auto_walk = True  # Set to True to enable auto-walk by default
         self.auto_walk_paused = False
@@ -101,6 +120,8 @@ class BotCore:
             
             # Start all modules
             self.screen_reader.start_capture()
+            self._setup_partial_capture()
+            self.frame_bus.start()
             self.keyboard_controller.start()
             self.mouse_controller.start()
             self.state_machine.start()
@@ -121,6 +142,8 @@ class BotCore:
             if self.enable_auto_walk:
                 threading.Thread(target=self.auto_walk.start, daemon=True).start()
             
+            self.supply_monitor.start()
+            
             self.logger.info("Bot started successfully")
             return True
             
@@ -137,12 +160,14 @@ class BotCore:
         self.is_running = False
         
         # Stop all modules
+        self.frame_bus.stop()
         self.screen_reader.stop_capture()
         self.keyboard_controller.stop()
         self.mouse_controller.stop()
         self.state_machine.stop()
         self.auto_loot.stop()
         self.auto_walk.stop()
+        self.supply_monitor.stop()
         
         # Wait for threads to finish
         if self._main_thread:
@@ -190,6 +215,8 @@ class BotCore:
             
             # Start all modules in safe mode
             self.screen_reader.start_capture()
+            self._setup_partial_capture()
+            self.frame_bus.start()
             self.keyboard_controller.start()
             self.mouse_controller.start()
             self.state_machine.start()
@@ -210,6 +237,8 @@ class BotCore:
             if self.enable_auto_walk:
                 threading.Thread(target=self.auto_walk.start, daemon=True).start()
             
+            self.supply_monitor.start()
+            
             self.logger.info("Bot started in SAFE MODE - no actual interactions")
             return True
             
@@ -232,6 +261,8 @@ class BotCore:
             
             # Initialize modules
             self.screen_reader.start_capture()
+            self._setup_partial_capture()
+            self.frame_bus.start()
             self.keyboard_controller.start()
             self.mouse_controller.start()
             self.state_machine.start()
@@ -243,6 +274,31 @@ class BotCore:
             self.logger.error(f"Error initializing bot: {e}")
             return False
     
+    def _setup_partial_capture(self):
+        """Give the frame bus the screen size it needs to grab declared ROIs."""
+        try:
+            width, height = self.region_grabber.screen_size()
+            self.frame_bus.screen_size = (width, height)
+        except Exception as e:
+            self.logger.warning(f"Partial capture disabled: {e}")
+            self.frame_bus.screen_size = None
+        self._setup_layout()
+    
+    def _setup_layout(self):
+        """Validate the stored UI layout (or detect it once) and calibrate the features."""
+        try:
+            image = self.screen_reader.capture_single_frame()
+            if image is None:
+                self.logger.warning("No frame available for UI layout detection")
+                return
+            window_rect = getattr(self.screen_reader.window_info, 'rect', None)
+            self.layout = self.layout_detector.load_or_detect(image, window_rect)
+            self.layout_detector.apply(self.layout, self.roi_registry,
+                                       auto_attack=self.auto_attack, auto_loot=self.auto_loot)
+            self.template_matcher.declare_default_rois(self.layout)
+        except Exception as e:
+            self.logger.warning(f"UI layout detection failed, keeping configured regions: {e}")
+    
     def _main_loop(self):
         """Main bot loop."""
         while self.is_running:
@@ -274,16 +330,18 @@ class BotCore:
     
     def _vision_loop(self):
         """Vision processing loop."""
+        last_seq = 0
         while self.is_running:
             try:
                 if not self.is_paused:
-                    # Get current frame
-                    frame = self.screen_reader.get_current_frame()
+                    # Wait for the next frame published on the shared bus
+                    frame = self.frame_bus.wait_for_frame(last_seq, timeout=0.5)
                     if frame is not None:
-                        # Process vision data
+                        last_seq = frame.seq
+                        # Process vision data (ROI crops come from the shared frame)
                         self._process_vision_data(frame)
-                
-                time.sleep(0.05)  # 20 FPS for vision processing
+                else:
+                    time.sleep(0.05)
                 
             except Exception as e:
                 self.logger.error(f"Error in vision loop: {e}")
@@ -515,7 +573,10 @@ class BotCore:
     
     @property
     def is_attacking(self):
-        # Returns True if bot is in COMBAT state
+        # While auto-attack runs, trust the on-screen target markers
+        if self.auto_attack.running:
+            return self.auto_attack.target_marker.is_attacking
+        # Otherwise fall back to the COMBAT state
         return self.state_machine.current_state.name == "COMBAT"
     
     def pause_auto_walk(self):
@@ -0,0 +1,160 @@
+"""
+Batch Matcher Module for Tibia Bot
+
+This module matches many same-sized templates against one search region
+in a single vectorized pass. Normalized cross-correlation is computed in
+the frequency domain: the search region (and its square, for masked
+templates) is transformed once, multiplied with the cached spectra of all
+templates of a stack and transformed back together. Window sums for the
+normalization come from an integral image, so adding templates to a stack
+only adds one spectrum product and one inverse transform each instead of
+a full ``cv2.matchTemplate`` call.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BestMatch = Tuple[str, int, int, float]  # (name, x, y, score) inside the region
+
+
+class TemplateStack:
+    """
+    Same-sized templates prepared for batched ZNCC.
+
+    Scores are the same measure as ``cv2.TM_CCOEFF_NORMED`` (with its mask
+    semantics for masked templates). Patches with no variance score 0.
+    """
+
+    def __init__(self, names: Sequence[str], templates: Sequence[np.ndarray],
+                 masks: Optional[Sequence[Optional[np.ndarray]]] = None,
+                 chunk_size: int = 64, cache_size: int = 4):
+        """
+        Initialize the TemplateStack.
+
+        Args:
+            names: Template names
+            templates: Grayscale templates, all of the same shape
+            masks: Optional per-template masks (non-zero = template pixel, None = no mask)
+            chunk_size: Templates correlated per vectorized pass (bounds memory)
+            cache_size: Search-region sizes whose template spectra are kept
+
+        Raises:
+            ValueError: If the stack is empty or the templates differ in shape
+        """
+        if not templates:
+            raise ValueError("Template stack needs at least one template")
+        shapes = {np.shape(t) for t in templates}
+        if len(shapes) != 1:
+            raise ValueError(f"Templates of a stack must share one shape, got {sorted(shapes)}")
+        self.names = list(names)
+        self.shape: Tuple[int, int] = shapes.pop()
+        self.chunk_size = max(1, chunk_size)
+        self.cache_size = cache_size
+
+        images = np.stack([np.asarray(t, dtype=np.float64) for t in templates])
+        masks = list(masks) if masks is not None else [None] * len(images)
+        self.masked = any(m is not None for m in masks)
+        weights = np.stack([(np.asarray(m) > 0).astype(np.float64) if m is not None else np.ones(self.shape)
+                            for m in masks])
+        self.counts = weights.sum(axis=(1, 2))
+        means = (images * weights).sum(axis=(1, 2)) / np.maximum(self.counts, 1)
+        self.zero_mean = (images - means[:, None, None]) * weights
+        self.norms = np.sqrt((self.zero_mean ** 2).sum(axis=(1, 2)))
+        self.weights = weights if self.masked else None
+        self._spectra: "OrderedDict[Tuple[int, int], Tuple[np.ndarray, Optional[np.ndarray]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def correlate(self, region: np.ndarray) -> np.ndarray:
+        """
+        Score every template at every position of a search region.
+
+        Args:
+            region: Grayscale search region (at least the template size)
+
+        Returns:
+            float32 array (templates, H - h + 1, W - w + 1); empty if the region is too small
+        """
+        th, tw = self.shape
+        region = np.asarray(region, dtype=np.float64)
+        height, width = region.shape
+        if height < th or width < tw:
+            return np.zeros((len(self), 0, 0), np.float32)
+        out_h, out_w = height - th + 1, width - tw + 1
+
+        # Circular correlation is exact on the valid part once the FFT covers the region
+        size = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+        template_f, mask_f = self._spectra_for(size)
+        # ZNCC ignores a constant offset; centering keeps the float32 products small
+        region = region - region.mean()
+        region_f = np.fft.rfft2(region.astype(np.float32), s=size)
+        valid = (slice(None), slice(th - 1, th - 1 + out_h), slice(tw - 1, tw - 1 + out_w))
+
+        if self.masked:
+            # Masked window sums stay in float64: the variance subtracts two large terms
+            region_f64 = np.fft.rfft2(region, s=size)
+            square_f = np.fft.rfft2(region * region, s=size)
+        else:
+            # Same window for every template: sums from the integral images
+            sums_i, squares_i = cv2.integral2(region, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+            sums = sums_i[th:, tw:] - sums_i[:-th, tw:] - sums_i[th:, :-tw] + sums_i[:-th, :-tw]
+            squares = squares_i[th:, tw:] - squares_i[:-th, tw:] - squares_i[th:, :-tw] + squares_i[:-th, :-tw]
+            shared_variance = squares - sums * sums / (th * tw)
+
+        scores = np.empty((len(self), out_h, out_w), np.float32)
+        for start in range(0, len(self), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            numerator = np.fft.irfft2(region_f[None] * template_f[chunk], s=size)[valid]
+            if self.masked:
+                sums = np.fft.irfft2(region_f64[None] * mask_f[chunk], s=size)[valid]
+                squares = np.fft.irfft2(square_f[None] * mask_f[chunk], s=size)[valid]
+                variance = squares - sums * sums / np.maximum(self.counts[chunk], 1)[:, None, None]
+            else:
+                variance = np.broadcast_to(shared_variance, numerator.shape)
+            # FFT round-off makes flat patches slightly non-zero: treat them as no match
+            flat = variance < 1e-2
+            denominator = self.norms[chunk][:, None, None] * np.sqrt(np.where(flat, 1.0, variance))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = numerator / denominator
+            result[flat | ~np.isfinite(result)] = 0.0
+            scores[chunk] = np.clip(result, -1.0, 1.0)
+        return scores
+
+    def best(self, region: np.ndarray) -> List[BestMatch]:
+        """
+        Best location and score of every template.
+
+        Args:
+            region: Grayscale search region
+
+        Returns:
+            (name, x, y, score) per template, in stack order (empty if the region is too small)
+        """
+        scores = self.correlate(region)
+        if scores.size == 0:
+            return []
+        flat = scores.reshape(len(self), -1)
+        indices = flat.argmax(axis=1)
+        ys, xs = np.unravel_index(indices, scores.shape[1:])
+        return [(name, int(x), int(y), float(flat[i, indices[i]]))
+                for i, (name, x, y) in enumerate(zip(self.names, xs, ys))]
+
+    def _spectra_for(self, size: Tuple[int, int]):
+        cached = self._spectra.get(size)
+        if cached is not None:
+            self._spectra.move_to_end(size)
+            return cached
+        # Correlation = convolution with the flipped template
+        template_f = np.fft.rfft2(self.zero_mean[:, ::-1, ::-1], s=size).astype(np.complex64)
+        mask_f = np.fft.rfft2(self.weights[:, ::-1, ::-1], s=size) if self.masked else None
+        self._spectra[size] = (template_f, mask_f)
+        if len(self._spectra) > self.cache_size:
+            self._spectra.popitem(last=False)
+        return template_f, mask_f
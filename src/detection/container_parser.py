@@ -0,0 +1,334 @@
+"""
+Container Parser Module for Tibia Bot
+
+This module identifies the items in open containers and corpses. Tibia
+draws container contents on a fixed grid of 32x32 slots, so each slot is
+cut out of the grid, its stack-count corner is masked and the remaining
+sprite pixels are hashed. The hash is looked up in an item dictionary
+built once from ``resources/templates/loot``, which makes identification
+a dictionary lookup per slot instead of a template match per item.
+"""
+
+import os
+import re
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from detection.template_bank import TemplateBank
+
+logger = logging.getLogger(__name__)
+
+EMPTY = "empty"
+
+
+@dataclass(frozen=True)
+class SlotGrid:
+    """Container slot layout at 100% UI scale (pixels)."""
+    slot_size: int = 32
+    pitch: int = 37           # Slot size plus the gap between slots
+    count_width: int = 14     # Stack-count digits, bottom-right corner of a slot
+    count_height: int = 9
+
+    def count_mask(self) -> np.ndarray:
+        """Boolean mask of the sprite pixels that are hashed (False on the count corner)."""
+        mask = np.ones((self.slot_size, self.slot_size), dtype=bool)
+        mask[self.slot_size - self.count_height:, self.slot_size - self.count_width:] = False
+        return mask
+
+
+@dataclass
+class SlotItem:
+    """One parsed container slot."""
+    index: int
+    column: int
+    row: int
+    x: int          # Slot center, in the coordinates of the parsed image plus the given origin
+    y: int
+    name: str       # Item name, EMPTY or '' when unknown
+
+
+def _average_hash(pixels: np.ndarray) -> int:
+    """64-bit average hash of a (masked) slot, for near-exact fallbacks."""
+    gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY) if pixels.ndim == 3 else pixels
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    bits = (small > small.mean()).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class ItemDictionary:
+    """
+    Sprite hash -> item name lookup built from slot screenshots.
+
+    Files are named after the item (``gold_coin.png``); extra sprites of
+    the same item, such as the coin pile drawn for larger stacks, take a
+    numeric suffix (``gold_coin_2.png``). ``empty_slot.png`` marks empty
+    slots.
+    """
+
+    def __init__(self, grid: Optional[SlotGrid] = None, max_distance: int = 4):
+        """
+        Initialize the ItemDictionary.
+
+        Args:
+            grid: Slot layout (defaults to 32x32 slots)
+            max_distance: Max average-hash Hamming distance for the fallback lookup
+        """
+        self.grid = grid or SlotGrid()
+        self.max_distance = max_distance
+        self._mask = self.grid.count_mask()
+        self._exact: Dict[bytes, str] = {}
+        self._approx: List[Tuple[int, str]] = []
+
+    @classmethod
+    def load(cls, directory: str = "resources/templates/loot", grid: Optional[SlotGrid] = None) -> "ItemDictionary":
+        """
+        Build the dictionary from a directory of slot PNGs.
+
+        Args:
+            directory: Loot template directory
+            grid: Slot layout
+
+        Returns:
+            ItemDictionary (empty if the directory does not exist)
+        """
+        dictionary = cls(grid)
+        bank = TemplateBank.for_directory(directory)
+        if bank is not None:
+            dictionary.load_bank(bank, os.path.basename(os.path.normpath(directory)))
+            return dictionary
+        if not os.path.isdir(directory):
+            logger.warning(f"Loot template directory not found: {directory}")
+            return dictionary
+        for filename in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() != ".png":
+                continue
+            image = cv2.imread(os.path.join(directory, filename), cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            name = EMPTY if stem == "empty_slot" else re.sub(r"_\d+$", "", stem)
+            dictionary.add(name, image)
+        logger.info(f"Item dictionary: {len(dictionary)} sprites from {directory}")
+        return dictionary
+
+    def load_bank(self, bank: TemplateBank, group: str = "loot"):
+        """
+        Add every sprite of a template bank group.
+
+        The bank stores both hashes for the default slot grid, so in that
+        case no sprite pixels are touched at all.
+
+        Args:
+            bank: Opened template bank
+            group: Group holding the loot sprites
+        """
+        precomputed = self.grid == SlotGrid()
+        for entry in bank.entries(group):
+            stem = entry.name.split("/", 1)[1]
+            name = EMPTY if stem == "empty_slot" else re.sub(r"_\d+$", "", stem)
+            if precomputed and "slot_key" in entry.meta:
+                self._exact[bytes.fromhex(entry.meta["slot_key"])] = name
+                self._approx.append((entry.meta["slot_hash"], name))
+                continue
+            image = entry.array("image")
+            if image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            self.add(name, image[:, :, :3])
+        logger.info(f"Item dictionary: {len(self)} sprites from {bank.path}")
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, name: str, slot_image: np.ndarray):
+        """Add one slot sprite (cropped or centered to the slot size)."""
+        key, average = self.hashes(slot_image)
+        if key is None:
+            logger.warning(f"Sprite for {name} is smaller than a slot, skipped")
+            return
+        self._exact[key] = name
+        self._approx.append((average, name))
+
+    def hashes(self, slot_image: np.ndarray) -> Tuple[Optional[bytes], Optional[int]]:
+        """
+        Exact key and average hash of a sprite, as stored in the dictionary.
+
+        Args:
+            slot_image: BGR sprite (cropped or centered to the slot size)
+
+        Returns:
+            (key, average hash), or (None, None) if the image is smaller than a slot
+        """
+        slot = self._fit(slot_image)
+        if slot is None:
+            return None, None
+        return self.key(slot), _average_hash(self._masked(slot))
+
+    def key(self, slot: np.ndarray) -> bytes:
+        """Exact hash of a slot's sprite pixels (stack count masked out)."""
+        return hashlib.blake2b(np.ascontiguousarray(slot[self._mask]).tobytes(), digest_size=16).digest()
+
+    def lookup(self, slot: np.ndarray) -> str:
+        """
+        Identify one slot.
+
+        Args:
+            slot: BGR slot image (slot_size x slot_size)
+
+        Returns:
+            Item name, EMPTY, or '' when unknown
+        """
+        return self.match(slot)[0]
+
+    def match(self, slot: np.ndarray) -> Tuple[str, bool]:
+        """
+        Identify one slot, telling exact hash hits from near-exact ones.
+
+        Args:
+            slot: BGR slot image (slot_size x slot_size)
+
+        Returns:
+            (item name, EMPTY or '', True if the exact hash matched)
+        """
+        name = self._exact.get(self.key(slot))
+        if name is not None:
+            return name, True
+        if not self._approx:
+            return "", False
+        # Near-exact fallback (e.g. a highlighted or slightly different sprite)
+        target = _average_hash(self._masked(slot))
+        distance, name = min((bin(h ^ target).count("1"), n) for h, n in self._approx)
+        return (name if distance <= self.max_distance else ""), False
+
+    def _masked(self, slot: np.ndarray) -> np.ndarray:
+        masked = slot.copy()
+        masked[~self._mask] = 0
+        return masked
+
+    def _fit(self, image: np.ndarray) -> Optional[np.ndarray]:
+        size = self.grid.slot_size
+        h, w = image.shape[:2]
+        if h < size or w < size:
+            return None
+        top, left = (h - size) // 2, (w - size) // 2
+        return image[top:top + size, left:left + size]
+
+
+class ContainerParser:
+    """Cut a container window into slots and identify each one."""
+
+    def __init__(self, dictionary: Optional[ItemDictionary] = None, grid: Optional[SlotGrid] = None,
+                 gap_ratio: float = 0.5, min_contrast: float = 2.0):
+        """
+        Initialize the ContainerParser.
+
+        Args:
+            dictionary: Item dictionary (built from resources/templates/loot by default)
+            grid: Slot layout
+            gap_ratio: Max gap / slot contrast for a grid origin to be trusted
+            min_contrast: Min slot contrast (gray level std) for a grid origin to be trusted
+        """
+        self.grid = grid or (dictionary.grid if dictionary is not None else SlotGrid())
+        self.dictionary = dictionary if dictionary is not None else ItemDictionary.load(grid=self.grid)
+        self.gap_ratio = gap_ratio
+        self.min_contrast = min_contrast
+        self.origin: Optional[Tuple[int, int]] = None  # First slot's top-left inside the container image
+
+    def reset(self):
+        """Forget the grid origin (call when the container area moves, closes or reopens)."""
+        self.origin = None
+
+    def locate(self, image: np.ndarray) -> Tuple[int, int]:
+        """
+        Find the grid origin inside a container image.
+
+        The gaps between slots are flat strips of the window background, so
+        the origin is the offset whose gap columns/rows vary the least.
+
+        Args:
+            image: BGR container image
+
+        Returns:
+            (x, y) of the first slot's top-left corner
+        """
+        return self._locate(image)[0]
+
+    def _locate(self, image: np.ndarray) -> Tuple[Tuple[int, int], bool]:
+        """Grid origin, and whether the gaps stand out from the slots clearly enough to trust it."""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        g = self.grid
+
+        def best_offset(profile: np.ndarray) -> Tuple[int, bool]:
+            positions = np.arange(len(profile))
+            scores, contrasts = [], []
+            for offset in range(g.pitch):
+                phase = (positions - offset) % g.pitch
+                gaps = (positions >= offset + g.slot_size) & (phase >= g.slot_size)
+                slots = (positions >= offset) & (phase < g.slot_size)
+                scores.append(profile[gaps].mean() if gaps.any() else np.inf)
+                contrasts.append(profile[slots].mean() if slots.any() else 0.0)
+            best = int(np.argmin(scores))
+            # A flat (or empty) panel has no contrast anywhere: any offset would do
+            confident = contrasts[best] >= self.min_contrast and scores[best] <= self.gap_ratio * contrasts[best]
+            return best, confident
+
+        (x, x_confident), (y, y_confident) = best_offset(gray.std(axis=0)), best_offset(gray.std(axis=1))
+        return (x, y), x_confident and y_confident
+
+    def parse(self, image: np.ndarray, origin: Tuple[int, int] = (0, 0)) -> List[SlotItem]:
+        """
+        Identify every slot of a container.
+
+        The grid origin is kept once it is located with confidence, and
+        located again when no slot matches an exact sprite hash.
+
+        Args:
+            image: BGR container image
+            origin: Screen position of ``image`` (added to slot centers)
+
+        Returns:
+            One SlotItem per full slot, row by row (none if no slot grid is visible)
+        """
+        if self.origin is None:
+            located, confident = self._locate(image)
+            if not confident:
+                return []
+            self.origin = located
+        items, exact = self._read(image, self.origin, origin)
+        if not exact:
+            # Wrong origin, or the window changed: find the grid again
+            located, confident = self._locate(image)
+            if not confident:
+                self.origin = None
+                return []
+            if located != self.origin:
+                self.origin = located
+                items, _ = self._read(image, located, origin)
+        return items
+
+    def _read(self, image: np.ndarray, grid_origin: Tuple[int, int],
+              origin: Tuple[int, int]) -> Tuple[List[SlotItem], int]:
+        """Slots at one grid origin, and how many matched an exact hash."""
+        ox, oy = grid_origin
+        g = self.grid
+        columns = max(0, (image.shape[1] - ox - g.slot_size) // g.pitch + 1)
+        rows = max(0, (image.shape[0] - oy - g.slot_size) // g.pitch + 1)
+
+        items = []
+        exact = 0
+        for row in range(rows):
+            top = oy + row * g.pitch
+            for column in range(columns):
+                left = ox + column * g.pitch
+                slot = image[top:top + g.slot_size, left:left + g.slot_size]
+                name, hit = self.dictionary.match(slot)
+                exact += hit
+                items.append(SlotItem(index=len(items), column=column, row=row,
+                                      x=origin[0] + left + g.slot_size // 2,
+                                      y=origin[1] + top + g.slot_size // 2,
+                                      name=name))
+        return items, exact
@@ -0,0 +1,100 @@
+"""
+Digit Reader Module for Tibia Bot
+
+This module reads the stack counts Tibia draws in the bottom-right corner
+of item slots (containers, action bars, hotkeys). The count is a line of
+small light-gray digits, so it is read with the same glyph bank technique
+as battle list names, using a digit-only bank. Counts are cached by a
+hash of the slot's count pixels: a slot that did not change since it was
+last read costs one hash and one dictionary lookup.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from detection.container_parser import SlotGrid
+from detection.name_recognizer import GlyphBank
+
+logger = logging.getLogger(__name__)
+
+
+class DigitReader:
+    """Read item stack counts with a digit glyph bank and a pixel-hash cache."""
+
+    def __init__(self, glyph_bank: Optional[GlyphBank] = None, grid: Optional[SlotGrid] = None,
+                 cache_size: int = 512, text_threshold: int = 170, max_spread: int = 40):
+        """
+        Initialize the DigitReader.
+
+        Args:
+            glyph_bank: Digit glyphs (loaded from resources/templates/digits by default)
+            grid: Slot layout (the count line is the bottom ``count_height`` rows)
+            cache_size: Max remembered count images
+            text_threshold: Min brightness (every channel) of a digit pixel
+            max_spread: Max channel spread of a digit pixel (digits are gray, sprites are not)
+        """
+        self.glyph_bank = glyph_bank if glyph_bank is not None else GlyphBank.load("resources/templates/digits",
+                                                                                  text_threshold=text_threshold)
+        self.grid = grid or SlotGrid()
+        self.cache_size = cache_size
+        self.text_threshold = text_threshold
+        self.max_spread = max_spread
+        self._cache: "OrderedDict[int, Optional[int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count_line(self, slot_image: np.ndarray) -> np.ndarray:
+        """The pixel rows of a slot that hold the stack count."""
+        return slot_image[-self.grid.count_height:]
+
+    def read(self, slot_image: np.ndarray) -> Optional[int]:
+        """
+        Read the stack count of one slot.
+
+        Args:
+            slot_image: BGR slot image (slot_size x slot_size)
+
+        Returns:
+            The count, 0 when no count is drawn, or None when the digits could not be read
+        """
+        line = np.ascontiguousarray(self.count_line(slot_image))
+        key = hash((line.shape, line.tobytes()))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        count = self._read_line(line)
+        self._cache[key] = count
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return count
+
+    def _read_line(self, line: np.ndarray) -> Optional[int]:
+        if line.ndim == 3:
+            line = line.astype(np.int16)
+            spread = line.max(axis=2) - line.min(axis=2)
+            mask = (line.min(axis=2) >= self.text_threshold) & (spread <= self.max_spread)
+        else:
+            mask = line >= self.text_threshold
+        if not mask.any():
+            return 0
+        if not len(self.glyph_bank):
+            return None
+        text = self.glyph_bank.read(mask).replace(" ", "")
+        return int(text) if text.isdigit() else None
+
+    def get_stats(self) -> Dict:
+        """Cache statistics."""
+        total = self.hits + self.misses
+        return {
+            'glyphs': len(self.glyph_bank),
+            'cached_counts': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,230 @@
+"""
+Entity Classifier Module for Tibia Bot
+
+This module tells players and monsters apart so targeting never attacks
+players. It only looks at pixels the battle list and viewport passes
+already have in hand:
+
+- Skull and party shield icons, which only players carry
+- The battle list name: its color (creature names are plain gray, player
+  highlights such as party or guild members are colored) and the list of
+  known monster names (``resources/monsters.json``)
+- Outfit colors: player outfits have four freely chosen colors, so their
+  icons show more distinct hues than most monsters. This is the weakest
+  cue and only breaks ties between conflicting name cues.
+
+Without any name evidence the entity is "unknown": colorful monsters
+would be taken for players on outfit hues alone, so targeting treats
+unknown entities like it did before the classifier existed.
+"""
+
+import os
+import json
+import logging
+from typing import Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MONSTER = "monster"
+PLAYER = "player"
+UNKNOWN = "unknown"
+
+
+class EntityClassifier:
+    """
+    Classify battle list rows and viewport entities as player or monster.
+
+    A skull/party mark means player. Otherwise the name cues vote: a
+    colored name for player, a known monster name for monster. With no
+    name cue the kind is unknown; when both fire, outfit hue diversity
+    breaks the tie. ``classify`` returns the kind and the cue that decided it.
+    """
+
+    def __init__(self, monster_names: Iterable[str] = (), monsters_file: str = "resources/monsters.json",
+                 icons_dir: str = "resources/templates/icons", mark_min_pixels: int = 12,
+                 hue_bins: int = 12, player_hue_count: int = 3, text_threshold: int = 150,
+                 name_color_spread: int = 60):
+        """
+        Initialize the EntityClassifier.
+
+        Args:
+            monster_names: Extra known monster names (case-insensitive)
+            monsters_file: JSON file with a "monsters" list of names
+            icons_dir: Skull / party shield templates for the viewport check
+            mark_min_pixels: Icon pixels needed in the battle list marks slot
+            hue_bins: Hue histogram bins for the outfit check
+            player_hue_count: Distinct populated hue bins that indicate a player outfit
+            text_threshold: Min brightness (max channel) of a name text pixel
+            name_color_spread: Min channel spread of the text color for a colored name
+        """
+        self.monster_names = set()
+        self.load_monster_names(monsters_file)
+        self.add_monster_names(monster_names)
+        self.mark_min_pixels = mark_min_pixels
+        self.hue_bins = hue_bins
+        self.player_hue_count = player_hue_count
+        self.text_threshold = text_threshold
+        self.name_color_spread = name_color_spread
+        self.icons = self._load_icons(icons_dir)
+
+    def load_monster_names(self, monsters_file: str) -> int:
+        """
+        Add the names of a monster list file.
+
+        Returns:
+            Number of names read
+        """
+        try:
+            if os.path.exists(monsters_file):
+                with open(monsters_file, 'r', encoding='utf-8') as f:
+                    names = json.load(f).get("monsters", [])
+                self.add_monster_names(names)
+                logger.info(f"Loaded {len(names)} monster names from {monsters_file}")
+                return len(names)
+        except Exception as e:
+            logger.error(f"Error loading monster names: {e}")
+        return 0
+
+    def add_monster_names(self, names: Iterable[str]):
+        """Extend the name table."""
+        self.monster_names.update(name.lower() for name in names)
+
+    def classify(self, name: str = "", has_mark: bool = False, hue_count: int = 0,
+                 name_colored: bool = False) -> Tuple[str, str]:
+        """
+        Combine the cues of one entity.
+
+        Args:
+            name: Recognized name ('' if unknown)
+            has_mark: A skull or party shield was found
+            hue_count: Distinct outfit hues (0 if not measured)
+            name_colored: The name is drawn in a player highlight color
+
+        Returns:
+            (kind, deciding cue)
+        """
+        if has_mark:
+            return PLAYER, "mark"
+        known = bool(name) and name.lower() in self.monster_names
+        if name_colored and not known:
+            return PLAYER, "name color"
+        if known and not name_colored:
+            return MONSTER, "name"
+        if not name_colored:
+            # No name evidence: outfit hues alone would skip colorful monsters
+            return UNKNOWN, "no name"
+        # Conflicting name cues: the outfit breaks the tie
+        if hue_count >= self.player_hue_count:
+            return PLAYER, "outfit"
+        return MONSTER, "default"
+
+    def classify_row(self, battle_list_image: np.ndarray, geometry, row_top: int, name: str = "") -> Tuple[str, str]:
+        """
+        Classify one battle list row.
+
+        Args:
+            battle_list_image: BGR crop of the battle list
+            geometry: BattleListGeometry of the list
+            row_top: Row top inside the crop
+            name: Recognized name of the row
+
+        Returns:
+            (kind, deciding cue)
+        """
+        has_mark = self.has_mark(geometry.marks_slot(battle_list_image, row_top))
+        if has_mark:
+            return self.classify(name, has_mark)
+        name_colored = self.is_name_colored(geometry.name_strip(battle_list_image, row_top))
+        known = bool(name) and name.lower() in self.monster_names
+        if not (name_colored and known):
+            return self.classify(name, False, 0, name_colored)
+        hue_count = self.outfit_hue_count(geometry.outfit_icon(battle_list_image, row_top))
+        return self.classify(name, False, hue_count, name_colored)
+
+    def classify_viewport(self, image: np.ndarray, center: Tuple[int, int], tile_size: int) -> Tuple[str, str]:
+        """
+        Classify an entity in the game viewport.
+
+        Args:
+            image: BGR frame the entity was detected in
+            center: Entity center in image coordinates
+            tile_size: Game tile size in pixels
+
+        Returns:
+            (kind, deciding cue)
+        """
+        cx, cy = center
+        width = image.shape[1]
+        # Name, skull and shield are drawn in the tile row above the creature
+        x0, x1 = max(0, cx - tile_size), min(width, cx + tile_size)
+        y0, y1 = max(0, cy - tile_size - tile_size // 2), max(0, cy - tile_size // 2)
+        has_mark = self._match_icons(image[y0:y1, x0:x1])
+        # No name is read in the viewport, so without a mark the outfit cannot decide either
+        return self.classify("", has_mark)
+
+    def has_mark(self, slot: np.ndarray) -> bool:
+        """Whether a battle list marks slot holds a skull or shield icon."""
+        if slot.size == 0:
+            return False
+        background = np.median(slot.reshape(-1, slot.shape[-1]), axis=0)
+        differs = np.abs(slot.astype(np.int16) - background.astype(np.int16)).max(axis=-1) > 60
+        return int(np.count_nonzero(differs)) >= self.mark_min_pixels
+
+    def is_name_colored(self, name_strip: np.ndarray) -> bool:
+        """Whether a battle list name is drawn in a color instead of the plain gray."""
+        if name_strip.size == 0 or name_strip.ndim != 3:
+            return False
+        pixels = name_strip.reshape(-1, name_strip.shape[-1])
+        text = pixels[pixels.max(axis=1) >= self.text_threshold]
+        if len(text) < 10:
+            return False
+        color = np.median(text, axis=0)
+        return float(color.max() - color.min()) >= self.name_color_spread
+
+    def outfit_hue_count(self, outfit: np.ndarray, hsv: Optional[np.ndarray] = None) -> int:
+        """
+        Count distinct, well-populated hues in an outfit image.
+
+        Args:
+            outfit: BGR outfit image
+            hsv: Its HSV conversion, if already computed
+
+        Returns:
+            Number of hue bins holding at least 8% of the colored pixels
+        """
+        if outfit.size == 0:
+            return 0
+        if hsv is None:
+            hsv = cv2.cvtColor(np.ascontiguousarray(outfit), cv2.COLOR_BGR2HSV)
+        colored = (hsv[..., 1] > 80) & (hsv[..., 2] > 60)
+        hues = hsv[..., 0][colored]
+        if hues.size < 10:
+            return 0
+        counts = np.bincount((hues.astype(np.int32) * self.hue_bins) // 180, minlength=self.hue_bins)
+        return int(np.count_nonzero(counts >= 0.08 * hues.size))
+
+    def _match_icons(self, area: np.ndarray, threshold: float = 0.85) -> bool:
+        if not self.icons or area.size == 0:
+            return False
+        for icon in self.icons:
+            if icon.shape[0] > area.shape[0] or icon.shape[1] > area.shape[1]:
+                continue
+            result = cv2.matchTemplate(area, icon, cv2.TM_CCOEFF_NORMED)
+            if float(result.max()) >= threshold:
+                return True
+        return False
+
+    @staticmethod
+    def _load_icons(icons_dir: str):
+        icons = []
+        if os.path.isdir(icons_dir):
+            for filename in sorted(os.listdir(icons_dir)):
+                if filename.lower().endswith(".png"):
+                    icon = cv2.imread(os.path.join(icons_dir, filename), cv2.IMREAD_COLOR)
+                    if icon is not None:
+                        icons.append(icon)
+            logger.info(f"Loaded {len(icons)} skull/party icons from {icons_dir}")
+        return icons
@@ -0,0 +1,252 @@
+"""
+Name Recognizer Module for Tibia Bot
+
+This module provides creature-name recognition for battle list rows using
+a glyph bank of Tibia's bitmap font. Recognized names are memoized by a
+hash of the row's binarized name pixels, so a row that did not change
+costs one dictionary lookup. A configurable name -> priority table turns
+the names into a target ranking.
+"""
+
+import os
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from detection.template_bank import TemplateBank
+
+logger = logging.getLogger(__name__)
+
+
+class GlyphBank:
+    """
+    Binary glyph masks of the battle list font.
+
+    Glyphs are stored at the full line height so they can be compared
+    column-block by column-block against a name strip.
+    """
+
+    def __init__(self, glyphs: Optional[Dict[str, np.ndarray]] = None,
+                 space_width: int = 3, max_mismatch: float = 0.1):
+        """
+        Initialize the GlyphBank.
+
+        Args:
+            glyphs: Character -> boolean mask (line height x glyph width)
+            space_width: Empty columns that separate two words
+            max_mismatch: Max fraction of differing pixels to accept a glyph
+        """
+        self.glyphs: Dict[str, np.ndarray] = {}
+        self.space_width = space_width
+        self.max_mismatch = max_mismatch
+        for char, mask in (glyphs or {}).items():
+            self.add(char, mask)
+
+    @classmethod
+    def load(cls, directory: str = "resources/templates/font", text_threshold: int = 150) -> "GlyphBank":
+        """
+        Load glyphs from PNG files named by Unicode code point (e.g. 97.png for 'a').
+
+        Args:
+            directory: Glyph directory
+            text_threshold: Min brightness of a text pixel
+
+        Returns:
+            GlyphBank (empty if the directory does not exist)
+        """
+        bank = cls()
+        packed = TemplateBank.for_directory(directory)
+        if packed is not None:
+            group = os.path.basename(os.path.normpath(directory))
+            for stem in packed.names(group):
+                if stem.isdigit():
+                    bank.add(chr(int(stem)), packed.entry(f"{group}/{stem}").array("gray") >= text_threshold)
+            logger.info(f"Loaded {len(bank.glyphs)} glyphs from {packed.path}")
+            return bank
+        if not os.path.isdir(directory):
+            logger.warning(f"Glyph directory not found: {directory}")
+            return bank
+        for filename in os.listdir(directory):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() != ".png" or not stem.isdigit():
+                continue
+            image = cv2.imread(os.path.join(directory, filename), cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                bank.add(chr(int(stem)), image >= text_threshold)
+        logger.info(f"Loaded {len(bank.glyphs)} glyphs from {directory}")
+        return bank
+
+    def add(self, char: str, mask: np.ndarray):
+        """Add (or replace) one glyph."""
+        mask = np.asarray(mask, dtype=bool)
+        # Trim empty columns so glyph widths match the drawn pixels
+        cols = np.nonzero(mask.any(axis=0))[0]
+        if cols.size:
+            mask = mask[:, cols[0]:cols[-1] + 1]
+        self.glyphs[char] = mask
+
+    def __len__(self) -> int:
+        return len(self.glyphs)
+
+    def read(self, mask: np.ndarray) -> str:
+        """
+        Read a binarized text line.
+
+        Args:
+            mask: Boolean text mask (line height x width)
+
+        Returns:
+            Recognized text ('?' for unknown glyphs)
+        """
+        if not self.glyphs:
+            return ""
+        height, width = mask.shape
+        has_text = mask.any(axis=0)
+        chars: List[str] = []
+        x = 0
+        gap = 0
+        while x < width:
+            if not has_text[x]:
+                gap += 1
+                x += 1
+                continue
+            if chars and gap >= self.space_width and chars[-1] != " ":
+                chars.append(" ")
+            gap = 0
+            char, glyph_width = self._best_glyph(mask, x, height, width)
+            if char is None:
+                # Skip the unknown blob up to the next empty column
+                end = x
+                while end < width and has_text[end]:
+                    end += 1
+                chars.append("?")
+                x = end
+            else:
+                chars.append(char)
+                x += glyph_width
+        return "".join(chars).strip()
+
+    def _best_glyph(self, mask: np.ndarray, x: int, height: int, width: int):
+        best_char, best_width, best_score = None, 0, None
+        for char, glyph in self.glyphs.items():
+            gh, gw = glyph.shape
+            if gh != height or x + gw > width:
+                continue
+            block = mask[:, x:x + gw]
+            mismatch = np.count_nonzero(block ^ glyph) / max(np.count_nonzero(glyph), 1)
+            if mismatch > self.max_mismatch:
+                continue
+            # Prefer the better match, then the wider glyph ('m' over 'n')
+            score = (mismatch, -gw)
+            if best_score is None or score < best_score:
+                best_char, best_width, best_score = char, gw, score
+        return best_char, best_width
+
+
+class NameRecognizer:
+    """Recognize battle list names with a bounded cache keyed by the name pixels."""
+
+    def __init__(self, glyph_bank: Optional[GlyphBank] = None, cache_size: int = 256,
+                 text_threshold: int = 150):
+        """
+        Initialize the NameRecognizer.
+
+        Args:
+            glyph_bank: Font glyphs (loaded from resources/templates/font by default)
+            cache_size: Max remembered name strips
+            text_threshold: Min brightness (max channel) of a text pixel
+        """
+        self.glyph_bank = glyph_bank if glyph_bank is not None else GlyphBank.load()
+        self.cache_size = cache_size
+        self.text_threshold = text_threshold
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def recognize(self, name_image: np.ndarray) -> str:
+        """
+        Recognize the name in one row's name strip.
+
+        Args:
+            name_image: BGR view of the name text line
+
+        Returns:
+            Creature name ('' if no glyphs are loaded)
+        """
+        if not len(self.glyph_bank):
+            return ""
+        mask = name_image.max(axis=2) >= self.text_threshold if name_image.ndim == 3 \
+            else name_image >= self.text_threshold
+        key = hash((mask.shape, np.packbits(mask).tobytes()))
+        name = self._cache.get(key)
+        if name is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return name
+
+        self.misses += 1
+        name = self.glyph_bank.read(mask)
+        self._cache[key] = name
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return name
+
+    def get_stats(self) -> Dict:
+        """Cache statistics."""
+        total = self.hits + self.misses
+        return {
+            'glyphs': len(self.glyph_bank),
+            'cached_names': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class TargetPriorities:
+    """
+    Name -> priority table for target selection.
+
+    Higher priorities are attacked first; a priority of 0 or less means
+    the creature is never attacked. Unknown names get the default.
+    """
+
+    def __init__(self, config_file: str = "config/target_priorities.json"):
+        """
+        Initialize the TargetPriorities.
+
+        Args:
+            config_file: JSON file with "default" and "priorities" keys
+        """
+        self.config_file = config_file
+        self.default = 1
+        self.priorities: Dict[str, int] = {}
+        self.load()
+
+    def load(self) -> bool:
+        """Load the table (names are matched case-insensitively)."""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.default = int(data.get("default", 1))
+                self.priorities = {name.lower(): int(value)
+                                   for name, value in data.get("priorities", {}).items()}
+                return True
+        except Exception as e:
+            logger.error(f"Error loading target priorities: {e}")
+        return False
+
+    def priority(self, name: str) -> int:
+        """Priority of a creature name."""
+        if not name:
+            return self.default
+        return self.priorities.get(name.lower(), self.default)
+
+    def set_priority(self, name: str, value: int):
+        """Change one creature's priority at runtime."""
+        self.priorities[name.lower()] = int(value)
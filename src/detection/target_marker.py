@@ -0,0 +1,221 @@
+"""
+Target Marker Module for Tibia Bot
+
+This module tells whether the character is attacking something. Tibia
+draws a red frame around the attacked creature's outfit icon in the battle
+list and a red outline around the creature in the game viewport. Both are
+checked in tiny ROIs (the battle list icon column and a window around the
+last outline), and a ROI that did not change since the previous frame is
+not analysed again. State changes are published as "target_acquired" and
+"target_lost" events.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from capture.frame import Frame
+from detection.battle_list import BattleListGeometry, red_mask
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+
+
+@dataclass
+class MarkerState:
+    """Attack state of one frame."""
+    is_attacking: bool = False
+    battle_row: Optional[int] = None    # Battle list row with the red icon frame
+    marker: Optional[Region] = None     # Red outline in the viewport (screen coordinates)
+    seq: int = -1
+
+
+def find_outline(image: np.ndarray, min_size: int = 16, max_size: int = 200) -> Optional[Region]:
+    """
+    Find a red square outline in an image.
+
+    Args:
+        image: BGR image to search
+        min_size: Min outline side in pixels
+        max_size: Max outline side in pixels
+
+    Returns:
+        (x, y, w, h) of the outline inside the image, or None
+    """
+    mask = red_mask(image)
+    if not mask.any():
+        return None
+    # Outline edges are the rows/columns with long red runs
+    rows = np.nonzero(mask.sum(axis=1) >= min_size * 0.8)[0]
+    cols = np.nonzero(mask.sum(axis=0) >= min_size * 0.8)[0]
+    if rows.size < 2 or cols.size < 2:
+        return None
+    top, bottom, left, right = rows[0], rows[-1], cols[0], cols[-1]
+    w, h = right - left + 1, bottom - top + 1
+    if not (min_size <= w <= max_size and min_size <= h <= max_size):
+        return None
+    if not 0.7 <= w / h <= 1.3:
+        return None
+    return (int(left), int(top), int(w), int(h))
+
+
+class TargetMarkerDetector:
+    """
+    Detect the attacked-creature markers and publish attack state changes.
+
+    Listeners registered with ``on`` receive the new MarkerState.
+    """
+
+    EVENTS = ("target_acquired", "target_lost")
+
+    def __init__(self, geometry: Optional[BattleListGeometry] = None):
+        """
+        Initialize the TargetMarkerDetector.
+
+        Args:
+            geometry: Battle list row layout (same as the battle list parser)
+        """
+        self.geometry = geometry or BattleListGeometry()
+        self.viewport: Optional[Region] = None
+        self.battle_list: Optional[Region] = None
+        self.row_offset = 0
+        self.state = MarkerState()
+        self._listeners: Dict[str, List[Callable[[MarkerState], None]]] = {e: [] for e in self.EVENTS}
+        self._last_strip: Optional[np.ndarray] = None
+        self._last_window: Optional[np.ndarray] = None
+        self.stats = {'frames': 0, 'unchanged': 0, 'viewport_scans': 0}
+
+    @property
+    def is_attacking(self) -> bool:
+        return self.state.is_attacking
+
+    def set_viewport(self, x: int, y: int, width: int, height: int):
+        """Game viewport in screen coordinates."""
+        self.viewport = (x, y, width, height)
+        self._last_window = None
+
+    def set_battle_list(self, x: int, y: int, width: int, height: int, row_offset: int = 0):
+        """Battle list region and the first row's offset inside it."""
+        self.battle_list = (x, y, width, height)
+        self.row_offset = row_offset
+        self._last_strip = None
+
+    def search_region(self) -> Optional[Region]:
+        """
+        Viewport area the next ``update`` reads, for the capture layer to grab.
+
+        Returns:
+            The window around the last outline; the whole viewport while an
+            attack seen in the battle list has no outline yet (or without a
+            battle list); None when the battle list icon alone decides
+        """
+        if self.viewport is None:
+            return None
+        if self.state.marker is not None:
+            return self._window(self.state.marker)
+        if self.battle_list is not None and self.state.battle_row is None:
+            return None
+        return self.viewport
+
+    def on(self, event: str, callback: Callable[[MarkerState], None]):
+        """Register a listener for "target_acquired" or "target_lost"."""
+        if event not in self._listeners:
+            raise ValueError(f"Unknown event: {event}")
+        self._listeners[event].append(callback)
+
+    def update(self, frame: Frame) -> MarkerState:
+        """
+        Update the attack state from a new frame.
+
+        Args:
+            frame: Current frame
+
+        Returns:
+            The new MarkerState
+        """
+        self.stats['frames'] += 1
+        battle_row = self._check_battle_list(frame)
+        marker = self._check_viewport(frame, battle_row)
+
+        previous = self.state
+        attacking = battle_row is not None or marker is not None
+        self.state = MarkerState(is_attacking=attacking, battle_row=battle_row, marker=marker, seq=frame.seq)
+
+        if attacking and not previous.is_attacking:
+            self._emit("target_acquired")
+        elif previous.is_attacking and not attacking:
+            self._emit("target_lost")
+        return self.state
+
+    def _check_battle_list(self, frame: Frame) -> Optional[int]:
+        if self.battle_list is None:
+            return None
+        g = self.geometry
+        x, y, w, h = self.battle_list
+        # Only the icon column: the attack frame is the icon box's top edge
+        strip = frame.crop(x + g.icon_x, y, g.icon_size, h)
+        if strip is None:
+            return None
+        if self._last_strip is not None and np.array_equal(strip, self._last_strip):
+            self.stats['unchanged'] += 1
+            return self.state.battle_row
+        self._last_strip = strip.copy()
+
+        edges = red_mask(strip[self.row_offset::g.row_height]).mean(axis=1) > 0.8
+        rows = np.nonzero(edges)[0]
+        return int(rows[0]) if rows.size else None
+
+    def _check_viewport(self, frame: Frame, battle_row: Optional[int]) -> Optional[Region]:
+        if self.viewport is None:
+            return None
+        vx, vy, vw, vh = self.viewport
+        tile = vw // 15
+
+        # Creatures move at most a tile between frames: look around the last outline first
+        previous = self.state.marker
+        if previous is not None:
+            x0, y0, ww, wh = self._window(previous)
+            window = frame.crop(x0, y0, ww, wh)
+            if window is not None:
+                if self._last_window is not None and window.shape == self._last_window.shape \
+                        and np.array_equal(window, self._last_window):
+                    self.stats['unchanged'] += 1
+                    return previous
+                self._last_window = window.copy()
+                found = find_outline(window, min_size=tile * 3 // 4, max_size=tile * 5 // 4 + 2)
+                if found is not None:
+                    return (x0 + found[0], y0 + found[1], found[2], found[3])
+
+        # Full viewport scan only when the outline is not where it was
+        self._last_window = None
+        if self.battle_list is not None and battle_row is None and previous is None:
+            # The battle list is the cheaper source of truth when nothing is attacked
+            return None
+        image = frame.crop(vx, vy, vw, vh)
+        if image is None:
+            return None
+        self.stats['viewport_scans'] += 1
+        found = find_outline(image, min_size=tile * 3 // 4, max_size=tile * 5 // 4 + 2)
+        if found is None:
+            return None
+        return (vx + found[0], vy + found[1], found[2], found[3])
+
+    def _window(self, marker: Region) -> Region:
+        """The outline grown by a tile on every side, clipped to the viewport."""
+        vx, vy, vw, vh = self.viewport
+        tile = vw // 15
+        mx, my, mw, mh = marker
+        x0, y0 = max(vx, mx - tile), max(vy, my - tile)
+        x1, y1 = min(vx + vw, mx + mw + tile), min(vy + vh, my + mh + tile)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _emit(self, event: str):
+        logger.debug(f"Target marker event: {event}")
+        for callback in self._listeners[event]:
+            try:
+                callback(self.state)
+            except Exception as e:
+                logger.error(f"Error in {event} listener: {e}")
@@ -0,0 +1,223 @@
+"""
+Target Tracker Module for Tibia Bot
+
+This module provides a lightweight multi-frame tracker for battle list
+(or viewport) detections. Detections are associated across frames by
+IoU and center distance, get stable IDs and keep per-target state such
+as the HP trend, when they were first seen and whether they were attacked.
+"""
+
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Track:
+    """One tracked creature."""
+    id: int
+    x: int
+    y: int
+    width: int
+    height: int
+    name: str = ""
+    hp: int = 100
+    first_seen: float = 0.0
+    last_seen: float = 0.0
+    missed: int = 0
+    attacked: bool = False
+    kind: str = ""          # "monster" / "player" once classified
+    kind_name: str = ""     # Name the kind was decided with
+    hp_history: Deque[Tuple[float, int]] = field(default_factory=lambda: deque(maxlen=10))
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return (self.x + self.width / 2.0, self.y + self.height / 2.0)
+
+    @property
+    def hp_trend(self) -> float:
+        """HP change in percent per second over the recent history (negative = losing HP)."""
+        if len(self.hp_history) < 2:
+            return 0.0
+        (t0, hp0), (t1, hp1) = self.hp_history[0], self.hp_history[-1]
+        return (hp1 - hp0) / (t1 - t0) if t1 > t0 else 0.0
+
+    @property
+    def age(self) -> float:
+        return self.last_seen - self.first_seen
+
+
+def iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class TargetTracker:
+    """
+    Associate detections across frames and keep stable target IDs.
+
+    Detections are dicts with "x", "y", "width", "height" and optionally
+    "name" and "hp" (the format AutoAttack already uses). Known names must
+    agree and HP may not jump up, so two different creatures never swap IDs.
+
+    In ordered mode (the battle list) rows keep their vertical order when a
+    creature dies and the rows below move up, so matching is an
+    order-preserving alignment that first maximizes the number of matches.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_distance: float = 50.0, max_missed: int = 2,
+                 hp_tolerance: int = 25, ordered: bool = True):
+        """
+        Initialize the TargetTracker.
+
+        Args:
+            iou_threshold: Min IoU for an overlap match
+            max_distance: Max center distance (pixels) for a position match
+            max_missed: Frames a track survives without a detection
+            hp_tolerance: Max HP gain (percent) between two frames of one creature
+            ordered: Detections keep their vertical order (battle list rows)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.hp_tolerance = hp_tolerance
+        self.ordered = ordered
+        self.tracks: Dict[int, Track] = {}
+        self._next_id = 1
+
+    def update(self, detections: List[Dict], now: Optional[float] = None) -> List[Track]:
+        """
+        Feed one frame's detections.
+
+        Every detection dict gets an "id" key with its track ID.
+
+        Args:
+            detections: Detections of the current frame
+            now: Frame timestamp (defaults to time.time())
+
+        Returns:
+            Tracks matched or created in this frame, in detection order
+        """
+        now = time.time() if now is None else now
+
+        if self.ordered:
+            assigned = self._align(detections)
+        else:
+            assigned = self._assign_greedy(detections)
+
+        matched = []
+        for index, det in enumerate(detections):
+            track_id = assigned.get(index)
+            if track_id is None:
+                track = Track(id=self._next_id, x=det["x"], y=det["y"], width=det["width"],
+                              height=det["height"], first_seen=now)
+                self.tracks[track.id] = track
+                self._next_id += 1
+            else:
+                track = self.tracks[track_id]
+            track.x, track.y = det["x"], det["y"]
+            track.width, track.height = det["width"], det["height"]
+            track.name = det.get("name") or track.name
+            track.hp = det.get("hp", track.hp)
+            track.hp_history.append((now, track.hp))
+            track.last_seen = now
+            track.missed = 0
+            det["id"] = track.id
+            matched.append(track)
+
+        # Age out tracks that were not seen this frame
+        seen = {track.id for track in matched}
+        for track_id in list(self.tracks):
+            if track_id not in seen:
+                track = self.tracks[track_id]
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track_id]
+        return matched
+
+    def _assign_greedy(self, detections: List[Dict]) -> Dict[int, int]:
+        """Best-scoring pairs first; returns detection index -> track ID."""
+        pairs = []
+        for track in self.tracks.values():
+            for index, det in enumerate(detections):
+                score = self._score(track, det)
+                if score is not None:
+                    pairs.append((score, track.id, index))
+        pairs.sort(reverse=True)
+
+        assigned: Dict[int, int] = {}
+        used_tracks = set()
+        for score, track_id, index in pairs:
+            if track_id in used_tracks or index in assigned:
+                continue
+            assigned[index] = track_id
+            used_tracks.add(track_id)
+        return assigned
+
+    def _align(self, detections: List[Dict]) -> Dict[int, int]:
+        """Order-preserving alignment maximizing (matches, total score)."""
+        tracks = sorted(self.tracks.values(), key=lambda t: t.y)
+        order = sorted(range(len(detections)), key=lambda i: detections[i]["y"])
+        n, m = len(tracks), len(order)
+        best = [[(0, 0.0)] * (m + 1) for _ in range(n + 1)]
+        move = [[0] * (m + 1) for _ in range(n + 1)]
+        for i in range(1, n + 1):
+            for j in range(1, m + 1):
+                options = [(best[i - 1][j], 1), (best[i][j - 1], 2)]
+                score = self._score(tracks[i - 1], detections[order[j - 1]])
+                if score is not None:
+                    count, total = best[i - 1][j - 1]
+                    options.append(((count + 1, total + score), 3))
+                best[i][j], move[i][j] = max(options)
+
+        assigned: Dict[int, int] = {}
+        i, j = n, m
+        while i > 0 and j > 0:
+            step = move[i][j]
+            if step == 3:
+                assigned[order[j - 1]] = tracks[i - 1].id
+                i, j = i - 1, j - 1
+            elif step == 1:
+                i -= 1
+            else:
+                j -= 1
+        return assigned
+
+    def _score(self, track: Track, det: Dict) -> Optional[float]:
+        name = det.get("name") or ""
+        if name and track.name and name != track.name:
+            return None
+        box = (det["x"], det["y"], det["width"], det["height"])
+        overlap = iou((track.x, track.y, track.width, track.height), box)
+        cx, cy = det["x"] + det["width"] / 2.0, det["y"] + det["height"] / 2.0
+        tx, ty = track.center
+        distance = ((cx - tx) ** 2 + (cy - ty) ** 2) ** 0.5
+        if overlap >= self.iou_threshold:
+            score = 1.0 + overlap
+        elif distance <= self.max_distance:
+            score = 1.0 - distance / self.max_distance
+        else:
+            return None
+        # HP only drops between frames; a jump up means a different creature
+        hp_gain = det.get("hp", track.hp) - track.hp
+        if hp_gain > self.hp_tolerance:
+            return None
+        return score - max(hp_gain, 0) / 100.0
+
+    def get(self, track_id: Optional[int]) -> Optional[Track]:
+        """Track by ID (None if it is gone)."""
+        return self.tracks.get(track_id) if track_id is not None else None
+
+    def reset(self):
+        """Drop all tracks."""
+        self.tracks.clear()
@@ -0,0 +1,326 @@
+"""
+Template Bank Module for Tibia Bot
+
+This module provides a single-file archive of every template under
+``resources/templates``. ``scripts/build_template_bank.py`` packs the raw
+images, alpha masks, the matcher's pyramid levels and normalization terms,
+and the container sprite hashes into one binary file with a JSON index.
+At runtime the file is opened with ``mmap``: only the index is parsed, and
+each array is a zero-copy, read-only numpy view created on first use, so
+startup does not grow with the size of the template library.
+
+File layout::
+
+    magic (8 bytes) | index offset (u8) | index length (u8) | arrays ... | JSON index
+
+Arrays are 64-byte aligned. The index records, per template group, the
+modification time and size of every PNG the bank was built from; a group
+whose files changed since (a template was added, edited, renamed or
+removed) is reported as stale and loaders fall back to reading the PNGs.
+"""
+
+import os
+import json
+import mmap
+import struct
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TIBTPL01"
+HEADER = struct.Struct("<8sQQ")
+ALIGNMENT = 64
+BANK_FILENAME = "templates.bank"
+
+_shared: Dict[str, "TemplateBank"] = {}
+_shared_lock = threading.Lock()
+
+
+class BankEntry:
+    """One template in the bank: named arrays plus precomputed metadata."""
+
+    def __init__(self, bank: "TemplateBank", name: str, record: Dict):
+        self.bank = bank
+        self.name = name
+        self.meta: Dict = record.get("meta", {})
+        self._arrays: Dict[str, List] = record.get("arrays", {})
+        self._views: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._arrays
+
+    def array(self, key: str) -> np.ndarray:
+        """
+        Read-only view of one stored array (created on first access).
+
+        Args:
+            key: Array name, e.g. "image", "alpha", "level1"
+
+        Returns:
+            numpy view into the mapped file
+        """
+        view = self._views.get(key)
+        if view is None:
+            offset, shape, dtype = self._arrays[key]
+            view = self.bank.view(offset, tuple(shape), dtype)
+            self._views[key] = view
+        return view
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Like ``array`` but None for arrays that were not stored."""
+        return self.array(key) if key in self._arrays else None
+
+
+class TemplateBank:
+    """
+    Memory-mapped template archive.
+
+    Entries are addressed as ``<group>/<stem>`` (``loot/gold_coin``).
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a bank file (only the header and index are read).
+
+        Args:
+            path: Bank file path
+
+        Raises:
+            ValueError: If the file is not a template bank
+        """
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a template bank: {path}")
+        index = json.loads(self._mmap[index_offset:index_offset + index_length].decode("utf-8"))
+        self.sources: Dict[str, Dict[str, List[int]]] = index.get("sources", {})
+        self._records: Dict[str, Dict] = index.get("entries", {})
+        self._entries: Dict[str, BankEntry] = {}
+
+    @classmethod
+    def shared(cls, templates_dir: str = "resources/templates") -> Optional["TemplateBank"]:
+        """
+        Bank of a templates root, opened once per process.
+
+        Args:
+            templates_dir: Directory holding ``templates.bank``
+
+        Returns:
+            TemplateBank, or None if no (valid) bank was built
+        """
+        path = os.path.abspath(os.path.join(templates_dir, BANK_FILENAME))
+        with _shared_lock:
+            bank = _shared.get(path)
+            if bank is None:
+                if not os.path.exists(path):
+                    return None
+                try:
+                    bank = cls(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not open template bank {path}: {e}")
+                    return None
+                _shared[path] = bank
+                logger.info(f"Template bank opened: {path} ({len(bank)} templates)")
+            return bank
+
+    @classmethod
+    def for_directory(cls, directory: str) -> Optional["TemplateBank"]:
+        """
+        Bank covering a template group directory, if it is up to date.
+
+        Args:
+            directory: Group directory, e.g. ``resources/templates/loot``
+
+        Returns:
+            TemplateBank, or None when there is no bank or the group is stale
+        """
+        bank = cls.shared(os.path.dirname(os.path.normpath(directory)))
+        if bank is None:
+            return None
+        group = os.path.basename(os.path.normpath(directory))
+        if not bank.is_current(group, directory):
+            logger.info(f"Template bank is stale for {directory}, loading PNGs")
+            return None
+        return bank
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self):
+        """Release the mapping; if views are still alive it is released with the last one."""
+        self._entries.clear()
+        with _shared_lock:
+            if _shared.get(os.path.abspath(self.path)) is self:
+                del _shared[os.path.abspath(self.path)]
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def is_current(self, group: str, directory: Optional[str] = None) -> bool:
+        """Whether a group was built from the directory as it is now."""
+        if group not in self.sources:
+            return False
+        directory = directory or os.path.join(self.root, group)
+        try:
+            return _fingerprint(directory) == self.sources[group]
+        except OSError:
+            return False
+
+    def names(self, group: str) -> List[str]:
+        """Template stems of a group, sorted."""
+        prefix = group + "/"
+        return sorted(name[len(prefix):] for name in self._records if name.startswith(prefix))
+
+    def entries(self, group: str) -> Iterator[BankEntry]:
+        """Entries of a group, in name order."""
+        for stem in self.names(group):
+            yield self.entry(f"{group}/{stem}")
+
+    def entry(self, name: str) -> BankEntry:
+        """
+        One template by full name.
+
+        Args:
+            name: ``<group>/<stem>``
+
+        Returns:
+            BankEntry
+
+        Raises:
+            KeyError: If the template is not in the bank
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = BankEntry(self, name, self._records[name])
+            self._entries[name] = entry
+        return entry
+
+    def view(self, offset: int, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+        """Zero-copy array over a byte range of the mapped file."""
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+
+class _BankWriter:
+    """Append aligned arrays to a bank file and collect the index."""
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write(HEADER.pack(MAGIC, 0, 0))
+
+    def add(self, array: np.ndarray) -> List:
+        array = np.ascontiguousarray(array)
+        position = self.f.tell()
+        padding = (-position) % ALIGNMENT
+        if padding:
+            self.f.write(b"\0" * padding)
+            position += padding
+        self.f.write(array.tobytes())
+        return [position, list(array.shape), array.dtype.str]
+
+    def finish(self, index: Dict):
+        payload = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        index_offset = self.f.tell()
+        self.f.write(payload)
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, index_offset, len(payload)))
+
+
+def _pack_template(writer: _BankWriter, group: str, image: np.ndarray) -> Dict:
+    """Arrays and metadata of one template."""
+    # Imported here: the loaders import this module
+    from detection.template_matcher import Template
+    from detection.container_parser import ItemDictionary
+
+    arrays = {"image": writer.add(image)}
+    meta: Dict = {}
+
+    alpha = None
+    color = image
+    if image.ndim == 3 and image.shape[2] == 4:
+        alpha = image[:, :, 3]
+        color = image[:, :, :3]
+        arrays["alpha"] = writer.add(alpha)
+    gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY) if color.ndim == 3 else color
+
+    # Matcher terms (pyramid, masks, zero-mean template and its norm)
+    template = Template.build(group, gray, alpha)
+    arrays["gray"] = writer.add(template.image)
+    arrays["zero_mean"] = writer.add(template.zero_mean)
+    for i, level in enumerate(template.levels):
+        arrays[f"level{i}"] = writer.add(level)
+    for i, mask in enumerate(template.mask_levels):
+        if mask is not None:
+            arrays[f"mask{i}"] = writer.add(mask)
+    meta.update(levels=len(template.levels), norm=template.norm, count=template.count)
+
+    # Container sprite hashes at the default slot grid
+    if group == "loot":
+        bgr = cv2.cvtColor(color, cv2.COLOR_GRAY2BGR) if color.ndim == 2 else color
+        slot_key, slot_hash = ItemDictionary().hashes(bgr)
+        if slot_key is not None:
+            meta.update(slot_key=slot_key.hex(), slot_hash=slot_hash)
+    return {"arrays": arrays, "meta": meta}
+
+
+def _fingerprint(directory: str) -> Dict[str, List[int]]:
+    """[modification time (ns), size] of every PNG in a group directory."""
+    files = {}
+    for filename in os.listdir(directory):
+        if os.path.splitext(filename)[1].lower() == ".png":
+            stat = os.stat(os.path.join(directory, filename))
+            files[filename] = [stat.st_mtime_ns, stat.st_size]
+    return files
+
+
+def build_bank(templates_dir: str = "resources/templates", output: Optional[str] = None) -> int:
+    """
+    Pack every ``<templates_dir>/<group>/*.png`` into a bank file.
+
+    Args:
+        templates_dir: Templates root
+        output: Bank path (defaults to ``<templates_dir>/templates.bank``)
+
+    Returns:
+        Number of templates packed
+    """
+    output = output or os.path.join(templates_dir, BANK_FILENAME)
+    entries: Dict[str, Dict] = {}
+    sources: Dict[str, Dict[str, List[int]]] = {}
+    temporary = output + ".tmp"
+
+    with open(temporary, "wb") as f:
+        writer = _BankWriter(f)
+        for group in sorted(os.listdir(templates_dir)):
+            directory = os.path.join(templates_dir, group)
+            if not os.path.isdir(directory):
+                continue
+            sources[group] = _fingerprint(directory)
+            for filename in sorted(os.listdir(directory)):
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() != ".png":
+                    continue
+                image = cv2.imread(os.path.join(directory, filename), cv2.IMREAD_UNCHANGED)
+                if image is None:
+                    logger.warning(f"Unreadable template skipped: {group}/{filename}")
+                    continue
+                entries[f"{group}/{stem}"] = _pack_template(writer, group, image)
+        writer.finish({"version": 2, "sources": sources, "entries": entries})
+
+    os.replace(temporary, output)
+    # A process that already mapped the old file keeps its own copy
+    with _shared_lock:
+        _shared.pop(os.path.abspath(output), None)
+    logger.info(f"Template bank built: {output} ({len(entries)} templates)")
+    return len(entries)
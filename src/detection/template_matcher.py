@@ -0,0 +1,524 @@
+"""
+Template Matcher Module for Tibia Bot
+
+This module provides the template matching engine used by the bot core
+for health/mana bars, status icons and equipment slots. Templates are
+loaded once with their pyramid levels, masks and normalization terms
+precomputed. Every search is restricted to the ROI registered for it and
+runs coarse-to-fine: a cheap match at the coarsest pyramid level rejects
+absent templates early and only the surviving peaks are refined at full
+resolution. Groups with several same-sized templates share one batched
+FFT correlation at the coarse level. Each public call is timed against a
+per-call budget.
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from capture.frame import Frame
+from capture.roi_registry import RoiRegistry
+from detection.batch_matcher import TemplateStack
+from detection.template_bank import BankEntry, TemplateBank
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+
+
+@dataclass
+class Template:
+    """A template with everything the matcher needs precomputed."""
+    name: str
+    image: np.ndarray                 # Grayscale float32
+    mask: Optional[np.ndarray]        # float32 0/1 from the PNG alpha channel, or None
+    levels: List[np.ndarray] = field(default_factory=list)  # Pyramid, levels[0] is full size
+    mask_levels: List[Optional[np.ndarray]] = field(default_factory=list)
+    zero_mean: np.ndarray = None      # (image - masked mean) * mask
+    norm: float = 0.0                 # sqrt(sum(zero_mean ** 2))
+    count: int = 0                    # Pixels under the mask
+
+    @classmethod
+    def build(cls, name: str, image: np.ndarray, mask: Optional[np.ndarray] = None,
+              min_coarse_size: int = 8, max_levels: int = 3) -> "Template":
+        """
+        Precompute pyramid levels and normalization terms.
+
+        Args:
+            name: Template name
+            image: Grayscale template
+            mask: Optional mask (non-zero = template pixel)
+            min_coarse_size: Smallest template side allowed at the coarsest level
+            max_levels: Max pyramid levels (including full size)
+
+        Returns:
+            Ready-to-match Template
+        """
+        image = image.astype(np.float32)
+        weights = (mask > 0).astype(np.float32) if mask is not None else np.ones_like(image)
+        count = int(weights.sum())
+        mean = float((image * weights).sum() / max(count, 1))
+        zero_mean = (image - mean) * weights
+
+        # Masked-out pixels take the mean so they do not bleed into coarse levels
+        filled = np.where(weights > 0, image, mean).astype(np.float32)
+        levels = [filled]
+        mask_levels = [weights if mask is not None else None]
+        while len(levels) < max_levels and min(levels[-1].shape) // 2 >= min_coarse_size:
+            levels.append(cv2.pyrDown(levels[-1]))
+            if mask is not None:
+                shrunk = cv2.pyrDown(mask_levels[-1])
+                mask_levels.append((shrunk > 0.99).astype(np.float32))
+            else:
+                mask_levels.append(None)
+
+        return cls(name=name, image=image, mask=weights if mask is not None else None, levels=levels,
+                   mask_levels=mask_levels, zero_mean=zero_mean,
+                   norm=float(np.sqrt((zero_mean ** 2).sum())), count=count)
+
+    @classmethod
+    def from_bank(cls, name: str, entry: BankEntry) -> "Template":
+        """
+        Template over the precomputed arrays of a bank entry (zero-copy views).
+
+        Args:
+            name: Template name
+            entry: Bank entry written by ``scripts/build_template_bank.py``
+
+        Returns:
+            Ready-to-match Template
+        """
+        levels = entry.meta["levels"]
+        return cls(name=name, image=entry.array("gray"), mask=entry.get("mask0"),
+                   levels=[entry.array(f"level{i}") for i in range(levels)],
+                   mask_levels=[entry.get(f"mask{i}") for i in range(levels)],
+                   zero_mean=entry.array("zero_mean"), norm=entry.meta["norm"], count=entry.meta["count"])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.image.shape
+
+
+@dataclass
+class Match:
+    """One template found in a frame (screen coordinates)."""
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    score: float
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+
+class TemplateMatcher:
+    """
+    ROI-restricted, coarse-to-fine template matcher.
+
+    Templates live in ``<templates_dir>/<group>/*.png`` (groups: status,
+    equipment). PNG alpha channels become masks. ROIs are read from the
+    RoiRegistry: "health_bar", "mana_bar", "status_icons" and "equipment".
+    """
+
+    GROUPS = ("status", "equipment")
+
+    def __init__(self, templates_dir: str = "resources/templates", roi_registry: Optional[RoiRegistry] = None,
+                 threshold: float = 0.85, coarse_slack: float = 0.2, budget_ms: float = 4.0,
+                 batch_min_size: int = 4):
+        """
+        Initialize the TemplateMatcher.
+
+        Args:
+            templates_dir: Root of the template groups
+            roi_registry: Registry the search ROIs are read from
+            threshold: Min normalized correlation of a match
+            coarse_slack: How far below ``threshold`` a coarse peak may be and still be refined
+            budget_ms: Time budget of one public call
+            batch_min_size: Same-sized templates needed to match them as one batch
+        """
+        self.templates_dir = templates_dir
+        self.roi_registry = roi_registry or RoiRegistry()
+        self.threshold = threshold
+        self.coarse_slack = coarse_slack
+        self.budget_ms = budget_ms
+        self.batch_min_size = batch_min_size
+        self.templates: Dict[str, Dict[str, Template]] = {group: {} for group in self.GROUPS}
+        # Round-robin start per group, so templates skipped by the budget run first next call
+        self._next_index: Dict[str, int] = {group: 0 for group in self.GROUPS}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._missing_rois = set()
+        self._stacks: Dict[Tuple, TemplateStack] = {}
+        self.budget_cutoffs = 0
+        self.load_templates()
+
+    # ---------------------------------------------------------------- templates
+
+    def load_templates(self) -> int:
+        """
+        Load and precompute every template group.
+
+        Returns:
+            Number of templates loaded
+        """
+        self._stacks.clear()
+        total = 0
+        for group in self.GROUPS:
+            directory = os.path.join(self.templates_dir, group)
+            bank = TemplateBank.for_directory(directory)
+            if bank is not None:
+                # Packed templates: views into the mapped bank, nothing is decoded here
+                for entry in bank.entries(group):
+                    name = entry.name.split("/", 1)[1]
+                    self.templates.setdefault(group, {})[name] = Template.from_bank(name, entry)
+                    total += 1
+                continue
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if not filename.lower().endswith(".png"):
+                    continue
+                image = cv2.imread(os.path.join(directory, filename), cv2.IMREAD_UNCHANGED)
+                if image is None:
+                    continue
+                mask = None
+                if image.ndim == 3 and image.shape[2] == 4:
+                    mask = image[:, :, 3]
+                    image = image[:, :, :3]
+                if image.ndim == 3:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                self.add_template(group, os.path.splitext(filename)[0], image, mask)
+                total += 1
+        logger.info(f"Loaded {total} templates from {self.templates_dir}")
+        return total
+
+    def add_template(self, group: str, name: str, image: np.ndarray, mask: Optional[np.ndarray] = None) -> Template:
+        """Add one template to a group (precomputing its terms)."""
+        template = Template.build(name, image, mask)
+        self.templates.setdefault(group, {})[name] = template
+        self._stacks.clear()
+        self._next_index.setdefault(group, 0)
+        return template
+
+    # ---------------------------------------------------------------- detectors
+
+    def detect_health_bar(self, frame: Union[Frame, np.ndarray]) -> Optional[Dict]:
+        """
+        Read the health bar fill.
+
+        Args:
+            frame: Current frame
+
+        Returns:
+            {'percentage': float, 'region': (x, y, w, h)} or None
+        """
+        start = time.perf_counter()
+        result = self._bar_percent(self._as_frame(frame), "health_bar", channel=2)
+        self._record("detect_health_bar", start)
+        return result
+
+    def detect_mana_bar(self, frame: Union[Frame, np.ndarray]) -> Optional[Dict]:
+        """
+        Read the mana bar fill.
+
+        Args:
+            frame: Current frame
+
+        Returns:
+            {'percentage': float, 'region': (x, y, w, h)} or None
+        """
+        start = time.perf_counter()
+        result = self._bar_percent(self._as_frame(frame), "mana_bar", channel=0)
+        self._record("detect_mana_bar", start)
+        return result
+
+    def detect_status_icons(self, frame: Union[Frame, np.ndarray]) -> List[str]:
+        """
+        Find the active status icons (poisoned, burning, haste, ...).
+
+        Args:
+            frame: Current frame
+
+        Returns:
+            Names of the status templates found in the "status_icons" ROI
+        """
+        start = time.perf_counter()
+        matches = self._match_group(self._as_frame(frame), "status", "status_icons", start)
+        self._record("detect_status_icons", start)
+        return [m.name for m in matches]
+
+    def detect_equipment_slots(self, frame: Union[Frame, np.ndarray]) -> Dict[str, bool]:
+        """
+        Tell which equipment slots are occupied.
+
+        Equipment templates are the empty slots (e.g. ``ring_empty.png``);
+        a slot whose empty template is not found is occupied.
+
+        Args:
+            frame: Current frame
+
+        Returns:
+            {slot: occupied} for every equipment template
+        """
+        start = time.perf_counter()
+        frame = self._as_frame(frame)
+        found = {m.name for m in self._match_group(frame, "equipment", "equipment", start, use_budget=False)}
+        slots = {}
+        if self._roi_image(frame, "equipment") is not None:
+            for name in self.templates.get("equipment", {}):
+                slots[name[:-len("_empty")] if name.endswith("_empty") else name] = name not in found
+        self._record("detect_equipment_slots", start)
+        return slots
+
+    def find(self, frame: Union[Frame, np.ndarray], group: str, name: str, roi_name: str) -> Optional[Match]:
+        """
+        Find one template inside a registered ROI.
+
+        Args:
+            frame: Current frame
+            group: Template group
+            name: Template name
+            roi_name: Registered ROI to search
+
+        Returns:
+            Best Match above the threshold, or None
+        """
+        start = time.perf_counter()
+        frame = self._as_frame(frame)
+        template = self.templates.get(group, {}).get(name)
+        located = self._roi_image(frame, roi_name)
+        result = None
+        if template is not None and located is not None:
+            roi, (rx, ry) = located
+            result = self._match(roi, template, rx, ry, self._pyramid(roi, len(template.levels)))
+        self._record("find", start)
+        return result
+
+    # ---------------------------------------------------------------- ROIs
+
+    def declare_default_rois(self, layout) -> List[str]:
+        """
+        Declare status/equipment ROIs from a detected UI layout.
+
+        In the default client layout the equipment panel and status icons
+        sit in the sidebar between the minimap and the battle list. ROIs
+        already declared (e.g. from screen_regions.json) are kept.
+
+        Args:
+            layout: UILayout from the layout detector
+
+        Returns:
+            Names of the ROIs declared
+        """
+        declared = []
+        minimap, battle_list = layout.minimap, layout.battle_list
+        sidebar = layout.right_sidebar or layout.left_sidebar
+        if minimap is None or sidebar is None:
+            return declared
+        top = minimap[1] + minimap[3]
+        bottom = battle_list[1] if battle_list is not None and battle_list[1] > top else top + 240
+        region = (sidebar[0], top, sidebar[2], bottom - top)
+        for name in ("equipment", "status_icons"):
+            if self.roi_registry.get(name) is None:
+                self.roi_registry.declare(name, *region, owner="template_matcher")
+                declared.append(name)
+        return declared
+
+    def _roi_image(self, frame: Frame, roi_name: str, space: str = "gray"):
+        rect = self.roi_registry.get(roi_name)
+        if rect is None:
+            if roi_name not in self._missing_rois:
+                logger.warning(f"No ROI registered for '{roi_name}', skipping its templates")
+                self._missing_rois.add(roi_name)
+            return None
+        image = frame.crop(rect.x, rect.y, rect.width, rect.height, space=space)
+        if image is None:
+            return None
+        return image, (rect.x, rect.y)
+
+    # ---------------------------------------------------------------- matching
+
+    def _match_group(self, frame: Frame, group: str, roi_name: str, start: float,
+                     use_budget: bool = True) -> List[Match]:
+        templates = list(self.templates.get(group, {}).values())
+        if not templates:
+            return []
+        located = self._roi_image(frame, roi_name)
+        if located is None:
+            return []
+        roi, (rx, ry) = located
+        pyramid = self._pyramid(roi, max(len(t.levels) for t in templates))
+        buckets = self._buckets(templates, pyramid)
+        coarse: Dict[int, Tuple[int, np.ndarray]] = {}
+
+        matches = []
+        first = self._next_index.get(group, 0) % len(templates)
+        for i in range(len(templates)):
+            index = (first + i) % len(templates)
+            if use_budget and i > 0 and (time.perf_counter() - start) * 1000.0 > self.budget_ms:
+                # Out of budget: resume from this template on the next call
+                self._next_index[group] = index
+                self.budget_cutoffs += 1
+                break
+            bucket = buckets.get(index)
+            if bucket is not None and index not in coarse:
+                # First template of a same-sized bucket: score the whole bucket in one pass
+                coarse.update(self._batch_coarse(group, bucket, templates, pyramid))
+            match = self._match(roi, templates[index], rx, ry, pyramid, coarse.get(index))
+            if match is not None:
+                matches.append(match)
+        else:
+            self._next_index[group] = 0
+        return matches
+
+    @staticmethod
+    def _pyramid(roi: np.ndarray, levels: int) -> List[np.ndarray]:
+        pyramid = [roi.astype(np.float32)]
+        while len(pyramid) < levels and min(pyramid[-1].shape) >= 2:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    @staticmethod
+    def _coarse_level(template: Template, pyramid: List[np.ndarray]) -> int:
+        """Coarsest level both the template and the ROI support."""
+        level = len(template.levels) - 1
+        while level > 0 and (level >= len(pyramid) or pyramid[level].shape[0] < template.levels[level].shape[0]
+                             or pyramid[level].shape[1] < template.levels[level].shape[1]):
+            level -= 1
+        return level
+
+    def _buckets(self, templates: List[Template], pyramid: List[np.ndarray]) -> Dict[int, List[int]]:
+        """Template index -> its bucket, for buckets of at least ``batch_min_size`` same-sized templates."""
+        members: Dict[Tuple, List[int]] = {}
+        for index, template in enumerate(templates):
+            th, tw = template.shape
+            if pyramid[0].shape[0] < th or pyramid[0].shape[1] < tw or template.norm == 0:
+                continue
+            level = self._coarse_level(template, pyramid)
+            members.setdefault((level, template.levels[level].shape), []).append(index)
+        return {index: indices for indices in members.values() if len(indices) >= self.batch_min_size
+                for index in indices}
+
+    def _batch_coarse(self, group: str, bucket: List[int], templates: List[Template],
+                      pyramid: List[np.ndarray]) -> Dict[int, Tuple[int, np.ndarray]]:
+        """Coarse score maps of one bucket from a single batched correlation."""
+        level = self._coarse_level(templates[bucket[0]], pyramid)
+        key = (group, level, tuple(templates[i].name for i in bucket))
+        stack = self._stacks.get(key)
+        if stack is None:
+            stack = TemplateStack(key[2], [templates[i].levels[level] for i in bucket],
+                                  [templates[i].mask_levels[level] for i in bucket])
+            self._stacks[key] = stack
+        scores = stack.correlate(pyramid[level])
+        return {index: (level, scores[n]) for n, index in enumerate(bucket)}
+
+    def _match(self, roi: np.ndarray, template: Template, rx: int, ry: int,
+               pyramid: List[np.ndarray], coarse: Optional[Tuple[int, np.ndarray]] = None) -> Optional[Match]:
+        th, tw = template.shape
+        if roi.shape[0] < th or roi.shape[1] < tw or template.norm == 0:
+            return None
+
+        if coarse is not None:
+            level, result = coarse
+        else:
+            level = self._coarse_level(template, pyramid)
+            result = cv2.matchTemplate(pyramid[level], template.levels[level], cv2.TM_CCOEFF_NORMED,
+                                       mask=template.mask_levels[level])
+            if template.mask is not None:
+                # Masked correlation is undefined on flat patches
+                result = np.nan_to_num(result, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        coarse_threshold = self.threshold - (self.coarse_slack if level > 0 else 0.0)
+
+        best = None
+        for _ in range(3):
+            _, score, _, (cx, cy) = cv2.minMaxLoc(result)
+            if score < coarse_threshold:
+                break  # Early exit: nothing left that could pass
+            # Suppress this peak before looking for the next one
+            result[max(0, cy - 2):cy + 3, max(0, cx - 2):cx + 3] = -1.0
+            refined = self._refine(roi, template, cx << level, cy << level, (1 << level) + 1)
+            if refined is not None and (best is None or refined[2] > best[2]):
+                best = refined
+                if best[2] >= self.threshold:
+                    break  # Early exit: good enough
+
+        if best is None or best[2] < self.threshold:
+            return None
+        x, y, score = best
+        return Match(template.name, rx + x, ry + y, tw, th, float(score))
+
+    @staticmethod
+    def _refine(roi: np.ndarray, template: Template, x: int, y: int, radius: int):
+        """Exact (masked) ZNCC around a coarse peak using the precomputed terms."""
+        th, tw = template.shape
+        x0, y0 = max(0, x - radius), max(0, y - radius)
+        x1, y1 = min(roi.shape[1] - tw, x + radius), min(roi.shape[0] - th, y + radius)
+        if x1 < x0 or y1 < y0:
+            return None
+        region = roi[y0:y1 + th, x0:x1 + tw].astype(np.float32)
+        windows = sliding_window_view(region, (th, tw))
+
+        # sum(t' * p) needs no patch mean because t' sums to zero under the mask
+        numerator = np.einsum('ijkl,kl->ij', windows, template.zero_mean)
+        if template.mask is None:
+            sums = windows.sum(axis=(2, 3))
+            squares = np.einsum('ijkl,ijkl->ij', windows, windows)
+        else:
+            sums = np.einsum('ijkl,kl->ij', windows, template.mask)
+            squares = np.einsum('ijkl,ijkl,kl->ij', windows, windows, template.mask)
+        variance = np.maximum(squares - sums * sums / template.count, 1e-6)
+        scores = numerator / (template.norm * np.sqrt(variance))
+
+        iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        return x0 + int(ix), y0 + int(iy), float(scores[iy, ix])
+
+    # ---------------------------------------------------------------- bars
+
+    def _bar_percent(self, frame: Frame, roi_name: str, channel: int) -> Optional[Dict]:
+        located = self._roi_image(frame, roi_name, space="bgr")
+        if located is None:
+            return None
+        bar, (rx, ry) = located
+        # The fill is drawn from the left; read the middle line of the bar
+        line = bar[bar.shape[0] // 2].astype(np.int16)
+        others = [c for c in range(3) if c != channel]
+        filled = (line[:, channel] >= 120) & (line[:, channel] - line[:, others].max(axis=1) >= 50)
+        return {
+            'percentage': round(100.0 * np.count_nonzero(filled) / max(len(filled), 1), 1),
+            'region': (rx, ry, bar.shape[1], bar.shape[0]),
+        }
+
+    # ---------------------------------------------------------------- helpers
+
+    @staticmethod
+    def _as_frame(frame: Union[Frame, np.ndarray]) -> Frame:
+        # A view: the frame marks its buffer read-only, the caller's array stays writable
+        return frame if isinstance(frame, Frame) else Frame(frame.view())
+
+    def _record(self, method: str, start: float):
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        stats = self._stats.setdefault(method, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'over_budget': 0})
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        if elapsed_ms > self.budget_ms:
+            stats['over_budget'] += 1
+
+    def get_stats(self) -> Dict:
+        """Per-call timing against the budget, per public method."""
+        report = {}
+        for method, stats in self._stats.items():
+            report[method] = dict(stats)
+            report[method]['avg_ms'] = stats['total_ms'] / stats['calls'] if stats['calls'] else 0.0
+            report[method]['budget_ms'] = self.budget_ms
+        report['templates'] = {group: len(t) for group, t in self.templates.items()}
+        report['budget_cutoffs'] = self.budget_cutoffs
+        return report
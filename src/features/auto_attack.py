@@ -14,6 +14,14 @@ import cv2
 import numpy as np
 
 from vision.screen_reader import ScreenReader
+from capture.frame import Frame
+from capture.frame_bus import FrameBus
+from capture.roi_registry import RoiRegistry
+from detection.battle_list import BattleListParser
+from detection.name_recognizer import NameRecognizer, TargetPriorities
+from detection.target_tracker import TargetTracker
+from detection.target_marker import TargetMarkerDetector
+from detection.entity_classifier import EntityClassifier, PLAYER
 from control.keyboard_controller import KeyboardController
 from control.mouse_controller import MouseController
 from core.state_machine import BotState
@@ -31,9 +39,12 @@ class AutoAttack:
     - Safe mode support
     """
     
-    def __init__(self, screen_reader: ScreenReader, keyboard: KeyboardController, mouse: MouseController):
+    def __init__(self, screen_reader: ScreenReader, keyboard: KeyboardController, mouse: MouseController,
+                 frame_bus: Optional[FrameBus] = None, roi_registry: Optional[RoiRegistry] = None):
         """Initialize auto-attack system."""
         self.screen_reader = screen_reader
+        self.frame_bus = frame_bus
+        self.roi_registry = roi_registry
         self.keyboard = keyboard
         self.mouse = mouse
         self.running = False
@@ -52,6 +63,16 @@ class AutoAttack:
             "width": 200,
             "height": 400
         }
+        self._declare_roi()
+        self.battle_list_parser = BattleListParser()
+        self.name_recognizer = NameRecognizer()
+        self.target_priorities = TargetPriorities()
+        self.target_tracker = TargetTracker()
+        self.entity_classifier = EntityClassifier()
+        self.target_marker = TargetMarkerDetector(self.battle_list_parser.geometry)
+        self.target_marker.set_battle_list(*self._battle_list_rect())
+        self.target_marker.on("target_lost", self._on_target_lost)
+        self._last_seq = 0
         
         # Target detection
         self.current_target = None
@@ -87,14 +108,14 @@ class AutoAttack:
                 # Check for targets
                 self._find_targets()
                 
-                # Attack current target
-                if self.current_target:
+                # Attack current target (the game keeps attacking once it is marked)
+                if self.current_target and not self.target_marker.is_attacking:
                     self._attack_current_target()
                 
                 # Look for next target
                 self._find_next_target()
                 
-                time.sleep(self.target_check_interval)
+                self._wait_for_next_frame()
                 
             except Exception as e:
                 logger.error(f"Error in attack loop: {e}")
@@ -104,69 +125,105 @@ class AutoAttack:
         """Find targets in battle list."""
         try:
             # Capture battle list area
-            frame = self.screen_reader.capture_single_frame()
+            frame = self._get_frame()
             if frame is None:
                 return
             
+            self._last_seq = frame.seq
+            
             # Extract battle list region
-            x, y, w, h = (
-                self.battle_list_region["x"],
-                self.battle_list_region["y"],
-                self.battle_list_region["width"],
-                self.battle_list_region["height"]
-            )
+            x, y, w, h = self._battle_list_rect()
             
             # Ensure coordinates are within frame bounds
-            if x + w > frame.shape[1] or y + h > frame.shape[0]:
+            battle_list_image = frame.crop(x, y, w, h)
+            if battle_list_image is None:
                 logger.warning("Battle list region outside screen bounds")
                 return
             
-            battle_list = frame[y:y+h, x:x+w]
+            # Parse the battle list rows (HP bar fill per row)
+            targets = self._detect_targets(battle_list_image)
+            
+            # Give every row a stable ID across frames
+            self.target_tracker.update(targets, now=frame.timestamp)
+            self._classify_targets(battle_list_image, targets)
+            self._refresh_current_target(targets)
             
-            # Find targets (red health bars or creature names)
-            targets = self._detect_targets(battle_list)
+            # Confirm the attack from the on-screen markers
+            self.target_marker.row_offset = self.battle_list_parser.offset or 0
+            self.target_marker.update(frame)
+            self._declare_marker_roi()
             
+            # The parse is exact, so an empty result means the list is empty
+            self.targets_found = targets
             if targets:
-                self.targets_found = targets
                 logger.debug(f"Found {len(targets)} targets")
             
         except Exception as e:
             logger.error(f"Error finding targets: {e}")
     
+    def _battle_list_rect(self) -> Tuple[int, int, int, int]:
+        region = self.battle_list_region
+        return region["x"], region["y"], region["width"], region["height"]
+    
+    def _wait_for_next_frame(self):
+        """Wait for a new shared frame (so target loss is seen within one frame), else sleep."""
+        if self.frame_bus is not None and self.frame_bus.is_running:
+            self.frame_bus.wait_for_frame(self._last_seq, timeout=self.target_check_interval)
+        else:
+            time.sleep(self.target_check_interval)
+    
+    def _on_target_lost(self, state):
+        """The red markers disappeared: the target died or left, pick a new one."""
+        if self.current_target is not None:
+            logger.debug(f"Lost target {self.current_target['id']}")
+        self.current_target = None
+    
+    def _declare_roi(self):
+        """Tell the capture layer which part of the screen the battle list is in."""
+        if self.roi_registry is not None:
+            region = self.battle_list_region
+            self.roi_registry.declare("battle_list", region["x"], region["y"],
+                                      region["width"], region["height"], owner="auto_attack")
+    
+    def _declare_marker_roi(self):
+        """Capture only the part of the viewport the next marker check reads (none while idle)."""
+        if self.roi_registry is None:
+            return
+        region = self.target_marker.search_region()
+        if region is None:
+            self.roi_registry.remove("target_marker")
+        else:
+            self.roi_registry.declare("target_marker", *region, owner="auto_attack")
+    
+    def _get_frame(self) -> Optional[Frame]:
+        """Latest shared frame from the bus, or a direct capture without one."""
+        if self.frame_bus is not None:
+            return self.frame_bus.latest()
+        image = self.screen_reader.capture_single_frame()
+        return Frame(image) if image is not None else None
+    
     def _detect_targets(self, battle_list_image):
-        """Detect targets in battle list image."""
+        """Detect targets in battle list image (one entry per occupied row, in list order)."""
         targets = []
         
         try:
-            # Convert to HSV for better color detection
-            hsv = cv2.cvtColor(battle_list_image, cv2.COLOR_BGR2HSV)
-            
-            # Look for red health bars (low health)
-            lower_red1 = np.array([0, 100, 100])
-            upper_red1 = np.array([10, 255, 255])
-            lower_red2 = np.array([160, 100, 100])
-            upper_red2 = np.array([180, 255, 255])
-            
-            mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-            mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-            red_mask = mask1 + mask2
-            
-            # Find contours of red areas
-            contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                if cv2.contourArea(contour) > 50:  # Minimum size
-                    x, y, w, h = cv2.boundingRect(contour)
-                    targets.append({
-                        "x": x + self.battle_list_region["x"],
-                        "y": y + self.battle_list_region["y"],
-                        "width": w,
-                        "height": h,
-                        "area": cv2.contourArea(contour)
-                    })
-            
-            # Sort by area (larger = more important target)
-            targets.sort(key=lambda t: t["area"], reverse=True)
+            rows = self.battle_list_parser.parse(battle_list_image)
+            geometry = self.battle_list_parser.geometry
+            
+            for row in rows:
+                row_top = int(row["y"]) - geometry.row_height // 2
+                name = self.name_recognizer.recognize(geometry.name_strip(battle_list_image, row_top))
+                targets.append({
+                    "row": int(row["row"]),
+                    "x": self.battle_list_region["x"] + geometry.icon_x,
+                    "y": self.battle_list_region["y"] + int(row["y"]) - geometry.row_height // 2,
+                    "width": geometry.bar_x + geometry.bar_width - geometry.icon_x,
+                    "height": geometry.row_height,
+                    "hp": int(row["hp"]),
+                    "selected": bool(row["selected"]),
+                    "name": name,
+                    "priority": self.target_priorities.priority(name)
+                })
             
         except Exception as e:
             logger.error(f"Error detecting targets: {e}")
@@ -192,7 +249,13 @@ class AutoAttack:
     def _find_next_target(self):
         """Find and click next target."""
         try:
+            if self.target_marker.is_attacking and self.current_target is not None:
+                # Already attacking the chosen target, nothing to press or click
+                return
+            
             if not self.targets_found:
+                if self.target_marker.is_attacking:
+                    return
                 # No targets found, try next target key
                 self.keyboard.press_key(self.next_target_key)
                 time.sleep(0.1)
@@ -200,23 +263,70 @@ class AutoAttack:
                 logger.debug("No targets found, pressed next target key")
                 return
             
-            # Click on the first target in battle list
-            target = self.targets_found[0]
+            # Click the highest-priority target (closest first on ties)
+            target = self._select_target(self.targets_found)
+            if target is None:
+                logger.debug("Only ignored creatures in battle list")
+                return
+            
+            # Click only when the intended target changes
+            if self.current_target is not None and self.current_target["id"] == target["id"]:
+                return
+            if target["selected"]:
+                # Already attacked in game (e.g. selected by hand)
+                self.current_target = target
+                return
             click_x = target["x"] + target["width"] // 2
             click_y = target["y"] + target["height"] // 2
             
             # Click on target
             self.mouse.click(click_x, click_y)
-            logger.debug(f"Clicked target at ({click_x}, {click_y})")
+            logger.debug(f"Clicked target {target['name'] or '?'} at ({click_x}, {click_y})")
             
             # Update current target
             self.current_target = target
-            
-            time.sleep(0.5)  # Wait for target selection
+            track = self.target_tracker.get(target["id"])
+            if track is not None:
+                track.attacked = True
             
         except Exception as e:
             logger.error(f"Error finding next target: {e}")
     
+    def _classify_targets(self, battle_list_image, targets):
+        """Tag each target as player or monster (once per tracked creature)."""
+        geometry = self.battle_list_parser.geometry
+        for target in targets:
+            track = self.target_tracker.get(target["id"])
+            if track is None:
+                continue
+            if not track.kind or (target["name"] and track.kind_name != target["name"]):
+                row_top = target["y"] - self.battle_list_region["y"]
+                track.kind, cue = self.entity_classifier.classify_row(
+                    battle_list_image, geometry, row_top, target["name"])
+                track.kind_name = target["name"]
+                if track.kind == PLAYER:
+                    logger.info(f"Player in battle list ({target['name'] or '?'}, by {cue}), not attacking")
+            target["kind"] = track.kind
+    
+    def _refresh_current_target(self, targets):
+        """Follow the current target to its new row, or drop it once it left the list."""
+        if self.current_target is None:
+            return
+        for target in targets:
+            if target["id"] == self.current_target["id"]:
+                self.current_target = target
+                return
+        if self.target_tracker.get(self.current_target["id"]) is None:
+            logger.debug(f"Target {self.current_target['id']} left the battle list")
+            self.current_target = None
+    
+    def _select_target(self, targets):
+        """Pick the target to attack; players and creatures with priority <= 0 are never attacked."""
+        candidates = [t for t in targets if t["priority"] > 0 and t.get("kind") != PLAYER]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda t: (t["priority"], -t["row"]))
+    
     def set_attack_key(self, key: str):
         """Set the attack key."""
         self.attack_key = key
@@ -240,13 +350,26 @@ class AutoAttack:
             "width": width,
             "height": height
         }
+        self._declare_roi()
+        self.battle_list_parser.reset()
+        self.target_tracker.reset()
+        self.target_marker.set_battle_list(x, y, width, height)
+        self.current_target = None
         logger.info(f"Battle list calibrated: ({x}, {y}, {width}, {height})")
     
+    def set_viewport(self, x: int, y: int, width: int, height: int):
+        """Set the game viewport (where the red target outline is drawn)."""
+        self.target_marker.set_viewport(x, y, width, height)
+        # Partial frames only hold declared regions: a window around the outline, not the viewport
+        self._declare_marker_roi()
+        logger.info(f"Viewport set: ({x}, {y}, {width}, {height})")
+    
     def get_status(self):
         """Get auto-attack status."""
         return {
             "running": self.running,
             "current_target": self.current_target,
+            "is_attacking": self.target_marker.is_attacking,
             "targets_found": len(self.targets_found),
             "attack_key": self.attack_key,
             "next_target_key": self.next_target_key,
@@ -5,6 +5,7 @@ By Taquito Loco 🎮
 This module handles auto-loot functionality for automatic item collection.
 """
 
+import os
 import time
 import threading
 import logging
@@ -13,6 +14,10 @@ import cv2
 import numpy as np
 
 from vision.screen_reader import ScreenReader
+from capture.frame import Frame
+from capture.frame_bus import FrameBus
+from capture.roi_registry import RoiRegistry
+from detection.container_parser import ContainerParser
 from control.mouse_controller import MouseController
 from control.keyboard_controller import KeyboardController
 
@@ -24,14 +29,17 @@ class AutoLoot:
     
     Features:
     - Loot corpses automatically
-    - Template matching for items
+    - Sprite-hash item identification in containers
     - Configurable loot list
     - Safe mode support
     """
     
-    def __init__(self, screen_reader: ScreenReader, mouse: MouseController, keyboard: KeyboardController):
+    def __init__(self, screen_reader: ScreenReader, mouse: MouseController, keyboard: KeyboardController,
+                 frame_bus: Optional[FrameBus] = None, roi_registry: Optional[RoiRegistry] = None):
         """Initialize auto-loot system."""
         self.screen_reader = screen_reader
+        self.frame_bus = frame_bus
+        self.roi_registry = roi_registry
         self.mouse = mouse
         self.keyboard = keyboard
         self.running = False
@@ -84,6 +92,17 @@ class AutoLoot:
             "height": 200
         }
         
+        # Open loot container (corpse / backpack window, approximate - will be calibrated)
+        self.container_area = {
+            "x": 1600,
+            "y": 620,
+            "width": 180,
+            "height": 180
+        }
+        self.container_parser = ContainerParser()
+        self.container_open = False
+        self._declare_roi()
+        
         logger.info("Auto-loot system initialized")
     
     def start(self):
@@ -125,42 +144,47 @@ class AutoLoot:
                 time.sleep(1.0)
     
     def _find_loot_items(self) -> List[Dict]:
-        """Find lootable items on screen."""
+        """Find lootable items in the open loot container."""
         items_found = []
         
         try:
             # Capture screen
-            frame = self.screen_reader.get_current_frame()
+            frame = self._get_frame()
             if frame is None:
                 return items_found
             
-            # Extract loot area
+            # Extract container area
             x, y, w, h = (
-                self.loot_area["x"],
-                self.loot_area["y"], 
-                self.loot_area["width"],
-                self.loot_area["height"]
+                self.container_area["x"],
+                self.container_area["y"],
+                self.container_area["width"],
+                self.container_area["height"]
             )
             
             # Ensure coordinates are within frame bounds
-            if x + w > frame.shape[1] or y + h > frame.shape[0]:
-                logger.warning("Loot area outside screen bounds")
+            container_image = frame.crop(x, y, w, h)
+            if container_image is None:
+                logger.warning("Loot container area outside screen bounds")
                 return items_found
             
-            loot_area = frame[y:y+h, x:x+w]
-            
-            # Check each enabled item
-            for item in self.loot_items:
-                if not item["enabled"]:
-                    continue
-                
-                # Template matching (simplified - would need actual templates)
-                if self._find_item_template(loot_area, item):
+            # Identify every slot (sprite hash lookup), then keep the wanted ones
+            slots = self.container_parser.parse(container_image, origin=(x, y))
+            if bool(slots) != self.container_open:
+                # Opened or closed since the last check: the next window locates its own grid
+                self.container_open = bool(slots)
+                self.container_parser.reset()
+                if slots:
+                    slots = self.container_parser.parse(container_image, origin=(x, y))
+            wanted = {self._item_key(item): item for item in self.loot_items if item["enabled"]}
+            for slot in slots:
+                item = wanted.get(slot.name)
+                if item is not None:
                     items_found.append({
                         "name": item["name"],
                         "priority": item["priority"],
-                        "x": x + self.loot_area["x"],
-                        "y": y + self.loot_area["y"]
+                        "slot": slot.index,
+                        "x": slot.x,
+                        "y": slot.y
                     })
             
             # Sort by priority
@@ -171,52 +195,24 @@ class AutoLoot:
         
         return items_found
     
-    def _find_item_template(self, image, item: Dict) -> bool:
-        """Find item using template matching (simplified)."""
-        try:
-            # For now, use color detection as placeholder
-            # In a real implementation, you'd load actual item templates
-            
-            # Convert to HSV
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            
-            # Look for gold/yellow colors (coins)
-            if "coin" in item["name"].lower():
-                lower_gold = np.array([20, 100, 100])
-                upper_gold = np.array([40, 255, 255])
-                mask = cv2.inRange(hsv, lower_gold, upper_gold)
-                
-                # If enough gold pixels found
-                if np.sum(mask > 0) > 100:
-                    return True
-            
-            # Look for red colors (health potions)
-            elif "health" in item["name"].lower():
-                lower_red1 = np.array([0, 100, 100])
-                upper_red1 = np.array([10, 255, 255])
-                lower_red2 = np.array([160, 100, 100])
-                upper_red2 = np.array([180, 255, 255])
-                
-                mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-                mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-                mask = mask1 + mask2
-                
-                if np.sum(mask > 0) > 100:
-                    return True
-            
-            # Look for blue colors (mana potions)
-            elif "mana" in item["name"].lower():
-                lower_blue = np.array([100, 100, 100])
-                upper_blue = np.array([140, 255, 255])
-                mask = cv2.inRange(hsv, lower_blue, upper_blue)
-                
-                if np.sum(mask > 0) > 100:
-                    return True
-            
-        except Exception as e:
-            logger.error(f"Error in template matching: {e}")
-        
-        return False
+    @staticmethod
+    def _item_key(item: Dict) -> str:
+        """Item dictionary name of a loot entry (its template file name without extension)."""
+        return os.path.splitext(item["template"])[0]
+    
+    def _declare_roi(self):
+        """Tell the capture layer where the open loot container is."""
+        if self.roi_registry is not None:
+            area = self.container_area
+            self.roi_registry.declare("loot_container", area["x"], area["y"],
+                                      area["width"], area["height"], owner="auto_loot")
+    
+    def _get_frame(self) -> Optional[Frame]:
+        """Latest shared frame from the bus, or the reader's frame without one."""
+        if self.frame_bus is not None:
+            return self.frame_bus.latest()
+        image = self.screen_reader.get_current_frame()
+        return Frame(image) if image is not None else None
     
     def _loot_items(self, items: List[Dict]):
         """Loot the found items."""
@@ -277,6 +273,13 @@ class AutoLoot:
         self.loot_area = {"x": x, "y": y, "width": width, "height": height}
         logger.info(f"Set loot area: ({x}, {y}) {width}x{height}")
     
+    def set_container_area(self, x: int, y: int, width: int, height: int):
+        """Set the screen area of the open loot container."""
+        self.container_area = {"x": x, "y": y, "width": width, "height": height}
+        self.container_parser.reset()
+        self._declare_roi()
+        logger.info(f"Set loot container area: ({x}, {y}) {width}x{height}")
+    
     def get_loot_items(self) -> List[Dict]:
         """Get list of all loot items."""
         return self.loot_items.copy()
@@ -290,5 +293,7 @@ class AutoLoot:
             "total_items": len(self.loot_items),
             "enabled_items": len(enabled_items),
             "loot_area": self.loot_area,
+            "container_area": self.container_area,
+            "known_sprites": len(self.container_parser.dictionary),
             "items": self.loot_items
         } 
\ No newline at end of file
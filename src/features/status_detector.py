@@ -5,36 +5,70 @@ By Taquito Loco 🎮
 - Detects health and mana percentage from the screen using color detection (OpenCV)
 - Fast and efficient (no OCR required)
 - Easy to adjust color ranges for different clients/themes
+- Reads the shared FrameBus frame when one is given, so health and mana
+  come from the same capture
 """
 import cv2
 import numpy as np
 import logging
 
+from capture.frame import Frame
+
 logger = logging.getLogger(__name__)
 
 class StatusDetector:
-    def __init__(self, screen_reader):
+    def __init__(self, screen_reader, frame_bus=None, roi_registry=None):
         self.screen_reader = screen_reader
+        self.frame_bus = frame_bus
+        self.roi_registry = roi_registry
         # Default regions for health/mana bars (adjust as needed)
         self.health_bar_region = (50, 40, 200, 10)  # (x, y, w, h)
         self.mana_bar_region = (50, 55, 200, 10)
+        self._declare_rois()
         # Color ranges (BGR) for health (red) and mana (blue)
         self.health_color = ([0, 0, 180], [80, 80, 255])  # Lower, Upper
         self.mana_color = ([180, 0, 0], [255, 80, 80])
 
+    def set_bar_regions(self, health_region, mana_region):
+        """Move the health/mana bar regions, (x, y, w, h) each."""
+        self.health_bar_region = tuple(health_region)
+        self.mana_bar_region = tuple(mana_region)
+        self._declare_rois()
+
+    def _declare_rois(self):
+        if self.roi_registry is not None:
+            self.roi_registry.declare("health_bar", *self.health_bar_region, owner="status_detector")
+            self.roi_registry.declare("mana_bar", *self.mana_bar_region, owner="status_detector")
+
     def get_health_percent(self) -> float:
         return self._get_bar_percent(self.health_bar_region, self.health_color, 'health')
 
     def get_mana_percent(self) -> float:
         return self._get_bar_percent(self.mana_bar_region, self.mana_color, 'mana')
 
-    def _get_bar_percent(self, region, color_range, label) -> float:
-        frame = self.screen_reader.capture_single_frame()
+    def get_status_percents(self):
+        """Health and mana percent measured on one captured frame."""
+        frame = self._get_frame()
+        return (self._get_bar_percent(self.health_bar_region, self.health_color, 'health', frame),
+                self._get_bar_percent(self.mana_bar_region, self.mana_color, 'mana', frame))
+
+    def _get_frame(self):
+        if self.frame_bus is not None:
+            return self.frame_bus.latest()
+        image = self.screen_reader.capture_single_frame()
+        return Frame(image) if image is not None else None
+
+    def _get_bar_percent(self, region, color_range, label, frame=None) -> float:
+        if frame is None:
+            frame = self._get_frame()
         if frame is None:
             logger.error(f"StatusDetector: No frame for {label} bar detection")
             return 0.0
         x, y, w, h = region
-        bar_img = frame[y:y+h, x:x+w]
+        bar_img = frame.crop(x, y, w, h)
+        if bar_img is None:
+            logger.error(f"StatusDetector: {label} bar region outside frame")
+            return 0.0
         lower = np.array(color_range[0], dtype=np.uint8)
         upper = np.array(color_range[1], dtype=np.uint8)
         mask = cv2.inRange(bar_img, lower, upper)
@@ -47,4 +81,5 @@ class StatusDetector:
 # Example usage:
 # detector = StatusDetector(screen_reader)
 # hp = detector.get_health_percent()
-# mp = detector.get_mana_percent() 
\ No newline at end of file
+# mp = detector.get_mana_percent()
+# hp, mp = detector.get_status_percents()  # one capture for both bars 
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Supply Monitor Feature
+By Taquito Loco 🎮
+
+This module reads the supply counts (potions, food, ...) from the stack
+numbers drawn on their action bar or backpack slots. It runs on its own
+thread at a low rate, off the main path, and publishes the counts to the
+state machine ('supplies', 'low_supplies', 'needs_resupply') and to any
+registered listener.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from capture.frame import Frame
+from capture.frame_bus import FrameBus
+from capture.roi_registry import RoiRegistry
+from detection.digit_reader import DigitReader
+
+logger = logging.getLogger(__name__)
+
+
+class SupplyMonitor:
+    """
+    Periodic supply counter.
+
+    Supplies are configured in ``config/supplies.json`` as the screen
+    position (top-left) of the slot showing each item, plus the minimum
+    count before a resupply is needed. A slot with no count drawn is
+    counted as 0; a count that cannot be read keeps the previous value.
+    """
+
+    def __init__(self, capture_fn: Optional[Callable[[], Optional[np.ndarray]]] = None,
+                 frame_bus: Optional[FrameBus] = None, roi_registry: Optional[RoiRegistry] = None,
+                 state_machine=None, digit_reader: Optional[DigitReader] = None,
+                 config_file: str = "config/supplies.json"):
+        """
+        Initialize the supply monitor.
+
+        Args:
+            capture_fn: Screen capture used when there is no frame bus
+            frame_bus: Shared frame bus
+            roi_registry: Registry the supply slots are declared in
+            state_machine: State machine the counts are published to
+            digit_reader: Stack count reader
+            config_file: JSON file with "interval", "slots" and "minimums"
+        """
+        self.capture_fn = capture_fn
+        self.frame_bus = frame_bus
+        self.roi_registry = roi_registry
+        self.state_machine = state_machine
+        self.digit_reader = digit_reader or DigitReader()
+        self.config_file = config_file
+        self.running = False
+        self.monitor_thread = None
+
+        self.interval = 2.0  # Supplies change slowly
+        self.slots: Dict[str, Tuple[int, int]] = {}
+        self.minimums: Dict[str, int] = {}
+        self.supplies: Dict[str, int] = {}
+        self._listeners: List[Callable[[Dict[str, int]], None]] = []
+        self.load_config()
+
+        logger.info("Supply monitor initialized")
+
+    def load_config(self) -> bool:
+        """Load slot positions and minimum counts."""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.interval = float(data.get("interval", self.interval))
+                self.slots = {name: (int(pos[0]), int(pos[1])) for name, pos in data.get("slots", {}).items()}
+                self.minimums = {name: int(value) for name, value in data.get("minimums", {}).items()}
+                self._declare_rois()
+                return True
+        except Exception as e:
+            logger.error(f"Error loading supply config: {e}")
+        return False
+
+    def start(self):
+        """Start supply monitoring."""
+        if self.running:
+            logger.warning("Supply monitor already running")
+            return False
+        if not self.slots:
+            logger.warning("No supply slots configured, supply monitor not started")
+            return False
+
+        self.running = True
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self.monitor_thread.start()
+
+        logger.info("Supply monitor started")
+        return True
+
+    def stop(self):
+        """Stop supply monitoring."""
+        self.running = False
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=1.0)
+
+        logger.info("Supply monitor stopped")
+
+    def on_update(self, callback: Callable[[Dict[str, int]], None]):
+        """Register a listener called with the counts after every read."""
+        self._listeners.append(callback)
+
+    def set_slot(self, name: str, x: int, y: int, minimum: Optional[int] = None):
+        """Set (or add) the screen slot of one supply."""
+        self.slots[name] = (x, y)
+        if minimum is not None:
+            self.minimums[name] = minimum
+        self._declare_rois()
+        logger.info(f"Set supply slot {name}: ({x}, {y})")
+
+    def _monitor_loop(self):
+        """Main supply reading loop."""
+        while self.running:
+            try:
+                self.update()
+                time.sleep(self.interval)
+
+            except Exception as e:
+                logger.error(f"Error in supply monitor loop: {e}")
+                time.sleep(1.0)
+
+    def update(self, frame: Optional[Frame] = None) -> Dict[str, int]:
+        """
+        Read every configured supply once and publish the counts.
+
+        Args:
+            frame: Frame to read (latest shared frame by default)
+
+        Returns:
+            Current counts by supply name
+        """
+        if frame is None:
+            frame = self._get_frame()
+        if frame is None:
+            return dict(self.supplies)
+
+        size = self.digit_reader.grid.slot_size
+        for name, (x, y) in self.slots.items():
+            slot = frame.crop(x, y, size, size)
+            if slot is None:
+                continue
+            count = self.digit_reader.read(slot)
+            if count is not None:
+                self.supplies[name] = count
+
+        self._publish()
+        return dict(self.supplies)
+
+    def low_supplies(self) -> List[str]:
+        """Supplies below their minimum count."""
+        return [name for name, minimum in self.minimums.items()
+                if name in self.supplies and self.supplies[name] < minimum]
+
+    def _publish(self):
+        supplies = dict(self.supplies)
+        low = self.low_supplies()
+        if self.state_machine is not None:
+            self.state_machine.set_state_data('supplies', supplies)
+            self.state_machine.set_state_data('low_supplies', low)
+            self.state_machine.set_state_data('needs_resupply', bool(low))
+        for callback in self._listeners:
+            try:
+                callback(supplies)
+            except Exception as e:
+                logger.error(f"Error in supply listener: {e}")
+
+    def _declare_rois(self):
+        """Tell the capture layer which slots are read."""
+        if self.roi_registry is not None:
+            size = self.digit_reader.grid.slot_size
+            for name, (x, y) in self.slots.items():
+                self.roi_registry.declare(f"supply_{name}", x, y, size, size, owner="supply_monitor")
+
+    def _get_frame(self) -> Optional[Frame]:
+        """Latest shared frame from the bus, or a fresh capture without one."""
+        if self.frame_bus is not None:
+            return self.frame_bus.latest()
+        if self.capture_fn is None:
+            return None
+        image = self.capture_fn()
+        return Frame(image) if image is not None else None
+
+    def get_status(self) -> Dict:
+        """Get current status."""
+        return {
+            "running": self.running,
+            "slots": len(self.slots),
+            "supplies": dict(self.supplies),
+            "low_supplies": self.low_supplies(),
+            "reader": self.digit_reader.get_stats()
+        }
@@ -773,7 +773,7 @@ class NopalBotEliteKnightGUI:
             from tkinter import filedialog
             filename = filedialog.askopenfilename(
                 title="Seleccionar archivo de mapa",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+                filetypes=[("JSON files", "*.json"), ("Visited tiles", "*.visited"), ("All files", "*.*")],
                 initialdir="logs"
             )
             
@@ -0,0 +1,248 @@
+"""
+Blocked Edges Module for Tibia Bot
+
+This module remembers moves that failed: a movement key was sent from a
+tile and the character did not move. Each (tile, direction) edge gets a
+confidence that rises with every failure and decays with time. Most
+blockers are temporary (a creature, another player, a field), so a single
+failure fades within seconds. Edges that keep failing decay more slowly:
+the half-life doubles with every failure, so a real wall the map does not
+show ends up blocked for hours. A move that succeeds clears the edge.
+
+Lookups are a dict access, so ``smart_walk`` can check a key before
+sending it. Tibia has no walls between tiles: a move fails because of what
+is on the tile it leads to. The path planner therefore avoids the
+destination tiles of blocked edges (``blocked_tiles``). Every change is
+counted in a revision per floor region of ``region_size`` tiles, so a
+cached route only goes stale when an edge inside its own area changes
+(``revisions``).
+"""
+
+import math
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]   # World (x, y, z)
+EdgeKey = Tuple[int, int, int, str]  # (x, y, z, direction)
+RegionId = Tuple[int, int, int]      # (z, x // region size, y // region size)
+
+# Tile offset of every movement key (same letters as the planner's moves)
+STEPS = {'W': (0, -1), 'S': (0, 1), 'A': (-1, 0), 'D': (1, 0)}
+
+
+@dataclass
+class BlockedEdge:
+    """Failure record of one move."""
+    confidence: float  # At ``updated``
+    updated: float     # Time of the last failure
+    failures: int
+
+
+class BlockedEdgeIndex:
+    """Failed moves with decaying confidence, looked up in O(1)."""
+
+    def __init__(self, threshold: float = 0.5, gain: float = 0.6, half_life: float = 20.0,
+                 max_half_life: float = 6 * 3600.0, max_edges: int = 4096, region_size: int = 32):
+        """
+        Initialize the BlockedEdgeIndex.
+
+        Args:
+            threshold: Confidence from which an edge counts as blocked
+            gain: Share of the remaining doubt a failure removes
+            half_life: Seconds for the confidence of a single failure to halve
+            max_half_life: Cap of the half-life of edges that keep failing
+            max_edges: Edges kept; the least confident ones go first
+            region_size: Side in tiles of the regions revisions are kept for
+        """
+        self.threshold = threshold
+        self.gain = gain
+        self.half_life = half_life
+        self.max_half_life = max_half_life
+        self.max_edges = max_edges
+        self.region_size = region_size
+        self._edges: Dict[EdgeKey, BlockedEdge] = {}
+        self._revision = 0
+        self._regions: Dict[RegionId, int] = {}  # Revision of every region that ever changed
+        self._next_expiry = math.inf  # When the next blocked edge stops counting as blocked
+        self._expired_until = -math.inf  # Edges expiring up to here were already counted
+        self._tiles: Dict[int, Set[Tuple[int, int]]] = {}  # Cached blocked_tiles per floor
+        self.stats = {'failures': 0, 'cleared': 0, 'expired': 0}
+
+    @staticmethod
+    def _key(position, direction: str) -> EdgeKey:
+        return (position[0], position[1], position[2], direction.upper())
+
+    def _half_life(self, edge: BlockedEdge) -> float:
+        return min(self.half_life * 2 ** (edge.failures - 1), self.max_half_life)
+
+    def _confidence(self, edge: BlockedEdge, now: float) -> float:
+        return edge.confidence * 0.5 ** (max(0.0, now - edge.updated) / self._half_life(edge))
+
+    def _expiry(self, edge: BlockedEdge) -> float:
+        """Time the edge's confidence falls below the threshold."""
+        if edge.confidence < self.threshold:
+            return edge.updated
+        return edge.updated + self._half_life(edge) * math.log2(edge.confidence / self.threshold)
+
+    @staticmethod
+    def _target(key: EdgeKey) -> Position:
+        """Tile a move leads to."""
+        dx, dy = STEPS[key[3]]
+        return (key[0] + dx, key[1] + dy, key[2])
+
+    def _changed(self, keys: Iterable[EdgeKey]):
+        """Count a change of the given edges in the regions of the tiles they lead to."""
+        size = self.region_size
+        for key in keys:
+            x, y, z = self._target(key)
+            region = (z, x // size, y // size)
+            self._regions[region] = self._regions.get(region, 0) + 1
+            self._tiles.pop(z, None)
+        self._revision += 1
+
+    # ------------------------------------------------------------------ updates
+
+    def record_failure(self, position: Position, direction: str, now: Optional[float] = None) -> float:
+        """
+        Record a move that did not change the position.
+
+        Args:
+            position: Tile the move started from
+            direction: Movement key ('W', 'A', 'S', 'D', any case)
+            now: Time of the attempt (default: time.time())
+
+        Returns:
+            Confidence that the edge is blocked
+        """
+        now = time.time() if now is None else now
+        key = self._key(position, direction)
+        edge = self._edges.get(key)
+        if edge is None:
+            if len(self._edges) >= self.max_edges:
+                self._evict(now)
+            edge = self._edges[key] = BlockedEdge(0.0, now, 0)
+        current = self._confidence(edge, now)
+        was_blocked = current >= self.threshold
+        edge.confidence = current + (1.0 - current) * self.gain
+        edge.updated = now
+        edge.failures += 1
+        self.stats['failures'] += 1
+        if not was_blocked and edge.confidence >= self.threshold:
+            self._changed([key])
+        self._next_expiry = min(self._next_expiry, self._expiry(edge))
+        logger.debug(f"Move {key[3]} from {position} failed ({edge.failures}x, confidence {edge.confidence:.2f})")
+        return edge.confidence
+
+    def record_success(self, position: Position, direction: str):
+        """
+        Record a move that worked: the edge and every edge into the tile reached are open.
+
+        Args:
+            position: Tile the move started from
+            direction: Movement key
+        """
+        key = self._key(position, direction)
+        dx, dy = STEPS.get(key[3], (0, 0))
+        reached = (position[0] + dx, position[1] + dy, position[2])
+        stale = [key] + [self._key((reached[0] - sx, reached[1] - sy, reached[2]), d)
+                         for d, (sx, sy) in STEPS.items()]
+        changed = []
+        for edge_key in stale:
+            if self._edges.pop(edge_key, None) is not None:
+                self.stats['cleared'] += 1
+                changed.append(edge_key)
+        if changed:
+            self._changed(changed)
+
+    def _evict(self, now: float):
+        """Drop the least confident quarter of the edges."""
+        ranked = sorted(self._edges, key=lambda k: self._confidence(self._edges[k], now))
+        evicted = ranked[:max(1, len(ranked) // 4)]
+        for key in evicted:
+            del self._edges[key]
+        self._changed(evicted)
+
+    def _expire(self, now: float):
+        """Forget edges that faded out and find the next time one stops being blocked."""
+        self._next_expiry = math.inf
+        changed = []
+        for key, edge in list(self._edges.items()):
+            if edge.confidence >= self.threshold and self._expired_until < self._expiry(edge) <= now:
+                changed.append(key)
+            confidence = self._confidence(edge, now)
+            if confidence < self.threshold * 0.1:
+                del self._edges[key]
+                self.stats['expired'] += 1
+            elif confidence >= self.threshold:
+                self._next_expiry = min(self._next_expiry, self._expiry(edge))
+        self._expired_until = now
+        if changed:
+            self._changed(changed)
+
+    # ------------------------------------------------------------------ queries
+
+    def confidence(self, position: Position, direction: str, now: Optional[float] = None) -> float:
+        """Current confidence that a move is blocked (0 if it never failed)."""
+        edge = self._edges.get(self._key(position, direction))
+        if edge is None:
+            return 0.0
+        return self._confidence(edge, time.time() if now is None else now)
+
+    def is_blocked(self, position: Position, direction: str, now: Optional[float] = None) -> bool:
+        """Whether a move from a tile is expected to fail."""
+        return self.confidence(position, direction, now) >= self.threshold
+
+    def blocked_directions(self, position: Position, now: Optional[float] = None) -> List[str]:
+        """Movement keys expected to fail from a tile."""
+        now = time.time() if now is None else now
+        return [d for d in STEPS if self.is_blocked(position, d, now)]
+
+    @property
+    def revision(self) -> int:
+        """Changes whenever the set of blocked edges changes anywhere (including by decay)."""
+        self._refresh()
+        return self._revision
+
+    def revisions(self, z: int, x: int, y: int, width: int, height: int) -> Dict[RegionId, int]:
+        """
+        Revisions of the regions of a floor rectangle that ever changed.
+
+        Equal results mean no blocked tile inside the rectangle changed in between.
+        """
+        self._refresh()
+        size = self.region_size
+        x0, y0 = x // size, y // size
+        x1, y1 = (x + width - 1) // size, (y + height - 1) // size
+        return {region: revision for region, revision in self._regions.items()
+                if region[0] == z and x0 <= region[1] <= x1 and y0 <= region[2] <= y1}
+
+    def _refresh(self):
+        now = time.time()
+        if now >= self._next_expiry:
+            self._expire(now)
+
+    def blocked_tiles(self, z: int) -> Set[Tuple[int, int]]:
+        """(x, y) of the tiles blocked edges on floor z lead to."""
+        self._refresh()
+        tiles = self._tiles.get(z)
+        if tiles is None:
+            now = time.time()
+            tiles = set()
+            for (x, y, ez, direction), edge in self._edges.items():
+                if ez == z and self._confidence(edge, now) >= self.threshold:
+                    tx, ty, _ = self._target((x, y, ez, direction))
+                    tiles.add((tx, ty))
+            self._tiles[z] = tiles
+        return tiles
+
+    def get_stats(self) -> Dict:
+        """Index statistics."""
+        now = time.time()
+        stats = dict(self.stats)
+        stats['edges'] = len(self._edges)
+        stats['blocked'] = sum(1 for edge in self._edges.values() if self._confidence(edge, now) >= self.threshold)
+        return stats
@@ -0,0 +1,165 @@
+"""
+Exploration Module for Tibia Bot
+
+This module keeps the exploration frontier: visited tiles next to at
+least one walkable tile that was not visited yet. The frontier is updated
+incrementally when a position is added; only the tile and its four
+neighbours are checked. Frontier tiles are kept in square spatial buckets,
+so the nearest one is found by looking at the buckets around the
+character ring by ring. The search stops as soon as no further ring can
+hold anything closer.
+
+Walkability comes from the map when one is given: walls and water never
+count as unexplored. Tiles can become blocked as the map grows, so
+frontier tiles are checked again when a query meets them.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from navigation.visited_grid import VisitedGrid
+from navigation.walkability import WalkabilityGrid
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]  # World (x, y, z)
+
+NEIGHBOURS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class ExplorationIndex:
+    """Incremental exploration frontier with nearest-frontier queries."""
+
+    def __init__(self, walkability: Optional[WalkabilityGrid] = None, bucket_size: int = 16,
+                 max_radius: int = 512):
+        """
+        Initialize the ExplorationIndex.
+
+        Args:
+            walkability: Map costs (without one every unvisited tile is walkable)
+            bucket_size: Side of the spatial buckets, in tiles
+            max_radius: Farthest (tiles) a nearest-frontier query looks
+        """
+        self.walkability = walkability
+        self.bucket_size = bucket_size
+        self.max_radius = max_radius
+        self.visited = VisitedGrid()
+        self.frontier: Set[Position] = set()
+        self._buckets: Dict[Position, Set[Position]] = {}
+        self.stats = {'queries': 0, 'buckets_searched': 0, 'stale': 0}
+
+    def __len__(self) -> int:
+        return len(self.frontier)
+
+    def _bucket(self, position: Position) -> Position:
+        return (position[0] // self.bucket_size, position[1] // self.bucket_size, position[2])
+
+    def _open(self, x: int, y: int, z: int) -> bool:
+        """Whether a tile is still to be explored."""
+        if (x, y, z) in self.visited:
+            return False
+        return self.walkability is None or self.walkability.is_walkable(x, y, z)
+
+    def _is_frontier(self, position: Position) -> bool:
+        x, y, z = position
+        return any(self._open(x + dx, y + dy, z) for dx, dy in NEIGHBOURS)
+
+    def _update(self, position: Position):
+        if self._is_frontier(position):
+            if position not in self.frontier:
+                self.frontier.add(position)
+                self._buckets.setdefault(self._bucket(position), set()).add(position)
+        else:
+            self._discard(position)
+
+    def _discard(self, position: Position):
+        if position in self.frontier:
+            self.frontier.discard(position)
+            key = self._bucket(position)
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(position)
+                if not bucket:
+                    del self._buckets[key]
+
+    def visit(self, x: int, y: int, z: int) -> bool:
+        """
+        Mark a tile visited.
+
+        Returns:
+            True if the tile was not visited before
+        """
+        position = (x, y, z)
+        if not self.visited.add(position):
+            return False
+        self._update(position)
+        for dx, dy in NEIGHBOURS:
+            neighbour = (x + dx, y + dy, z)
+            if neighbour in self.frontier:
+                self._update(neighbour)
+        return True
+
+    def visit_many(self, positions: Iterable[Position]) -> int:
+        """Mark several tiles visited (e.g. a loaded map). Returns how many were new."""
+        return sum(self.visit(*position) for position in positions)
+
+    def nearest(self, x: int, y: int, z: int) -> Optional[Position]:
+        """
+        Closest tile still to be explored, next to the nearest frontier tile.
+
+        Args:
+            x, y, z: Query position (usually the character)
+
+        Returns:
+            Unvisited walkable tile, or None if no frontier is within ``max_radius``
+        """
+        self.stats['queries'] += 1
+        if not self.frontier:
+            return None
+        size = self.bucket_size
+        bx, by = x // size, y // size
+        best, best_distance = None, None
+        for ring in range(self.max_radius // size + 1):
+            # Nothing in this ring or beyond is closer than this
+            if best is not None and best_distance <= (ring - 1) * size:
+                break
+            for key in self._ring(bx, by, z, ring):
+                bucket = self._buckets.get(key)
+                if not bucket:
+                    continue
+                self.stats['buckets_searched'] += 1
+                for position in list(bucket):
+                    if not self._is_frontier(position):
+                        self.stats['stale'] += 1
+                        self._discard(position)
+                        continue
+                    distance = abs(position[0] - x) + abs(position[1] - y)
+                    if best is None or distance < best_distance:
+                        best, best_distance = position, distance
+        if best is None:
+            return None
+        # Step into the unexplored neighbour closest to the query position
+        fx, fy, _ = best
+        candidates = [(fx + dx, fy + dy, z) for dx, dy in NEIGHBOURS if self._open(fx + dx, fy + dy, z)]
+        return min(candidates, key=lambda p: abs(p[0] - x) + abs(p[1] - y))
+
+    @staticmethod
+    def _ring(bx: int, by: int, z: int, ring: int):
+        """Bucket keys at Chebyshev distance ``ring`` from (bx, by)."""
+        if ring == 0:
+            yield (bx, by, z)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (bx + dx, by - ring, z)
+            yield (bx + dx, by + ring, z)
+        for dy in range(-ring + 1, ring):
+            yield (bx - ring, by + dy, z)
+            yield (bx + ring, by + dy, z)
+
+    def get_stats(self) -> Dict:
+        """Index statistics."""
+        stats = dict(self.stats)
+        stats['visited'] = len(self.visited)
+        stats['frontier'] = len(self.frontier)
+        stats['buckets'] = len(self._buckets)
+        return stats
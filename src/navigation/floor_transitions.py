@@ -0,0 +1,289 @@
+"""
+Floor Transitions Module for Tibia Bot
+
+This module indexes the known floor changes (stairs, ladders, holes, ramps)
+and routes between floors through them. Transitions come from two sources:
+the yellow floor-change tiles of the minimap atlas, and floor changes the
+minimap tracker actually saw the character make. The latter also tell
+which floor a transition leads to and where it lands.
+
+The index is a small graph. Its nodes are transitions, and its edges are
+the walking costs from where one transition lands to the next transition
+on that floor. The edge costs come from one bounded Dijkstra search per
+transition and are recomputed only for floors the atlas changed. A
+multi-floor route is then a Dijkstra search over a few dozen nodes,
+followed by one A* leg per floor.
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from navigation.minimap_atlas import ChunkKey
+from navigation.path_planner import PathPlanner, Position
+from navigation.walkability import BLOCKED, TRANSITION, UNKNOWN
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Transition:
+    """One way from a tile to another floor."""
+    tile: Position        # Tile walked onto
+    landing: Position     # Where the character ends up
+    observed: bool = False  # Seen used (not only inferred from the map)
+
+
+def _within(tiles, center: Position, radius: int) -> List[Position]:
+    """Tiles inside the search window of ``radius`` tiles around ``center``."""
+    return [t for t in tiles if abs(t[0] - center[0]) <= radius and abs(t[1] - center[1]) <= radius]
+
+
+class TransitionGraph:
+    """
+    Floor change index with precomputed walking costs between transitions.
+
+    Installs itself as the planner's multi-floor router.
+    """
+
+    def __init__(self, planner: PathPlanner, radius: int = 96):
+        """
+        Initialize the TransitionGraph.
+
+        Args:
+            planner: Planner used for distance searches and per-floor legs
+            radius: How far (tiles) walking costs between transitions are searched
+        """
+        self.planner = planner
+        self.walkability = planner.walkability
+        self.atlas = self.walkability.atlas
+        self.radius = radius
+        self.transitions: Dict[Position, List[Transition]] = {}
+        self._edges: Dict[Position, Dict[Position, int]] = {}  # Landing -> {transition tile: cost}
+        self._scanned: Dict[int, Set[ChunkKey]] = {}
+        self._dirty_floors: Set[int] = set()
+        self._built: Set[int] = set()
+        self.stats = {'routes': 0, 'edge_builds': 0, 'observed': 0}
+        self.atlas.on_change(self._atlas_changed)
+        planner.transitions = self
+
+    # ------------------------------------------------------------------ index
+
+    def _atlas_changed(self, z: int, chunks: Set[ChunkKey]):
+        scanned = self._scanned.get(z)
+        if scanned:
+            scanned -= chunks
+        # Landings on the floors around can change as well
+        self._dirty_floors.update((z - 1, z, z + 1))
+
+    def _scan_floor(self, z: int):
+        """Index the floor change tiles of chunks not scanned since they changed."""
+        store = self.atlas.floors.get(z)
+        if store is None:
+            return
+        scanned = self._scanned.setdefault(z, set())
+        size = store.chunk_size
+        for cx, cy in store.chunk_keys():
+            if (cx, cy) in scanned:
+                continue
+            scanned.add((cx, cy))
+            x0, y0 = cx * size, cy * size
+            for tile in [t for t in self.transitions if t[2] == z and x0 <= t[0] < x0 + size and y0 <= t[1] < y0 + size]:
+                self.transitions[tile] = [t for t in self.transitions[tile] if t.observed]
+                if not self.transitions[tile]:
+                    del self.transitions[tile]
+            costs = self.walkability.chunk(z, cx, cy)
+            if costs is None:
+                continue
+            # One node per group of adjacent floor change tiles (a hole can be several tiles wide)
+            count, labels, _, centroids = cv2.connectedComponentsWithStats((costs == TRANSITION).astype(np.uint8),
+                                                                          connectivity=4)
+            for label in range(1, count):
+                ys, xs = np.nonzero(labels == label)
+                nearest = int(np.argmin((xs - centroids[label][0]) ** 2 + (ys - centroids[label][1]) ** 2))
+                self._add_inferred((x0 + int(xs[nearest]), y0 + int(ys[nearest]), z))
+
+    def _add_inferred(self, tile: Position):
+        """Transitions a map tile may lead to: every mapped floor above or below."""
+        known = self.transitions.setdefault(tile, [])
+        if any(t.observed for t in known):
+            return
+        for dz in (-1, 1):
+            landing = self._landing(tile[0], tile[1], tile[2] + dz)
+            if landing is not None and all(t.landing != landing for t in known):
+                known.append(Transition(tile, landing))
+        if not known:
+            del self.transitions[tile]
+
+    def _landing(self, x: int, y: int, z: int) -> Optional[Position]:
+        for dx, dy in ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)):
+            cost = self.walkability.cost(x + dx, y + dy, z)
+            if cost not in (UNKNOWN, BLOCKED):
+                return (x + dx, y + dy, z)
+        return None
+
+    def observe(self, before: Position, after: Position):
+        """
+        Record a floor change the character made.
+
+        Args:
+            before: Last position on the old floor
+            after: First position on the new floor
+        """
+        if before[2] == after[2]:
+            return
+        before, after = tuple(before), tuple(after)
+        tile = self._nearest_transition_tile(before) or before
+        self.transitions[tile] = [Transition(tile, after, observed=True)]
+        self._dirty_floors.update((before[2], after[2]))
+        self.stats['observed'] += 1
+        logger.info(f"Floor change observed: {tile} -> {after}")
+
+    def _nearest_transition_tile(self, position: Position, reach: int = 1) -> Optional[Position]:
+        x, y, z = position
+        best = None
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                if self.walkability.cost(x + dx, y + dy, z) == TRANSITION:
+                    if best is None or abs(dx) + abs(dy) < abs(best[0] - x) + abs(best[1] - y):
+                        best = (x + dx, y + dy, z)
+        return best
+
+    def floor_transitions(self, z: int) -> List[Transition]:
+        """Known transitions starting on a floor."""
+        self._scan_floor(z)
+        return [t for tile, known in self.transitions.items() if tile[2] == z for t in known]
+
+    # ------------------------------------------------------------------ edges
+
+    def _refresh(self, floors: Set[int]):
+        """Recompute the edge costs of dirty floors."""
+        for z in floors:
+            self._scan_floor(z)
+        for z in sorted(floors):
+            if z in self._dirty_floors or z not in self._built:
+                self._dirty_floors.discard(z)
+                self._built.add(z)
+                self._build_edges(z)
+
+    def _build_edges(self, z: int):
+        """Walking cost from every landing on floor z to every transition tile of floor z."""
+        landings = {t.landing for known in self.transitions.values() for t in known if t.landing[2] == z}
+        for landing in landings:
+            self._edges.pop(landing, None)
+        tiles = [tile for tile in self.transitions if tile[2] == z]
+        r = self.radius
+        for tile in tiles:
+            # Distances towards the transition tile, as the planner's fields
+            near = _within(landings, tile, r)
+            area = self.planner._area(z, tile[0] - r, tile[1] - r, tile[0] + r, tile[1] + r, tile, *near)
+            targets = {area.index(l[0], l[1]) for l in near}
+            targets.discard(None)
+            distance = self.planner._dijkstra(area, area.index(tile[0], tile[1]), targets)
+            for landing in near:
+                index = area.index(landing[0], landing[1])
+                if index is not None and distance[index] >= 0:
+                    self._edges.setdefault(landing, {})[tile] = distance[index]
+        self.stats['edge_builds'] += 1
+
+    # ------------------------------------------------------------------ route
+
+    def route(self, start: Position, goal: Position) -> Optional[List[Position]]:
+        """
+        Route between floors: graph search over transitions, then one A* leg per floor.
+
+        Args:
+            start: Current position
+            goal: Destination (any floor)
+
+        Returns:
+            Tiles from start to goal, or None if no known transitions connect them
+        """
+        self.stats['routes'] += 1
+        start, goal = tuple(start), tuple(goal)
+        low, high = min(start[2], goal[2]), max(start[2], goal[2])
+        self._refresh(set(range(low - 1, high + 2)))
+
+        r = self.radius
+        tiles_from_start = _within([tile for tile in self.transitions if tile[2] == start[2]], start, r)
+        area = self.planner._area(start[2], start[0] - r, start[1] - r, start[0] + r, start[1] + r,
+                                  start, *tiles_from_start)
+        targets = {area.index(t[0], t[1]) for t in tiles_from_start}
+        targets.discard(None)
+        from_start = self.planner._dijkstra(area, area.index(start[0], start[1]), targets)
+
+        # Landings may be floor change tiles themselves (stairs on top of stairs)
+        landings = _within({t.landing for known in self.transitions.values() for t in known
+                            if t.landing[2] == goal[2]}, goal, r)
+        goal_area = self.planner._area(goal[2], goal[0] - r, goal[1] - r, goal[0] + r, goal[1] + r,
+                                       goal, *landings)
+        to_goal = self.planner._dijkstra(goal_area, goal_area.index(goal[0], goal[1]))
+
+        # Dijkstra over transitions; a node is a transition tile, reached by walking
+        best: Dict[Position, int] = {}
+        previous: Dict[Position, Optional[Position]] = {}
+        heap: List[Tuple[int, Position]] = []
+        for tile in tiles_from_start:
+            index = area.index(tile[0], tile[1])
+            if index is not None and from_start[index] >= 0:
+                best[tile] = from_start[index]
+                previous[tile] = None
+                heapq.heappush(heap, (best[tile], tile))
+
+        finish, finish_cost, finish_via = None, None, None
+        while heap:
+            cost, tile = heapq.heappop(heap)
+            if cost > best.get(tile, cost) or (finish_cost is not None and cost >= finish_cost):
+                continue
+            for transition in self.transitions.get(tile, []):
+                landing = transition.landing
+                if landing[2] == goal[2]:
+                    index = goal_area.index(landing[0], landing[1])
+                    if index is not None and to_goal[index] >= 0:
+                        total = cost + 1 + to_goal[index]
+                        if finish_cost is None or total < finish_cost:
+                            finish, finish_cost, finish_via = tile, total, transition
+                for next_tile, walk in self._edges.get(landing, {}).items():
+                    if not low - 1 <= next_tile[2] <= high + 1:
+                        continue
+                    total = cost + 1 + walk
+                    if total < best.get(next_tile, 1 << 60):
+                        best[next_tile] = total
+                        previous[next_tile] = (tile, landing)
+                        heapq.heappush(heap, (total, next_tile))
+        if finish is None:
+            return None
+
+        # Transitions used, in order, with where each lands
+        hops = [(finish, finish_via.landing)]
+        tile = finish
+        while previous[tile] is not None:
+            tile, landing = previous[tile]
+            hops.append((tile, landing))
+        hops.reverse()
+
+        route = [start]
+        current = start
+        for tile, landing in hops:
+            leg = self.planner._plan_floor(current, tile)
+            if leg is None:
+                return None
+            route.extend(leg[1:])
+            route.append(landing)
+            current = landing
+        leg = self.planner._plan_floor(current, goal)
+        if leg is None:
+            return None
+        route.extend(leg[1:])
+        return route
+
+    def get_stats(self) -> Dict:
+        """Index statistics."""
+        stats = dict(self.stats)
+        stats['transitions'] = sum(len(known) for known in self.transitions.values())
+        stats['edges'] = sum(len(edges) for edges in self._edges.values())
+        return stats
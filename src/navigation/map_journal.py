@@ -0,0 +1,302 @@
+"""
+Map Journal Module for Tibia Bot
+
+This module persists visited tiles incrementally. New tiles are appended to
+a journal of fixed 12-byte records, (x, y, z) as little endian int32. A save
+therefore writes only the tiles added since the previous save. From time to
+time the journal is folded into a snapshot in the chunked bitset format of
+``navigation.visited_grid``. This compaction runs in a background thread
+and does not touch the live grid.
+
+Files are numbered by generation::
+
+    snapshot-000003.visited   every tile journaled before generation 3
+    journal-000003.log        tiles added since (appends go here)
+
+Compacting generation N starts journal N + 1 for new appends. The thread
+then writes snapshot N + 1 from snapshot N plus journal N and deletes the
+older files. Opening the journal loads the newest complete snapshot
+(index only) and replays just the journals at or after its generation. A
+crash at any point loses at most the records that were not flushed yet,
+and replaying a record twice is harmless.
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from navigation.visited_grid import VisitedGrid
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]  # World (x, y, z)
+
+JOURNAL_MAGIC = b"TIBJRN01"
+RECORD = np.dtype("<i4")  # x, y, z per record
+RECORD_SIZE = 3 * RECORD.itemsize
+DEFAULT_DIRECTORY = os.path.join("resources", "maps", "visited")
+
+_FILE_PATTERN = re.compile(r"^(snapshot|journal)-(\d{6})\.(visited|log)$")
+
+
+class MapJournal:
+    """Visited tiles on disk: append-only journal plus compacted snapshot."""
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, compact_threshold: int = 1 << 16,
+                 durable: bool = True):
+        """
+        Initialize the MapJournal.
+
+        Args:
+            directory: Folder for the snapshot and journal files
+            compact_threshold: Journaled records that trigger a background compaction
+            durable: fsync the journal on every flush
+        """
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.durable = durable
+        self.visited = VisitedGrid()
+        self.generation = 0
+        self._pending: List[Position] = []
+        self._journaled = 0  # Records in journals not compacted yet
+        self._file = None
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self.stats = {'flushed': 0, 'replayed': 0, 'compactions': 0}
+
+    # ------------------------------------------------------------------ files
+
+    def _path(self, kind: str, generation: int) -> str:
+        extension = "visited" if kind == "snapshot" else "log"
+        return os.path.join(self.directory, f"{kind}-{generation:06d}.{extension}")
+
+    def _generations(self, kind: str) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            match = _FILE_PATTERN.match(name)
+            if match and match.group(1) == kind:
+                found.append(int(match.group(2)))
+        return sorted(found)
+
+    def _read_journal(self, generation: int, repair: bool = False) -> np.ndarray:
+        """
+        Records of one journal as an (n, 3) array.
+
+        A torn last record (crash in the middle of a write) is ignored, and cut
+        off the file when ``repair`` is set so later appends stay aligned.
+        """
+        path = self._path("journal", generation)
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(JOURNAL_MAGIC):
+            logger.warning(f"Ignoring journal without header: {path}")
+            return np.empty((0, 3), RECORD)
+        body = len(data) - len(JOURNAL_MAGIC)
+        whole = body - body % RECORD_SIZE
+        if whole != body and repair:
+            logger.warning(f"Dropping torn record at the end of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(len(JOURNAL_MAGIC) + whole)
+        return np.frombuffer(data, RECORD, count=whole // RECORD.itemsize,
+                             offset=len(JOURNAL_MAGIC)).reshape(-1, 3)
+
+    def _open_journal(self, generation: int):
+        self._file = open(self._path("journal", generation), "ab")
+        if self._file.tell() < len(JOURNAL_MAGIC):
+            # New file, or a crash while the header was being written
+            self._file.truncate(0)
+            self._file.write(JOURNAL_MAGIC)
+            self._file.flush()
+
+    def _remove_before(self, generation: int):
+        """Delete snapshots and journals already folded into snapshot ``generation``."""
+        for kind in ("snapshot", "journal"):
+            for old in self._generations(kind):
+                if old < generation:
+                    try:
+                        os.remove(self._path(kind, old))
+                    except OSError:
+                        pass  # Still mapped somewhere (Windows); removed on a later open
+
+    # ------------------------------------------------------------------ open / add / flush
+
+    def open(self) -> VisitedGrid:
+        """
+        Recover the visited tiles: newest snapshot plus the journal tail.
+
+        Returns:
+            The live grid (also ``self.visited``)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        snapshots = self._generations("snapshot")
+        base = snapshots[-1] if snapshots else 0
+        self.visited = VisitedGrid.load(self._path("snapshot", base)) if snapshots else VisitedGrid()
+        self._remove_before(base)
+
+        journals = [g for g in self._generations("journal") if g >= base]
+        self._journaled = 0
+        for generation in journals:
+            records = self._read_journal(generation, repair=generation == journals[-1])
+            self._replay(records)
+            self._journaled += len(records)
+            self.stats['replayed'] += len(records)
+        self.generation = journals[-1] if journals else base
+        self._open_journal(self.generation)
+        logger.info(f"Map journal opened: {len(self.visited)} tiles, {self._journaled} replayed from the journal")
+        return self.visited
+
+    def _replay(self, records: np.ndarray):
+        for x, y, z in records.tolist():
+            self.visited.add((x, y, z))
+
+    def add(self, position: Position) -> bool:
+        """
+        Mark a tile visited; new tiles are journaled on the next flush.
+
+        Returns:
+            True if the tile was not visited before
+        """
+        position = tuple(position)
+        if not self.visited.add(position):
+            return False
+        self._pending.append(position)
+        return True
+
+    def update(self, positions) -> int:
+        """Add many tiles. Returns how many were new."""
+        return sum(self.add(position) for position in positions)
+
+    def flush(self) -> int:
+        """
+        Append the pending tiles to the journal. Compacts in the background
+        once the journal holds ``compact_threshold`` records.
+
+        Returns:
+            Number of records written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                if self._file is None:
+                    self._open_journal(self.generation)
+                self._file.write(np.asarray(pending, RECORD).tobytes())
+                self._file.flush()
+                if self.durable:
+                    os.fsync(self._file.fileno())
+                self._journaled += len(pending)
+                self.stats['flushed'] += len(pending)
+        if self._journaled >= self.compact_threshold:
+            self.compact()
+        return len(pending)
+
+    # ------------------------------------------------------------------ compaction
+
+    def compact(self, wait: bool = False) -> bool:
+        """
+        Fold the journal into a new snapshot in a background thread.
+
+        Args:
+            wait: Block until the compaction is done
+
+        Returns:
+            False if a compaction was already running
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            if wait:
+                self._compactor.join()
+            return False
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            # Appends go to the next journal while this one is folded
+            sealed = self.generation
+            self.generation += 1
+            self._open_journal(self.generation)
+            self._journaled = 0
+        self._compactor = threading.Thread(target=self._compact, args=(sealed,), daemon=True,
+                                           name="map-journal-compactor")
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+        return True
+
+    def _compact(self, sealed: int):
+        """Write snapshot ``sealed + 1``: the previous snapshot plus every journal up to ``sealed``."""
+        try:
+            snapshots = [g for g in self._generations("snapshot") if g <= sealed]
+            base = snapshots[-1] if snapshots else 0
+            grid = VisitedGrid.load(self._path("snapshot", base)) if snapshots else VisitedGrid()
+            folded = 0
+            for generation in self._generations("journal"):
+                if base <= generation <= sealed:
+                    for x, y, z in self._read_journal(generation).tolist():
+                        grid.add((x, y, z))
+                        folded += 1
+            grid.save(self._path("snapshot", sealed + 1))
+            del grid  # Release the mapping of the old snapshot before deleting it
+            self._remove_before(sealed + 1)
+            self.stats['compactions'] += 1
+            logger.info(f"Map journal compacted: {folded} records into snapshot {sealed + 1}")
+        except Exception as e:
+            # The journals stay on disk, so nothing is lost; the next compaction retries
+            logger.error(f"Map journal compaction failed: {e}")
+
+    def replace(self, grid: VisitedGrid):
+        """
+        Make ``grid`` the whole visited map (e.g. a loaded map file).
+
+        Writes it as a new snapshot; earlier snapshots and journals are dropped.
+        """
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._pending = []
+            self.generation += 1
+            grid.save(self._path("snapshot", self.generation))
+            self._remove_before(self.generation)
+            self._open_journal(self.generation)
+            self._journaled = 0
+            self.visited = grid
+
+    def merge(self, grid: VisitedGrid) -> int:
+        """
+        Union another map (e.g. one shared by another player) into this one.
+
+        The union is written as a new snapshot instead of one journal record
+        per tile, since a shared map can hold millions of tiles.
+
+        Returns:
+            Number of tiles that were new
+        """
+        added = self.visited.merge(grid)
+        if added:
+            self.replace(self.visited)
+        return added
+
+    def close(self):
+        """Flush pending tiles and wait for a running compaction."""
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> dict:
+        """Journal statistics."""
+        stats = dict(self.stats)
+        stats['tiles'] = len(self.visited)
+        stats['generation'] = self.generation
+        stats['journaled'] = self._journaled
+        stats['pending'] = len(self._pending)
+        return stats
@@ -0,0 +1,217 @@
+"""
+Map Merge Module for Tibia Bot
+
+This module merges map files shared between players into one set of
+visited tiles. It accepts:
+
+- compact ``.visited`` grids (``navigation.visited_grid``);
+- JSON map files that point to a ``.visited`` file (``visited_file``);
+- legacy JSON files with the tiles inline (``visited_positions``,
+  ``positions`` or ``visited_coordinates``).
+
+JSON is scanned in fixed-size blocks instead of being parsed whole, so
+memory is bounded by the bitset of the merged map, not by the size of the
+input files. Duplicate tiles disappear in the bitset union. With many
+inputs, the JSON files are parsed in a process pool and each worker sends
+back its grid in the compact format.
+"""
+
+import os
+import re
+import time
+import logging
+import multiprocessing
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from navigation.visited_grid import VisitedGrid
+
+logger = logging.getLogger(__name__)
+
+VISITED_KEYS = ("visited_positions", "positions", "visited_coordinates")
+HISTORY_KEY = "position_history"
+BLOCK_SIZE = 1 << 20
+
+_LIST_START = re.compile(r'"(%s)"\s*:\s*\[' % "|".join(VISITED_KEYS + (HISTORY_KEY,)))
+_VISITED_FILE = re.compile(r'"visited_file"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_TUPLE = re.compile(r'\s*,?\s*\[\s*(-?\d+)\s*,\s*(-?\d+)\s*(?:,\s*(-?\d+)\s*)?\]')
+_LIST_END = re.compile(r'\s*\]')
+_KEEP = 256  # Tail kept between blocks so a key split across two blocks is still found
+
+
+@dataclass
+class MergeReport:
+    """What a merge read and kept."""
+    files: int = 0
+    tiles_read: int = 0     # Distinct tiles of each input, summed over the inputs
+    tiles: int = 0          # Tiles the merge added
+    failed: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def duplicates(self) -> int:
+        return self.tiles_read - self.tiles
+
+
+def _scan_json(path: str, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[str, tuple]]:
+    """
+    Stream the position lists of a JSON map file.
+
+    Yields:
+        (key, tuple) for every [x, y] or [x, y, z] entry of a known list, and
+        ("visited_file", (name,)) for a reference to a compact grid
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        key = None  # List being read
+        eof = False
+        while True:
+            if key is None:
+                start = _LIST_START.search(buffer)
+                limit = start.start() if start is not None else len(buffer)
+                last = None
+                for last in _VISITED_FILE.finditer(buffer, 0, limit):
+                    yield "visited_file", (last.group(1),)
+                if start is not None:
+                    key = start.group(1)
+                    buffer = buffer[start.end():]
+                    continue
+                if eof:
+                    return
+                # Keep the tail in case a key is split across blocks, but never a match already seen
+                buffer = buffer[max(len(buffer) - _KEEP, last.end() if last is not None else 0):]
+            else:
+                position = 0
+                while True:
+                    match = _TUPLE.match(buffer, position)
+                    if match is None:
+                        break
+                    x, y, z = match.groups()
+                    yield key, (int(x), int(y)) if z is None else (int(x), int(y), int(z))
+                    position = match.end()
+                buffer = buffer[position:]
+                end = _LIST_END.match(buffer)
+                if end is not None:
+                    key = None
+                    buffer = buffer[end.end():]
+                    continue
+                if eof:
+                    return
+                if len(buffer) > _KEEP:
+                    # Longer than any entry and still no match: not a list of positions
+                    key = None
+                    continue
+            block = f.read(block_size)
+            if not block:
+                eof = True
+            buffer += block
+
+
+def read_map_file(path: str, default_floor: int = 7, history: Optional[list] = None) -> VisitedGrid:
+    """
+    Read one map file in any supported format.
+
+    Args:
+        path: ``.visited`` grid or JSON map file
+        default_floor: Floor for legacy (x, y) entries, which were saved without one
+        history: If given, the file's position history is appended to it
+
+    Returns:
+        Visited tiles of the file (a compact grid is mapped, not read)
+
+    Raises:
+        ValueError: If the file is not a map file or holds no visited tiles
+    """
+    if VisitedGrid.is_grid_file(path):
+        return VisitedGrid.load(path)
+    grid = VisitedGrid()
+    found = False
+    for key, value in _scan_json(path):
+        if key == "visited_file":
+            grid.merge(VisitedGrid.load(os.path.join(os.path.dirname(path), value[0])))
+            found = True
+        elif key == HISTORY_KEY:
+            if history is not None:
+                history.append(value)
+        else:
+            grid.add(value if len(value) == 3 else (value[0], value[1], default_floor))
+            found = True
+    if not found:
+        raise ValueError(f"No visited tiles in {path}")
+    return grid
+
+
+def _read_packed(args: Tuple[str, int]) -> Tuple[str, Optional[bytes], int]:
+    """Pool worker: one file as (path, grid bytes or None, tiles read)."""
+    path, default_floor = args
+    try:
+        grid = read_map_file(path, default_floor)
+        return path, grid.to_bytes(), len(grid)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return path, None, 0
+
+
+def merge_map_files(paths: Sequence[str], into: Optional[VisitedGrid] = None, default_floor: int = 7,
+                    processes: Optional[int] = None, parallel_threshold: int = 4) -> Tuple[VisitedGrid, MergeReport]:
+    """
+    Union any number of map files.
+
+    Args:
+        paths: Map files (compact or JSON)
+        into: Grid to merge into (a new one if None)
+        default_floor: Floor for legacy (x, y) entries
+        processes: Pool size (None: one per CPU, 1: no pool)
+        parallel_threshold: Fewest JSON inputs that are worth a pool
+
+    Returns:
+        (merged grid, report)
+    """
+    start = time.perf_counter()
+    grid = into if into is not None else VisitedGrid()
+    report = MergeReport(files=len(paths))
+    before = len(grid)
+
+    # Compact grids are only ORed chunk by chunk: no parsing to spread over processes
+    compact = [p for p in paths if VisitedGrid.is_grid_file(p)]
+    json_files = [p for p in paths if p not in compact]
+    if processes != 1 and len(json_files) >= parallel_threshold:
+        serial = compact
+    else:
+        serial, json_files = compact + json_files, []
+    for path in serial:
+        try:
+            source = read_map_file(path, default_floor)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read {path}: {e}")
+            report.failed.append(path)
+            continue
+        report.tiles_read += len(source)
+        grid.merge(source)
+
+    if json_files:
+        with multiprocessing.Pool(processes) as pool:
+            for path, data, tiles in pool.imap_unordered(_read_packed, [(p, default_floor) for p in json_files]):
+                if data is None:
+                    report.failed.append(path)
+                    continue
+                report.tiles_read += tiles
+                grid.merge(VisitedGrid.from_bytes(data))
+
+    report.tiles = len(grid) - before
+    report.elapsed = time.perf_counter() - start
+    logger.info(f"Merged {report.files} map files: {report.tiles_read} tiles read, {report.tiles} new")
+    return grid, report
+
+
+def find_map_files(paths: Iterable[str]) -> List[str]:
+    """Expand directories into the map files they hold (``.json`` and ``.visited``)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith((".json", ".visited")):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
@@ -0,0 +1,464 @@
+"""
+Minimap Atlas Module for Tibia Bot
+
+This module provides the persistent world map the minimap is registered
+against and stitched into. Tiles are stored as minimap palette indices
+(Tibia draws the minimap with the 6x6x6 color cube, so one byte per tile
+is lossless; 0 is black, i.e. unexplored).
+
+Each floor is one memory-mapped file split into fixed-size chunks of
+``CHUNK_SIZE`` x ``CHUNK_SIZE`` tiles in world coordinates. Chunks are
+allocated the first time a tile in them is written, and a small
+append-only index file records which chunks exist. Opening a floor only
+reads that index; a chunk is mapped the first time it is read or
+written, and writes go straight to the mapped pages, so saving flushes
+the touched chunks instead of rewriting the map.
+
+Storage layout (``resources/maps/atlas`` by default)::
+
+    floor-07.map   magic (8 bytes) | chunk size (u4) | padding to 64 | chunks ...
+    floor-07.idx   (chunk x, chunk y, slot) as 3 x i4 per allocated chunk
+
+Per-floor minimap exports placed in ``resources/maps`` (``floor-07-map.png``,
+top-left pixel at world (31744, 30976)) are imported once into the atlas.
+"""
+
+import os
+import re
+import struct
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# World position of the top-left pixel of the standard floor exports
+DEFAULT_ORIGIN = (31744, 30976)
+GROUND_FLOOR = 7
+
+CHUNK_SIZE = 256
+ATLAS_DIRNAME = "atlas"
+MAGIC = b"TIBMAP01"
+HEADER = struct.Struct("<8sI")
+HEADER_SIZE = 64
+INDEX_RECORD = np.dtype([("cx", "<i4"), ("cy", "<i4"), ("slot", "<i4")])
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+ChunkKey = Tuple[int, int]  # (x // chunk size, y // chunk size)
+
+_FLOOR_FILE = re.compile(r"floor[-_]?(\d{1,2})", re.IGNORECASE)
+
+# Minimap palette: index = r * 36 + g * 6 + b with every channel a multiple of 51
+PALETTE_STEP = 51
+_LEVEL_LUT = ((np.arange(256) + PALETTE_STEP // 2) // PALETTE_STEP).astype(np.uint8)
+PALETTE = np.array([((i % 6) * PALETTE_STEP, (i // 6 % 6) * PALETTE_STEP, (i // 36) * PALETTE_STEP)
+                    for i in range(216)], np.uint8)  # BGR
+GRAY_LUT = np.zeros(256, np.uint8)
+GRAY_LUT[:216] = cv2.cvtColor(PALETTE[None], cv2.COLOR_BGR2GRAY)[0]
+
+
+def color_indices(image: np.ndarray) -> np.ndarray:
+    """
+    Minimap palette index of every pixel.
+
+    Args:
+        image: BGR (or grayscale) image
+
+    Returns:
+        uint8 array of palette indices (0 = black / unexplored)
+    """
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    levels = _LEVEL_LUT[image[..., :3]]
+    return levels[..., 2] * 36 + levels[..., 1] * 6 + levels[..., 0]
+
+
+class FloorStore:
+    """One floor of the atlas: lazily allocated, memory-mapped chunks."""
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Open (or prepare) a floor file. Only the chunk index is read.
+
+        Args:
+            path: ``.map`` file path (the index is the ``.idx`` file next to it)
+            chunk_size: Chunk side in tiles for a new file (existing files keep theirs)
+
+        Raises:
+            ValueError: If the file is not an atlas floor
+        """
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        self.chunk_size = chunk_size
+        self.revision = 0  # Bumped on every write that changes a tile
+        self._slots: Dict[ChunkKey, int] = {}
+        self._chunks: Dict[ChunkKey, np.memmap] = {}
+        self._dirty: Set[ChunkKey] = set()
+        if os.path.exists(path):
+            self._open()
+
+    @property
+    def chunk_bytes(self) -> int:
+        return self.chunk_size * self.chunk_size
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            magic, chunk_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not an atlas floor: {self.path}")
+        self.chunk_size = chunk_size
+        if not os.path.exists(self.index_path):
+            return
+        # A record cut short by a crash is dropped (later records must stay aligned),
+        # and a record whose chunk the map file never got is ignored
+        data = np.fromfile(self.index_path, dtype=np.uint8)
+        whole = len(data) - len(data) % INDEX_RECORD.itemsize
+        if whole != len(data):
+            with open(self.index_path, "r+b") as f:
+                f.truncate(whole)
+        records = data[:whole].view(INDEX_RECORD)
+        slots = (os.path.getsize(self.path) - HEADER_SIZE) // self.chunk_bytes
+        for cx, cy, slot in records.tolist():
+            if slot < slots:
+                self._slots[(cx, cy)] = slot
+
+    def chunk_keys(self) -> List[ChunkKey]:
+        """Allocated chunks as (chunk x, chunk y)."""
+        return list(self._slots)
+
+    def has_chunk(self, cx: int, cy: int) -> bool:
+        return (cx, cy) in self._slots
+
+    def chunk(self, cx: int, cy: int, create: bool = False) -> Optional[np.memmap]:
+        """
+        Mapped chunk (chunk_size x chunk_size palette indices).
+
+        Args:
+            cx, cy: Chunk coordinates (world tile // chunk_size)
+            create: Allocate the chunk if it does not exist yet
+
+        Returns:
+            Writable view of the chunk, or None if it does not exist
+        """
+        key = (cx, cy)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            return chunk
+        slot = self._slots.get(key)
+        if slot is None:
+            if not create:
+                return None
+            slot = self._allocate(key)
+        chunk = np.memmap(self.path, dtype=np.uint8, mode="r+", offset=HEADER_SIZE + slot * self.chunk_bytes,
+                          shape=(self.chunk_size, self.chunk_size))
+        self._chunks[key] = chunk
+        return chunk
+
+    def _allocate(self, key: ChunkKey) -> int:
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, self.chunk_size).ljust(HEADER_SIZE, b"\0"))
+        # Appended rather than truncated: other chunks of the file may be mapped.
+        # A chunk left without an index record by a crash is skipped, not reused.
+        with open(self.path, "ab") as f:
+            f.seek(0, os.SEEK_END)
+            slot = -(-(f.tell() - HEADER_SIZE) // self.chunk_bytes)
+            f.write(bytes(HEADER_SIZE + (slot + 1) * self.chunk_bytes - f.tell()))
+        # Written after the chunk exists: an index entry never points past the file
+        with open(self.index_path, "ab") as f:
+            f.write(np.array([(key[0], key[1], slot)], INDEX_RECORD).tobytes())
+        self._slots[key] = slot
+        return slot
+
+    def _chunk_range(self, x: int, y: int, width: int, height: int):
+        """Chunks overlapping a world rectangle, with the overlap in world coordinates."""
+        size = self.chunk_size
+        for cy in range(y // size, (y + height - 1) // size + 1):
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                x0, y0 = max(x, cx * size), max(y, cy * size)
+                x1, y1 = min(x + width, (cx + 1) * size), min(y + height, (cy + 1) * size)
+                yield cx, cy, x0, y0, x1, y1
+
+    def read(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """
+        Palette indices of a world rectangle (0 where no chunk exists).
+
+        Args:
+            x, y: World position of the top-left tile
+            width, height: Size in tiles
+
+        Returns:
+            (height, width) uint8 array
+        """
+        out = np.zeros((height, width), np.uint8)
+        if width <= 0 or height <= 0:
+            return out
+        size = self.chunk_size
+        for cx, cy, x0, y0, x1, y1 in self._chunk_range(x, y, width, height):
+            chunk = self.chunk(cx, cy)
+            if chunk is not None:
+                out[y0 - y:y1 - y, x0 - x:x1 - x] = chunk[y0 - cy * size:y1 - cy * size,
+                                                          x0 - cx * size:x1 - cx * size]
+        return out
+
+    def write(self, x: int, y: int, values: np.ndarray, mask: Optional[np.ndarray] = None) -> Set[ChunkKey]:
+        """
+        Write palette indices at a world position.
+
+        Args:
+            x, y: World position of the top-left tile
+            values: (height, width) palette indices
+            mask: Tiles to write (default: every non-zero value; unexplored never overwrites)
+
+        Returns:
+            Chunks in which at least one tile changed
+        """
+        if mask is None:
+            mask = values != 0
+        changed: Set[ChunkKey] = set()
+        height, width = values.shape
+        size = self.chunk_size
+        for cx, cy, x0, y0, x1, y1 in self._chunk_range(x, y, width, height):
+            source = values[y0 - y:y1 - y, x0 - x:x1 - x]
+            selected = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+            if not selected.any():
+                continue
+            chunk = self.chunk(cx, cy, create=True)
+            target = chunk[y0 - cy * size:y1 - cy * size, x0 - cx * size:x1 - cx * size]
+            selected = selected & (target != source)
+            if selected.any():
+                target[selected] = source[selected]
+                changed.add((cx, cy))
+        if changed:
+            self._dirty |= changed
+            self.revision += 1
+        return changed
+
+    def extent(self) -> Optional[Region]:
+        """World rectangle covered by the allocated chunks."""
+        if not self._slots:
+            return None
+        keys = np.array(list(self._slots))
+        (cx0, cy0), (cx1, cy1) = keys.min(axis=0), keys.max(axis=0) + 1
+        size = self.chunk_size
+        return int(cx0 * size), int(cy0 * size), int((cx1 - cx0) * size), int((cy1 - cy0) * size)
+
+    def flush(self) -> int:
+        """Write changed chunks to disk. Returns the number flushed."""
+        dirty = self._dirty
+        self._dirty = set()
+        for key in dirty:
+            self._chunks[key].flush()
+        return len(dirty)
+
+    def close(self):
+        """Flush and unmap every chunk."""
+        self.flush()
+        self._chunks.clear()
+
+
+class MinimapAtlas:
+    """
+    Persistent per-floor world map in minimap palette indices.
+
+    ``patch`` returns grayscale (palette gray) for the tracker's
+    correlation, ``colors`` the raw indices.
+    """
+
+    def __init__(self, directory: str = "resources/maps", origin: Tuple[int, int] = DEFAULT_ORIGIN,
+                 storage: Optional[str] = None, chunk_size: int = CHUNK_SIZE):
+        """
+        Initialize the MinimapAtlas.
+
+        Args:
+            directory: Directory with per-floor minimap exports (``floor-ZZ*.png``)
+            origin: World (x, y) of every export's top-left pixel
+            storage: Atlas directory (``<directory>/atlas`` by default)
+            chunk_size: Chunk side in tiles for new floor files
+        """
+        self.directory = directory
+        self.origin = origin
+        self.storage = storage or os.path.join(directory, ATLAS_DIRNAME)
+        self.chunk_size = chunk_size
+        self.floors: Dict[int, FloorStore] = {}
+        self._images: Dict[int, Tuple[int, np.ndarray]] = {}
+        self._listeners: List[Callable[[int, Set[ChunkKey]], None]] = []
+        self.load()
+
+    def on_change(self, callback: Callable[[int, Set[ChunkKey]], None]):
+        """Register a listener called with (floor, changed chunk keys) after every write."""
+        self._listeners.append(callback)
+
+    def _changed(self, z: int, chunks: Set[ChunkKey]):
+        if not chunks:
+            return
+        for callback in self._listeners:
+            try:
+                callback(z, chunks)
+            except Exception as e:
+                logger.error(f"Error in atlas listener: {e}")
+
+    def load(self) -> int:
+        """
+        Open the stored floors and import exports of floors not stored yet.
+
+        Returns:
+            Number of floors with map data
+        """
+        if os.path.isdir(self.storage):
+            for filename in sorted(os.listdir(self.storage)):
+                match = _FLOOR_FILE.search(filename)
+                if match is None or not filename.endswith(".map"):
+                    continue
+                try:
+                    self.floors[int(match.group(1))] = FloorStore(os.path.join(self.storage, filename))
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning(f"Could not open atlas floor {filename}: {e}")
+
+        if os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                match = _FLOOR_FILE.search(filename)
+                if match is None or not filename.lower().endswith(".png"):
+                    continue
+                z = int(match.group(1))
+                if self.has_floor(z):
+                    continue
+                image = cv2.imread(os.path.join(self.directory, filename), cv2.IMREAD_COLOR)
+                if image is not None:
+                    tiles = self.import_image(z, image)
+                    self._store(z).flush()
+                    logger.info(f"Imported {filename} into the atlas ({tiles} tiles)")
+
+        floors = [z for z in self.floors if self.has_floor(z)]
+        logger.info(f"Loaded {len(floors)} map floors from {self.storage}")
+        return len(floors)
+
+    def _store(self, z: int) -> FloorStore:
+        store = self.floors.get(z)
+        if store is None:
+            store = FloorStore(os.path.join(self.storage, f"floor-{z:02d}.map"), self.chunk_size)
+            self.floors[z] = store
+        return store
+
+    def import_image(self, z: int, image: np.ndarray, origin: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Write a whole floor image (one pixel per tile) into the atlas.
+
+        Args:
+            z: Floor
+            image: BGR (or grayscale) floor image
+            origin: World (x, y) of its top-left pixel (the export origin by default)
+
+        Returns:
+            Number of explored tiles in the image
+        """
+        indices = color_indices(image)
+        x, y = origin or self.origin
+        self._changed(z, self._store(z).write(x, y, indices))
+        return int(np.count_nonzero(indices))
+
+    def add_floor(self, z: int, image: np.ndarray):
+        """Add one floor export (BGR or grayscale) at the export origin."""
+        self.import_image(z, image)
+
+    def stitch(self, z: int, x: int, y: int, minimap: np.ndarray, scale: int = 1) -> int:
+        """
+        Write a minimap crop centered on the character at (x, y, z).
+
+        Args:
+            z: Floor
+            x, y: Character world position (the minimap center)
+            minimap: BGR minimap crop
+            scale: Minimap pixels per tile
+
+        Returns:
+            Number of chunks changed
+        """
+        if scale > 1:
+            minimap = cv2.resize(minimap, (minimap.shape[1] // scale, minimap.shape[0] // scale),
+                                 interpolation=cv2.INTER_NEAREST)
+        indices = color_indices(minimap)
+        height, width = indices.shape
+        cy, cx = height // 2, width // 2
+        mask = indices != 0
+        # The character marker is not map
+        mask[max(cy - 1, 0):cy + 2, max(cx - 1, 0):cx + 2] = False
+        changed = self._store(z).write(x - cx, y - cy, indices, mask)
+        self._changed(z, changed)
+        return len(changed)
+
+    def has_floor(self, z: int) -> bool:
+        store = self.floors.get(z)
+        return store is not None and len(store) > 0
+
+    def floor_numbers(self) -> List[int]:
+        """Floors with map data, closest to the ground floor first."""
+        return sorted((z for z in self.floors if self.has_floor(z)), key=lambda z: (abs(z - GROUND_FLOOR), z))
+
+    def floor_extent(self, z: int) -> Optional[Region]:
+        """World rectangle covered by a floor's chunks."""
+        store = self.floors.get(z)
+        return store.extent() if store is not None else None
+
+    def floor_image(self, z: int) -> Optional[np.ndarray]:
+        """
+        Whole grayscale floor over ``floor_extent`` (pixel (0, 0) is its top-left tile).
+
+        Assembled from every chunk, so only for full-floor searches; the image
+        is kept until the floor changes.
+        """
+        store = self.floors.get(z)
+        extent = self.floor_extent(z)
+        if store is None or extent is None:
+            return None
+        cached = self._images.get(z)
+        if cached is not None and cached[0] == store.revision:
+            return cached[1]
+        image = GRAY_LUT[store.read(*extent)]
+        self._images[z] = (store.revision, image)
+        return image
+
+    def colors(self, z: int, x: int, y: int, width: int, height: int) -> Optional[np.ndarray]:
+        """
+        Palette indices of a world rectangle.
+
+        Returns:
+            (height, width) uint8 array (0 where unexplored), or None if the floor is unknown
+        """
+        store = self.floors.get(z)
+        if store is None or len(store) == 0:
+            return None
+        return store.read(x, y, width, height)
+
+    def patch(self, z: int, x: int, y: int, width: int, height: int) -> Optional[np.ndarray]:
+        """
+        Grayscale map patch in world coordinates.
+
+        Args:
+            z: Floor
+            x: World x of the patch's left column
+            y: World y of the patch's top row
+            width: Patch width in tiles
+            height: Patch height in tiles
+
+        Returns:
+            (height, width) uint8 patch (0 where unexplored), or None if the floor is unknown
+        """
+        indices = self.colors(z, x, y, width, height)
+        return GRAY_LUT[indices] if indices is not None else None
+
+    def flush(self) -> int:
+        """Write changed chunks of every floor to disk. Returns the number flushed."""
+        return sum(store.flush() for store in self.floors.values())
+
+    def close(self):
+        """Flush and unmap every floor."""
+        for store in self.floors.values():
+            store.close()
+        self._images.clear()
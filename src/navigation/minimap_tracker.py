@@ -0,0 +1,330 @@
+"""
+Minimap Tracker Module for Tibia Bot
+
+This module finds the character's world position (x, y, z) by registering
+the live minimap against the stored map atlas. The minimap is centered on
+the character, so a small grayscale patch around its center is phase
+correlated with the atlas patch around the last fix: one FFT-sized
+correlation per update recovers the shift the character walked. A fix is
+only accepted if the shifted atlas patch agrees with the minimap pixel by
+pixel; otherwise a few neighbouring windows, the floors above and below
+and finally a full-floor search are tried. Every registered minimap is
+stitched back into the atlas, so the map grows as the character explores.
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from capture.frame import Frame
+from navigation.minimap_atlas import GRAY_LUT, GROUND_FLOOR, MinimapAtlas, color_indices
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height)
+
+# Where a map recorded from scratch starts (there is no absolute reference yet)
+START_POSITION = (32000, 32000, GROUND_FLOOR)
+
+
+@dataclass
+class PositionFix:
+    """One registered position."""
+    x: int
+    y: int
+    z: int
+    agreement: float      # Fraction of explored minimap pixels that match the atlas
+    method: str           # "local", "window", "floor", "global" or "seed"
+    elapsed_ms: float = 0.0
+
+    @property
+    def position(self) -> Tuple[int, int, int]:
+        return (self.x, self.y, self.z)
+
+
+class MinimapTracker:
+    """
+    Track the character position from the minimap.
+
+    ``update`` is the per-frame call; it keeps the last fix and only
+    searches around it, so an update costs a couple of small phase
+    correlations.
+    """
+
+    def __init__(self, atlas: MinimapAtlas, minimap_region: Optional[Region] = None,
+                 scale: int = 1, patch_size: int = 64, search_radius: int = 32,
+                 min_agreement: float = 0.8, tolerance: int = 6, start_floor: int = GROUND_FLOOR,
+                 record: bool = True):
+        """
+        Initialize the MinimapTracker.
+
+        Args:
+            atlas: Stored world map
+            minimap_region: Minimap widget in screen coordinates
+            scale: Minimap pixels per tile (zoom)
+            patch_size: Side of the correlated patch, in tiles
+            search_radius: How far (tiles) from the last fix the local search looks
+            min_agreement: Min fraction of matching explored pixels to accept a fix
+            tolerance: Max gray difference of two matching pixels
+            start_floor: Floor searched first when there is no fix yet
+            record: Stitch every registered minimap into the atlas
+        """
+        self.atlas = atlas
+        self.minimap_region = minimap_region
+        self.scale = max(1, scale)
+        self.patch_size = patch_size
+        self.search_radius = search_radius
+        self.min_agreement = min_agreement
+        self.tolerance = tolerance
+        self.start_floor = start_floor
+        self.record = record
+        self.last_fix: Optional[PositionFix] = None
+        self._window: Optional[np.ndarray] = None
+        self.stats = {'updates': 0, 'local': 0, 'window': 0, 'floor': 0, 'global': 0, 'seed': 0, 'lost': 0,
+                      'stitched_chunks': 0}
+
+    @property
+    def position(self) -> Optional[Tuple[int, int, int]]:
+        return self.last_fix.position if self.last_fix is not None else None
+
+    def set_minimap_region(self, x: int, y: int, width: int, height: int):
+        """Minimap widget in screen coordinates."""
+        self.minimap_region = (x, y, width, height)
+
+    def set_position(self, x: int, y: int, z: int):
+        """Seed the tracker with a known position (skips the first global search)."""
+        self.last_fix = PositionFix(x, y, z, 1.0, "manual")
+
+    def reset(self):
+        """Forget the last fix."""
+        self.last_fix = None
+
+    def update(self, frame: Union[Frame, np.ndarray]) -> Optional[PositionFix]:
+        """
+        Register the minimap of a new frame.
+
+        Args:
+            frame: Current frame (or full BGR screenshot)
+
+        Returns:
+            New PositionFix, or None if the minimap could not be registered
+        """
+        if self.minimap_region is None:
+            return None
+        if not isinstance(frame, Frame):
+            frame = Frame(frame.view())  # Read-only view, the caller's array stays writable
+        x, y, w, h = self.minimap_region
+        minimap = frame.crop(x, y, w, h)
+        if minimap is None:
+            return None
+
+        fix = self._seed() if self.record else None
+        if fix is None:
+            fix = self.locate(minimap)
+        if fix is not None and self.record:
+            self.stats['stitched_chunks'] += self.atlas.stitch(fix.z, fix.x, fix.y, minimap, self.scale)
+        return fix
+
+    def _seed(self) -> Optional[PositionFix]:
+        """Accept a seeded position as is while the atlas has nothing around it."""
+        last = self.last_fix
+        if last is None or last.method != "manual":
+            return None
+        half = self.patch_size // 2
+        around = self.atlas.colors(last.z, last.x - half, last.y - half, self.patch_size, self.patch_size)
+        if around is not None and around.any():
+            return None
+        self.stats['seed'] += 1
+        self.last_fix = PositionFix(last.x, last.y, last.z, 1.0, "seed")
+        return self.last_fix
+
+    def locate(self, minimap: np.ndarray) -> Optional[PositionFix]:
+        """
+        Register one minimap image.
+
+        Args:
+            minimap: Minimap crop (grayscale or BGR), centered on the character
+
+        Returns:
+            New PositionFix, or None if it could not be registered
+        """
+        start = time.perf_counter()
+        self.stats['updates'] += 1
+        probe = self._probe(minimap)
+        if probe is None:
+            return None
+
+        fix = None
+        last = self.last_fix
+        if last is not None:
+            fix = self._search_local(probe, last.x, last.y, last.z)
+            if fix is None:
+                for dz in (-1, 1):
+                    candidate = self._register(probe, last.x, last.y, last.z + dz, "floor")
+                    if candidate is not None:
+                        fix = candidate
+                        break
+        if fix is None:
+            fix = self.relocate(probe)
+
+        if fix is None:
+            self.stats['lost'] += 1
+            return None
+        fix.elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.stats[fix.method] += 1
+        self.last_fix = fix
+        return fix
+
+    def relocate(self, probe: np.ndarray, floors: Optional[List[int]] = None) -> Optional[PositionFix]:
+        """
+        Search whole floors for the probe (slow; only when there is no usable fix).
+
+        Args:
+            probe: Probe patch from ``_probe``
+            floors: Floors to search (last/start floor first by default)
+
+        Returns:
+            PositionFix, or None if no floor matches
+        """
+        if floors is None:
+            first = self.last_fix.z if self.last_fix is not None else self.start_floor
+            floors = sorted(self.atlas.floor_numbers(), key=lambda z: (z != first, abs(z - first)))
+        size = probe.shape[0]
+        half = size // 2
+        for z in floors:
+            image = self.atlas.floor_image(z)
+            if image is None or image.shape[0] < size or image.shape[1] < size:
+                continue
+            result = cv2.matchTemplate(image, probe.astype(np.uint8), cv2.TM_SQDIFF)
+            _, _, (px, py), _ = cv2.minMaxLoc(result)
+            x0, y0, _, _ = self.atlas.floor_extent(z)
+            fix = self._verify(probe, x0 + px + half, y0 + py + half, z, "global")
+            if fix is not None:
+                return fix
+        return None
+
+    # ---------------------------------------------------------------- internals
+
+    def _probe(self, minimap: np.ndarray) -> Optional[np.ndarray]:
+        """Square grayscale patch around the minimap center, one pixel per tile."""
+        if minimap.ndim == 3:
+            # Same gray as the atlas: through the minimap palette
+            minimap = GRAY_LUT[color_indices(minimap)]
+        if self.scale > 1:
+            minimap = cv2.resize(minimap, (minimap.shape[1] // self.scale, minimap.shape[0] // self.scale),
+                                 interpolation=cv2.INTER_NEAREST)
+        size = min(self.patch_size, minimap.shape[0], minimap.shape[1]) & ~1
+        if size < 8:
+            return None
+        cy, cx = minimap.shape[0] // 2, minimap.shape[1] // 2
+        return minimap[cy - size // 2:cy + size // 2, cx - size // 2:cx + size // 2].astype(np.float32)
+
+    def _search_local(self, probe: np.ndarray, x: int, y: int, z: int) -> Optional[PositionFix]:
+        fix = self._register(probe, x, y, z, "local")
+        if fix is not None:
+            return fix
+        # Phase correlation only sees shifts up to half a patch: try windows around the fix
+        step = probe.shape[0] // 2
+        for dy in range(-self.search_radius, self.search_radius + 1, step):
+            for dx in range(-self.search_radius, self.search_radius + 1, step):
+                if dx == 0 and dy == 0:
+                    continue
+                fix = self._register(probe, x + dx, y + dy, z, "window")
+                if fix is not None:
+                    return fix
+        return None
+
+    def _register(self, probe: np.ndarray, x: int, y: int, z: int, method: str) -> Optional[PositionFix]:
+        """Phase correlate the probe with the atlas patch centered on (x, y, z)."""
+        size = probe.shape[0]
+        half = size // 2
+        reference = self.atlas.patch(z, x - half, y - half, size, size)
+        if reference is None or not reference.any():
+            return None
+        if self._window is None or self._window.shape != probe.shape:
+            self._window = cv2.createHanningWindow((size, size), cv2.CV_32F)
+        # phaseCorrelate applies the window in place: never hand it the probe itself
+        (sx, sy), _ = cv2.phaseCorrelate(reference.astype(np.float32), probe.copy(), self._window)
+        # The probe is the reference shifted by (last fix - true position)
+        x, y = x - int(round(sx)), y - int(round(sy))
+        # Sub-tile peaks round either way: keep the best of the neighbouring tiles
+        around = self.atlas.patch(z, x - half - 1, y - half - 1, size + 2, size + 2)
+        best = None
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                agreement = self._agreement(probe, around[1 + dy:1 + dy + size, 1 + dx:1 + dx + size])
+                if agreement is not None and (best is None or agreement > best[0]):
+                    best = (agreement, x + dx, y + dy)
+        if best is None:
+            return None
+        return PositionFix(int(best[1]), int(best[2]), int(z), float(best[0]), method)
+
+    def _verify(self, probe: np.ndarray, x: int, y: int, z: int, method: str) -> Optional[PositionFix]:
+        """Accept (x, y, z) if the atlas agrees where both it and the minimap are explored."""
+        half = probe.shape[0] // 2
+        reference = self.atlas.patch(z, x - half, y - half, probe.shape[1], probe.shape[0])
+        if reference is None:
+            return None
+        agreement = self._agreement(probe, reference)
+        if agreement is None:
+            return None
+        return PositionFix(int(x), int(y), int(z), float(agreement), method)
+
+    def _agreement(self, probe: np.ndarray, reference: np.ndarray) -> Optional[float]:
+        """Fraction of tiles explored in both that match, or None below ``min_agreement``."""
+        size = probe.shape[0]
+        half = size // 2
+        explored = (probe > 0) & (reference > 0)
+        # The character marker sits on the center tile
+        explored[half - 1:half + 2, half - 1:half + 2] = False
+        count = int(np.count_nonzero(explored))
+        if count < size:
+            return None
+        matching = np.abs(reference.astype(np.float32) - probe) <= self.tolerance
+        agreement = np.count_nonzero(matching & explored) / count
+        return agreement if agreement >= self.min_agreement else None
+
+    def get_stats(self) -> dict:
+        """Update counters and the last fix."""
+        stats = dict(self.stats)
+        stats['position'] = self.position
+        stats['last_ms'] = self.last_fix.elapsed_ms if self.last_fix is not None else None
+        return stats
+
+
+def create_tracker(image: np.ndarray, maps_dir: str = "resources/maps",
+                   layout_file: str = "config/ui_layout.json",
+                   start_position: Tuple[int, int, int] = START_POSITION) -> Optional[MinimapTracker]:
+    """
+    Build a tracker for a running client.
+
+    Loads the atlas and finds the minimap with the layout detector (the
+    stored layout when it still matches the screen). With an empty atlas
+    the map is recorded from scratch, starting at ``start_position``.
+
+    Args:
+        image: Full BGR screenshot of the client
+        maps_dir: Map exports directory (the atlas is stored in its ``atlas`` subdirectory)
+        layout_file: Stored UI layout
+        start_position: Position of the first minimap when no map exists yet
+
+    Returns:
+        MinimapTracker, or None without a detected minimap
+    """
+    # Imported here: the layout detector is only needed once
+    from capture.layout_detector import LayoutDetector
+
+    layout = LayoutDetector(layout_file).load_or_detect(image)
+    if layout.minimap is None:
+        logger.warning("Minimap not found on screen, position tracking disabled")
+        return None
+    atlas = MinimapAtlas(maps_dir)
+    tracker = MinimapTracker(atlas, layout.minimap)
+    if not atlas.floor_numbers():
+        logger.info(f"No map recorded yet, starting one at {start_position}")
+        tracker.set_position(*start_position)
+    return tracker
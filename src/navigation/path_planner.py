@@ -0,0 +1,617 @@
+"""
+Path Planner Module for Tibia Bot
+
+This module plans walking routes over the walkability grid. The character
+moves in four directions, so the planner is a 4-connected A* with jump
+point search: inside regions where every tile around costs the same, a
+straight scan jumps to the next tile where the route could turn instead
+of queueing every tile on the way. Tiles next to a cost change are
+expanded like plain A*, so routes stay optimal on mixed terrain.
+
+Destinations that are asked for repeatedly (a hunting spot, the depot)
+get a Dijkstra distance field towards them, kept in a small LRU cache:
+a route to a cached destination is read by walking down the field, in
+time proportional to its length. A field grows to cover a start outside
+its radius when the worker thread builds it (see below), and is dropped
+when the atlas changes under it.
+
+The bot loop asks through ``request``, which never plans on the calling
+thread: routes are read from a ready field (or the last route planned to
+that goal), and anything else is queued for a worker thread that builds
+the field in the background. A 256x256 cave takes a Python Dijkstra
+hundreds of milliseconds; reading the finished field takes about one.
+
+Routes to another floor go through the floor transition graph when one
+is attached (see ``floor_transitions``); without it they walk to the
+floor change tile (stairs, ladders, holes) that best leads towards the
+goal, one floor at a time.
+
+With a blocked edge index attached (see ``blocked_edges``), the tiles that
+moves keep failing into are treated as blocked until their record decays.
+A distance field is rebuilt only when a blocked tile inside its own area
+changes.
+"""
+
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from navigation.blocked_edges import BlockedEdgeIndex
+from navigation.minimap_atlas import ChunkKey
+from navigation.walkability import BLOCKED, TRANSITION, UNKNOWN, WalkabilityGrid
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]  # World (x, y, z)
+
+# Movement keys by step
+MOVES = {(0, -1): 'W', (0, 1): 'S', (-1, 0): 'A', (1, 0): 'D'}
+
+
+@dataclass
+class _Area:
+    """Cropped cost grid a search runs on (1-tile blocked border, flat indices)."""
+    z: int
+    x: int                # World x of column 0
+    y: int                # World y of row 0
+    width: int
+    height: int
+    cost: bytearray       # Step cost of every tile, 0 = not walkable
+    uniform: bytearray    # 1 where the tile and its walkable neighbours share one cost
+    min_cost: int
+
+    def index(self, x: int, y: int) -> Optional[int]:
+        px, py = x - self.x, y - self.y
+        if 0 < px < self.width - 1 and 0 < py < self.height - 1:
+            return py * self.width + px
+        return None
+
+    def position(self, index: int) -> Position:
+        return (self.x + index % self.width, self.y + index // self.width, self.z)
+
+
+@dataclass
+class _Field:
+    """Dijkstra distances from every tile of an area to one destination."""
+    goal: Position
+    area: _Area
+    distance: List[int]
+    # Blocked edge index revisions of the regions in the area, as built
+    blocked_revisions: Dict[Tuple[int, int, int], int] = field(default_factory=dict)
+
+
+class PathPlanner:
+    """4-connected A*/JPS planner over a WalkabilityGrid."""
+
+    def __init__(self, walkability: WalkabilityGrid, margin: int = 32, max_margin: int = 256,
+                 unknown_cost: int = 5, field_radius: int = 128, field_threshold: int = 2,
+                 field_cache_size: int = 8, blocked_edges: Optional[BlockedEdgeIndex] = None):
+        """
+        Initialize the PathPlanner.
+
+        Args:
+            walkability: Cost grid
+            margin: Tiles searched around the start/goal bounding box
+            max_margin: Margin of the retry when no route fits in the first one
+            unknown_cost: Step cost of unexplored tiles (they may be walkable; 0 = never enter)
+            field_radius: Half size of the area a distance field covers
+            field_threshold: Queries to one destination before it gets a distance field
+            field_cache_size: Max cached distance fields
+            blocked_edges: Failed moves; the tiles they lead to are avoided
+        """
+        self.walkability = walkability
+        self.margin = margin
+        self.max_margin = max_margin
+        self.unknown_cost = unknown_cost
+        self.field_radius = field_radius
+        self.field_threshold = field_threshold
+        self.field_cache_size = field_cache_size
+        self._fields: "OrderedDict[Position, _Field]" = OrderedDict()
+        self._queries: "OrderedDict[Position, int]" = OrderedDict()
+        self.blocked_edges = blocked_edges
+        self.transitions = None  # Multi-floor router (TransitionGraph attaches itself)
+        self.stats = {'plans': 0, 'field_hits': 0, 'fields_built': 0, 'fields_dropped': 0,
+                      'expanded': 0, 'failed': 0, 'requests': 0, 'background_plans': 0}
+
+        # Background planning (see ``request``)
+        self._lock = threading.Condition()
+        self._revision = 0  # Bumped on every atlas change: fields built across one are not cached
+        self._routes: "OrderedDict[Position, List[Position]]" = OrderedDict()
+        self._unreachable: "OrderedDict[Position, Position]" = OrderedDict()  # goal -> start
+        self._pending: Optional[Tuple[Position, Position]] = None
+        self._working: Optional[Tuple[Position, Position]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        walkability.atlas.on_change(self._atlas_changed)
+
+    # ------------------------------------------------------------------ public
+
+    def plan(self, start: Position, goal: Position) -> Optional[List[Position]]:
+        """
+        Route between two tiles, floor changes included.
+
+        Args:
+            start: Current position
+            goal: Destination
+
+        Returns:
+            Tiles from start to goal (both included), or None if there is no known route
+        """
+        self.stats['plans'] += 1
+        start, goal = tuple(start), tuple(goal)
+        if start[2] != goal[2] and self.transitions is not None:
+            route = self.transitions.route(start, goal)
+            if route is None:
+                self.stats['failed'] += 1
+            return route
+        route = [start]
+        current = start
+        while current[2] != goal[2]:
+            leg = self._plan_floor_change(current, goal)
+            if leg is None:
+                self.stats['failed'] += 1
+                return None
+            route.extend(leg[1:])
+            current = leg[-1]
+        leg = self._plan_floor(current, goal)
+        if leg is None:
+            self.stats['failed'] += 1
+            return None
+        route.extend(leg[1:])
+        return route
+
+    def request(self, start: Position, goal: Position) -> Optional[List[Position]]:
+        """
+        Route for the bot loop, without planning on the calling thread.
+
+        The route is read from a ready distance field towards the goal, or from
+        the last route planned to it when ``start`` lies on that route. Otherwise
+        the plan is queued for the worker thread (replacing any older request)
+        and None is returned; ``is_pending`` tells a queued plan from a goal the
+        worker found no route to.
+
+        Args:
+            start: Current position
+            goal: Destination
+
+        Returns:
+            Tiles from start to goal (both included), or None if not ready or no known route
+        """
+        self.stats['requests'] += 1
+        start, goal = tuple(start), tuple(goal)
+        if start == goal:
+            return [start]
+        with self._lock:
+            cached = self._fields.get(goal)
+            planned = self._routes.get(goal)
+            unreachable = self._unreachable.get(goal) == start
+        if cached is not None and self._is_current(cached):
+            route = self._follow_field(cached, start)
+            if route is not None:
+                self.stats['field_hits'] += 1
+                return route
+        if planned is not None and start in planned:
+            return planned[planned.index(start):]
+        if unreachable:
+            return None
+        with self._lock:
+            self._pending = (start, goal)
+            self._lock.notify()
+            if self._worker is None and not self._closed:
+                self._worker = threading.Thread(target=self._work, daemon=True)
+                self._worker.start()
+        return None
+
+    def is_pending(self, goal: Position) -> bool:
+        """True while the worker thread has a plan towards ``goal`` queued or running."""
+        goal = tuple(goal)
+        with self._lock:
+            return any(job is not None and job[1] == goal for job in (self._pending, self._working))
+
+    def close(self):
+        """Stop the worker thread."""
+        with self._lock:
+            self._closed = True
+            self._pending = None
+            self._lock.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+            self._worker = None
+
+    def distance_field(self, goal: Position, start: Optional[Position] = None) -> _Field:
+        """
+        Distance field towards a destination (built on first use, then cached).
+
+        Args:
+            goal: Destination
+            start: Tile the field should also cover; a cached field that does not is
+                rebuilt over both (up to ``2 * (field_radius + max_margin)`` tiles a side)
+
+        Returns:
+            The field
+        """
+        with self._lock:
+            cached = self._fields.get(goal)
+            revision = self._revision
+        if cached is not None and self._is_current(cached) and (
+                start is None or not self._extends(cached, goal, start)):
+            with self._lock:
+                if goal in self._fields:
+                    self._fields.move_to_end(goal)
+            return cached
+        r = self.field_radius
+        x0, y0, x1, y1 = goal[0] - r, goal[1] - r, goal[0] + r, goal[1] + r
+        if start is not None and self._extends(cached, goal, start):
+            x0, y0 = min(x0, start[0] - self.margin), min(y0, start[1] - self.margin)
+            x1, y1 = max(x1, start[0] + self.margin), max(y1, start[1] + self.margin)
+        area = self._area(goal[2], x0, y0, x1, y1, goal)
+        built = _Field(goal, area, self._dijkstra(area, area.index(goal[0], goal[1])),
+                       self._blocked_revisions(area))
+        with self._lock:
+            # Built across an atlas change: use it once, but do not keep it
+            if revision == self._revision:
+                self._fields[goal] = built
+                self._fields.move_to_end(goal)
+                if len(self._fields) > self.field_cache_size:
+                    self._fields.popitem(last=False)
+            self.stats['fields_built'] += 1
+        return built
+
+    def _extends(self, cached: Optional[_Field], goal: Position, start: Position) -> bool:
+        """True if a field towards ``goal`` should be (re)built to cover ``start``."""
+        if start[2] != goal[2]:
+            return False
+        reach = self.field_radius + self.max_margin
+        if abs(start[0] - goal[0]) > reach or abs(start[1] - goal[1]) > reach:
+            return False
+        if cached is None:
+            return abs(start[0] - goal[0]) > self.field_radius or abs(start[1] - goal[1]) > self.field_radius
+        return cached.area.index(start[0], start[1]) is None
+
+    def _is_current(self, cached: _Field) -> bool:
+        return cached.blocked_revisions == self._blocked_revisions(cached.area)
+
+    def _blocked_revisions(self, area: _Area) -> Dict[Tuple[int, int, int], int]:
+        if self.blocked_edges is None:
+            return {}
+        return self.blocked_edges.revisions(area.z, area.x, area.y, area.width, area.height)
+
+    @staticmethod
+    def to_moves(route: List[Position]) -> List[str]:
+        """Movement keys of a route (floor changes need no key of their own)."""
+        moves = []
+        for (x0, y0, z0), (x1, y1, z1) in zip(route, route[1:]):
+            if z0 == z1:
+                moves.append(MOVES[(x1 - x0, y1 - y0)])
+        return moves
+
+    def get_stats(self) -> Dict:
+        """Planner counters."""
+        stats = dict(self.stats)
+        stats['cached_fields'] = len(self._fields)
+        return stats
+
+    # ------------------------------------------------------------- one floor
+
+    def _plan_floor(self, start: Position, goal: Position) -> Optional[List[Position]]:
+        if start == goal:
+            return [start]
+        count = self._queries.pop(goal, 0) + 1
+        self._queries[goal] = count
+        if len(self._queries) > 256:
+            self._queries.popitem(last=False)
+        if count >= self.field_threshold:
+            route = self._follow_field(self.distance_field(goal), start)
+            if route is not None:
+                self.stats['field_hits'] += 1
+                return route
+
+        for margin in (self.margin, self.max_margin):
+            area = self._area(start[2], min(start[0], goal[0]) - margin, min(start[1], goal[1]) - margin,
+                              max(start[0], goal[0]) + margin, max(start[1], goal[1]) + margin, start, goal)
+            route = self._search(area, area.index(start[0], start[1]), area.index(goal[0], goal[1]))
+            if route is not None:
+                return route
+        return None
+
+    def _area(self, z: int, x0: int, y0: int, x1: int, y1: int, *endpoints: Position) -> _Area:
+        """Crop and prepare the costs of a world rectangle (inclusive corners)."""
+        x0, y0 = x0 - 1, y0 - 1
+        width, height = x1 - x0 + 2, y1 - y0 + 2
+        raw = self.walkability.region(z, x0, y0, width, height)
+        cost = raw.copy()
+        cost[raw == UNKNOWN] = self.unknown_cost
+        cost[raw >= TRANSITION] = 0
+        # Start and goal may be floor change tiles (arriving on stairs, walking to them)
+        ends = {(x, y) for x, y, _ in endpoints if x0 <= x < x0 + width and y0 <= y < y0 + height}
+        for x, y in ends:
+            if raw[y - y0, x - x0] == TRANSITION:
+                cost[y - y0, x - x0] = 1
+        # Tiles moves keep failing into (creatures, walls the minimap does not show)
+        if self.blocked_edges is not None:
+            for x, y in self.blocked_edges.blocked_tiles(z):
+                if x0 <= x < x0 + width and y0 <= y < y0 + height and (x, y) not in ends:
+                    cost[y - y0, x - x0] = 0
+        cost[0, :] = cost[-1, :] = 0
+        cost[:, 0] = cost[:, -1] = 0
+
+        walkable = cost > 0
+        kernel = np.ones((3, 3), np.uint8)
+        low = cv2.erode(np.where(walkable, cost, 255).astype(np.uint8), kernel)
+        high = cv2.dilate(np.where(walkable, cost, 0).astype(np.uint8), kernel)
+        uniform = walkable & (low == high)
+        min_cost = int(cost[walkable].min()) if walkable.any() else 1
+        return _Area(z, x0, y0, width, height, bytearray(cost.tobytes()),
+                     bytearray(uniform.astype(np.uint8).tobytes()), min_cost)
+
+    def _search(self, area: _Area, start: Optional[int], goal: Optional[int]) -> Optional[List[Position]]:
+        """A* with jump point search between two flat indices."""
+        if start is None or goal is None or not area.cost[start] or not area.cost[goal]:
+            return None
+        width = area.width
+        gx, gy = goal % width, goal // width
+        scale = area.min_cost
+
+        def heuristic(i):
+            return (abs(i % width - gx) + abs(i // width - gy)) * scale
+
+        g = {start: 0}
+        parent = {start: None}
+        arrival = {start: 0}  # Step the node was reached with (0 = expand every direction)
+        open_heap = [(heuristic(start), 0, start)]
+        closed = set()
+        while open_heap:
+            _, cost, node = heapq.heappop(open_heap)
+            if node == goal:
+                return self._unpack(area, parent, goal)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.stats['expanded'] += 1
+            for step in self._directions(area, node, arrival[node]):
+                jump = self._jump(area, node, step, goal)
+                if jump is None:
+                    continue
+                target, segment = jump
+                new_cost = cost + segment
+                if new_cost < g.get(target, 1 << 60):
+                    g[target] = new_cost
+                    parent[target] = node
+                    arrival[target] = step
+                    heapq.heappush(open_heap, (new_cost + heuristic(target), new_cost, target))
+        return None
+
+    @staticmethod
+    def _directions(area: _Area, node: int, step: int) -> List[int]:
+        """Pruned successor directions of a node reached with ``step``."""
+        width = area.width
+        if not step or not area.uniform[node]:
+            return [1, -1, width, -width]
+        cost = area.cost
+        if step in (1, -1):
+            # Horizontal: go on, turning only where the tile beside the previous one is blocked
+            directions = [step]
+            for side in (width, -width):
+                if cost[node + side] and not cost[node - step + side]:
+                    directions.append(side)
+            return directions
+        # Vertical: go on or branch into horizontal scans
+        return [step, 1, -1]
+
+    def _jump(self, area: _Area, node: int, step: int, goal: int) -> Optional[Tuple[int, int]]:
+        """
+        Scan from a node in one direction to the next jump point.
+
+        Returns:
+            (jump point, cost of the straight segment), or None at a dead end
+        """
+        cost, uniform, width = area.cost, area.uniform, area.width
+        horizontal = step in (1, -1)
+        current = node
+        segment = 0
+        while True:
+            current += step
+            tile = cost[current]
+            if not tile:
+                return None
+            segment += tile
+            if current == goal or not uniform[current]:
+                return current, segment
+            if horizontal:
+                for side in (width, -width):
+                    if cost[current + side] and not cost[current - step + side]:
+                        return current, segment
+            elif self._jump(area, current, 1, goal) is not None or self._jump(area, current, -1, goal) is not None:
+                return current, segment
+
+    @staticmethod
+    def _unpack(area: _Area, parent: Dict[int, Optional[int]], goal: int) -> List[Position]:
+        """Expand the jump points of a route into every tile."""
+        points = []
+        node = goal
+        while node is not None:
+            points.append(node)
+            node = parent[node]
+        points.reverse()
+        width = area.width
+        tiles = [points[0]]
+        for a, b in zip(points, points[1:]):
+            diff = b - a
+            step = (1 if diff > 0 else -1) if abs(diff) < width else (width if diff > 0 else -width)
+            tiles.extend(range(a + step, b + step, step))
+        return [area.position(i) for i in tiles]
+
+    # --------------------------------------------------------- distance fields
+
+    def _dijkstra(self, area: _Area, source: Optional[int], targets: Optional[Set[int]] = None) -> List[int]:
+        """
+        Distances from every tile to ``source`` (bucket queue: step costs are small integers).
+
+        Args:
+            area: Search area
+            source: Flat index the distances are measured to
+            targets: Stop once all of these are settled
+
+        Returns:
+            Distance per flat index (-1 where unreachable)
+        """
+        distance = [-1] * (area.width * area.height)
+        if source is None or not area.cost[source]:
+            return distance
+        cost, width = area.cost, area.width
+        remaining = set(targets) if targets else None
+        buckets: Dict[int, List[int]] = {0: [source]}
+        settled = bytearray(len(distance))
+        tentative = {source: 0}
+        current = 0
+        while buckets:
+            bucket = buckets.pop(current, None)
+            if bucket is None:
+                current += 1
+                continue
+            for node in bucket:
+                if settled[node] or tentative[node] != current:
+                    continue
+                settled[node] = 1
+                distance[node] = current
+                if remaining is not None:
+                    remaining.discard(node)
+                    if not remaining:
+                        return distance
+                # Walking a route backwards: entering ``node`` from a neighbour costs cost[node]
+                for neighbour in (node + 1, node - 1, node + width, node - width):
+                    if cost[neighbour] and not settled[neighbour]:
+                        new_distance = current + cost[node]
+                        if new_distance < tentative.get(neighbour, 1 << 60):
+                            tentative[neighbour] = new_distance
+                            buckets.setdefault(new_distance, []).append(neighbour)
+            current += 1
+        return distance
+
+    def _follow_field(self, field: _Field, start: Position) -> Optional[List[Position]]:
+        """Walk down a distance field from ``start``."""
+        area = field.area
+        if start[2] != area.z:
+            return None
+        node = area.index(start[0], start[1])
+        if node is None or field.distance[node] < 0:
+            return None
+        distance, cost, width = field.distance, area.cost, area.width
+        route = [node]
+        while distance[node] > 0:
+            # The next tile is the neighbour the distance was relaxed through
+            node = min((n for n in (node + 1, node - 1, node + width, node - width) if distance[n] >= 0),
+                       key=lambda n: distance[n] + cost[n])
+            route.append(node)
+        return [area.position(i) for i in route]
+
+    def _atlas_changed(self, z: int, chunks: Set[ChunkKey]):
+        """Drop distance fields that cover a changed chunk, and planned routes through one."""
+        store = self.walkability.atlas.floors.get(z)
+        if store is None:
+            return
+        size = store.chunk_size
+        with self._lock:
+            self._revision += 1
+            for goal, field in list(self._fields.items()):
+                area = field.area
+                if area.z != z:
+                    continue
+                for cx, cy in chunks:
+                    if (cx * size < area.x + area.width and area.x < (cx + 1) * size and
+                            cy * size < area.y + area.height and area.y < (cy + 1) * size):
+                        del self._fields[goal]
+                        self.stats['fields_dropped'] += 1
+                        break
+            for goal, route in list(self._routes.items()):
+                if any(tz == z and (x // size, y // size) in chunks for x, y, tz in route):
+                    del self._routes[goal]
+            self._unreachable.clear()
+
+    # ------------------------------------------------------------ worker thread
+
+    def _work(self):
+        """Worker thread: plan the latest request, keep the field and the route for ``request``."""
+        while True:
+            with self._lock:
+                while self._pending is None and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                start, goal = self._working = self._pending
+                self._pending = None
+            route, failed = None, False
+            try:
+                if start[2] == goal[2]:
+                    route = self._follow_field(self.distance_field(goal, start), start)
+                if route is None:
+                    route = self.plan(start, goal)
+                failed = route is None
+            except Exception as e:
+                # The loop thread may change the blocked edges mid-plan: the next request retries
+                logger.error(f"Error planning route to {goal}: {e}")
+            with self._lock:
+                self._working = None
+                self.stats['background_plans'] += 1
+                if route is not None:
+                    self._routes[goal] = route
+                    self._routes.move_to_end(goal)
+                    if len(self._routes) > self.field_cache_size:
+                        self._routes.popitem(last=False)
+                elif failed:
+                    self._unreachable[goal] = start
+                    if len(self._unreachable) > self.field_cache_size:
+                        self._unreachable.popitem(last=False)
+
+    # ----------------------------------------------------------- floor change
+
+    def _plan_floor_change(self, start: Position, goal: Position) -> Optional[List[Position]]:
+        """Route to the floor change tile that leads one floor towards the goal, then onto it."""
+        z = start[2]
+        dz = 1 if goal[2] > z else -1
+        r = self.max_margin
+        area = self._area(z, start[0] - r, start[1] - r, start[0] + r, start[1] + r, start)
+        raw = self.walkability.region(z, area.x, area.y, area.width, area.height)
+        candidates = {}
+        for py, px in zip(*np.nonzero(raw == TRANSITION)):
+            arrival = self._arrival(int(area.x + px), int(area.y + py), z + dz)
+            if arrival is not None:
+                candidates[int(py) * area.width + int(px)] = arrival
+        if not candidates:
+            return None
+
+        # The stairs themselves are only walked onto at the end of the leg
+        for index in candidates:
+            area.cost[index] = 1
+        distance = self._dijkstra(area, area.index(start[0], start[1]), set(candidates))
+        best, best_score = None, None
+        for index, arrival in candidates.items():
+            if distance[index] < 0:
+                continue
+            remaining = abs(arrival[0] - goal[0]) + abs(arrival[1] - goal[1])
+            score = distance[index] + remaining * area.min_cost
+            if best_score is None or score < best_score:
+                best, best_score = index, score
+        if best is None:
+            return None
+        for index in candidates:
+            if index != best:
+                area.cost[index] = 0
+        route = self._search(area, area.index(start[0], start[1]), best)
+        if route is None:
+            return None
+        return route + [candidates[best]]
+
+    def _arrival(self, x: int, y: int, z: int) -> Optional[Position]:
+        """Where a floor change at (x, y) lands on floor z, if that floor is mapped there."""
+        for dx, dy in ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)):
+            cost = self.walkability.cost(x + dx, y + dy, z)
+            if cost not in (UNKNOWN, BLOCKED):
+                return (x + dx, y + dy, z)
+        return None
@@ -0,0 +1,276 @@
+"""
+Visited Grid Module for Tibia Bot
+
+This module stores visited tiles as packed bits: one bit per tile in
+chunks of ``CHUNK_SIZE`` x ``CHUNK_SIZE`` tiles per floor (8 KB a chunk),
+allocated when a tile in them is first visited. It behaves like the set
+of (x, y, z) tuples it replaces (``add``, ``in``, ``len``, iteration,
+``|=``) at a fraction of the memory: a fully walked chunk of 65536 tiles
+costs 8 KB instead of several megabytes of tuples.
+
+File format (little endian)::
+
+    magic (8 bytes) | chunk size (u4) | chunk count (u4)
+    index: (z i4, cx i4, cy i4, count u4, offset u8) per chunk
+    chunks: chunk_size rows of chunk_size / 8 bytes each
+
+``load`` reads the header and index only; each chunk is mapped from the
+file the first time it is needed and copied only when it is written to.
+"""
+
+import io
+import os
+import struct
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int, int]  # World (x, y, z)
+ChunkId = Tuple[int, int, int]   # (z, x // chunk size, y // chunk size)
+
+CHUNK_SIZE = 256
+MAGIC = b"TIBVIS01"
+HEADER = struct.Struct("<8sII")
+INDEX_ENTRY = struct.Struct("<iiiIQ")
+
+
+class VisitedGrid:
+    """Set of visited tiles as chunked bitsets, one chunk index for every floor."""
+
+    def __init__(self, positions: Optional[Iterable[Position]] = None, chunk_size: int = CHUNK_SIZE):
+        """
+        Initialize the VisitedGrid.
+
+        Args:
+            positions: Tiles to start with
+            chunk_size: Chunk side in tiles (a multiple of 8)
+        """
+        if chunk_size % 8:
+            raise ValueError(f"Chunk size must be a multiple of 8, got {chunk_size}")
+        self.chunk_size = chunk_size
+        self._chunks: Dict[ChunkId, np.ndarray] = {}
+        self._counts: Dict[ChunkId, int] = {}
+        self._lazy: Dict[ChunkId, int] = {}   # Chunks still in the file: id -> offset
+        self._writable: set = set()           # Loaded chunks already copied out of the file
+        self._mmap: Optional[np.memmap] = None
+        self.path: Optional[str] = None
+        if positions is not None:
+            self.update(positions)
+
+    # ------------------------------------------------------------------ set API
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def __bool__(self) -> bool:
+        return any(self._counts.values())
+
+    def __contains__(self, position) -> bool:
+        x, y, z = position
+        size = self.chunk_size
+        chunk = self._chunk((z, x // size, y // size))
+        if chunk is None:
+            return False
+        col = x % size
+        return bool(chunk[y % size, col >> 3] & (0x80 >> (col & 7)))
+
+    def add(self, position: Position) -> bool:
+        """
+        Mark a tile visited.
+
+        Returns:
+            True if it was not visited before
+        """
+        x, y, z = position
+        size = self.chunk_size
+        key = (z, x // size, y // size)
+        chunk = self._chunk(key, create=True)
+        col = x % size
+        bit = 0x80 >> (col & 7)
+        row = y % size
+        if chunk[row, col >> 3] & bit:
+            return False
+        chunk[row, col >> 3] |= bit
+        self._counts[key] += 1
+        return True
+
+    def update(self, positions: Iterable[Position]) -> int:
+        """Add many (x, y, z) tiles. Returns how many were new."""
+        return sum(self.add(tuple(p)) for p in positions)
+
+    def __iter__(self) -> Iterator[Position]:
+        size = self.chunk_size
+        for key in sorted(self.chunk_ids()):
+            z, cx, cy = key
+            ys, xs = np.nonzero(np.unpackbits(self._chunk(key), axis=1))
+            for y, x in zip(ys.tolist(), xs.tolist()):
+                yield (cx * size + x, cy * size + y, z)
+
+    def __ior__(self, other: "VisitedGrid") -> "VisitedGrid":
+        self.merge(other)
+        return self
+
+    def merge(self, other: "VisitedGrid") -> int:
+        """
+        Set union with another grid, chunk by chunk (bitwise OR).
+
+        Returns:
+            Number of tiles that were new
+        """
+        if other.chunk_size != self.chunk_size:
+            return self.update(other)
+        before = len(self)
+        for key in other.chunk_ids():
+            source = other._chunk(key)
+            target = self._chunk(key)
+            if target is None:
+                self._chunks[key] = np.array(source)
+                self._writable.add(key)
+                self._counts[key] = other._counts[key]
+                continue
+            target = self._chunk(key, create=True)
+            np.bitwise_or(target, source, out=target)
+            self._counts[key] = int(np.unpackbits(target).sum())
+        return len(self) - before
+
+    def chunk_ids(self) -> List[ChunkId]:
+        """Every allocated chunk as (z, chunk x, chunk y)."""
+        return list(self._chunks) + list(self._lazy)
+
+    def floors(self) -> Dict[int, int]:
+        """Visited tiles per floor."""
+        floors: Dict[int, int] = {}
+        for (z, _, _), count in self._counts.items():
+            floors[z] = floors.get(z, 0) + count
+        return floors
+
+    def nbytes(self) -> int:
+        """Memory held by chunks that were loaded or created."""
+        return sum(chunk.nbytes for chunk in self._chunks.values())
+
+    # ------------------------------------------------------------------ chunks
+
+    def _chunk(self, key: ChunkId, create: bool = False) -> Optional[np.ndarray]:
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            offset = self._lazy.pop(key, None)
+            if offset is not None:
+                chunk = self._mmap[offset:offset + self._chunk_bytes].reshape(self.chunk_size, -1)
+                self._chunks[key] = chunk
+            elif create:
+                chunk = np.zeros((self.chunk_size, self.chunk_size // 8), np.uint8)
+                self._chunks[key] = chunk
+                self._writable.add(key)
+                self._counts[key] = 0
+                return chunk
+            else:
+                return None
+        if create and key not in self._writable:
+            # Copy out of the read-only file mapping before the first write
+            chunk = np.array(chunk)
+            self._chunks[key] = chunk
+            self._writable.add(key)
+        return chunk
+
+    @property
+    def _chunk_bytes(self) -> int:
+        return self.chunk_size * self.chunk_size // 8
+
+    # ------------------------------------------------------------------ files
+
+    def save(self, path: str) -> int:
+        """
+        Write the grid in the binary format.
+
+        Args:
+            path: Output file (replaced atomically)
+
+        Returns:
+            Number of chunks written
+        """
+        temporary = path + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(temporary, "wb") as f:
+            count = self._write(f)
+        if self.path is not None and os.path.abspath(self.path) == os.path.abspath(path):
+            # The old file is about to be replaced: nothing may keep reading from it
+            self._detach()
+        os.replace(temporary, path)
+        return count
+
+    def _write(self, f) -> int:
+        keys = sorted(self.chunk_ids())
+        chunks = [(key, self._chunk(key)) for key in keys]
+        f.write(HEADER.pack(MAGIC, self.chunk_size, len(chunks)))
+        offset = HEADER.size + INDEX_ENTRY.size * len(chunks)
+        for key, _ in chunks:
+            f.write(INDEX_ENTRY.pack(key[0], key[1], key[2], self._counts[key], offset))
+            offset += self._chunk_bytes
+        for _, chunk in chunks:
+            f.write(np.ascontiguousarray(chunk).tobytes())
+        return len(chunks)
+
+    def to_bytes(self) -> bytes:
+        """The grid in the file format (e.g. to send it to another process)."""
+        buffer = io.BytesIO()
+        self._write(buffer)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "VisitedGrid":
+        """Grid from ``to_bytes`` output; chunks are read from the buffer on first use."""
+        if len(data) < HEADER.size or not data.startswith(MAGIC):
+            raise ValueError("Not a visited grid")
+        return cls._from_index(data[:HEADER.size], data[HEADER.size:], np.frombuffer(data, np.uint8))
+
+    def _detach(self):
+        for key in list(self._lazy):
+            self._chunk(key)
+        for key, chunk in self._chunks.items():
+            if key not in self._writable:
+                self._chunks[key] = np.array(chunk)
+                self._writable.add(key)
+        self._mmap = None
+        self.path = None
+
+    @classmethod
+    def load(cls, path: str) -> "VisitedGrid":
+        """
+        Open a grid file. Only the index is read; chunks are mapped on first use.
+
+        Raises:
+            ValueError: If the file is not a visited grid
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                raise ValueError(f"Not a visited grid: {path}")
+            _, _, count = HEADER.unpack(header)
+            index = f.read(INDEX_ENTRY.size * count)
+        grid = cls._from_index(header, index, np.memmap(path, dtype=np.uint8, mode="r") if count else None)
+        grid.path = path
+        return grid
+
+    @classmethod
+    def _from_index(cls, header: bytes, index: bytes, data: Optional[np.ndarray]) -> "VisitedGrid":
+        _, chunk_size, count = HEADER.unpack(header)
+        if chunk_size % 8:
+            raise ValueError(f"Invalid chunk size {chunk_size}")
+        grid = cls(chunk_size=chunk_size)
+        grid._mmap = data
+        for z, cx, cy, tiles, offset in INDEX_ENTRY.iter_unpack(index[:INDEX_ENTRY.size * count]):
+            grid._lazy[(z, cx, cy)] = offset
+            grid._counts[(z, cx, cy)] = tiles
+        return grid
+
+    @staticmethod
+    def is_grid_file(path: str) -> bool:
+        """Whether a file is in the visited grid format."""
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return False
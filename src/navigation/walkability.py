@@ -0,0 +1,178 @@
+"""
+Walkability Module for Tibia Bot
+
+This module turns the minimap atlas into a per-tile movement cost grid.
+The minimap encodes terrain by color, so a 256-entry lookup table maps
+every palette index to a cost byte; a whole chunk is classified with one
+table lookup. Cost chunks mirror the atlas chunks, are built on first
+use and are rebuilt only when the atlas reports that chunk changed.
+
+Cost bytes::
+
+    0          unexplored (unknown)
+    1 - 253    walkable, relative cost of stepping onto the tile
+    254        floor change (stairs, ladders, holes): walked onto only on purpose
+    255        blocked (walls, water, trees, lava, ...)
+"""
+
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from navigation.minimap_atlas import ChunkKey, MinimapAtlas
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 0
+TRANSITION = 254
+BLOCKED = 255
+
+# Minimap palette index -> (terrain, cost)
+TERRAIN_COSTS: Dict[int, Tuple[str, int]] = {
+    0x0C: ("tree", BLOCKED),
+    0x18: ("grass", 3),
+    0x1E: ("swamp", 6),
+    0x28: ("water", BLOCKED),
+    0x56: ("mountain", BLOCKED),
+    0x72: ("cave wall", BLOCKED),
+    0x79: ("dirt", 3),
+    0x81: ("road", 2),
+    0x8C: ("light grass", 3),
+    0xB3: ("ice", 3),
+    0xBA: ("wall", BLOCKED),
+    0xC0: ("lava", BLOCKED),
+    0xCF: ("sand", 3),
+    0xD2: ("floor change", TRANSITION),
+    0xD7: ("snow", 3),
+}
+
+
+def build_cost_lut(costs: Optional[Dict[int, int]] = None, default: int = BLOCKED) -> np.ndarray:
+    """
+    Lookup table from palette index to cost byte.
+
+    Args:
+        costs: Overrides (palette index -> cost) on top of ``TERRAIN_COSTS``
+        default: Cost of explored colors the table does not know
+
+    Returns:
+        uint8 array of 256 costs (index 0 is always UNKNOWN)
+    """
+    lut = np.full(256, default, np.uint8)
+    for index, (_, cost) in TERRAIN_COSTS.items():
+        lut[index] = cost
+    for index, cost in (costs or {}).items():
+        lut[index] = cost
+    lut[0] = UNKNOWN
+    return lut
+
+
+class WalkabilityGrid:
+    """
+    Movement costs of every atlas tile, kept in sync with the atlas.
+
+    Listens to the atlas: a changed atlas chunk only drops that cost
+    chunk, which is reclassified the next time it is read.
+    """
+
+    def __init__(self, atlas: MinimapAtlas, costs: Optional[Dict[int, int]] = None, default: int = BLOCKED):
+        """
+        Initialize the WalkabilityGrid.
+
+        Args:
+            atlas: Map the costs are derived from
+            costs: Cost overrides by palette index
+            default: Cost of explored colors with no known terrain
+        """
+        self.atlas = atlas
+        self.lut = build_cost_lut(costs, default)
+        self._chunks: Dict[int, Dict[ChunkKey, np.ndarray]] = {}
+        self.revision = 0  # Bumped whenever a cost chunk is dropped
+        self.stats = {'classified': 0, 'invalidated': 0}
+        atlas.on_change(self.invalidate)
+
+    def invalidate(self, z: int, chunks: Set[ChunkKey]):
+        """Drop the cost chunks of changed atlas chunks."""
+        floor = self._chunks.get(z)
+        if floor is None:
+            return
+        for key in chunks:
+            if floor.pop(key, None) is not None:
+                self.stats['invalidated'] += 1
+        self.revision += 1
+
+    def classify(self, indices: np.ndarray) -> np.ndarray:
+        """Cost bytes of an array of palette indices."""
+        return cv2.LUT(indices, self.lut)
+
+    def chunk(self, z: int, cx: int, cy: int) -> Optional[np.ndarray]:
+        """
+        Cost chunk (chunk_size x chunk_size), built on first use.
+
+        Returns:
+            uint8 costs, or None if the atlas has no such chunk
+        """
+        floor = self._chunks.setdefault(z, {})
+        costs = floor.get((cx, cy))
+        if costs is None:
+            store = self.atlas.floors.get(z)
+            indices = store.chunk(cx, cy) if store is not None else None
+            if indices is None:
+                return None
+            costs = self.classify(np.asarray(indices))
+            floor[(cx, cy)] = costs
+            self.stats['classified'] += 1
+        return costs
+
+    def region(self, z: int, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """
+        Costs of a world rectangle.
+
+        Args:
+            z: Floor
+            x, y: World position of the top-left tile
+            width, height: Size in tiles
+
+        Returns:
+            (height, width) uint8 costs (UNKNOWN outside the atlas)
+        """
+        out = np.zeros((height, width), np.uint8)
+        store = self.atlas.floors.get(z)
+        if store is None or width <= 0 or height <= 0:
+            return out
+        size = store.chunk_size
+        for cy in range(y // size, (y + height - 1) // size + 1):
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                costs = self.chunk(z, cx, cy)
+                if costs is None:
+                    continue
+                x0, y0 = max(x, cx * size), max(y, cy * size)
+                x1, y1 = min(x + width, (cx + 1) * size), min(y + height, (cy + 1) * size)
+                out[y0 - y:y1 - y, x0 - x:x1 - x] = costs[y0 - cy * size:y1 - cy * size,
+                                                          x0 - cx * size:x1 - cx * size]
+        return out
+
+    def cost(self, x: int, y: int, z: int) -> int:
+        """Cost byte of one tile."""
+        store = self.atlas.floors.get(z)
+        if store is None:
+            return UNKNOWN
+        size = store.chunk_size
+        costs = self.chunk(z, x // size, y // size)
+        return int(costs[y % size, x % size]) if costs is not None else UNKNOWN
+
+    def is_walkable(self, x: int, y: int, z: int) -> bool:
+        """Whether a tile can be walked on (unexplored tiles count as walkable)."""
+        return self.cost(x, y, z) < TRANSITION
+
+    def is_known(self, x: int, y: int, z: int) -> bool:
+        """Whether a tile has been explored."""
+        return self.cost(x, y, z) != UNKNOWN
+
+    def get_stats(self) -> Dict:
+        """Cache statistics."""
+        stats = dict(self.stats)
+        stats['cached_chunks'] = sum(len(floor) for floor in self._chunks.values())
+        return stats
@@ -86,6 +86,20 @@ class SimpleWorkingBypass:
         logger.error("💀 All simple methods failed")
         return None
     
+    def capture_region(self, x: int, y: int, width: int, height: int) -> Optional[np.ndarray]:
+        """Capture one rectangle of the Tibia window (window coordinates, like capture_simple_working)"""
+        try:
+            if not self.tibia_window:
+                if not self.find_tibia_window():
+                    return None
+            
+            left, top, _, _ = win32gui.GetWindowRect(self.tibia_window)
+            return self._try_mss(left + x, top + y, left + x + width, top + y + height)
+            
+        except Exception as e:
+            logger.debug(f"Region capture error: {e}")
+            return None
+    
     def _capture_screen_dc(self) -> Optional[np.ndarray]:
         """Screen DC capture - most reliable method"""
         try:
@@ -16,6 +16,9 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from vision.screen_reader import ScreenReader
+from capture.frame_bus import FrameBus
+from capture.roi_registry import RoiRegistry
+from capture.region_grabber import RegionGrabber
 from control.keyboard_controller import KeyboardController
 from control.mouse_controller import MouseController
 from features.auto_attack import AutoAttack
@@ -42,6 +45,8 @@ class TibiaBotCLI:
         """Initialize CLI interface."""
         self.running = False
         self.screen_reader = None
+        self.frame_bus = None
+        self.roi_registry = None
         self.keyboard = None
         self.mouse = None
         
@@ -90,14 +95,32 @@ class TibiaBotCLI:
                 print("❌ No se pudo iniciar captura de pantalla")
                 return False
             
+            # One shared capture feeds every feature; only declared ROIs are grabbed
+            grabber = RegionGrabber()
+            self.roi_registry = RoiRegistry()
+            self.roi_registry.load_screen_regions()
+            try:
+                screen_size = grabber.screen_size()
+            except Exception as e:
+                # Without the screen size the bus grabs full frames
+                print(f"⚠️ Captura parcial desactivada: {e}")
+                screen_size = None
+            self.frame_bus = FrameBus(self.screen_reader.capture_single_frame,
+                                      registry=self.roi_registry,
+                                      region_capture_fn=grabber.grab,
+                                      screen_size=screen_size)
+            self.frame_bus.start()
+            
             # Initialize controllers
             self.keyboard = KeyboardController("Tibia")
             self.mouse = MouseController("Tibia")
             
             # Initialize features
-            self.auto_attack = AutoAttack(self.screen_reader, self.keyboard, self.mouse)
+            self.auto_attack = AutoAttack(self.screen_reader, self.keyboard, self.mouse,
+                                          frame_bus=self.frame_bus, roi_registry=self.roi_registry)
             self.auto_spell = AutoSpell(self.keyboard)
-            self.auto_loot = AutoLoot(self.screen_reader, self.mouse, self.keyboard)
+            self.auto_loot = AutoLoot(self.screen_reader, self.mouse, self.keyboard,
+                                      frame_bus=self.frame_bus, roi_registry=self.roi_registry)
             self.auto_walk = AutoWalk(self.keyboard)
             
             print("✅ Todos los sistemas inicializados")
@@ -486,6 +509,8 @@ class TibiaBotCLI:
                 
                 elif choice == "9":
                     self.stop_all_features()
+                    if self.frame_bus:
+                        self.frame_bus.stop()
                     self.running = False
                     print("👋 ¡Hasta luego!")
                 
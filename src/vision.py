@@ -35,6 +35,11 @@ class ComputerVision:
             # Gris (obstáculos)
             ([0, 0, 50], [180, 30, 200])
         ]
+        
+        # Clasificador jugador/monstruo (para no atacar jugadores)
+        self.tile_size = 32  # Tamaño de un tile en pantalla (viewport / 15)
+        self.players_detected: List[Tuple[int, int]] = []
+        self._entity_classifier = None
     
     def capture_tibia_screen(self) -> Optional[np.ndarray]:
         """Captura toda la pantalla evadiendo anti-cheat con técnicas mejoradas"""
@@ -55,6 +60,20 @@ class ComputerVision:
             print(f"❌ Simple bypass failed: {e}")
             return self._capture_fallback_traditional()
 
+    def capture_tibia_region(self, x: int, y: int, width: int, height: int) -> Optional[np.ndarray]:
+        """Captura solo un rectángulo (p. ej. el minimapa), en las coordenadas de capture_tibia_screen"""
+        bypass = getattr(self, '_simple_bypass', None)
+        if bypass is not None:
+            region = bypass.capture_region(x, y, width, height)
+            if region is not None:
+                return region
+        
+        # Sin captura por región: recortar la captura completa
+        image = self.capture_tibia_screen()
+        if image is None:
+            return None
+        return image[y:y + height, x:x + width]
+
     def _capture_directx_desktop_duplication(self) -> Optional[np.ndarray]:
         """DirectX Desktop Duplication - método más efectivo contra anti-cheat"""
         try:
@@ -386,13 +405,14 @@ class ComputerVision:
         except Exception as e:
             raise Exception(f"Fallback tradicional error: {e}")
     
-    def detect_enemies(self, image: np.ndarray) -> List[Tuple[int, int]]:
-        """Detecta enemigos en la imagen"""
+    def detect_enemies(self, image: np.ndarray, hsv: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """Detecta enemigos en la imagen (hsv: conversión ya calculada para este frame)"""
         enemies = []
         
         try:
-            # Convertir a HSV
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            # Convertir a HSV (solo si no viene ya calculado)
+            if hsv is None:
+                hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
             
             for lower, upper in self.enemy_colors:
                 # Crear máscara
@@ -411,18 +431,39 @@ class ComputerVision:
                             cy = int(M["m01"] / M["m00"])
                             enemies.append((cx, cy))
             
-            return enemies
+            # Separar jugadores de monstruos en la misma pasada
+            return self._filter_players(image, enemies)
             
         except Exception as e:
             print(f"Error detectando enemigos: {e}")
             return []
     
-    def detect_stairs(self, image: np.ndarray) -> List[Tuple[int, int]]:
-        """Detecta escaleras en la imagen"""
+    def _filter_players(self, image: np.ndarray, entities: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Quita los jugadores de la lista de enemigos (quedan en self.players_detected)"""
+        self.players_detected = []
+        if self._entity_classifier is None:
+            try:
+                from detection.entity_classifier import EntityClassifier
+                self._entity_classifier = EntityClassifier()
+            except ImportError:
+                return entities
+        
+        monsters = []
+        for center in entities:
+            kind, _ = self._entity_classifier.classify_viewport(image, center, self.tile_size)
+            if kind == "player":
+                self.players_detected.append(center)
+            else:
+                monsters.append(center)
+        return monsters
+    
+    def detect_stairs(self, image: np.ndarray, hsv: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """Detecta escaleras en la imagen (hsv: conversión ya calculada para este frame)"""
         stairs = []
         
         try:
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            if hsv is None:
+                hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
             
             for lower, upper in self.stair_colors:
                 mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
@@ -442,12 +483,13 @@ class ComputerVision:
             print(f"Error detectando escaleras: {e}")
             return []
     
-    def detect_portals(self, image: np.ndarray) -> List[Tuple[int, int]]:
-        """Detecta portales en la imagen"""
+    def detect_portals(self, image: np.ndarray, hsv: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """Detecta portales en la imagen (hsv: conversión ya calculada para este frame)"""
         portals = []
         
         try:
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            if hsv is None:
+                hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
             
             for lower, upper in self.portal_colors:
                 mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
@@ -467,12 +509,13 @@ class ComputerVision:
             print(f"Error detectando portales: {e}")
             return []
     
-    def detect_obstacles(self, image: np.ndarray) -> List[Tuple[int, int]]:
-        """Detecta obstáculos en la imagen"""
+    def detect_obstacles(self, image: np.ndarray, hsv: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+        """Detecta obstáculos en la imagen (hsv: conversión ya calculada para este frame)"""
         obstacles = []
         
         try:
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            if hsv is None:
+                hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
             
             for lower, upper in self.obstacle_colors:
                 mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
@@ -524,10 +567,12 @@ class ComputerVision:
                 'closest_enemy': None
             }
         
-        enemies = self.detect_enemies(image)
-        stairs = self.detect_stairs(image)
-        portals = self.detect_portals(image)
-        obstacles = self.detect_obstacles(image)
+        # Una sola conversión HSV compartida por todos los detectores
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        enemies = self.detect_enemies(image, hsv)
+        stairs = self.detect_stairs(image, hsv)
+        portals = self.detect_portals(image, hsv)
+        obstacles = self.detect_obstacles(image, hsv)
         closest_enemy = self.find_closest_enemy(enemies)
         
         return {
@@ -0,0 +1,68 @@
+"""
+Tests for batched FFT template matching
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.batch_matcher import TemplateStack
+
+
+class TestTemplateStack(unittest.TestCase):
+    """Test cases for TemplateStack"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.region = cv2.GaussianBlur(rng.integers(0, 255, (60, 200), dtype=np.uint8), (3, 3), 0)
+        self.region[:, 160:] = 90  # Flat area
+        self.templates = [rng.integers(0, 255, (12, 12), dtype=np.uint8) for _ in range(10)]
+        self.templates[4] = self.region[10:22, 50:62].copy()
+        self.names = [f"item_{i}" for i in range(10)]
+
+    def reference(self, masks=None):
+        region = self.region.astype(np.float32)
+        results = []
+        for i, template in enumerate(self.templates):
+            mask = masks[i].astype(np.float32) if masks is not None else None
+            result = cv2.matchTemplate(region, template.astype(np.float32), cv2.TM_CCOEFF_NORMED, mask=mask)
+            results.append(np.nan_to_num(result))
+        return np.stack(results)
+
+    def test_scores_match_opencv(self):
+        scores = TemplateStack(self.names, self.templates, chunk_size=3).correlate(self.region)
+        expected = self.reference()
+        self.assertEqual(scores.shape, expected.shape)
+        self.assertLess(float(np.abs(scores - expected)[:, :, :145].max()), 1e-3)
+        self.assertEqual(float(np.abs(scores[:, :, 160:]).max()), 0.0)
+
+    def test_masked_scores_match_opencv(self):
+        rng = np.random.default_rng(8)
+        masks = [(rng.random((12, 12)) > 0.3).astype(np.uint8) for _ in self.templates]
+        scores = TemplateStack(self.names, self.templates, masks).correlate(self.region)
+        self.assertLess(float(np.abs(scores - self.reference(masks))[:, :, :145].max()), 1e-3)
+
+    def test_best_per_template(self):
+        stack = TemplateStack(self.names, self.templates)
+        best = stack.best(self.region)
+        self.assertEqual(len(best), 10)
+        name, x, y, score = best[4]
+        self.assertEqual((name, x, y), ("item_4", 50, 10))
+        self.assertGreater(score, 0.999)
+        self.assertTrue(all(b[3] < 0.9 for i, b in enumerate(best) if i != 4))
+        self.assertEqual(stack.best(self.region[:5, :5]), [])
+
+    def test_rejects_mixed_shapes(self):
+        with self.assertRaises(ValueError):
+            TemplateStack(["a", "b"], [np.zeros((4, 4)), np.zeros((5, 5))])
+
+
+if __name__ == '__main__':
+    unittest.main()
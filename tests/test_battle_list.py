@@ -0,0 +1,76 @@
+"""
+Tests for the fixed-stride battle list parser
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import time
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.battle_list import BattleListParser, BattleListGeometry
+
+PANEL = (64, 64, 64)
+
+
+def draw_battle_list(entries, offset=0, height=400, width=170, geometry=BattleListGeometry()):
+    """Render rows of (hp percent, selected) the way the client draws them."""
+    image = np.full((height, width, 3), PANEL, np.uint8)
+    g = geometry
+    for i, (hp, selected) in enumerate(entries):
+        top = offset + i * g.row_height
+        # Outfit icon and name text (noise the parser must ignore)
+        image[top + 1:top + g.icon_size, g.icon_x:g.icon_x + g.icon_size] = (30, 120, 200)
+        image[top + 3:top + 12, g.bar_x:g.bar_x + 70] = (200, 200, 200)
+        if selected:
+            image[top, g.icon_x:g.icon_x + g.icon_size] = (0, 0, 255)
+        # HP bar: black border and background, colored fill
+        image[g.bar_y - 1 + top:g.bar_y + 3 + top, g.bar_x - 1:g.bar_x + g.bar_width + 1] = 0
+        fill = int(round(g.bar_width * hp / 100.0))
+        color = (0, 192, 0) if hp > 60 else ((0, 192, 192) if hp > 30 else (0, 0, 192))
+        image[g.bar_y + top:g.bar_y + 2 + top, g.bar_x:g.bar_x + fill] = color
+    return image
+
+
+class TestBattleListParser(unittest.TestCase):
+    """Test cases for BattleListParser"""
+
+    def test_parses_rows_exactly(self):
+        entries = [(100, False), (75, True), (50, False), (5, False)]
+        rows = BattleListParser().parse(draw_battle_list(entries))
+        self.assertEqual(rows["row"].tolist(), [0, 1, 2, 3])
+        self.assertEqual(rows["hp"].tolist(), [100, 75, 50, 5])
+        self.assertEqual(rows["selected"].tolist(), [False, True, False, False])
+        self.assertEqual(rows["y"].tolist(), [11, 33, 55, 77])
+
+    def test_empty_list(self):
+        parser = BattleListParser()
+        self.assertEqual(len(parser.parse(draw_battle_list([]))), 0)
+        self.assertIsNone(parser.offset)
+
+    def test_row_offset_is_calibrated(self):
+        parser = BattleListParser()
+        rows = parser.parse(draw_battle_list([(80, False), (20, False)], offset=7))
+        self.assertEqual(parser.offset, 7)
+        self.assertEqual(rows["hp"].tolist(), [80, 20])
+        self.assertEqual(rows["y"].tolist(), [18, 40])
+
+    def test_full_list_parses_under_a_millisecond(self):
+        parser = BattleListParser()
+        image = draw_battle_list([(90, False)] * 18)
+        parser.parse(image)
+        start = time.perf_counter()
+        for _ in range(100):
+            rows = parser.parse(image)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0 / 100
+        self.assertEqual(len(rows), 18)
+        self.assertLess(elapsed_ms, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the learned index of blocked moves
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.blocked_edges import BlockedEdgeIndex
+from navigation.minimap_atlas import MinimapAtlas, PALETTE
+from navigation.path_planner import PathPlanner
+from navigation.walkability import WalkabilityGrid
+
+ROAD, WALL = 0x81, 0xBA
+X, Y = 32000, 32000
+
+
+class TestBlockedEdgeIndex(unittest.TestCase):
+    """Test cases for BlockedEdgeIndex"""
+
+    def test_confidence_grows_and_decays(self):
+        index = BlockedEdgeIndex(half_life=10.0)
+        t = time.time()
+        tile = (X, Y, 7)
+        self.assertFalse(index.is_blocked(tile, 'D', now=t))
+        index.record_failure(tile, 'd', now=t)
+        self.assertTrue(index.is_blocked(tile, 'D', now=t))
+        self.assertEqual(index.blocked_directions(tile, now=t + 1.0), ['D'])
+        # A creature: one failure is forgotten within seconds
+        self.assertFalse(index.is_blocked(tile, 'D', now=t + 10.0))
+
+        # A wall: repeated failures last much longer
+        wall = (X + 5, Y, 7)
+        for attempt in range(6):
+            index.record_failure(wall, 'W', now=t + attempt)
+        self.assertGreater(index.confidence(wall, 'W', now=t + 5.0), 0.99)
+        self.assertTrue(index.is_blocked(wall, 'W', now=t + 200.0))
+        self.assertFalse(index.is_blocked(wall, 'A', now=t + 5.0))
+
+    def test_success_clears_edges_into_the_tile(self):
+        index = BlockedEdgeIndex()
+        t = time.time()
+        index.record_failure((X, Y, 7), 'D', now=t)
+        index.record_failure((X + 2, Y, 7), 'A', now=t)
+        index.record_failure((X, Y, 7), 'S', now=t)
+        revision = index.revision
+        # Someone walked onto (X + 1, Y) from above: it is free now
+        index.record_success((X + 1, Y - 1, 7), 'S')
+        self.assertFalse(index.is_blocked((X, Y, 7), 'D', now=t))
+        self.assertFalse(index.is_blocked((X + 2, Y, 7), 'A', now=t))
+        self.assertTrue(index.is_blocked((X, Y, 7), 'S', now=t))
+        self.assertNotEqual(index.revision, revision)
+
+    def test_revisions_are_kept_per_region(self):
+        index = BlockedEdgeIndex(half_life=10.0, region_size=32)
+        t = time.time()
+        near = index.revisions(7, X, Y, 64, 64)
+        index.record_failure((X + 100, Y, 7), 'D', now=t)
+        index.record_failure((X + 5, Y + 5, 6), 'D', now=t)
+        # Other floor and other regions: the rectangle did not change
+        self.assertEqual(index.revisions(7, X, Y, 64, 64), near)
+        index.record_failure((X + 5, Y + 5, 7), 'D', now=t)
+        changed = index.revisions(7, X, Y, 64, 64)
+        self.assertNotEqual(changed, near)
+        # A failure that does not change the blocked set is no change either
+        index.record_failure((X + 5, Y + 5, 7), 'D', now=t + 1.0)
+        self.assertEqual(index.revisions(7, X, Y, 64, 64), changed)
+
+    def test_planner_avoids_blocked_tiles(self):
+        temp_dir = tempfile.mkdtemp()
+        atlas = MinimapAtlas(temp_dir)
+        try:
+            tiles = np.full((5, 10), WALL)
+            tiles[1:4, 1:9] = ROAD
+            atlas.import_image(7, PALETTE[tiles.astype(np.uint8)], origin=(X, Y))
+            index = BlockedEdgeIndex(half_life=3600.0)
+            planner = PathPlanner(WalkabilityGrid(atlas), unknown_cost=0, field_threshold=1,
+                                  blocked_edges=index)
+            start, goal = (X + 1, Y + 2, 7), (X + 8, Y + 2, 7)
+            self.assertIn((X + 4, Y + 2, 7), planner.plan(start, goal))
+
+            # The straight line keeps failing at (X + 4, Y + 2): the cached field is rebuilt around it
+            index.record_failure((X + 3, Y + 2, 7), 'D')
+            route = planner.plan(start, goal)
+            self.assertNotIn((X + 4, Y + 2, 7), route)
+            self.assertEqual(len(route) - 1, 9)
+
+            # A move failing far outside the cached field's area keeps the field
+            built = planner.stats['fields_built']
+            index.record_failure((X + 1000, Y, 7), 'D')
+            index.record_failure((X + 3, Y + 2, 6), 'D')
+            planner.plan(start, goal)
+            self.assertEqual(planner.stats['fields_built'], built)
+        finally:
+            atlas.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests for the container slot parser and item dictionary
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.container_parser import ContainerParser, ItemDictionary, SlotGrid, EMPTY
+
+BACKGROUND = (50, 50, 50)
+
+
+def make_sprite(seed, size=32):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+
+
+def draw_container(slots, columns=4, origin=(6, 9), size=(155, 85), grid=SlotGrid()):
+    """Container window: flat background with the sprites on the slot grid."""
+    width, height = size
+    image = np.full((height, width, 3), BACKGROUND, np.uint8)
+    for i, sprite in enumerate(slots):
+        left = origin[0] + (i % columns) * grid.pitch
+        top = origin[1] + (i // columns) * grid.pitch
+        image[top:top + grid.slot_size, left:left + grid.slot_size] = sprite
+    return image
+
+
+class TestContainerParser(unittest.TestCase):
+    """Test cases for ContainerParser and ItemDictionary"""
+
+    def setUp(self):
+        self.gold = make_sprite(1)
+        self.potion = make_sprite(2)
+        self.empty = np.full((32, 32, 3), 25, np.uint8)
+        self.dictionary = ItemDictionary()
+        self.dictionary.add("gold_coin", self.gold)
+        self.dictionary.add("small_health", self.potion)
+        self.dictionary.add(EMPTY, self.empty)
+
+    def test_count_corner_is_masked(self):
+        grid = SlotGrid()
+        mask = grid.count_mask()
+        self.assertFalse(mask[-grid.count_height:, -grid.count_width:].any())
+        self.assertEqual(int((~mask).sum()), grid.count_height * grid.count_width)
+
+        # A different stack count only changes the corner: same item
+        stack = self.gold.copy()
+        stack[-grid.count_height:, -grid.count_width:] = 255
+        self.assertEqual(self.dictionary.key(stack), self.dictionary.key(self.gold))
+        self.assertEqual(self.dictionary.lookup(stack), "gold_coin")
+        # Pixels outside the corner are part of the sprite
+        other = self.gold.copy()
+        other[:8, :8] = 255 - other[:8, :8]
+        self.assertNotEqual(self.dictionary.key(other), self.dictionary.key(self.gold))
+
+    def test_unknown_sprite(self):
+        self.assertEqual(self.dictionary.lookup(make_sprite(3)), "")
+        self.assertEqual(len(self.dictionary), 3)
+
+    def test_locate_grid_origin(self):
+        parser = ContainerParser(self.dictionary)
+        image = draw_container([self.gold, self.potion, self.empty, self.gold, self.potion])
+        self.assertEqual(parser.locate(image), (6, 9))
+
+    def test_parse_slots(self):
+        parser = ContainerParser(self.dictionary)
+        image = draw_container([self.gold, self.potion, self.empty, make_sprite(3),
+                                self.potion, self.empty, self.empty, self.empty])
+        items = parser.parse(image, origin=(1600, 620))
+        self.assertEqual(parser.origin, (6, 9))
+        self.assertEqual(len(items), 8)
+        self.assertEqual([item.name for item in items],
+                         ["gold_coin", "small_health", EMPTY, "", "small_health", EMPTY, EMPTY, EMPTY])
+        self.assertEqual((items[5].column, items[5].row), (1, 1))
+        self.assertEqual((items[5].x, items[5].y), (1600 + 6 + 37 + 16, 620 + 9 + 37 + 16))
+
+        # The origin is kept while slots match, and located again when none does
+        parser.parse(draw_container([self.potion, self.gold]))
+        self.assertEqual(parser.origin, (6, 9))
+        self.assertEqual(parser.parse(draw_container([self.gold], origin=(0, 0)))[0].name, "gold_coin")
+        self.assertEqual(parser.origin, (0, 0))
+
+    def test_flat_panel_is_not_cached(self):
+        parser = ContainerParser(self.dictionary)
+        # Closed container: a flat panel has no grid to locate
+        self.assertEqual(parser.parse(draw_container([])), [])
+        self.assertIsNone(parser.origin)
+        items = parser.parse(draw_container([self.gold, self.potion, self.empty, self.potion], origin=(5, 7)))
+        self.assertEqual(parser.origin, (5, 7))
+        self.assertEqual([item.name for item in items[:4]], ["gold_coin", "small_health", EMPTY, "small_health"])
+        # The container closes: the origin is dropped with it
+        self.assertEqual(parser.parse(draw_container([])), [])
+        self.assertIsNone(parser.origin)
+
+
+if __name__ == '__main__':
+    unittest.main()
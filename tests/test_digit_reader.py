@@ -0,0 +1,81 @@
+"""
+Tests for the stack count digit reader and the supply monitor
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.frame import Frame
+from detection.digit_reader import DigitReader
+from detection.name_recognizer import GlyphBank
+from core.state_machine import StateMachine
+from features.supply_monitor import SupplyMonitor
+
+
+def make_digits():
+    """Distinct 9x4 digit bitmaps."""
+    rng = np.random.default_rng(3)
+    digits = {}
+    for d in "0123456789":
+        glyph = rng.random((9, 4)) > 0.5
+        glyph[:, 0] = glyph[:, -1] = True  # Keep the full width after trimming
+        digits[d] = glyph
+    return digits
+
+
+def make_slot(digits, text, item_color=(30, 90, 160)):
+    slot = np.full((32, 32, 3), item_color, np.uint8)
+    x = 31 - (len(text) * 5 - 1)
+    for d in text:
+        slot[23:32, x:x + 4][digits[d]] = 223
+        x += 5
+    return slot
+
+
+class TestDigitReader(unittest.TestCase):
+    """Test cases for DigitReader"""
+
+    def setUp(self):
+        self.digits = make_digits()
+        self.reader = DigitReader(GlyphBank(self.digits, space_width=3))
+
+    def test_reads_counts(self):
+        self.assertEqual(self.reader.read(make_slot(self.digits, "7")), 7)
+        self.assertEqual(self.reader.read(make_slot(self.digits, "100")), 100)
+        self.assertEqual(self.reader.read(make_slot(self.digits, "")), 0)
+
+    def test_unchanged_slot_is_cached(self):
+        slot = make_slot(self.digits, "42")
+        self.assertEqual(self.reader.read(slot), 42)
+        self.assertEqual(self.reader.read(slot.copy()), 42)
+        stats = self.reader.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_unknown_glyph_is_unreadable(self):
+        slot = make_slot(self.digits, "5")
+        slot[23:32, 10:16] = 223
+        self.assertIsNone(self.reader.read(slot))
+
+    def test_supply_monitor_publishes_counts(self):
+        screen = np.zeros((200, 300, 3), np.uint8)
+        screen[100:132, 10:42] = make_slot(self.digits, "12")
+        screen[100:132, 50:82] = make_slot(self.digits, "3")
+        state_machine = StateMachine()
+        monitor = SupplyMonitor(capture_fn=lambda: screen, state_machine=state_machine,
+                                digit_reader=self.reader, config_file="does_not_exist.json")
+        monitor.set_slot("health_potions", 10, 100, minimum=5)
+        monitor.set_slot("food_count", 50, 100, minimum=5)
+        self.assertEqual(monitor.update(Frame(screen)), {"health_potions": 12, "food_count": 3})
+        self.assertEqual(state_machine.get_state_data('low_supplies'), ["food_count"])
+        self.assertTrue(state_machine.get_state_data('needs_resupply'))
+
+
+if __name__ == '__main__':
+    unittest.main()
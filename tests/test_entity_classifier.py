@@ -0,0 +1,93 @@
+"""
+Tests for the player / monster classifier
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.battle_list import BattleListGeometry
+from detection.entity_classifier import EntityClassifier, MONSTER, PLAYER, UNKNOWN
+
+PANEL = (64, 64, 64)
+GRAY_NAME = (192, 192, 192)
+GREEN_NAME = (40, 220, 40)
+OUTFIT_COLORS = [(0, 0, 200), (0, 200, 0), (200, 0, 0), (0, 200, 200)]
+
+
+def draw_row(name_color=GRAY_NAME, skull=False, outfit_colors=((30, 120, 200),), geometry=BattleListGeometry()):
+    """One battle list row: outfit icon in stripes, name text and an optional skull."""
+    g = geometry
+    image = np.full((g.row_height, 180, 3), PANEL, np.uint8)
+    icon = g.outfit_icon(image, 0)
+    stripe = max(1, icon.shape[0] // len(outfit_colors))
+    for i, color in enumerate(outfit_colors):
+        icon[i * stripe:(i + 1) * stripe] = color
+    image[g.name_y + 2:g.name_y + 9, g.bar_x:g.bar_x + 60:2] = name_color
+    if skull:
+        image[g.name_y + 2:g.name_y + 10, g.marks_x + 2:g.marks_x + 10] = (255, 255, 255)
+    return image
+
+
+class TestEntityClassifier(unittest.TestCase):
+    """Test cases for EntityClassifier"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.monsters_file = os.path.join(self.temp_dir, 'monsters.json')
+        with open(self.monsters_file, 'w', encoding='utf-8') as f:
+            json.dump({'monsters': ['Rotworm', 'Dragon Lord']}, f)
+        self.classifier = EntityClassifier(monsters_file=self.monsters_file, icons_dir=self.temp_dir)
+        self.geometry = BattleListGeometry()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def classify_row(self, name='', **row):
+        return self.classifier.classify_row(draw_row(**row), self.geometry, 0, name)
+
+    def test_monster_list_is_separate_from_priorities(self):
+        self.assertEqual(self.classifier.monster_names, {'rotworm', 'dragon lord'})
+        self.classifier.add_monster_names(['Cyclops'])
+        self.assertEqual(self.classifier.classify('cyclops'), (MONSTER, 'name'))
+        self.assertEqual(EntityClassifier(monsters_file='missing.json', icons_dir=self.temp_dir).monster_names, set())
+
+    def test_skull_means_player(self):
+        self.assertEqual(self.classify_row('Rotworm', skull=True), (PLAYER, 'mark'))
+        self.assertEqual(self.classify_row('Rotworm'), (MONSTER, 'name'))
+
+    def test_name_color(self):
+        self.assertTrue(self.classifier.is_name_colored(self.geometry.name_strip(draw_row(GREEN_NAME), 0)))
+        self.assertFalse(self.classifier.is_name_colored(self.geometry.name_strip(draw_row(GRAY_NAME), 0)))
+        self.assertEqual(self.classify_row('Knight Bob', name_color=GREEN_NAME), (PLAYER, 'name color'))
+        self.assertEqual(self.classify_row('', name_color=GREEN_NAME), (PLAYER, 'name color'))
+
+    def test_name_beats_outfit_hues(self):
+        # A colorful monster: its name decides, the hues are not consulted
+        self.assertEqual(self.classify_row('Dragon Lord', outfit_colors=OUTFIT_COLORS), (MONSTER, 'name'))
+        self.assertEqual(self.classifier.classify('Rotworm', hue_count=4), (MONSTER, 'name'))
+
+    def test_outfit_hues_break_ties(self):
+        self.assertGreaterEqual(self.classifier.outfit_hue_count(
+            self.geometry.outfit_icon(draw_row(outfit_colors=OUTFIT_COLORS), 0)), 3)
+        # No name cue: the outfit alone does not make a player
+        self.assertEqual(self.classify_row('', outfit_colors=OUTFIT_COLORS), (UNKNOWN, 'no name'))
+        self.assertEqual(self.classify_row('Dragon', outfit_colors=OUTFIT_COLORS), (UNKNOWN, 'no name'))
+        self.assertEqual(self.classify_row(''), (UNKNOWN, 'no name'))
+        # Conflicting name cues
+        self.assertEqual(self.classify_row('Rotworm', name_color=GREEN_NAME, outfit_colors=OUTFIT_COLORS),
+                         (PLAYER, 'outfit'))
+        self.assertEqual(self.classify_row('Rotworm', name_color=GREEN_NAME), (MONSTER, 'default'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for the incremental exploration frontier
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE
+from navigation.walkability import WalkabilityGrid
+from navigation.exploration import ExplorationIndex
+
+ROAD, WALL = 0x81, 0xBA
+
+
+class TestExplorationIndex(unittest.TestCase):
+    """Test cases for ExplorationIndex"""
+
+    def test_frontier_follows_visits(self):
+        index = ExplorationIndex()
+        index.visit(0, 0, 7)
+        self.assertEqual(index.frontier, {(0, 0, 7)})
+        index.visit_many([(1, 0, 7), (0, 1, 7), (1, 1, 7)])
+        self.assertEqual(len(index), 4)
+        # A tile with every neighbour visited leaves the frontier
+        index.visit_many([(x, y, 7) for x in range(-1, 3) for y in range(-1, 3)])
+        self.assertNotIn((0, 0, 7), index.frontier)
+        self.assertNotIn((1, 1, 7), index.frontier)
+        self.assertIn((2, 2, 7), index.frontier)
+        self.assertFalse(index.visit(0, 0, 7))
+
+    def test_nearest_target(self):
+        index = ExplorationIndex(bucket_size=4)
+        self.assertIsNone(index.nearest(0, 0, 7))
+        index.visit_many([(x, 0, 7) for x in range(100)])
+        self.assertEqual(index.nearest(50, 0, 7), (50, -1, 7))
+        self.assertEqual(index.nearest(200, 0, 7), (100, 0, 7))
+        self.assertIsNone(index.nearest(50, 0, 6))
+        self.assertLess(index.stats['buckets_searched'], 40)
+
+    def test_walls_are_not_unexplored(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            atlas = MinimapAtlas(temp_dir)
+            tiles = np.full((5, 12), WALL)
+            tiles[2, 1:11] = ROAD
+            atlas.import_image(7, PALETTE[tiles.astype(np.uint8)], origin=(32000, 32000))
+            index = ExplorationIndex(WalkabilityGrid(atlas))
+            index.visit_many([(32000 + x, 32002, 7) for x in range(1, 8)])
+            self.assertEqual(index.frontier, {(32007, 32002, 7)})
+            self.assertEqual(index.nearest(32001, 32002, 7), (32008, 32002, 7))
+            # The map grows: what was open turns out to be a wall
+            atlas.stitch(7, 32008, 32000, PALETTE[np.full((5, 5), WALL, np.uint8)])
+            atlas.stitch(7, 32012, 32002, PALETTE[np.full((3, 3), WALL, np.uint8)])
+            self.assertIsNone(index.nearest(32001, 32002, 7))
+            self.assertEqual(index.stats['stale'], 1)
+            atlas.close()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
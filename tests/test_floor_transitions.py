@@ -0,0 +1,98 @@
+"""
+Tests for the floor transition graph
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE
+from navigation.walkability import WalkabilityGrid
+from navigation.path_planner import PathPlanner
+from navigation.floor_transitions import TransitionGraph
+
+ROAD, STAIRS = 0x81, 0xD2
+X, Y = 32000, 32000
+
+
+def floor_changes(route):
+    return [b for a, b in zip(route, route[1:]) if a[2] != b[2]]
+
+
+class TestTransitionGraph(unittest.TestCase):
+    """Test cases for TransitionGraph"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.atlas = MinimapAtlas(self.temp_dir)
+        self.planner = PathPlanner(WalkabilityGrid(self.atlas), unknown_cost=0)
+        self.graph = TransitionGraph(self.planner)
+        ground = np.full((30, 30), ROAD)
+        ground[5, 5] = ground[25, 25] = STAIRS
+        upper = np.zeros((30, 30))
+        upper[:12, :12] = ROAD
+        upper[5, 5] = STAIRS
+        top = np.zeros((30, 30))
+        top[:12, :12] = ROAD
+        below = np.zeros((30, 30))
+        below[20:, 20:] = ROAD
+        for z, tiles in ((5, top), (6, upper), (7, ground), (8, below)):
+            self.load(tiles, z)
+
+    def tearDown(self):
+        self.atlas.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def load(self, tiles, z):
+        self.atlas.import_image(z, PALETTE[np.asarray(tiles, np.uint8)], origin=(X, Y))
+
+    def test_route_across_several_floors(self):
+        route = self.planner.plan((X + 2, Y + 2, 6), (X + 28, Y + 28, 8))
+        self.assertEqual(floor_changes(route), [(X + 5, Y + 5, 7), (X + 25, Y + 25, 8)])
+        self.assertEqual(route[-1], (X + 28, Y + 28, 8))
+        self.assertEqual(len(self.planner.to_moves(route)), len(route) - 3)
+
+        route = self.planner.plan((X + 20, Y + 20, 7), (X + 2, Y + 2, 5))
+        self.assertEqual(floor_changes(route), [(X + 5, Y + 5, 6), (X + 5, Y + 5, 5)])
+        self.assertIsNone(self.planner.plan((X + 2, Y + 2, 5), (X + 28, Y + 28, 8)))
+
+    def test_transitions_beyond_the_search_radius(self):
+        # The two stairs of floor 7 are 20 tiles apart, more than the window
+        planner = PathPlanner(WalkabilityGrid(self.atlas), unknown_cost=0)
+        TransitionGraph(planner, radius=8)
+        route = planner.plan((X + 2, Y + 2, 7), (X + 2, Y + 2, 6))
+        self.assertEqual(floor_changes(route), [(X + 5, Y + 5, 6)])
+        route = planner.plan((X + 20, Y + 20, 7), (X + 28, Y + 28, 8))
+        self.assertEqual(floor_changes(route), [(X + 25, Y + 25, 8)])
+        self.assertEqual(route[-1], (X + 28, Y + 28, 8))
+
+    def test_observed_floor_change_replaces_guesses(self):
+        self.assertEqual(len(self.graph.floor_transitions(7)), 2)
+        self.graph.observe((X + 5, Y + 6, 7), (X + 6, Y + 5, 6))
+        transitions = {t.tile: t for t in self.graph.floor_transitions(7)}
+        self.assertEqual(transitions[(X + 5, Y + 5, 7)].landing, (X + 6, Y + 5, 6))
+        self.assertTrue(transitions[(X + 5, Y + 5, 7)].observed)
+        route = self.planner.plan((X + 20, Y + 20, 7), (X + 2, Y + 2, 6))
+        self.assertEqual(floor_changes(route), [(X + 6, Y + 5, 6)])
+
+    def test_new_stairs_on_the_map_are_indexed(self):
+        self.assertIsNone(self.planner.plan((X + 2, Y + 2, 5), (X + 28, Y + 28, 8)))
+        # A hole seen on the minimap (its center is under the character marker)
+        self.atlas.stitch(5, X + 9, Y + 8, PALETTE[np.full((5, 5), STAIRS, np.uint8)])
+        self.assertEqual(len(self.graph.floor_transitions(5)), 1)
+        route = self.planner.plan((X + 2, Y + 2, 5), (X + 28, Y + 28, 8))
+        self.assertIsNotNone(route)
+        self.assertEqual(route[-1], (X + 28, Y + 28, 8))
+        self.assertGreater(self.graph.stats['edge_builds'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
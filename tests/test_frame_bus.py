@@ -0,0 +1,118 @@
+"""
+Tests for the shared FrameBus and Frame objects (including the derived-image cache)
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import threading
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.frame import Frame
+from capture.frame_bus import FrameBus
+
+
+class TestFrame(unittest.TestCase):
+    """Test cases for Frame"""
+    
+    def test_frame_is_read_only(self):
+        frame = Frame(np.zeros((10, 10, 3), dtype=np.uint8), seq=1)
+        with self.assertRaises(ValueError):
+            frame.image[0, 0, 0] = 1
+    
+    def test_crop_is_zero_copy_view(self):
+        image = np.arange(10 * 20 * 3, dtype=np.uint8).reshape(10, 20, 3)
+        frame = Frame(image)
+        crop = frame.crop(5, 2, 4, 3)
+        self.assertEqual(crop.shape, (3, 4, 3))
+        self.assertTrue(np.shares_memory(crop, frame.image))
+        self.assertIsNone(frame.crop(18, 0, 4, 3))
+    
+    def test_derived_images_are_memoized(self):
+        image = np.random.RandomState(0).randint(0, 255, (64, 96, 3)).astype(np.uint8)
+        frame = Frame(image)
+        self.assertIs(frame.hsv, frame.hsv)
+        self.assertIs(frame.gray, frame.gray)
+        self.assertEqual(frame.downscaled(2).shape, (32, 48, 3))
+        self.assertEqual(frame.downscaled(4, "gray").shape, (16, 24))
+        self.assertTrue(np.array_equal(frame.hsv, cv2.cvtColor(image, cv2.COLOR_BGR2HSV)))
+    
+    def test_roi_conversion_is_cached_or_viewed(self):
+        image = np.random.RandomState(1).randint(0, 255, (40, 40, 3)).astype(np.uint8)
+        frame = Frame(image)
+        roi_hsv = frame.crop(5, 5, 10, 10, space="hsv")
+        self.assertIs(roi_hsv, frame.crop(5, 5, 10, 10, space="hsv"))
+        self.assertTrue(np.array_equal(roi_hsv, cv2.cvtColor(image[5:15, 5:15], cv2.COLOR_BGR2HSV)))
+        
+        # Once the full conversion exists, ROIs become views into it
+        full = frame.hsv
+        self.assertTrue(np.shares_memory(frame.crop(20, 20, 5, 5, space="hsv"), full))
+    
+    def test_release_drops_cache(self):
+        frame = Frame(np.zeros((8, 8, 3), dtype=np.uint8))
+        frame.hsv
+        self.assertTrue(frame.cached_keys)
+        frame.release()
+        self.assertEqual(frame.cached_keys, [])
+        self.assertIsNotNone(frame.hsv)
+        self.assertEqual(frame.cached_keys, [])
+
+
+class TestFrameBus(unittest.TestCase):
+    """Test cases for FrameBus"""
+    
+    def test_latest_wins_and_history_depth(self):
+        bus = FrameBus(lambda: None, history=2)
+        for value in range(5):
+            bus.publish(np.full((4, 4, 3), value, dtype=np.uint8))
+        self.assertEqual(bus.latest().seq, 5)
+        self.assertEqual([f.seq for f in bus.history()], [4, 5])
+    
+    def test_evicted_frames_release_cache(self):
+        bus = FrameBus(lambda: None, history=1)
+        first = bus.publish(np.zeros((4, 4, 3), dtype=np.uint8))
+        first.gray
+        bus.publish(np.zeros((4, 4, 3), dtype=np.uint8))
+        self.assertEqual(first.cached_keys, [])
+    
+    def test_wait_for_frame_skips_to_newest(self):
+        bus = FrameBus(lambda: None)
+        bus.publish(np.zeros((2, 2, 3), dtype=np.uint8))
+        bus.publish(np.zeros((2, 2, 3), dtype=np.uint8))
+        self.assertEqual(bus.wait_for_frame(0, timeout=0.1).seq, 2)
+        self.assertIsNone(bus.wait_for_frame(2, timeout=0.05))
+        
+        timer = threading.Timer(0.05, bus.publish, args=(np.zeros((2, 2, 3), dtype=np.uint8),))
+        timer.start()
+        self.assertEqual(bus.wait_for_frame(2, timeout=1.0).seq, 3)
+        timer.join()
+    
+    def test_capture_thread_calls_capture_once_per_tick(self):
+        calls = []
+        
+        def capture():
+            calls.append(1)
+            return np.zeros((8, 8, 3), dtype=np.uint8)
+        
+        bus = FrameBus(capture, interval=0.01)
+        bus.start()
+        try:
+            self.assertIsNotNone(bus.wait_for_frame(0, timeout=1.0))
+        finally:
+            bus.stop()
+        captures = len(calls)
+        # Any number of consumers read the same frame without capturing
+        frames = [bus.latest() for _ in range(10)]
+        self.assertTrue(all(f is frames[0] for f in frames))
+        self.assertEqual(len(calls), captures)
+        self.assertEqual(bus.get_stats()["frames_published"], captures)
+
+
+if __name__ == "__main__":
+    unittest.main()
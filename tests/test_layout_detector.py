@@ -0,0 +1,105 @@
+"""
+Tests for the one-shot UI layout detector
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.layout_detector import LayoutDetector, UILayout, average_hash
+
+
+def make_screen(viewport=(300, 40, 1200, 880), size=(1920, 1080), seed=0, chrome=True):
+    """Synthetic client: dark chrome, noisy viewport, minimap and bars on the right."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 40, np.uint8)
+    if chrome:
+        # Faint static pattern, like the client's stone border texture
+        yy, xx = np.mgrid[:height, :width]
+        image += (8 + 8 * np.sin(xx / 4.0) * np.sin(yy / 5.0)).round().astype(np.uint8)[:, :, None]
+    vx, vy, vw, vh = viewport
+    image[vy:vy + vh, vx:vx + vw] = rng.integers(0, 255, (vh, vw, 3), dtype=np.uint8)
+    image[30:140, width - 300:width - 190] = (30, 160, 60)
+    image[160:170, width - 320:width - 120] = (0, 0, 220)
+    image[180:190, width - 320:width - 120] = (220, 40, 0)
+    return image
+
+
+class TestLayoutDetector(unittest.TestCase):
+    """Test cases for LayoutDetector"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.detector = LayoutDetector(os.path.join(self.tmp.name, "ui_layout.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_detects_regions(self):
+        layout = self.detector.detect(make_screen())
+        self.assertEqual(layout.viewport, (300, 40, 1200, 880))
+        self.assertEqual(layout.minimap, (1620, 30, 110, 110))
+        self.assertEqual(layout.health_bar, (1600, 160, 200, 10))
+        self.assertEqual(layout.mana_bar, (1600, 180, 200, 10))
+        self.assertIsNotNone(layout.battle_list)
+        self.assertAlmostEqual(layout.tile_size, 80.0)
+
+    def test_container_panel_below_battle_list(self):
+        image = make_screen()
+        image[500, 1500:] = 200  # Separator between the battle list and the container panel
+        layout = self.detector.detect(image)
+        self.assertEqual(layout.battle_list, (1504, 194, 412, 305))
+        self.assertEqual(layout.container, (1504, 503, 412, 577))
+
+        class Recorder:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs.get("owner")))
+
+        registry, auto_loot = Recorder(), Recorder()
+        LayoutDetector.apply(layout, roi_registry=registry, auto_loot=auto_loot)
+        self.assertIn("battle_list", [args[0] for _, args, _ in registry.calls])
+        self.assertEqual(auto_loot.calls, [("set_container_area", layout.container, None)])
+
+    def test_stored_layout_is_reused_when_fingerprint_matches(self):
+        first = self.detector.load_or_detect(make_screen())
+        self.assertTrue(first.fingerprint.ui_hashes)
+        self.assertNotIn(None, first.fingerprint.ui_hashes.values())
+        # Game content changes between runs, the chrome does not
+        self.assertTrue(self.detector.validate(first, make_screen(seed=1)))
+        second = self.detector.load_or_detect(make_screen(seed=1))
+        self.assertEqual(first, second)
+        self.assertEqual(UILayout.from_dict(first.to_dict()), first)
+
+    def test_flat_chrome_forces_redetection(self):
+        self.assertIsNone(average_hash(np.full((16, 16, 3), 40, np.uint8)))
+        layout = self.detector.detect(make_screen(chrome=False))
+        self.assertEqual(set(layout.fingerprint.ui_hashes.values()), {None})
+        self.assertFalse(self.detector.validate(layout, make_screen(chrome=False)))
+        # A flat screen (e.g. loading) does not validate a textured layout either
+        textured = self.detector.detect(make_screen())
+        blank = np.full((1080, 1920, 3), 44, np.uint8)
+        self.assertFalse(self.detector.validate(textured, blank))
+        self.assertFalse(self.detector.validate(UILayout.from_dict(layout.to_dict()), make_screen(chrome=False)))
+
+    def test_layout_change_triggers_redetection(self):
+        self.detector.load_or_detect(make_screen())
+        stored = self.detector.load()
+        moved = make_screen(viewport=(250, 13, 1155, 847))
+        self.assertFalse(self.detector.validate(stored, moved))
+        self.assertEqual(self.detector.load_or_detect(moved).viewport[:2], (250, 13))
+        self.assertFalse(self.detector.validate(stored, make_screen(size=(2560, 1440))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the append-only map journal
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.map_journal import MapJournal, RECORD_SIZE
+from navigation.visited_grid import VisitedGrid
+
+
+class TestMapJournal(unittest.TestCase):
+    """Test cases for MapJournal"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def files(self):
+        return sorted(os.listdir(self.temp_dir))
+
+    def test_flush_appends_only_new_tiles(self):
+        journal = MapJournal(self.temp_dir, durable=False)
+        journal.open()
+        journal.update([(32000 + i, 32000, 7) for i in range(100)])
+        self.assertEqual(journal.flush(), 100)
+        journal.add((32000, 32000, 7))  # Already visited
+        journal.add((32000, 32001, 7))
+        self.assertEqual(journal.flush(), 1)
+        size = os.path.getsize(os.path.join(self.temp_dir, 'journal-000000.log'))
+        self.assertEqual(size, 8 + 101 * RECORD_SIZE)
+        journal.close()
+
+        # Recovery replays the journal
+        recovered = MapJournal(self.temp_dir).open()
+        self.assertEqual(len(recovered), 101)
+        self.assertIn((32099, 32000, 7), recovered)
+
+    def test_compaction_and_torn_tail(self):
+        journal = MapJournal(self.temp_dir, compact_threshold=50, durable=False)
+        journal.open()
+        journal.update([(x, 5, 6) for x in range(60)])
+        journal.flush()  # Over the threshold: folded into a snapshot in the background
+        journal.close()  # Waits for the compaction
+        self.assertEqual(journal.stats['compactions'], 1)
+        journal.update([(x, 6, 6) for x in range(10)])
+        journal.flush()
+        journal.close()
+        self.assertEqual(self.files(), ['journal-000001.log', 'snapshot-000001.visited'])
+
+        # A crash in the middle of a record
+        with open(os.path.join(self.temp_dir, 'journal-000001.log'), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        reopened = MapJournal(self.temp_dir, durable=False)
+        visited = reopened.open()
+        self.assertEqual(len(visited), 70)
+        self.assertEqual(reopened.stats['replayed'], 10)  # Only the tail
+        reopened.add((100, 100, 6))
+        reopened.close()
+        self.assertEqual(len(MapJournal(self.temp_dir).open()), 71)
+
+    def test_replace(self):
+        journal = MapJournal(self.temp_dir, durable=False)
+        journal.open()
+        journal.update([(1, 1, 7), (2, 2, 7)])
+        journal.flush()
+        journal.replace(VisitedGrid([(5, 5, 7)]))
+        journal.add((6, 6, 7))
+        journal.close()
+        self.assertEqual(set(MapJournal(self.temp_dir).open()), {(5, 5, 7), (6, 6, 7)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for merging shared map files
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.map_merge import _scan_json, find_map_files, merge_map_files, read_map_file
+from navigation.visited_grid import VisitedGrid
+
+
+class TestMapMerge(unittest.TestCase):
+    """Test cases for the map merge"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_json(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def test_scan_survives_block_boundaries(self):
+        positions = [[32000 + i, 31000 - i, 7] for i in range(300)]
+        path = self.write_json('map.json', {
+            'timestamp': 'x', 'position_history': [[1, 2], [3, 4]], 'current_position': [9, 9, 9],
+            'notes': [{'a': 1}], 'visited_coordinates': positions})
+        for block_size in (7, 64, 1 << 20):
+            found = list(_scan_json(path, block_size))
+            self.assertEqual([v for k, v in found if k == 'position_history'], [(1, 2), (3, 4)])
+            self.assertEqual([list(v) for k, v in found if k == 'visited_coordinates'], positions)
+
+    def test_read_every_format(self):
+        grid = VisitedGrid([(10, 10, 6), (11, 10, 6)])
+        grid.save(os.path.join(self.temp_dir, 'shared.visited'))
+        shared = self.write_json('shared.json', {'nopalbot_coordinates': {'visited_file': 'shared.visited'}})
+        legacy = self.write_json('old.json', {'visited_positions': [[1, 1], [2, 2]],
+                                              'position_history': [[2, 2]]})
+
+        self.assertEqual(set(read_map_file(shared)), {(10, 10, 6), (11, 10, 6)})
+        history = []
+        self.assertEqual(set(read_map_file(legacy, default_floor=8, history=history)), {(1, 1, 8), (2, 2, 8)})
+        self.assertEqual(history, [(2, 2)])
+        with self.assertRaises(ValueError):
+            read_map_file(self.write_json('empty.json', {'timestamp': 'x'}))
+        # The bot's own save: history first, tiles in the grid file next to it
+        saved = self.write_json('map_data.json', {'position_history': [[5, 5, 7], [6, 5, 7]],
+                                                  'total_positions': 2, 'visited_file': 'shared.visited'})
+        history = []
+        self.assertEqual(set(read_map_file(saved, history=history)), {(10, 10, 6), (11, 10, 6)})
+        self.assertEqual(history, [(5, 5, 7), (6, 5, 7)])
+        # A position history alone is not a map
+        history = []
+        with self.assertRaises(ValueError):
+            read_map_file(self.write_json('meta.json', {'position_history': [[5, 5]]}), history=history)
+
+    def test_merge_deduplicates(self):
+        for i in range(4):
+            self.write_json(f'map_{i}.json', {'positions': [[x, 0, 7] for x in range(i * 50, i * 50 + 100)]})
+        VisitedGrid([(x, 1, 7) for x in range(10)]).save(os.path.join(self.temp_dir, 'extra.visited'))
+        self.write_json('broken.json', {'timestamp': 'nothing here'})
+        paths = find_map_files([self.temp_dir])
+        self.assertEqual(len(paths), 6)
+
+        serial, report = merge_map_files(paths, processes=1)
+        self.assertEqual(len(serial), 260)
+        self.assertEqual(report.tiles_read, 410)
+        self.assertEqual(report.failed, [os.path.join(self.temp_dir, 'broken.json')])
+
+        pooled, report = merge_map_files(paths, processes=2, parallel_threshold=2)
+        self.assertEqual(set(pooled), set(serial))
+        self.assertEqual(report.duplicates, 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
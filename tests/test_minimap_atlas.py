@@ -0,0 +1,79 @@
+"""
+Tests for the chunked, memory-mapped minimap atlas
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE, CHUNK_SIZE, color_indices
+
+
+class TestMinimapAtlas(unittest.TestCase):
+    """Test cases for MinimapAtlas"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.minimap = PALETTE[np.random.default_rng(1).integers(1, 216, (109, 106))]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_palette_round_trip(self):
+        indices = np.arange(216, dtype=np.uint8).reshape(12, 18)
+        np.testing.assert_array_equal(color_indices(PALETTE[indices]), indices)
+
+    def test_stitch_allocates_only_touched_chunks(self):
+        atlas = MinimapAtlas(self.temp_dir)
+        x, y = 32000 + CHUNK_SIZE // 2, 32000 + CHUNK_SIZE // 2
+        self.assertEqual(atlas.stitch(7, x, y, self.minimap), 1)
+        self.assertEqual(atlas.stitch(7, x, y, self.minimap), 0)  # Nothing new
+        self.assertEqual(atlas.floor_numbers(), [7])
+        self.assertEqual(len(atlas.floors[7]), 1)
+        # Stitching near a chunk corner touches the four chunks around it
+        corner = (x // CHUNK_SIZE + 1) * CHUNK_SIZE
+        self.assertEqual(atlas.stitch(6, corner, corner, self.minimap), 4)
+        atlas.close()
+
+    def test_reopen_reads_index_then_chunks_lazily(self):
+        atlas = MinimapAtlas(self.temp_dir)
+        atlas.stitch(7, 32100, 32100, self.minimap)
+        atlas.stitch(8, 33000, 32500, self.minimap)
+        expected = atlas.colors(7, 32047, 32046, 106, 109)
+        atlas.close()
+
+        reopened = MinimapAtlas(self.temp_dir)
+        self.assertEqual(reopened.floor_numbers(), [7, 8])
+        self.assertEqual(len(reopened.floors[7]._chunks), 0)
+        np.testing.assert_array_equal(reopened.colors(7, 32047, 32046, 106, 109), expected)
+        self.assertEqual(len(reopened.floors[7]._chunks), 1)
+        self.assertEqual(len(reopened.floors[8]._chunks), 0)
+        # The character marker is not stored
+        self.assertEqual(reopened.colors(7, 32100, 32100, 1, 1)[0, 0], 0)
+        self.assertEqual(reopened.patch(5, 32100, 32100, 4, 4), None)
+        reopened.close()
+
+    def test_torn_index_record_is_ignored(self):
+        atlas = MinimapAtlas(self.temp_dir)
+        atlas.stitch(7, 32100, 32100, self.minimap)
+        atlas.close()
+        with open(atlas.floors[7].index_path, "ab") as f:
+            f.write(b"\x01\x02\x03\x04\x05")  # Crash mid-record
+
+        reopened = MinimapAtlas(self.temp_dir)
+        self.assertEqual(len(reopened.floors[7]), 1)
+        self.assertEqual(reopened.stitch(7, 34176, 34176, self.minimap), 1)
+        reopened.close()
+        self.assertEqual(len(MinimapAtlas(self.temp_dir).floors[7]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for minimap registration against the map atlas
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE, DEFAULT_ORIGIN
+from navigation.minimap_tracker import MinimapTracker
+
+
+class TestMinimapTracker(unittest.TestCase):
+    """Test cases for MinimapTracker"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        blocks = rng.integers(1, 216, (64, 80))
+        blocks = cv2.resize(blocks.astype(np.uint8), (640, 512), interpolation=cv2.INTER_NEAREST)
+        blocks[rng.random(blocks.shape) < 0.05] = 215
+        self.floors = {7: PALETTE[blocks], 6: PALETTE[215 - blocks]}
+        self.atlas = MinimapAtlas(self.temp_dir)
+        for z, image in self.floors.items():
+            self.atlas.add_floor(z, image)
+        self.tracker = MinimapTracker(self.atlas, record=False)
+        self.x, self.y = DEFAULT_ORIGIN[0] + 300, DEFAULT_ORIGIN[1] + 250
+
+    def tearDown(self):
+        self.atlas.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def minimap(self, x, y, z=7, width=106, height=109):
+        px, py = x - DEFAULT_ORIGIN[0], y - DEFAULT_ORIGIN[1]
+        image = self.floors[z][py - height // 2:py - height // 2 + height,
+                               px - width // 2:px - width // 2 + width].copy()
+        image[height // 2 - 1:height // 2 + 2, width // 2 - 1:width // 2 + 2] = 255  # Character cross
+        image[:12] = 0  # Unexplored tiles
+        return image
+
+    def test_first_fix_searches_the_floor(self):
+        fix = self.tracker.locate(self.minimap(self.x, self.y))
+        self.assertEqual(fix.position, (self.x, self.y, 7))
+        self.assertEqual(fix.method, "global")
+
+    def test_walking_is_tracked_locally(self):
+        self.tracker.set_position(self.x, self.y, 7)
+        x, y = self.x, self.y
+        for dx, dy in [(1, 0), (1, 1), (0, -3), (-6, 2), (0, 0)]:
+            x, y = x + dx, y + dy
+            fix = self.tracker.locate(self.minimap(x, y))
+            self.assertEqual(fix.position, (x, y, 7))
+            self.assertEqual(fix.method, "local")
+
+    def test_long_jump_and_floor_change(self):
+        self.tracker.set_position(self.x, self.y, 7)
+        fix = self.tracker.locate(self.minimap(self.x + 25, self.y - 25))
+        self.assertEqual(fix.position, (self.x + 25, self.y - 25, 7))
+        fix = self.tracker.locate(self.minimap(self.x + 25, self.y - 25, z=6))
+        self.assertEqual(fix.position, (self.x + 25, self.y - 25, 6))
+        self.assertEqual(fix.method, "floor")
+
+    def test_update_crops_the_minimap_region(self):
+        screen = np.zeros((600, 800, 3), np.uint8)
+        screen[20:129, 680:786] = self.minimap(self.x, self.y)
+        self.tracker.set_minimap_region(680, 20, 106, 109)
+        self.tracker.set_position(self.x - 2, self.y, 7)
+        self.assertEqual(self.tracker.update(screen).position, (self.x, self.y, 7))
+        self.assertTrue(screen.flags.writeable)
+
+
+    def test_recording_from_scratch(self):
+        atlas = MinimapAtlas(os.path.join(self.temp_dir, "empty"))
+        tracker = MinimapTracker(atlas)
+        tracker.set_position(self.x, self.y, 7)
+        self.assertEqual(tracker.locate(self.minimap(self.x, self.y)), None)
+
+        screen = np.zeros((600, 800, 3), np.uint8)
+        tracker.set_minimap_region(680, 20, 106, 109)
+        x = self.x
+        for step in range(4):
+            screen[20:129, 680:786] = self.minimap(x, self.y)
+            fix = tracker.update(screen.copy())
+            self.assertEqual(fix.position, (x, self.y, 7))
+            self.assertEqual(fix.method, "seed" if step == 0 else "local")
+            x += 2
+        self.assertTrue(atlas.patch(7, self.x - 20, self.y - 20, 40, 40).all())
+        atlas.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for battle list name recognition and target priorities
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.name_recognizer import GlyphBank, NameRecognizer, TargetPriorities
+
+LINE_HEIGHT = 7
+
+
+def make_glyphs(chars, seed=0):
+    """Distinct random glyph masks (every column drawn, so none gets trimmed)."""
+    rng = np.random.default_rng(seed)
+    glyphs = {}
+    for i, char in enumerate(chars):
+        mask = rng.random((LINE_HEIGHT, 3 + i % 3)) > 0.5
+        mask[LINE_HEIGHT // 2] = True
+        glyphs[char] = mask
+    return glyphs
+
+
+def draw_text(glyphs, text, space=4, width=120):
+    """Text line mask: one empty column between letters, ``space`` columns between words."""
+    mask = np.zeros((LINE_HEIGHT, width), bool)
+    x = 2
+    for char in text:
+        if char == " ":
+            x += space - 1
+            continue
+        glyph = glyphs[char]
+        mask[:, x:x + glyph.shape[1]] = glyph
+        x += glyph.shape[1] + 1
+    return mask
+
+
+def to_strip(mask):
+    """BGR name strip with white text on the dark panel."""
+    strip = np.full(mask.shape + (3,), 40, np.uint8)
+    strip[mask] = 230
+    return strip
+
+
+class TestGlyphBank(unittest.TestCase):
+    """Test cases for GlyphBank"""
+
+    def setUp(self):
+        self.glyphs = make_glyphs("RDadgorntwm")
+        # 'D' is drawn but not known
+        self.bank = GlyphBank({char: mask for char, mask in self.glyphs.items() if char != "D"})
+
+    def test_reads_words(self):
+        self.assertEqual(self.bank.read(draw_text(self.glyphs, "Rotworm")), "Rotworm")
+        self.assertEqual(self.bank.read(draw_text(self.glyphs, "Dragon")), "?ragon")
+        self.assertEqual(self.bank.read(draw_text(self.glyphs, "Rat Rat")), "Rat Rat")
+
+    def test_tolerates_a_few_wrong_pixels(self):
+        mask = draw_text(self.glyphs, "rat")
+        mask[0, 2] = not mask[0, 2]
+        self.assertEqual(self.bank.read(mask), "rat")
+
+    def test_empty_bank_reads_nothing(self):
+        self.assertEqual(GlyphBank().read(draw_text(self.glyphs, "rat")), "")
+
+
+class TestNameRecognizer(unittest.TestCase):
+    """Test cases for NameRecognizer"""
+
+    def setUp(self):
+        self.glyphs = make_glyphs("RDadgorntwm")
+        self.recognizer = NameRecognizer(GlyphBank(self.glyphs), cache_size=2)
+
+    def test_cache_hits_on_identical_rows(self):
+        strip = to_strip(draw_text(self.glyphs, "Rat"))
+        self.assertEqual(self.recognizer.recognize(strip), "Rat")
+        # Brightness changes below the text threshold keep the same binarized row
+        strip[strip == 40] = 90
+        self.assertEqual(self.recognizer.recognize(strip), "Rat")
+        stats = self.recognizer.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['cached_names']), (1, 1, 1))
+
+    def test_least_recently_used_row_is_evicted(self):
+        rat, dragon, rotworm = (to_strip(draw_text(self.glyphs, text)) for text in ("Rat", "Dragon", "Rotworm"))
+        self.recognizer.recognize(rat)
+        self.recognizer.recognize(dragon)
+        self.recognizer.recognize(rat)       # rat is now the most recent
+        self.recognizer.recognize(rotworm)   # evicts dragon
+        self.assertEqual(self.recognizer.get_stats()['cached_names'], 2)
+        self.recognizer.recognize(rat)
+        self.assertEqual(self.recognizer.hits, 2)
+        self.recognizer.recognize(dragon)
+        self.assertEqual(self.recognizer.misses, 4)
+
+
+class TestTargetPriorities(unittest.TestCase):
+    """Test cases for TargetPriorities"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'target_priorities.json')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            json.dump({'default': 2, 'priorities': {'Dragon Lord': 10, 'Dragon': 8, 'Rabbit': 0}}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_ordering(self):
+        priorities = TargetPriorities(self.config_file)
+        names = ['Rabbit', 'Troll', 'dragon', 'DRAGON LORD', '']
+        ranked = sorted(names, key=priorities.priority, reverse=True)
+        self.assertEqual(ranked, ['DRAGON LORD', 'dragon', 'Troll', '', 'Rabbit'])
+        self.assertEqual(priorities.priority('Troll'), 2)
+        self.assertEqual(priorities.priority(''), 2)
+
+        priorities.set_priority('Troll', 9)
+        self.assertEqual(sorted(names, key=priorities.priority, reverse=True)[:2], ['DRAGON LORD', 'Troll'])
+
+    def test_missing_file_uses_default(self):
+        priorities = TargetPriorities(os.path.join(self.temp_dir, 'missing.json'))
+        self.assertEqual(priorities.priority('Dragon'), 1)
+        self.assertEqual(priorities.priorities, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tests for the A*/JPS path planner
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE
+from navigation.walkability import WalkabilityGrid
+from navigation.path_planner import PathPlanner
+
+ROAD, GRASS, SWAMP, WALL, STAIRS = 0x81, 0x18, 0x1E, 0xBA, 0xD2
+X, Y = 32000, 32000
+
+
+class TestPathPlanner(unittest.TestCase):
+    """Test cases for PathPlanner"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.atlas = MinimapAtlas(self.temp_dir)
+        self.grid = WalkabilityGrid(self.atlas)
+
+    def tearDown(self):
+        self.atlas.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def load(self, tiles, z=7):
+        self.atlas.import_image(z, PALETTE[np.asarray(tiles, np.uint8)], origin=(X, Y))
+
+    def route_cost(self, route):
+        for (x0, y0, z0), (x1, y1, z1) in zip(route, route[1:]):
+            if z0 == z1:
+                self.assertEqual(abs(x1 - x0) + abs(y1 - y0), 1)
+        return sum(self.grid.cost(x, y, z) for x, y, z in route[1:])
+
+    def test_route_goes_around_walls(self):
+        tiles = np.full((10, 10), ROAD)
+        tiles[2:10, 5] = WALL
+        self.load(tiles)
+        planner = PathPlanner(self.grid, unknown_cost=0)
+        route = planner.plan((X + 2, Y + 8, 7), (X + 8, Y + 8, 7))
+        self.assertEqual(route[0], (X + 2, Y + 8, 7))
+        self.assertEqual(route[-1], (X + 8, Y + 8, 7))
+        self.assertEqual(len(route) - 1, 6 + 2 * 7)
+        self.assertNotIn((X + 5, Y + 8, 7), route)
+        self.assertEqual(planner.to_moves(route)[:7], ['W'] * 7)
+
+    def test_routes_are_optimal_on_mixed_terrain(self):
+        rng = np.random.default_rng(3)
+        picker = random.Random(1)
+        tiles = rng.choice([ROAD, GRASS, SWAMP, WALL], (40, 50), p=[0.45, 0.2, 0.1, 0.25])
+        self.load(tiles)
+        planner = PathPlanner(self.grid, unknown_cost=0, field_threshold=3)
+        free = [(X + x, Y + y, 7) for y, x in np.argwhere(tiles != WALL)]
+        goals = free[:3]
+        area = planner._area(7, X, Y, X + 50, Y + 40)
+        for _ in range(30):
+            start, goal = picker.choice(free), picker.choice(goals)
+            best = planner._dijkstra(area, area.index(goal[0], goal[1]))[area.index(start[0], start[1])]
+            route = planner.plan(start, goal)
+            if best < 0:
+                self.assertIsNone(route)
+            else:
+                self.assertEqual(self.route_cost(route), best)
+        self.assertGreater(planner.stats['field_hits'], 0)
+
+    def test_atlas_change_drops_distance_field(self):
+        self.load(np.full((20, 20), ROAD))
+        planner = PathPlanner(self.grid, field_threshold=1)
+        goal = (X + 15, Y + 15, 7)
+        self.assertEqual(len(planner.plan((X, Y, 7), goal)), 31)
+        self.assertEqual(planner.get_stats()['cached_fields'], 1)
+        self.atlas.stitch(7, X + 10, Y + 10, PALETTE[np.full((5, 5), WALL, np.uint8)])
+        self.assertEqual(planner.get_stats()['cached_fields'], 0)
+
+    def test_endpoints_outside_the_area_are_ignored(self):
+        tiles = np.full((20, 20), ROAD)
+        tiles[13, 13] = STAIRS
+        self.load(tiles)
+        planner = PathPlanner(self.grid)
+        # (X + 7, Y + 7) is two tiles before the area: it must not wrap onto the stairs
+        area = planner._area(7, X + 10, Y + 10, X + 14, Y + 14, (X + 7, Y + 7, 7), (X + 40, Y + 40, 7))
+        self.assertEqual(area.cost[area.index(X + 13, Y + 13)], 0)
+        area = planner._area(7, X + 10, Y + 10, X + 14, Y + 14, (X + 13, Y + 13, 7))
+        self.assertEqual(area.cost[area.index(X + 13, Y + 13)], 1)
+
+    def test_large_cave_is_planned_off_the_loop_thread(self):
+        # 256x256 cellular automaton cave on mixed terrain (no uniform regions for JPS to skip)
+        rng = np.random.default_rng(5)
+        rock = rng.random((256, 256)) < 0.45
+        for _ in range(4):
+            rock = cv2.blur(rock.astype(np.float32), (3, 3)) * 9 >= 5
+        tiles = rng.choice([ROAD, GRASS], (256, 256))
+        tiles[rock] = WALL
+        self.load(tiles)
+        planner = PathPlanner(self.grid, unknown_cost=0)
+        self.addCleanup(planner.close)
+
+        area = planner._area(7, X, Y, X + 255, Y + 255)
+        free = np.argwhere(tiles != WALL)
+        gy, gx = free[np.argmin(np.abs(free - 20).sum(axis=1))]
+        goal = (X + int(gx), Y + int(gy), 7)
+        distance = np.asarray(planner._dijkstra(area, area.index(goal[0], goal[1])))
+        # The farthest reachable tile: well outside the field radius around the goal
+        far = int(np.argmax(distance))
+        start = area.position(far)
+        self.assertGreater(max(abs(start[0] - goal[0]), abs(start[1] - goal[1])), planner.field_radius)
+
+        began = time.perf_counter()
+        self.assertIsNone(planner.request(start, goal))
+        self.assertLess(time.perf_counter() - began, 0.01)
+        deadline = time.time() + 30.0
+        while planner.is_pending(goal) and time.time() < deadline:
+            time.sleep(0.01)
+
+        began = time.perf_counter()
+        route = planner.request(start, goal)
+        self.assertLess(time.perf_counter() - began, 0.01)
+        self.assertEqual((route[0], route[-1]), (start, goal))
+        self.assertEqual(self.route_cost(route), distance[far])
+        # A few steps later: still read from the field
+        began = time.perf_counter()
+        self.assertEqual(planner.request(route[40], goal), route[40:])
+        self.assertLess(time.perf_counter() - began, 0.01)
+        self.assertEqual(planner.get_stats()['field_hits'], 2)
+
+    def test_route_changes_floor_on_stairs(self):
+        ground = np.full((12, 20), ROAD)
+        ground[:, 12] = WALL
+        ground[10, 8] = STAIRS
+        ground[2, 3] = STAIRS  # Leads nowhere mapped
+        self.load(ground, 7)
+        upper = np.zeros((12, 20))
+        upper[4:12, 6:18] = ROAD
+        self.load(upper, 6)
+        planner = PathPlanner(self.grid, unknown_cost=0)
+        route = planner.plan((X + 1, Y + 1, 7), (X + 15, Y + 5, 6))
+        self.assertIn((X + 8, Y + 10, 7), route)
+        index = route.index((X + 8, Y + 10, 7))
+        self.assertEqual(route[index + 1], (X + 8, Y + 10, 6))
+        self.assertEqual(route[-1], (X + 15, Y + 5, 6))
+        self.assertEqual(len(planner.to_moves(route)), len(route) - 2)
+        self.assertIsNone(planner.plan((X + 1, Y + 1, 7), (X + 15, Y + 5, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
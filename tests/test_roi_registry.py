@@ -0,0 +1,95 @@
+"""
+Tests for the ROI registry and partial (multi-rectangle) capture
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.roi_registry import Rect, RoiRegistry, merge_rects
+from capture.frame_bus import FrameBus
+
+
+class TestMergeRects(unittest.TestCase):
+    """Test cases for merge_rects"""
+    
+    def test_overlapping_rects_merge(self):
+        merged = merge_rects([Rect(0, 0, 100, 10), Rect(0, 8, 100, 10)])
+        self.assertEqual(merged, [Rect(0, 0, 100, 18)])
+    
+    def test_distant_rects_stay_separate(self):
+        rects = [Rect(2440, 535, 200, 30), Rect(320, 20, 200, 30)]
+        self.assertEqual(len(merge_rects(rects)), 2)
+    
+    def test_touching_rects_with_waste_stay_separate(self):
+        # An L-shape would waste most of its bounding box
+        merged = merge_rects([Rect(0, 0, 200, 10), Rect(0, 10, 10, 200)])
+        self.assertEqual(len(merged), 2)
+    
+    def test_contained_rect_is_absorbed(self):
+        merged = merge_rects([Rect(0, 0, 100, 100), Rect(10, 10, 5, 5)])
+        self.assertEqual(merged, [Rect(0, 0, 100, 100)])
+
+
+class TestRoiRegistry(unittest.TestCase):
+    """Test cases for RoiRegistry"""
+    
+    def test_declare_invalidates_merged_cache(self):
+        registry = RoiRegistry()
+        registry.declare("health_bar", 50, 40, 200, 10, owner="status")
+        registry.declare("mana_bar", 50, 55, 200, 10, owner="status")
+        self.assertEqual(registry.capture_rects(), [Rect(50, 40, 200, 25)])
+        version = registry.version
+        registry.declare("mana_bar", 50, 55, 200, 10, owner="status")
+        self.assertEqual(registry.version, version)
+        registry.remove("mana_bar")
+        self.assertEqual(registry.capture_rects(), [Rect(50, 40, 200, 10)])
+    
+    def test_load_screen_regions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "screen_regions.json")
+            with open(path, "w") as f:
+                json.dump({"screen_regions": {"health_bar": {"x": 1, "y": 2, "width": 3, "height": 4}}}, f)
+            registry = RoiRegistry()
+            self.assertEqual(registry.load_screen_regions(path), 1)
+            self.assertEqual(registry.get("health_bar"), Rect(1, 2, 3, 4))
+
+
+class TestPartialCapture(unittest.TestCase):
+    """Test cases for FrameBus partial capture"""
+    
+    def test_bus_grabs_only_declared_rects(self):
+        screen = np.random.RandomState(0).randint(0, 255, (1440, 2560, 3)).astype(np.uint8)
+        grabbed = []
+        
+        def grab(x, y, w, h):
+            grabbed.append((x, y, w, h))
+            return screen[y:y + h, x:x + w].copy()
+        
+        registry = RoiRegistry()
+        registry.declare("battle_list", 2300, 200, 200, 400)
+        registry.declare("health_bar", 2300, 30, 200, 10)
+        bus = FrameBus(lambda: screen.copy(), registry=registry,
+                       region_capture_fn=grab, screen_size=(2560, 1440))
+        frame = bus.capture_once()
+        
+        self.assertTrue(frame.is_partial)
+        self.assertEqual(len(grabbed), 2)
+        self.assertLess(bus.get_stats()["avg_captured_pixels"], screen.shape[0] * screen.shape[1] / 10)
+        crop = frame.crop(2310, 250, 50, 50)
+        self.assertTrue(np.array_equal(crop, screen[250:300, 2310:2360]))
+        self.assertEqual(frame.crop(2310, 250, 50, 50, space="hsv").shape, (50, 50, 3))
+        self.assertIsNone(frame.crop(0, 0, 10, 10))
+        self.assertEqual(frame.shape, (1440, 2560, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the soak harness
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root (the harness lives in scripts/) and src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from scripts.soak_harness import SoakHarness, SyntheticFrameSource, VirtualClock, WalkingMinimap
+from navigation.minimap_atlas import MinimapAtlas
+from navigation.minimap_tracker import MinimapTracker
+
+
+class LeakyWorkload:
+    """Keeps every frame it sees and sleeps like the bot loop does."""
+
+    def __init__(self):
+        self.kept = []
+        self.steps = 0
+
+    def patches(self):
+        return []
+
+    def setup(self):
+        self.setup_time = time.time()
+
+    def step(self, frame):
+        self.steps += 1
+        self.kept.append(frame.copy())
+        time.sleep(0.5)
+        if self.steps % 7 == 0:
+            raise RuntimeError("flaky step")
+
+    def extra_metrics(self):
+        return {'kept': float(len(self.kept))}
+
+
+class TestVirtualClock(unittest.TestCase):
+    """Test cases for VirtualClock"""
+
+    def test_advances_only_when_told(self):
+        clock = VirtualClock(start=100.0)
+        self.assertEqual(clock.time(), 100.0)
+        clock.sleep(2.5)
+        clock.sleep(-1.0)
+        clock.advance(0.5)
+        self.assertEqual(clock.time(), 103.0)
+        self.assertEqual(clock.elapsed, 3.0)
+
+
+class TestSoakHarness(unittest.TestCase):
+    """Test cases for SoakHarness"""
+
+    def test_synthetic_run_report(self):
+        workload = LeakyWorkload()
+        source = SyntheticFrameSource(width=64, height=48, seed=1)
+        harness = SoakHarness(workload, source, loop_interval=0.5, snapshot_interval=10.0, top_n=3)
+        wall_start = time.time()
+        report = harness.run(hours=60.0 / 3600.0)
+
+        # 60 virtual seconds of 1 s loops (0.5 s sleep + 0.5 s interval), patched clock restored
+        self.assertEqual(report.loops, 60)
+        self.assertEqual(workload.steps, 60)
+        self.assertEqual(workload.setup_time, harness.clock.start)
+        self.assertAlmostEqual(report.virtual_hours, 60.0 / 3600.0)
+        self.assertLess(time.time() - wall_start, 60.0)
+        self.assertEqual(report.errors, 60 // 7)
+        self.assertEqual(report.exceptions, {'RuntimeError: flaky step': 60 // 7})
+
+        self.assertEqual(len(report.windows), 6)
+        self.assertEqual([w.loops for w in report.windows], [10] * 6)
+        self.assertEqual(report.windows[-1].metrics, {'kept': 60.0})
+        self.assertTrue(all(w.p50_ms <= w.p95_ms <= w.max_ms for w in report.windows))
+
+        # The kept frames are the top growth, reported against the first window
+        self.assertTrue(1 <= len(report.top_growth) <= 3)
+        self.assertIn('test_soak_harness.py', report.top_growth[0].location)
+        self.assertGreater(report.top_growth[0].size_diff_kb, 0)
+        self.assertGreater(report.latency_drift_ratio, 0)
+        self.assertTrue(np.isfinite(report.latency_slope_ms_per_hour))
+
+        data = json.loads(json.dumps(report.to_dict()))
+        self.assertEqual(set(data['windows'][0]),
+                         {'virtual_hours', 'loops', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'traced_mb', 'metrics'})
+        text = report.format()
+        self.assertIn('Top allocation growth since first snapshot:', text)
+        self.assertIn('Latency drift', text)
+        self.assertIn('8x  RuntimeError: flaky step', text)
+
+
+class TestWalkingMinimap(unittest.TestCase):
+    """Test cases for WalkingMinimap"""
+
+    def test_walk_is_tracked_from_the_minimap(self):
+        region = (200, 10, 106, 109)
+        minimap = WalkingMinimap(size=256, region=region)
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        atlas = MinimapAtlas(temp_dir)
+        self.addCleanup(atlas.close)
+        atlas.add_floor(7, minimap.floor)
+        tracker = MinimapTracker(atlas, region)
+        tracker.set_position(*minimap.position)
+
+        frame = SyntheticFrameSource(width=320, height=240, seed=2).next_frame()
+        for key in 'ddwwwaxs' + 'd' * 80:
+            minimap.press(key)
+            minimap.draw(frame)
+            fix = tracker.update(frame)
+            self.assertEqual(fix.position, minimap.position)
+        # 'x' is not a walking key, and the character stops short of the floor edge
+        self.assertEqual(minimap.x, 256 - minimap.margin - 1)
+        self.assertEqual(minimap.moves, 7 + (minimap.x - 129))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the attacked-creature marker detector
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.frame import Frame
+from detection.battle_list import BattleListGeometry
+from detection.target_marker import TargetMarkerDetector, find_outline
+
+RED = (0, 0, 255)
+BATTLE_LIST = (10, 10, 170, 220)
+VIEWPORT = (200, 0, 480, 352)  # 15 tiles of 32 pixels
+
+
+def draw_screen(battle_row=None, outline=None, geometry=BattleListGeometry()):
+    """Gray screen with the red icon frame on a battle list row and/or a red outline at (x, y, side)."""
+    image = np.full((400, 700, 3), 64, np.uint8)
+    if battle_row is not None:
+        x, y = BATTLE_LIST[0] + geometry.icon_x, BATTLE_LIST[1] + battle_row * geometry.row_height
+        image[y, x:x + geometry.icon_size] = RED
+    if outline is not None:
+        x, y, side = outline
+        image[y, x:x + side] = image[y + side - 1, x:x + side] = RED
+        image[y:y + side, x] = image[y:y + side, x + side - 1] = RED
+    return image
+
+
+class TestTargetMarkerDetector(unittest.TestCase):
+    """Test cases for TargetMarkerDetector"""
+
+    def setUp(self):
+        self.detector = TargetMarkerDetector()
+        self.events = []
+        for event in TargetMarkerDetector.EVENTS:
+            self.detector.on(event, lambda state, event=event: self.events.append((event, state.battle_row)))
+        self.seq = 0
+
+    def update(self, image):
+        self.seq += 1
+        return self.detector.update(Frame(image, seq=self.seq))
+
+    def test_find_outline(self):
+        image = draw_screen(outline=(300, 100, 32))
+        self.assertEqual(find_outline(image, min_size=24, max_size=42), (300, 100, 32, 32))
+        self.assertIsNone(find_outline(draw_screen(battle_row=1), min_size=24, max_size=42))
+
+    def test_battle_list_icon_frame(self):
+        self.detector.set_battle_list(*BATTLE_LIST)
+        state = self.update(draw_screen(battle_row=2))
+        self.assertTrue(state.is_attacking)
+        self.assertEqual(state.battle_row, 2)
+        self.assertIsNone(state.marker)
+        self.assertEqual(self.update(draw_screen(battle_row=0)).battle_row, 0)
+
+    def test_viewport_outline_is_followed(self):
+        self.detector.set_viewport(*VIEWPORT)
+        state = self.update(draw_screen(outline=(300, 64, 32)))
+        self.assertEqual(state.marker, (300, 64, 32, 32))
+        self.assertEqual(self.detector.stats['viewport_scans'], 1)
+        # The creature walked half a tile: found in the window around the old outline
+        state = self.update(draw_screen(outline=(316, 64, 32)))
+        self.assertEqual(state.marker, (316, 64, 32, 32))
+        self.assertEqual(self.detector.stats['viewport_scans'], 1)
+
+    def test_viewport_not_scanned_while_battle_list_is_idle(self):
+        self.detector.set_battle_list(*BATTLE_LIST)
+        self.detector.set_viewport(*VIEWPORT)
+        self.assertFalse(self.update(draw_screen(outline=(300, 64, 32))).is_attacking)
+        self.assertEqual(self.detector.stats['viewport_scans'], 0)
+        state = self.update(draw_screen(battle_row=1, outline=(300, 64, 32)))
+        self.assertEqual((state.battle_row, state.marker), (1, (300, 64, 32, 32)))
+
+    def test_acquired_and_lost_events(self):
+        self.detector.set_battle_list(*BATTLE_LIST)
+        self.detector.set_viewport(*VIEWPORT)
+        self.update(draw_screen())
+        self.update(draw_screen(battle_row=3, outline=(400, 160, 32)))
+        self.update(draw_screen(battle_row=3, outline=(420, 160, 32)))
+        self.update(draw_screen())
+        self.assertEqual(self.events, [("target_acquired", 3), ("target_lost", None)])
+        self.assertFalse(self.detector.is_attacking)
+
+    def test_search_region_follows_the_outline(self):
+        self.detector.set_battle_list(*BATTLE_LIST)
+        self.detector.set_viewport(*VIEWPORT)
+        # Idle: the battle list icon column alone is read
+        self.update(draw_screen())
+        self.assertIsNone(self.detector.search_region())
+        # Attack seen in the battle list, no outline yet: the viewport is read once
+        self.update(draw_screen(battle_row=1))
+        self.assertEqual(self.detector.search_region(), VIEWPORT)
+        # Then only a tile around the outline
+        self.update(draw_screen(battle_row=1, outline=(300, 64, 32)))
+        self.assertEqual(self.detector.search_region(), (300 - 32, 64 - 32, 32 * 3, 32 * 3))
+        # The window is clipped to the viewport
+        self.update(draw_screen(battle_row=1, outline=(310, 10, 32)))
+        self.assertEqual(self.detector.search_region(), (310 - 32, 0, 32 * 3, 32 * 2 + 10))
+
+    def test_identical_roi_is_skipped(self):
+        self.detector.set_battle_list(*BATTLE_LIST)
+        self.detector.set_viewport(*VIEWPORT)
+        image = draw_screen(battle_row=1, outline=(300, 64, 32))
+        first = self.update(image.copy())
+        self.assertEqual(self.detector.stats['unchanged'], 0)
+        # Only pixels outside the ROIs change: the icon strip is skipped
+        image[390, 690] = 255
+        self.update(image.copy())
+        self.assertEqual(self.detector.stats['unchanged'], 1)
+        # The window around the outline was stored on the previous frame: now both are skipped
+        image[390, 680] = 255
+        second = self.update(image.copy())
+        self.assertEqual(self.detector.stats['unchanged'], 3)
+        self.assertEqual(self.detector.stats['viewport_scans'], 1)
+        self.assertEqual((second.battle_row, second.marker), (first.battle_row, first.marker))
+        self.assertEqual(self.events, [("target_acquired", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
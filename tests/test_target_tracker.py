@@ -0,0 +1,75 @@
+"""
+Tests for the multi-frame target tracker
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import unittest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.target_tracker import TargetTracker, iou
+
+ROW_HEIGHT = 22
+
+
+def rows(*entries):
+    """Battle list detections from (name, hp) tuples, top to bottom."""
+    return [{"x": 1602, "y": 200 + i * ROW_HEIGHT, "width": 154, "height": ROW_HEIGHT,
+             "name": name, "hp": hp} for i, (name, hp) in enumerate(entries)]
+
+
+class TestTargetTracker(unittest.TestCase):
+    """Test cases for TargetTracker"""
+
+    def test_iou(self):
+        self.assertEqual(iou((0, 0, 10, 10), (0, 0, 10, 10)), 1.0)
+        self.assertEqual(iou((0, 0, 10, 10), (20, 20, 10, 10)), 0.0)
+        self.assertAlmostEqual(iou((0, 0, 10, 10), (5, 0, 10, 10)), 50 / 150)
+
+    def test_ids_are_stable(self):
+        tracker = TargetTracker()
+        first = rows(("Rat", 100), ("Cave Rat", 100))
+        tracker.update(first, now=0.0)
+        second = rows(("Rat", 80), ("Cave Rat", 100))
+        tracker.update(second, now=0.5)
+        self.assertEqual([d["id"] for d in first], [d["id"] for d in second])
+        track = tracker.get(second[0]["id"])
+        self.assertEqual(track.hp, 80)
+        self.assertAlmostEqual(track.hp_trend, -40.0)
+        self.assertEqual(track.first_seen, 0.0)
+
+    def test_rows_moving_up_keep_their_ids(self):
+        tracker = TargetTracker()
+        first = rows(("Rat", 5), ("Rat", 100), ("Rat", 90))
+        tracker.update(first, now=0.0)
+        # The top rat died; the others move up one row
+        second = rows(("Rat", 100), ("Rat", 90))
+        tracker.update(second, now=0.5)
+        self.assertEqual([d["id"] for d in second], [first[1]["id"], first[2]["id"]])
+
+    def test_new_creature_gets_new_id_and_dead_ones_expire(self):
+        tracker = TargetTracker(max_missed=1)
+        first = rows(("Rat", 10))
+        tracker.update(first, now=0.0)
+        second = rows(("Dragon", 100))
+        tracker.update(second, now=0.5)
+        self.assertNotEqual(first[0]["id"], second[0]["id"])
+        tracker.update(rows(("Dragon", 100)), now=1.0)
+        self.assertIsNone(tracker.get(first[0]["id"]))
+
+    def test_unordered_greedy_matching(self):
+        tracker = TargetTracker(ordered=False)
+        boxes = [{"x": 100, "y": 100, "width": 32, "height": 32},
+                 {"x": 300, "y": 100, "width": 32, "height": 32}]
+        tracker.update(boxes, now=0.0)
+        moved = [{"x": 305, "y": 98, "width": 32, "height": 32},
+                 {"x": 96, "y": 104, "width": 32, "height": 32}]
+        tracker.update(moved, now=0.1)
+        self.assertEqual([m["id"] for m in moved], [boxes[1]["id"], boxes[0]["id"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tests for the memory-mapped template bank
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from detection.template_bank import TemplateBank, build_bank
+from detection.template_matcher import TemplateMatcher
+from detection.container_parser import ItemDictionary, EMPTY
+
+
+def make_icon(seed, size=24):
+    rng = np.random.default_rng(seed)
+    icon = rng.integers(0, 255, (size // 4, size // 4), dtype=np.uint8)
+    return cv2.resize(icon, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+class TestTemplateBank(unittest.TestCase):
+    """Test cases for TemplateBank"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        status_dir = os.path.join(self.root, "status")
+        loot_dir = os.path.join(self.root, "loot")
+        os.makedirs(status_dir)
+        os.makedirs(loot_dir)
+
+        cv2.imwrite(os.path.join(status_dir, "poisoned.png"), make_icon(1))
+        masked = cv2.cvtColor(make_icon(2), cv2.COLOR_GRAY2BGRA)
+        masked[:4, :, 3] = 0
+        cv2.imwrite(os.path.join(status_dir, "haste.png"), masked)
+
+        rng = np.random.default_rng(3)
+        self.coin = rng.integers(0, 255, (32, 32, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(loot_dir, "gold_coin.png"), self.coin)
+        cv2.imwrite(os.path.join(loot_dir, "empty_slot.png"), np.full((32, 32, 3), 25, np.uint8))
+
+        self.count = build_bank(self.root)
+
+    def tearDown(self):
+        bank = TemplateBank.shared(self.root)
+        if bank is not None:
+            bank.close()
+        self.tmp.cleanup()
+
+    def test_index_and_lazy_views(self):
+        self.assertEqual(self.count, 4)
+        bank = TemplateBank.shared(self.root)
+        self.assertIs(bank, TemplateBank.shared(self.root))
+        self.assertEqual(bank.names("status"), ["haste", "poisoned"])
+        entry = bank.entry("loot/gold_coin")
+        image = entry.array("image")
+        self.assertTrue(np.array_equal(image, self.coin))
+        self.assertFalse(image.flags.writeable)
+        self.assertIs(image, entry.array("image"))
+
+    def test_matcher_uses_precomputed_terms(self):
+        banked = TemplateMatcher(self.root).templates["status"]
+        built = self._bare_matcher()
+        for name in ("poisoned", "haste"):
+            image = cv2.imread(os.path.join(self.root, "status", f"{name}.png"), cv2.IMREAD_UNCHANGED)
+            mask = image[:, :, 3] if image.ndim == 3 and image.shape[2] == 4 else None
+            gray = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            expected = built.add_template("status", name, gray, mask)
+            template = banked[name]
+            self.assertFalse(template.zero_mean.flags.writeable)
+            self.assertEqual(len(template.levels), len(expected.levels))
+            self.assertAlmostEqual(template.norm, expected.norm, places=3)
+            self.assertTrue(np.allclose(template.levels[-1], expected.levels[-1]))
+            self.assertEqual(template.mask is None, expected.mask is None)
+
+    def test_item_dictionary_from_precomputed_hashes(self):
+        dictionary = ItemDictionary.load(os.path.join(self.root, "loot"))
+        self.assertEqual(len(dictionary), 2)
+        self.assertEqual(dictionary.lookup(self.coin), "gold_coin")
+        self.assertEqual(dictionary.lookup(np.full((32, 32, 3), 25, np.uint8)), EMPTY)
+
+    def test_stale_group_falls_back_to_png(self):
+        bank = TemplateBank.shared(self.root)
+        loot_dir = os.path.join(self.root, "loot")
+        self.assertIsNotNone(TemplateBank.for_directory(loot_dir))
+        cv2.imwrite(os.path.join(loot_dir, "platinum_coin.png"), np.zeros((32, 32, 3), np.uint8))
+        self.assertIsNone(TemplateBank.for_directory(loot_dir))
+        self.assertEqual(len(ItemDictionary.load(loot_dir)), 3)
+
+    def test_edited_template_is_stale(self):
+        bank = TemplateBank.shared(self.root)
+        loot_dir = os.path.join(self.root, "loot")
+        directory_mtime = os.stat(loot_dir).st_mtime_ns
+        # Overwriting a file in place does not touch the directory's mtime
+        path = os.path.join(loot_dir, "gold_coin.png")
+        recorded = bank.sources["loot"]["gold_coin.png"]
+        cv2.imwrite(path, np.zeros((32, 32, 3), np.uint8))
+        os.utime(path, ns=(recorded[0], recorded[0] + 1))
+        os.utime(loot_dir, ns=(directory_mtime, directory_mtime))
+        self.assertFalse(bank.is_current("loot", loot_dir))
+        self.assertTrue(bank.is_current("status"))
+
+    @staticmethod
+    def _bare_matcher():
+        matcher = TemplateMatcher.__new__(TemplateMatcher)
+        matcher.templates = {}
+        matcher._next_index = {}
+        matcher._stacks = {}
+        return matcher
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests for the ROI-restricted coarse-to-fine template matcher
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from capture.frame import Frame
+from capture.roi_registry import RoiRegistry
+from detection.template_matcher import TemplateMatcher, Template
+
+
+def make_icon(seed, size=24):
+    rng = np.random.default_rng(seed)
+    icon = rng.integers(0, 255, (size // 4, size // 4), dtype=np.uint8)
+    return cv2.resize(icon, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+class TestTemplateMatcher(unittest.TestCase):
+    """Test cases for TemplateMatcher"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        status_dir = os.path.join(self.tmp.name, "status")
+        os.makedirs(status_dir)
+        self.icons = {name: make_icon(i) for i, name in enumerate(["poisoned", "burning", "haste"])}
+        for name, icon in self.icons.items():
+            cv2.imwrite(os.path.join(status_dir, f"{name}.png"), icon)
+
+        self.registry = RoiRegistry()
+        self.registry.declare("status_icons", 1000, 300, 200, 60)
+        self.registry.declare("health_bar", 1000, 100, 200, 10)
+        self.registry.declare("mana_bar", 1000, 120, 200, 10)
+        self.matcher = TemplateMatcher(self.tmp.name, roi_registry=self.registry, budget_ms=50.0)
+
+        self.image = np.full((720, 1280, 3), 60, np.uint8)
+        self.image[100:110, 1000:1150] = (0, 0, 220)   # 75% health
+        self.image[120:130, 1000:1050] = (220, 0, 0)   # 25% mana
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def place(self, name, x, y):
+        icon = self.icons[name]
+        self.image[y:y + icon.shape[0], x:x + icon.shape[1]] = icon[:, :, None]
+
+    def test_templates_are_precomputed(self):
+        template = self.matcher.templates["status"]["poisoned"]
+        self.assertEqual(len(template.levels), 2)
+        self.assertAlmostEqual(float(template.zero_mean.sum()), 0.0, places=2)
+        self.assertGreater(template.norm, 0)
+
+    def test_status_icons_found_inside_roi_only(self):
+        self.place("burning", 1037, 313)
+        self.place("haste", 100, 100)  # Outside the ROI
+        self.assertEqual(self.matcher.detect_status_icons(Frame(self.image)), ["burning"])
+
+    def test_exact_position(self):
+        self.place("poisoned", 1101, 321)
+        match = self.matcher.find(self.image, "status", "poisoned", "status_icons")
+        self.assertEqual((match.x, match.y), (1101, 321))
+        self.assertGreater(match.score, 0.99)
+        # Plain arrays are wrapped, not frozen
+        self.assertTrue(self.image.flags.writeable)
+
+    def test_masked_template_ignores_background(self):
+        icon = self.icons["haste"]
+        mask = np.zeros_like(icon)
+        mask[4:20, 4:20] = 255
+        self.matcher.add_template("status", "haste_masked", icon, mask)
+        self.place("haste", 1050, 310)
+        # Different surroundings under the masked-out border
+        self.image[310:314, 1050:1074] = 255
+        match = self.matcher.find(self.image, "status", "haste_masked", "status_icons")
+        self.assertEqual((match.x, match.y), (1050, 310))
+
+    def test_batched_group_matches_like_single_templates(self):
+        self.place("burning", 1037, 313)
+        self.place("haste", 1120, 330)
+        single = self.matcher.detect_status_icons(self.image)
+        self.matcher.batch_min_size = 2
+        self.assertEqual(sorted(self.matcher.detect_status_icons(self.image)), sorted(single))
+        self.assertEqual(len(self.matcher._stacks), 1)
+        match = self.matcher.find(self.image, "status", "haste", "status_icons")
+        self.assertEqual((match.x, match.y), (1120, 330))
+
+    def test_bars(self):
+        frame = Frame(self.image)
+        self.assertEqual(self.matcher.detect_health_bar(frame)['percentage'], 75.0)
+        self.assertEqual(self.matcher.detect_mana_bar(frame)['percentage'], 25.0)
+
+    def test_missing_roi_and_budget_stats(self):
+        self.assertEqual(self.matcher.detect_equipment_slots(self.image), {})
+        self.matcher.detect_status_icons(self.image)
+        stats = self.matcher.get_stats()
+        self.assertEqual(stats["detect_status_icons"]["calls"], 1)
+        self.assertEqual(stats["detect_status_icons"]["budget_ms"], 50.0)
+
+    def test_budget_cutoff_resumes_next_call(self):
+        self.matcher.budget_ms = 0.0
+        self.place("haste", 1150, 320)
+        found = []
+        for _ in range(3):
+            found += self.matcher.detect_status_icons(self.image)
+        self.assertIn("haste", found)
+        self.assertGreater(self.matcher.budget_cutoffs, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
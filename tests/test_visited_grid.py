@@ -0,0 +1,77 @@
+"""
+Tests for the chunked bitset of visited tiles
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.visited_grid import VisitedGrid
+
+
+class TestVisitedGrid(unittest.TestCase):
+    """Test cases for VisitedGrid"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_behaves_like_a_set(self):
+        tiles = {(32000, 32000, 7), (32255, 32001, 7), (32256, 32001, 7), (-3, -1, 0), (32000, 32000, 6)}
+        grid = VisitedGrid(tiles)
+        self.assertEqual(len(grid), 5)
+        self.assertEqual(set(grid), tiles)
+        self.assertIn((32256, 32001, 7), grid)
+        self.assertNotIn((32001, 32000, 7), grid)
+        self.assertNotIn((32000, 32000, 8), grid)
+        self.assertFalse(grid.add((32000, 32000, 7)))
+        self.assertTrue(grid.add((32001, 32000, 7)))
+        self.assertEqual(grid.floors(), {7: 4, 0: 1, 6: 1})
+
+    def test_union(self):
+        a = VisitedGrid([(x, 0, 7) for x in range(0, 300)])
+        b = VisitedGrid([(x, 0, 7) for x in range(200, 600)] + [(5, 5, 6)])
+        self.assertEqual(a.merge(b), 301)
+        self.assertEqual(len(a), 601)
+        a |= VisitedGrid([(0, 0, 7), (1, 1, 7)])
+        self.assertEqual(len(a), 602)
+        self.assertIn((599, 0, 7), a)
+
+    def test_save_and_lazy_load(self):
+        tiles = [(32000 + i, 31000 + (i * 7) % 900, 7 - i % 3) for i in range(5000)]
+        path = os.path.join(self.temp_dir, 'visited.visited')
+        grid = VisitedGrid(tiles)
+        grid.save(path)
+        self.assertTrue(VisitedGrid.is_grid_file(path))
+
+        loaded = VisitedGrid.load(path)
+        self.assertEqual(len(loaded), len(set(tiles)))
+        self.assertEqual(loaded.nbytes(), 0)  # Nothing read before it is needed
+        self.assertIn(tiles[10], loaded)
+        self.assertEqual(loaded.nbytes(), 8192)
+
+        # Writing to a loaded chunk and saving over the same file
+        self.assertTrue(loaded.add((32000, 31001, 7)))
+        loaded.save(path)
+        again = VisitedGrid.load(path)
+        self.assertEqual(set(again), set(tiles) | {(32000, 31001, 7)})
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.temp_dir, 'map.json')
+        with open(path, 'w') as f:
+            f.write('{}')
+        self.assertFalse(VisitedGrid.is_grid_file(path))
+        with self.assertRaises(ValueError):
+            VisitedGrid.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for the minimap walkability grid
+By Taquito Loco 🎮
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from navigation.minimap_atlas import MinimapAtlas, PALETTE, CHUNK_SIZE
+from navigation.walkability import WalkabilityGrid, BLOCKED, TRANSITION, UNKNOWN
+
+ROAD, WALL, WATER, STAIRS = 0x81, 0xBA, 0x28, 0xD2
+
+
+class TestWalkabilityGrid(unittest.TestCase):
+    """Test cases for WalkabilityGrid"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.atlas = MinimapAtlas(self.temp_dir)
+        self.grid = WalkabilityGrid(self.atlas)
+        tiles = np.full((20, 30), ROAD, np.uint8)
+        tiles[5, :] = WALL
+        tiles[10:12, 3:6] = WATER
+        tiles[15, 20] = STAIRS
+        tiles[18:, 25:] = 0
+        self.atlas.import_image(7, PALETTE[tiles], origin=(32000, 32000))
+
+    def tearDown(self):
+        self.atlas.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_terrain_costs(self):
+        self.assertTrue(self.grid.is_walkable(32000, 32000, 7))
+        self.assertEqual(self.grid.cost(32010, 32005, 7), BLOCKED)
+        self.assertEqual(self.grid.cost(32004, 32011, 7), BLOCKED)
+        self.assertEqual(self.grid.cost(32020, 32015, 7), TRANSITION)
+        self.assertFalse(self.grid.is_walkable(32020, 32015, 7))
+        self.assertEqual(self.grid.cost(32026, 32019, 7), UNKNOWN)
+        self.assertEqual(self.grid.cost(32000, 32000, 6), UNKNOWN)
+
+    def test_region_spans_chunks(self):
+        base = (32000 // CHUNK_SIZE) * CHUNK_SIZE
+        costs = self.grid.region(7, base - 3, 32000, 3 + 32000 - base + 2, 6)
+        self.assertTrue((costs[:, :3] == UNKNOWN).all())
+        self.assertEqual(costs[5, -1], BLOCKED)
+        self.assertEqual(costs[0, -1], self.grid.lut[ROAD])
+
+    def test_atlas_changes_update_costs(self):
+        self.assertEqual(self.grid.cost(32010, 32005, 7), BLOCKED)
+        minimap = PALETTE[np.full((9, 9), ROAD, np.uint8)]
+        self.atlas.stitch(7, 32010, 32003, minimap)
+        self.assertEqual(self.grid.stats['invalidated'], 1)
+        self.assertTrue(self.grid.is_walkable(32010, 32005, 7))
+        self.assertEqual(self.grid.cost(32020, 32005, 7), BLOCKED)
+
+
+if __name__ == '__main__':
+    unittest.main()